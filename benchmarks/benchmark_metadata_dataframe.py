@@ -0,0 +1,80 @@
+"""Benchmark the construction of the recording metadata DataFrame.
+
+Compares the previous approach of concatenating one single-row DataFrame per recording
+with the bulk :meth:`Recording.to_dataframe <cantopy.xenocanto_components.Recording.to_dataframe>`
+builder for an increasing number of recordings. The time per recording of the bulk
+builder should stay roughly constant, showing that it scales linearly.
+
+Run from the repository root with: python -m benchmarks.benchmark_metadata_dataframe
+"""
+
+import json
+import time
+from os.path import dirname, join
+import pandas as pd
+from cantopy.xenocanto_components import Recording
+
+
+def load_example_recordings(num_recordings: int) -> list[Recording]:
+    """Build a list of recordings by repeating the example XenoCanto recordings.
+
+    Parameters
+    ----------
+    num_recordings
+        The number of recordings to build.
+
+    Returns
+    -------
+    list[Recording]
+        The built recordings, each with a unique recording id.
+    """
+    with open(
+        join(
+            dirname(__file__),
+            "..",
+            "tests",
+            "resources",
+            "example_xenocanto_query_response_page_1.json",
+        ),
+        "r",
+        encoding="utf-8",
+    ) as file:
+        recordings_data = json.load(file)["recordings"]
+
+    return [
+        Recording({**recordings_data[i % len(recordings_data)], "id": str(i)})
+        for i in range(num_recordings)
+    ]
+
+
+def concat_single_rows(recordings: list[Recording]) -> pd.DataFrame:
+    """The previous approach, concatenating a single-row DataFrame per recording."""
+    metadata = pd.DataFrame({})
+    for recording in recordings:
+        metadata = pd.concat([metadata, recording.to_dataframe_row()])
+    return metadata
+
+
+def time_function(function, recordings: list[Recording]) -> float:
+    start = time.perf_counter()
+    function(recordings)
+    return time.perf_counter() - start
+
+
+if __name__ == "__main__":
+    print(f"{'recordings':>10} {'concat (s)':>12} {'bulk (s)':>10} {'bulk us/rec':>12}")
+    for num_recordings in [500, 1000, 2000, 4000, 8000, 16000, 32000]:
+        recordings = load_example_recordings(num_recordings)
+
+        # The concat approach is quadratic, only time it for the smaller sizes
+        concat_time = (
+            f"{time_function(concat_single_rows, recordings):12.3f}"
+            if num_recordings <= 4000
+            else f"{'-':>12}"
+        )
+        bulk_time = time_function(Recording.to_dataframe, recordings)
+
+        print(
+            f"{num_recordings:>10} {concat_time} {bulk_time:10.3f}"
+            f" {1e6 * bulk_time / num_recordings:12.1f}"
+        )
@@ -1,6 +1,46 @@
 from cantopy.fetch_manager import FetchManager
 from cantopy.download_manager import DownloadManager
-from cantopy.xenocanto_components import Query
+from cantopy.download_pipeline import DownloadPipeline
+from cantopy.query_planner import QueryPlanner
+from cantopy.download_result import DownloadResult
+from cantopy.async_fetch_manager import AsyncFetchManager
+from cantopy.async_download_manager import AsyncDownloadManager
+from cantopy.audio_transcoder import AudioTranscoder
+from cantopy.feature_extractor import FeatureExtractor
+from cantopy.http_session import HttpSession
+from cantopy.rate_limiter import RateLimiter, RetryPolicy
+from cantopy.download_index import DownloadIndex
+from cantopy.response_cache import ResponseCache
+from cantopy.shard_export import ShardReader
+from cantopy.metadata_store import (
+    CsvMetadataStore,
+    MetadataStore,
+    MetadataWriter,
+    ParquetMetadataStore,
+)
+from cantopy.xenocanto_components import F, Query
 
 
-__all__ = ["FetchManager", "DownloadManager", "Query"]
+__all__ = [
+    "FetchManager",
+    "DownloadManager",
+    "DownloadPipeline",
+    "QueryPlanner",
+    "DownloadResult",
+    "AsyncFetchManager",
+    "AsyncDownloadManager",
+    "AudioTranscoder",
+    "FeatureExtractor",
+    "HttpSession",
+    "RateLimiter",
+    "RetryPolicy",
+    "DownloadIndex",
+    "ResponseCache",
+    "ShardReader",
+    "MetadataStore",
+    "CsvMetadataStore",
+    "ParquetMetadataStore",
+    "MetadataWriter",
+    "F",
+    "Query",
+]
@@ -0,0 +1,436 @@
+import asyncio
+import os
+import time
+from os.path import exists, join
+from cantopy.async_fetch_manager import _aget, _gather_bounded, _require_aiohttp
+from cantopy.audio_transcoder import AudioTranscoder
+from cantopy.download_manager import DownloadManager
+from cantopy.download_result import DownloadResult
+from cantopy.feature_extractor import FeatureExtractor
+from cantopy.http_session import HttpSession
+from cantopy.metadata_store import MetadataStore
+from cantopy.rate_limiter import RetryPolicy
+from cantopy.xenocanto_components import QueryResult, Recording
+
+try:
+    import aiohttp
+except ImportError:  # pragma: no cover
+    aiohttp = None
+
+
+class AsyncDownloadManager(DownloadManager):
+    """The asyncio counterpart of the :class:`DownloadManager <cantopy.download_manager.DownloadManager>`.
+
+    With :meth:`adownload_all_recordings_in_queryresult`, this class downloads
+    recordings from within an asyncio event loop, without blocking it or relying on a
+    thread pool for the network I/O. It stores the recordings and their metadata in
+    exactly the same folder layout as the DownloadManager, so both can be used on the
+    same data folder. All synchronous entry points inherited from the DownloadManager,
+    like :meth:`download_query` and :meth:`sync`, keep working and download through the
+    requests-based session, so an AsyncDownloadManager can be used wherever a
+    DownloadManager is expected. Using this class requires the optional aiohttp
+    dependency (``pip install cantopy[async]``).
+
+    Attributes
+    ----------
+    data_base_path
+        The base data folder where we want our download manager to store the downloaded files.
+    max_workers
+        The maximum number of recordings that are downloaded concurrently.
+    chunk_size
+        The size in bytes of the chunks in which the recordings are streamed to disk.
+    timeout
+        The timeout in seconds for connecting and for each read while downloading a
+        recording.
+    """
+
+    def __init__(
+        self,
+        data_base_path: str,
+        max_workers: int = 1,
+        chunk_size: int = 1024 * 1024,
+        timeout: float = 30.0,
+        session: HttpSession | None = None,
+        metadata_write_mode: str = "rewrite",
+        compaction_threshold: int | None = None,
+        metadata_store: MetadataStore | None = None,
+        use_download_index: bool = False,
+        download_index_path: str | None = None,
+        retry_policy: RetryPolicy | None = None,
+        transcoder: AudioTranscoder | None = None,
+        feature_extractor: FeatureExtractor | None = None,
+        shard_index: int = 0,
+        num_shards: int = 1,
+    ):
+        """Initialize an AsyncDownloadManager instance.
+
+        Parameters
+        ----------
+        data_base_path
+            The base data folder where we want our download manager to store the downloaded files.
+        max_workers : optional
+            The maximum number of recordings that are downloaded concurrently, by default 1.
+        chunk_size : optional
+            The size in bytes of the chunks in which the recordings are streamed to
+            disk, by default 1 MiB.
+        timeout : optional
+            The timeout in seconds for connecting and for each read while downloading
+            a recording, by default 30.0. There is no limit on the total download time,
+            wrap the download call in :func:`asyncio.wait_for` for that.
+        session : optional
+            The HttpSession used by the synchronous entry points inherited from the
+            DownloadManager. The async downloads are paced by the rate limiter of this
+            session and retried with its retry policy, like the synchronous downloads.
+            By default, a new session is created with a connection pool sized to
+            max_workers.
+        metadata_write_mode : optional
+            How new rows are added to the per-species metadata files, by default "rewrite".
+            See :class:`DownloadManager <cantopy.download_manager.DownloadManager>`.
+        compaction_threshold : optional
+            In "append" mode, the number of appended rows after which a metadata file is
+            compacted, by default None (never compact automatically).
+        metadata_store : optional
+            The MetadataStore in which the per-species recording metadata is stored,
+            by default a CsvMetadataStore configured with the metadata_write_mode and
+            compaction_threshold arguments, which can't be combined with a
+            metadata_store.
+        use_download_index : optional
+            Whether to keep a :class:`DownloadIndex <cantopy.download_index.DownloadIndex>`
+            of the downloaded recordings in the data folder, by default False.
+        download_index_path : optional
+            The folder to store the download index in, by default the data folder.
+        retry_policy : optional
+            The RetryPolicy for resuming downloads that were interrupted by a connection
+            error or a timeout while streaming, by default a RetryPolicy with its
+            default settings.
+        transcoder : optional
+            The :class:`AudioTranscoder <cantopy.audio_transcoder.AudioTranscoder>` that
+            transcodes the downloaded recordings, by default None (no transcoding).
+        feature_extractor : optional
+            The :class:`FeatureExtractor <cantopy.feature_extractor.FeatureExtractor>`
+            that precomputes the log-mel spectrograms of the downloaded recordings, by
+            default None (no features).
+        shard_index : optional
+            The index of the shard of recordings this manager downloads, by default 0.
+        num_shards : optional
+            The number of shards the recordings are partitioned into, by default 1 (no
+            sharding). See :class:`DownloadManager <cantopy.download_manager.DownloadManager>`.
+        """
+        _require_aiohttp()
+
+        super().__init__(
+            data_base_path,
+            max_workers=max_workers,
+            session=session,
+            chunk_size=chunk_size,
+            metadata_write_mode=metadata_write_mode,
+            compaction_threshold=compaction_threshold,
+            metadata_store=metadata_store,
+            use_download_index=use_download_index,
+            download_index_path=download_index_path,
+            retry_policy=retry_policy,
+            transcoder=transcoder,
+            feature_extractor=feature_extractor,
+            shard_index=shard_index,
+            num_shards=num_shards,
+        )
+        self.timeout = timeout
+
+    async def adownload_all_recordings_in_queryresult(
+        self,
+        query_result: QueryResult,
+        session: "aiohttp.ClientSession | None" = None,
+    ) -> dict[str, DownloadResult]:
+        """Download all the recordings contained in the provided QueryResult
+        asynchronously.
+
+        This is the asyncio counterpart of :meth:`DownloadManager.download_all_recordings_in_queryresult
+        <cantopy.download_manager.DownloadManager.download_all_recordings_in_queryresult>`.
+        Cancelling the task awaiting this coroutine stops all running downloads, their
+        partially downloaded files are resumed on the next run.
+
+        Parameters
+        ----------
+        query_result
+            The QueryResult instance containing the recordings we want to download.
+        session : optional
+            The aiohttp ClientSession to download the recordings with. By default, a
+            new session is opened for the duration of this call.
+
+        Returns
+        -------
+        dict[str, DownloadResult]
+            The DownloadResult of each recording that was not downloaded before, keyed
+            by recording id.
+        """
+        if session is None:
+            async with aiohttp.ClientSession(  # type: ignore
+                connector=aiohttp.TCPConnector(limit_per_host=self.max_workers)  # type: ignore
+            ) as session:
+                return await self.adownload_all_recordings_in_queryresult(
+                    query_result, session
+                )
+
+        # Get the recordings of this manager's shard from the query result
+        recordings = [
+            recording
+            for recording in query_result.get_all_recordings()
+            if self.is_in_shard(recording.recording_id)
+        ]
+
+        # First detect the recordings that are already downloaded
+        detected_already_downloaded_recordings = (
+            self._detect_already_downloaded_recordings(recordings)
+        )
+
+        # Download the not-already-downloaded recordings
+        not_already_downloaded_recordings = [
+            recording
+            for recording in recordings
+            if detected_already_downloaded_recordings[str(recording.recording_id)]
+            == "new"
+        ]
+        download_results = await self._adownload_all_recordings(
+            not_already_downloaded_recordings, session
+        )
+
+        # Generate the metadata dataframe for the downloaded recordings, in a worker
+        # thread since it waits for the running transcodings and feature extractions
+        downloaded_recordings_metadata = await asyncio.get_running_loop().run_in_executor(
+            None,
+            self._generate_downloaded_recordings_metadata,
+            not_already_downloaded_recordings,
+            download_results,
+        )
+
+        # Udate the metadata file of each one of the downloaded animals, without
+        # blocking the event loop while the metadata writer writes it
+        await self.metadata_writer.write_async(
+            self._split_metadata_per_animal(downloaded_recordings_metadata)
+        )
+
+        return download_results
+
+    async def _adownload_all_recordings(
+        self, recordings: list[Recording], session: "aiohttp.ClientSession"
+    ) -> dict[str, DownloadResult]:
+        """Download all recordings in the provided recordings list concurrently.
+
+        Parameters
+        ----------
+        recordings
+            The list of recordings we want to download.
+        session
+            The aiohttp ClientSession to download the recordings with.
+
+        Returns
+        -------
+        dict[str, DownloadResult]
+            A dictionary containing the DownloadResult of each recording, keyed by
+            recording id, in the same order as the provided recordings.
+        """
+        results = await _gather_bounded(
+            (
+                self._adownload_single_recording(recording, session)
+                for recording in recordings
+            ),
+            self.max_workers,
+        )
+
+        return {result.recording_id: result for result in results}
+
+    async def _adownload_single_recording(
+        self, recording: Recording, session: "aiohttp.ClientSession"
+    ) -> DownloadResult:
+        """Download a single recording.
+
+        Like :meth:`download_recording`, a download that is interrupted by a connection
+        error or a timeout is resumed from its partially downloaded file, after a
+        jittered exponential backoff, up to the maximum number of retries of the retry
+        policy.
+
+        Parameters
+        ----------
+        recording
+            The recording we want to download.
+        session
+            The aiohttp ClientSession to download the recording with.
+
+        Returns
+        -------
+        DownloadResult
+            The result of the download, with status "pass" or "fail".
+        """
+        start_time = time.perf_counter()
+        num_bytes = 0
+
+        attempt = 0
+        while True:
+            result = await self._adownload_single_recording_attempt(recording, session)
+            num_bytes += result.num_bytes
+            if result.status != "retry":
+                break
+
+            if attempt >= self.retry_policy.max_retries:
+                result.status = "fail"
+                break
+
+            await asyncio.sleep(self.retry_policy.get_delay(attempt))
+            attempt += 1
+
+        result.num_bytes = num_bytes
+        result.duration = time.perf_counter() - start_time
+
+        return result
+
+    async def _adownload_single_recording_attempt(
+        self, recording: Recording, session: "aiohttp.ClientSession"
+    ) -> DownloadResult:
+        """Make a single attempt at downloading a recording.
+
+        Parameters
+        ----------
+        recording
+            The recording we want to download.
+        session
+            The aiohttp ClientSession to download the recording with.
+
+        Returns
+        -------
+        DownloadResult
+            The result of the attempt, with status "pass" or "fail", or "retry" if the
+            download was interrupted and can be resumed by a next attempt.
+        """
+        # Generate the path where the recording should be located
+        animal_folder_path = join(
+            self.data_base_path,
+            self._generate_animal_folder_name(recording.english_name),
+        )
+        recording_path = join(animal_folder_path, f"{recording.recording_id}.mp3")
+        os.makedirs(animal_folder_path, exist_ok=True)
+
+        # Continue a previously interrupted download from its partial file
+        temporary_recording_path = f"{recording_path}.part"
+        offset = (
+            os.path.getsize(temporary_recording_path)
+            if exists(temporary_recording_path)
+            else 0
+        )
+
+        # Download the recording
+        recording_id = str(recording.recording_id)
+        http_status = None
+        num_bytes = 0
+        is_streaming = False
+        try:
+            response = await self._aget(
+                session,
+                recording.audio_file_url,
+                headers={"Range": f"bytes={offset}-"} if offset > 0 else {},
+            )
+            async with response:
+                http_status = response.status
+                if response.status == 206:
+                    file_mode = "ab"
+                elif response.status == 200:
+                    offset = 0
+                    file_mode = "wb"
+                elif response.status == 416 and offset > 0:
+                    os.remove(temporary_recording_path)
+                    return await self._adownload_single_recording_attempt(
+                        recording, session
+                    )
+                else:
+                    return DownloadResult(
+                        recording_id,
+                        "fail",
+                        http_status=http_status,
+                        error=f"Unexpected HTTP status {http_status}",
+                    )
+
+                expected_size = self._get_expected_download_size(response, offset)  # type: ignore
+                checksum = self._start_download_checksum(
+                    temporary_recording_path, file_mode
+                )
+
+                is_streaming = True
+                with open(temporary_recording_path, file_mode) as file:
+                    async for chunk in response.content.iter_chunked(self.chunk_size):
+                        file.write(chunk)
+                        num_bytes += len(chunk)
+                        if checksum is not None:
+                            checksum.update(chunk)
+
+            # Verify that we received the complete recording
+            downloaded_size = os.path.getsize(temporary_recording_path)
+            if expected_size is not None and downloaded_size != expected_size:
+                if downloaded_size > expected_size:
+                    os.remove(temporary_recording_path)
+
+                return DownloadResult(
+                    recording_id,
+                    "retry",
+                    num_bytes=num_bytes,
+                    http_status=http_status,
+                    error=f"Expected {expected_size} bytes, received {downloaded_size}",
+                )
+
+            # Atomically move the completed download to its final location
+            os.replace(temporary_recording_path, recording_path)
+        except Exception as error:
+            # Dropped connections and timeouts while streaming leave a resumable
+            # partial file, failed requests were already retried by _aget
+            return DownloadResult(
+                recording_id,
+                (
+                    "retry"
+                    if is_streaming
+                    and isinstance(error, (aiohttp.ClientError, asyncio.TimeoutError))  # type: ignore
+                    else "fail"
+                ),
+                num_bytes=num_bytes,
+                http_status=http_status,
+                error=f"{type(error).__name__}: {error}",
+            )
+
+        # The recording is complete on disk from here on, so errors while indexing or
+        # post-processing it don't fail the download
+        return DownloadResult(
+            recording_id,
+            "pass",
+            num_bytes=num_bytes,
+            http_status=http_status,
+            error=self._process_downloaded_recording(
+                recording, recording_path, checksum
+            ),
+        )
+
+    async def _aget(
+        self, session: "aiohttp.ClientSession", url: str, headers: dict[str, str]
+    ) -> "aiohttp.ClientResponse":
+        """Send a GET request with the rate limiter and retry policy of the HttpSession.
+
+        Parameters
+        ----------
+        session
+            The aiohttp ClientSession to send the request with.
+        url
+            The url to send the request to.
+        headers
+            The HTTP headers of the request.
+
+        Returns
+        -------
+        aiohttp.ClientResponse
+            The response returned by the server, to be released by the caller.
+        """
+        return await _aget(
+            session,
+            url,
+            headers,
+            aiohttp.ClientTimeout(  # type: ignore
+                total=None, sock_connect=self.timeout, sock_read=self.timeout
+            ),
+            self.session.rate_limiter,
+            self.session.retry_policy,
+        )
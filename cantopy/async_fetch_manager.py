@@ -0,0 +1,312 @@
+import asyncio
+from typing import Any, Awaitable, Iterable, TypeVar
+from cantopy.fetch_manager import FetchManager
+from cantopy.rate_limiter import RateLimiter, RetryPolicy
+from cantopy.xenocanto_components import Query, QueryResult, ResultPage
+
+try:
+    import aiohttp
+    import yarl
+except ImportError:  # pragma: no cover
+    aiohttp = None
+
+
+T = TypeVar("T")
+
+
+def _require_aiohttp():
+    """Check that the optional aiohttp dependency of the async API is installed.
+
+    Raises
+    ------
+    ImportError
+        If aiohttp is not installed.
+    """
+    if aiohttp is None:
+        raise ImportError(
+            "The async CantoPy API requires aiohttp, install it with: pip install cantopy[async]"
+        )
+
+
+async def _gather_bounded(awaitables: Iterable[Awaitable[T]], limit: int) -> list[T]:
+    """Await all awaitables concurrently, with at most limit of them in flight.
+
+    If one of the awaitables raises, or the gathering task itself is cancelled, all
+    other still running awaitables are cancelled before the error is propagated.
+
+    Parameters
+    ----------
+    awaitables
+        The awaitables to run.
+    limit
+        The maximum number of awaitables that run at the same time.
+
+    Returns
+    -------
+    list[T]
+        The results of the awaitables, in the same order as they were passed.
+    """
+    semaphore = asyncio.Semaphore(max(limit, 1))
+
+    async def run_bounded(awaitable: Awaitable[T]) -> T:
+        async with semaphore:
+            return await awaitable
+
+    tasks = [asyncio.ensure_future(run_bounded(awaitable)) for awaitable in awaitables]
+    try:
+        return list(await asyncio.gather(*tasks))
+    finally:
+        for task in tasks:
+            task.cancel()
+
+
+async def _aget(
+    session: "aiohttp.ClientSession",
+    url: "str | yarl.URL",
+    headers: dict[str, str],
+    timeout: "aiohttp.ClientTimeout",
+    rate_limiter: RateLimiter | None,
+    retry_policy: RetryPolicy,
+) -> "aiohttp.ClientResponse":
+    """Send a GET request paced by a rate limiter and retried with a retry policy.
+
+    This is the aiohttp counterpart of :meth:`HttpSession.get
+    <cantopy.http_session.HttpSession.get>`: requests that fail with a connection
+    error, a timeout or a retryable status code are retried with jittered exponential
+    backoff, honouring the Retry-After header sent by the server.
+
+    Parameters
+    ----------
+    session
+        The aiohttp ClientSession to send the request with.
+    url
+        The url to send the request to.
+    headers
+        The HTTP headers of the request.
+    timeout
+        The timeout of each attempt.
+    rate_limiter
+        The RateLimiter that paces the requests, None if they are not rate limited.
+    retry_policy
+        The RetryPolicy for failed requests.
+
+    Returns
+    -------
+    aiohttp.ClientResponse
+        The response returned by the server, to be released by the caller. After the
+        last retry, this can still be a response with a retryable status code.
+    """
+    attempt = 0
+    while True:
+        if rate_limiter is not None:
+            await rate_limiter.acquire_async()
+
+        # Step 1: Send the request, retrying connection errors and timeouts
+        try:
+            response = await session.get(url, headers=headers, timeout=timeout)
+        except (aiohttp.ClientConnectionError, asyncio.TimeoutError):  # type: ignore
+            if rate_limiter is not None:
+                rate_limiter.on_throttle()
+            if attempt >= retry_policy.max_retries:
+                raise
+
+            await asyncio.sleep(retry_policy.get_delay(attempt))
+            attempt += 1
+            continue
+
+        # Step 2: Return the response unless it has a retryable status code
+        if response.status not in retry_policy.retry_status_codes:
+            if rate_limiter is not None:
+                rate_limiter.on_success()
+            return response
+
+        # Step 3: Back off, for at least as long as the server asked for
+        retry_after = RetryPolicy.parse_retry_after(response.headers.get("Retry-After"))
+        if rate_limiter is not None and response.status in (429, 503):
+            rate_limiter.on_throttle(retry_after)
+        if attempt >= retry_policy.max_retries:
+            return response
+
+        response.release()
+        await asyncio.sleep(retry_policy.get_delay(attempt, retry_after))
+        attempt += 1
+
+
+class AsyncFetchManager:
+    """The asyncio counterpart of the :class:`FetchManager <cantopy.fetch_manager.FetchManager>`.
+
+    This class sends queries to the Xeno Canto API from within an asyncio event loop,
+    without blocking it or relying on a thread pool. It returns the same QueryResult
+    structure as the FetchManager. Using this class requires the optional aiohttp
+    dependency (``pip install cantopy[async]``).
+    """
+
+    @classmethod
+    async def send_query(
+        cls,
+        query: Query,
+        max_pages: int = 1,
+        max_workers: int = 1,
+        session: "aiohttp.ClientSession | None" = None,
+        timeout: float = 30.0,
+        rate_limiter: RateLimiter | None = None,
+        retry_policy: RetryPolicy | None = None,
+    ) -> QueryResult:
+        """Send a query to the Xeno Canto API.
+
+        Cancelling the task awaiting this coroutine cancels all outstanding page requests.
+
+        Parameters
+        ----------
+        query
+            The query to send to the Xeno Canto API.
+        max_pages : optional
+            Specify a maximum number of pages of recordings to fetch, by default 1.
+            See :meth:`FetchManager.send_query <cantopy.fetch_manager.FetchManager.send_query>`.
+        max_workers : optional
+            The maximum number of result pages to fetch concurrently, by default 1.
+        session : optional
+            The aiohttp ClientSession to send the requests over. By default, a new
+            session is opened for the duration of this call.
+        timeout : optional
+            The timeout in seconds for each page request, by default 30.0.
+        rate_limiter : optional
+            The RateLimiter that paces the page requests, by default None (no rate
+            limiting). Share it with the HttpSession of the other managers that talk
+            to the XenoCanto API.
+        retry_policy : optional
+            The RetryPolicy for page requests that fail with a connection error, a
+            timeout or a retryable status code, by default a RetryPolicy with its
+            default settings.
+
+        Returns
+        -------
+        QueryResult
+            The QueryResult wrapper object containing the results of the query.
+
+        Raises
+        ------
+        aiohttp.ClientResponseError
+            If the XenoCanto API responds with an error status, after the retries.
+        """
+        _require_aiohttp()
+        retry_policy = retry_policy if retry_policy is not None else RetryPolicy()
+
+        if session is None:
+            async with aiohttp.ClientSession(  # type: ignore
+                connector=aiohttp.TCPConnector(limit_per_host=max_workers)  # type: ignore
+            ) as session:
+                return await cls.send_query(
+                    query,
+                    max_pages,
+                    max_workers,
+                    session,
+                    timeout,
+                    rate_limiter,
+                    retry_policy,
+                )
+
+        # We need to first send an initial query to determine the number of available result pages
+        query_str = query.to_string()
+        query_metadata, result_page_1 = await cls._fetch_result_page(
+            query_str, 1, session, timeout, rate_limiter, retry_policy
+        )
+
+        # Fetch the other requested result pages
+        remaining_pages = range(
+            2, min(max_pages, int(query_metadata["available_num_pages"])) + 1
+        )
+        remaining_result_pages = await _gather_bounded(
+            (
+                cls._fetch_result_page(
+                    query_str, page, session, timeout, rate_limiter, retry_policy
+                )
+                for page in remaining_pages
+            ),
+            max_workers,
+        )
+
+        result_pages: list[ResultPage] = [result_page_1]
+        result_pages.extend(result_page for _, result_page in remaining_result_pages)
+
+        return QueryResult(query_metadata, result_pages)
+
+    @classmethod
+    async def _fetch_result_page(
+        cls,
+        query_str: str,
+        page: int,
+        session: "aiohttp.ClientSession",
+        timeout: float,
+        rate_limiter: RateLimiter | None,
+        retry_policy: RetryPolicy,
+    ) -> tuple[dict[str, int], ResultPage]:
+        """Fetch a specific page from the XenoCanto API.
+
+        Parameters
+        ----------
+        query_str
+            The query to send to the Xeno Canto API, printed in string format.
+        page
+            The number id of the page we want to fetch.
+        session
+            The aiohttp ClientSession to send the request over.
+        timeout
+            The timeout in seconds for each attempt of the request.
+        rate_limiter
+            The RateLimiter that paces the request, None if it is not rate limited.
+        retry_policy
+            The RetryPolicy for the request.
+
+        Returns
+        -------
+        tuple[dict[str, int], ResultPage]
+            A tuple containing both a dictionary with query metadata and a ResultPage
+            wrapper containing the requested page.
+
+        Raises
+        ------
+        aiohttp.ClientResponseError
+            If the XenoCanto API responds with an error status, after the retries.
+        """
+        # Pass the payload pre-encoded, so it is sent exactly as the FetchManager would
+        url = yarl.URL(  # type: ignore
+            f"{FetchManager._base_url}?{FetchManager._encode_payload(query_str, page)}",  # type: ignore
+            encoded=True,
+        )
+
+        # Send the request through the rate limiter and retry policy. Like in the
+        # FetchManager, a successful response whose body is not valid json (e.g. a
+        # truncated body) is fetched again.
+        attempt = 0
+        while True:
+            response = await _aget(
+                session,
+                url,
+                {},
+                aiohttp.ClientTimeout(total=timeout),  # type: ignore
+                rate_limiter,
+                retry_policy,
+            )
+            async with response:
+                if response.status != 200:
+                    raise aiohttp.ClientResponseError(  # type: ignore
+                        response.request_info,
+                        response.history,
+                        status=response.status,
+                        message=f"The XenoCanto API responded with HTTP status {response.status}",
+                        headers=response.headers,
+                    )
+
+                # Open json return as dict
+                try:
+                    query_response: Any = await response.json(content_type=None)
+                    break
+                except ValueError:
+                    if attempt >= retry_policy.max_retries:
+                        raise
+
+            await asyncio.sleep(retry_policy.get_delay(attempt))
+            attempt += 1
+
+        return FetchManager._parse_query_response(query_response)  # type: ignore
@@ -0,0 +1,239 @@
+from os.path import splitext
+import os
+import shutil
+import struct
+import subprocess
+import wave
+from cantopy.process_pool_stage import ProcessPoolStage
+
+
+def transcode_recording(
+    input_path: str,
+    output_path: str,
+    sample_rate: int,
+    num_channels: int,
+    output_format: str,
+    ffmpeg_path: str = "ffmpeg",
+) -> float:
+    """Decode an audio file and write it with a fixed sample rate and channel count.
+
+    The output is first written to a temporary file, which is moved to the output
+    path once it is complete.
+
+    Parameters
+    ----------
+    input_path
+        The path of the audio file to transcode.
+    output_path
+        The path of the transcoded audio file.
+    sample_rate
+        The sample rate in Hz of the transcoded audio.
+    num_channels
+        The number of channels of the transcoded audio.
+    output_format
+        The format of the transcoded audio ("wav" or "flac").
+    ffmpeg_path : optional
+        The path of the ffmpeg executable, by default "ffmpeg".
+
+    Returns
+    -------
+    float
+        The duration in seconds of the transcoded audio.
+
+    Raises
+    ------
+    subprocess.CalledProcessError
+        If ffmpeg fails to transcode the audio file.
+    """
+    temporary_output_path = f"{output_path}.part"
+    subprocess.run(
+        [
+            ffmpeg_path,
+            "-nostdin",
+            "-y",
+            "-v",
+            "error",
+            "-i",
+            input_path,
+            "-ac",
+            str(num_channels),
+            "-ar",
+            str(sample_rate),
+            "-f",
+            output_format,
+            temporary_output_path,
+        ],
+        check=True,
+        capture_output=True,
+    )
+    os.replace(temporary_output_path, output_path)
+
+    return get_audio_duration(output_path)
+
+
+def get_audio_duration(path: str) -> float:
+    """Read the duration of a WAV or FLAC file from its header.
+
+    Parameters
+    ----------
+    path
+        The path of the WAV or FLAC file.
+
+    Returns
+    -------
+    float
+        The duration of the audio in seconds.
+
+    Raises
+    ------
+    ValueError
+        If the file is not a WAV or FLAC file.
+    """
+    with open(path, "rb") as file:
+        header = file.read(42)
+
+    if header[:4] == b"RIFF":
+        with wave.open(path, "rb") as wave_file:
+            return wave_file.getnframes() / wave_file.getframerate()
+
+    # The FLAC STREAMINFO block packs the sample rate (20 bits), channel count
+    # (3 bits), bits per sample (5 bits) and total number of samples (36 bits)
+    if header[:4] == b"fLaC":
+        (packed,) = struct.unpack(">Q", header[18:26])
+        sample_rate = packed >> 44
+        num_samples = packed & (2**36 - 1)
+        return num_samples / sample_rate
+
+    raise ValueError(f"Unsupported audio file format: {path}")
+
+
+class AudioTranscoder(ProcessPoolStage):
+    """A post-download stage that transcodes downloaded recordings in a process pool.
+
+    Decoding MP3 files is CPU-bound, so this stage runs in its own pool of worker
+    processes, separate from the I/O threads that download the recordings. A
+    :class:`DownloadManager <cantopy.download_manager.DownloadManager>` created with a
+    transcoder submits every recording to it as soon as its download finishes, and
+    records the path and duration of the transcoded file in the
+    ``transcoded_file_path`` and ``transcoded_duration`` metadata columns.
+
+    Transcoding requires the ffmpeg executable to be installed.
+
+    Attributes
+    ----------
+    sample_rate
+        The sample rate in Hz of the transcoded audio.
+    num_channels
+        The number of channels of the transcoded audio.
+    output_format
+        The format of the transcoded audio ("wav" or "flac").
+    max_workers
+        The maximum number of worker processes.
+    ffmpeg_path
+        The path of the ffmpeg executable.
+    """
+
+    supported_output_formats = ("wav", "flac")
+
+    def __init__(
+        self,
+        sample_rate: int = 16000,
+        num_channels: int = 1,
+        output_format: str = "wav",
+        max_workers: int | None = None,
+        ffmpeg_path: str = "ffmpeg",
+    ):
+        """Create an AudioTranscoder.
+
+        Parameters
+        ----------
+        sample_rate : optional
+            The sample rate in Hz of the transcoded audio, by default 16000.
+        num_channels : optional
+            The number of channels of the transcoded audio, by default 1 (mono).
+        output_format : optional
+            The format of the transcoded audio, "wav" or "flac", by default "wav".
+        max_workers : optional
+            The maximum number of worker processes, by default the number of CPUs.
+        ffmpeg_path : optional
+            The path of the ffmpeg executable, by default "ffmpeg" (from the PATH).
+
+        Raises
+        ------
+        ValueError
+            If an unsupported output_format is passed.
+        FileNotFoundError
+            If the ffmpeg executable can't be found.
+        """
+        if output_format not in self.supported_output_formats:
+            raise ValueError(
+                f"Unsupported output format, expected 'wav' or 'flac': {output_format}"
+            )
+        if shutil.which(ffmpeg_path) is None:
+            raise FileNotFoundError(
+                f"Transcoding requires ffmpeg, which was not found: {ffmpeg_path}"
+            )
+
+        super().__init__(max_workers)
+
+        self.sample_rate = sample_rate
+        self.num_channels = num_channels
+        self.output_format = output_format
+        self.ffmpeg_path = ffmpeg_path
+
+    def get_output_path(self, recording_path: str) -> str:
+        """Get the path of the transcoded file of a recording.
+
+        Parameters
+        ----------
+        recording_path
+            The path of the downloaded recording.
+
+        Returns
+        -------
+        str
+            The path of the transcoded file, next to the downloaded recording.
+        """
+        return f"{splitext(recording_path)[0]}.{self.output_format}"
+
+    def submit(self, recording_id: str, recording_path: str):
+        """Start transcoding a downloaded recording in the process pool.
+
+        Parameters
+        ----------
+        recording_id
+            The id of the recording.
+        recording_path
+            The path of the downloaded recording.
+        """
+        output_path = self.get_output_path(recording_path)
+        self._submit(
+            recording_id,
+            output_path,
+            transcode_recording,
+            recording_path,
+            output_path,
+            self.sample_rate,
+            self.num_channels,
+            self.output_format,
+            self.ffmpeg_path,
+        )
+
+    def collect(
+        self, recording_ids: list[str]
+    ) -> dict[str, tuple[str | None, float | None]]:
+        """Wait for the transcoding of recordings that were submitted before.
+
+        Parameters
+        ----------
+        recording_ids
+            The ids of the recordings.
+
+        Returns
+        -------
+        dict[str, tuple[str | None, float | None]]
+            The path and duration in seconds of the transcoded file of each submitted
+            recording, or (None, None) if transcoding it failed. Recordings that were
+            not submitted are left out.
+        """
+        return super().collect(recording_ids)
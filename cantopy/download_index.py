@@ -0,0 +1,295 @@
+from os.path import join
+import hashlib
+import os
+import re
+import sqlite3
+import threading
+from typing import Any, Iterable
+
+
+class DownloadIndex:
+    """A persistent manifest of the recordings downloaded into a data folder.
+
+    The index is a SQLite database, stored in the data folder by default. For every
+    recording it keeps the species folder, the file size, the SHA-256 checksum and
+    the download status, so checking which recordings of a query are already
+    downloaded is a single bulk lookup instead of a file system probe per recording.
+    The index is safe to use from multiple worker threads. The database is opened in
+    write-ahead logging (WAL) mode with a busy timeout, so processes on the same host
+    that share the index wait for each other's writes instead of failing. WAL mode
+    and SQLite's locking don't work on network file systems, so for a data folder on
+    an NFS or SMB share, pass an index_path on a local disk to keep the index out of
+    the data folder.
+
+    Since the index is only updated by CantoPy, it goes stale when recordings are
+    added or removed by hand. Use :meth:`rebuild` to rescan the data folder in that case.
+
+    Attributes
+    ----------
+    data_base_path
+        The base data folder containing the species folders.
+    index_file_path
+        The path of the SQLite database file.
+    """
+
+    index_file_name = "download_index.sqlite"
+
+    # Stay below the default maximum number of SQLite query parameters
+    _lookup_batch_size = 900
+
+    _recording_file_pattern = re.compile(r"^(\d+)\.mp3(\.part)?$")
+
+    def __init__(
+        self,
+        data_base_path: str,
+        busy_timeout: float = 30.0,
+        index_path: str | None = None,
+    ):
+        """Open the download index of a data folder.
+
+        If the index does not exist yet, a new index is created and filled with the
+        recordings that are already present in the data folder.
+
+        Parameters
+        ----------
+        data_base_path
+            The base data folder containing the species folders.
+        busy_timeout : optional
+            The time in seconds to wait for a write of another connection to the index
+            to finish before failing, by default 30.0.
+        index_path : optional
+            The folder to store the index database in, by default the data folder. Use
+            a folder on a local disk when the data folder is on a network file system.
+        """
+        self.data_base_path = data_base_path
+        self.index_file_path = join(
+            index_path if index_path is not None else data_base_path,
+            self.index_file_name,
+        )
+
+        os.makedirs(data_base_path, exist_ok=True)
+        os.makedirs(os.path.dirname(self.index_file_path), exist_ok=True)
+
+        self._lock = threading.Lock()
+        self._connection = sqlite3.connect(
+            self.index_file_path, timeout=busy_timeout, check_same_thread=False
+        )
+        self._connection.execute("PRAGMA journal_mode=WAL")
+
+        # Create the index and fill it with the recordings downloaded before it existed
+        # in a single transaction, so processes opening a new index at the same time
+        # don't scan the data folder over each other's records
+        with self._lock, self._connection:
+            self._connection.execute("BEGIN IMMEDIATE")
+            is_new_index = (
+                self._connection.execute(
+                    "SELECT name FROM sqlite_master "
+                    "WHERE type = 'table' AND name = 'recordings'"
+                ).fetchone()
+                is None
+            )
+            if is_new_index:
+                self._connection.execute(
+                    "CREATE TABLE recordings ("
+                    "recording_id INTEGER PRIMARY KEY, "
+                    "animal_folder_name TEXT NOT NULL, "
+                    "file_size INTEGER, "
+                    "sha256 TEXT, "
+                    "status TEXT NOT NULL)"
+                )
+                self._connection.executemany(
+                    "INSERT INTO recordings VALUES (?, ?, ?, ?, ?)",
+                    self._scan_data_folder(compute_checksums=False),
+                )
+
+    def lookup(self, recording_ids: Iterable[int]) -> dict[int, str]:
+        """Look up the download status of multiple recordings at once.
+
+        Parameters
+        ----------
+        recording_ids
+            The ids of the recordings to look up.
+
+        Returns
+        -------
+        dict[int, str]
+            The download status ("pass" for a complete download, "partial" for an
+            interrupted one) of each looked up recording that is in the index.
+            Recordings that are not in the index are left out.
+        """
+        recording_ids = list(recording_ids)
+        statuses: dict[int, str] = {}
+
+        with self._lock:
+            for start in range(0, len(recording_ids), self._lookup_batch_size):
+                batch = recording_ids[start : start + self._lookup_batch_size]
+                rows = self._connection.execute(
+                    "SELECT recording_id, status FROM recordings "
+                    f"WHERE recording_id IN ({', '.join('?' * len(batch))})",
+                    batch,
+                )
+                statuses.update(rows)
+
+        return statuses
+
+    def get(self, recording_id: int) -> dict[str, Any] | None:
+        """Get the index entry of a recording.
+
+        Parameters
+        ----------
+        recording_id
+            The id of the recording.
+
+        Returns
+        -------
+        dict[str, Any] | None
+            The index entry of the recording, with the recording_id, animal_folder_name,
+            file_size, sha256 and status keys, or None if the recording is not indexed.
+        """
+        with self._lock:
+            cursor = self._connection.execute(
+                "SELECT recording_id, animal_folder_name, file_size, sha256, status "
+                "FROM recordings WHERE recording_id = ?",
+                (recording_id,),
+            )
+            row = cursor.fetchone()
+
+        if row is None:
+            return None
+
+        return dict(zip([column[0] for column in cursor.description], row))
+
+    def record(
+        self,
+        recording_id: int,
+        animal_folder_name: str,
+        status: str,
+        file_size: int | None = None,
+        sha256: str | None = None,
+    ):
+        """Add or replace the index entry of a recording.
+
+        Parameters
+        ----------
+        recording_id
+            The id of the recording.
+        animal_folder_name
+            The name of the species folder the recording is stored in.
+        status
+            The download status of the recording ("pass" or "partial").
+        file_size : optional
+            The size in bytes of the downloaded file, by default None.
+        sha256 : optional
+            The hexadecimal SHA-256 checksum of the downloaded file, by default None.
+        """
+        with self._lock, self._connection:
+            self._connection.execute(
+                "INSERT OR REPLACE INTO recordings VALUES (?, ?, ?, ?, ?)",
+                (recording_id, animal_folder_name, file_size, sha256, status),
+            )
+
+    def rebuild(self, compute_checksums: bool = False):
+        """Rebuild the index by rescanning the species folders of the data folder.
+
+        Complete recordings (``<id>.mp3``) are indexed with the "pass" status and
+        interrupted downloads (``<id>.mp3.part``) with the "partial" status.
+
+        Parameters
+        ----------
+        compute_checksums : optional
+            Whether to compute the checksum of every complete recording, by default
+            False. This reads every recording in the data folder, so it is slow on
+            large data folders.
+        """
+        entries = self._scan_data_folder(compute_checksums)
+
+        # Replace the index contents in a single transaction
+        with self._lock, self._connection:
+            self._connection.execute("DELETE FROM recordings")
+            self._connection.executemany(
+                "INSERT INTO recordings VALUES (?, ?, ?, ?, ?)", entries
+            )
+
+    def _scan_data_folder(
+        self, compute_checksums: bool
+    ) -> list[tuple[int, str, int, str | None, str]]:
+        """Scan the species folders of the data folder for recording files.
+
+        Parameters
+        ----------
+        compute_checksums
+            Whether to compute the checksum of every complete recording.
+
+        Returns
+        -------
+        list[tuple[int, str, int, str | None, str]]
+            The index entry of every recording file, as (recording_id,
+            animal_folder_name, file_size, sha256, status) rows.
+        """
+        entries: dict[int, tuple[int, str, int, str | None, str]] = {}
+
+        with os.scandir(self.data_base_path) as animal_folders:
+            for animal_folder in animal_folders:
+                if not animal_folder.is_dir():
+                    continue
+
+                with os.scandir(animal_folder.path) as files:
+                    for file in files:
+                        match = self._recording_file_pattern.match(file.name)
+                        if match is None:
+                            continue
+
+                        recording_id = int(match.group(1))
+                        status = "partial" if match.group(2) else "pass"
+
+                        # A complete recording takes precedence over a leftover partial file
+                        if status == "partial" and recording_id in entries:
+                            continue
+
+                        entries[recording_id] = (
+                            recording_id,
+                            animal_folder.name,
+                            file.stat().st_size,
+                            (
+                                self.compute_checksum(file.path)
+                                if compute_checksums and status == "pass"
+                                else None
+                            ),
+                            status,
+                        )
+
+        return list(entries.values())
+
+    @staticmethod
+    def compute_checksum(file_path: str, chunk_size: int = 1024 * 1024) -> str:
+        """Compute the SHA-256 checksum of a file.
+
+        Parameters
+        ----------
+        file_path
+            The path of the file.
+        chunk_size : optional
+            The size in bytes of the chunks in which the file is read, by default 1 MiB.
+
+        Returns
+        -------
+        str
+            The hexadecimal SHA-256 checksum of the file.
+        """
+        checksum = hashlib.sha256()
+        with open(file_path, "rb") as file:
+            for chunk in iter(lambda: file.read(chunk_size), b""):
+                checksum.update(chunk)
+
+        return checksum.hexdigest()
+
+    def close(self):
+        """Close the connection to the index database."""
+        with self._lock:
+            self._connection.close()
+
+    def __enter__(self) -> "DownloadIndex":
+        return self
+
+    def __exit__(self, *args: Any):
+        self.close()
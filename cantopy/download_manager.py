@@ -1,11 +1,27 @@
 from concurrent.futures import ThreadPoolExecutor
-from concurrent.futures import as_completed
-from cantopy.xenocanto_components import QueryResult, Recording
+from cantopy.audio_transcoder import AudioTranscoder
+from cantopy.download_index import DownloadIndex
+from cantopy.download_pipeline import DownloadPipeline
+from cantopy.download_result import DownloadResult
+from cantopy.feature_extractor import FeatureExtractor
+from cantopy.http_session import HttpSession
+from cantopy.file_lock import FileLock
+from cantopy.metadata_store import CsvMetadataStore, MetadataStore, MetadataWriter
+from cantopy.rate_limiter import RetryPolicy
+from cantopy.response_cache import ResponseCache
+from cantopy.shard_export import export_shards
+from cantopy.xenocanto_components import Query, QueryResult, Recording, ResultPage
+from cantopy.xenocanto_components.parsing import add_parsed_columns
+from cantopy.xenocanto_components.recording_filter import Predicate, as_predicate
 from os.path import exists, join
+from typing import Any, Iterable
+import hashlib
+import json
+import shutil
+import time
 import pandas as pd
 import requests
 import os
-import numpy as np
 
 
 class DownloadManager:
@@ -19,9 +35,56 @@ class DownloadManager:
         manager, since it will skip duplicate downloads.
     max_workers
         The maximum number of workers to use for downloading the recordings.
+    session
+        The HttpSession used to download the recordings.
+    chunk_size
+        The size in bytes of the chunks in which the recordings are streamed to disk.
+    metadata_store
+        The MetadataStore in which the per-species recording metadata is stored.
+    download_index
+        The DownloadIndex used to detect already downloaded recordings, None if the
+        data folder is probed file by file.
+    retry_policy
+        The RetryPolicy for resuming downloads that were interrupted while streaming.
+    transcoder
+        The AudioTranscoder that transcodes the downloaded recordings, None if the
+        recordings are only stored as downloaded.
+    feature_extractor
+        The FeatureExtractor that precomputes the log-mel spectrograms of the
+        downloaded recordings, None if no features are precomputed.
+    shard_index
+        The index of the shard of recordings this manager downloads.
+    num_shards
+        The number of shards the recordings are partitioned into, 1 if this manager
+        downloads all recordings.
+    metadata_writer
+        The MetadataWriter through which all metadata updates of this manager are
+        written, batched per species.
     """
 
-    def __init__(self, data_base_path: str, max_workers: int = 1):
+    # The file in the data folder in which the high-water marks of synced queries are kept
+    sync_state_file_name = "sync_state.json"
+
+    # The folder in the data folder in which sharded managers write their metadata
+    metadata_fragments_folder_name = "metadata_fragments"
+
+    def __init__(
+        self,
+        data_base_path: str,
+        max_workers: int = 1,
+        session: HttpSession | None = None,
+        chunk_size: int = 1024 * 1024,
+        metadata_write_mode: str = "rewrite",
+        compaction_threshold: int | None = None,
+        metadata_store: MetadataStore | None = None,
+        use_download_index: bool = False,
+        download_index_path: str | None = None,
+        retry_policy: RetryPolicy | None = None,
+        transcoder: AudioTranscoder | None = None,
+        feature_extractor: FeatureExtractor | None = None,
+        shard_index: int = 0,
+        num_shards: int = 1,
+    ):
         """Initialize a DownloadManager instance
 
         Parameters
@@ -32,31 +95,472 @@ class DownloadManager:
             manager, since it will skip duplicate downloads.
         max_workers : optional
             The maximum number of workers to use for downloading the recordings, by default 1
+        session : optional
+            The HttpSession used to download the recordings. This session can be shared
+            with the FetchManager. By default, a new session is created with a
+            connection pool sized to max_workers.
+        chunk_size : optional
+            The size in bytes of the chunks in which the recordings are streamed to
+            disk, by default 1 MiB. Only one chunk per worker is held in memory at a time.
+        metadata_write_mode : optional
+            How new rows are added to the per-species metadata files of the default
+            metadata store, by default "rewrite". In "rewrite" mode, each update reads
+            the whole metadata file, merges the new rows and rewrites the file sorted by
+            recording id. In "append" mode, the new rows are only appended to the end
+            of the file, and sorting and de-duplication are deferred to :meth:`compact`.
+            Use :meth:`load_animal_recordings_metadata` to read the metadata in sorted
+            form regardless of the mode.
+        compaction_threshold : optional
+            In "append" mode, the number of rows this manager appends to a metadata file
+            of the default metadata store after which it compacts that file, by default
+            None (never compact automatically).
+        metadata_store : optional
+            The MetadataStore in which the per-species recording metadata is stored,
+            for example a :class:`ParquetMetadataStore <cantopy.metadata_store.ParquetMetadataStore>`
+            for typed columnar metadata. By default, a
+            :class:`CsvMetadataStore <cantopy.metadata_store.CsvMetadataStore>` is used,
+            configured with the metadata_write_mode and compaction_threshold arguments,
+            which can't be combined with a metadata_store.
+        use_download_index : optional
+            Whether to keep a :class:`DownloadIndex <cantopy.download_index.DownloadIndex>`
+            of the downloaded recordings in the data folder, by default False. With the
+            index, detecting the already downloaded recordings is a single lookup in
+            the index instead of a file system probe per recording, which is much
+            faster on large data folders. The index also stores the size and checksum
+            of every recording downloaded by this manager. Use :meth:`rebuild_index`
+            when recordings were added or removed by hand.
+        download_index_path : optional
+            The folder to store the download index in, by default the data folder. The
+            index does not work on a network file system, so for a data folder on an
+            NFS or SMB share, pass a folder on a local disk.
+        retry_policy : optional
+            The RetryPolicy for resuming downloads that were interrupted by a connection
+            error or a timeout while streaming, by default a RetryPolicy with its
+            default settings. Failed requests themselves are retried by the session,
+            see :class:`HttpSession <cantopy.http_session.HttpSession>`. To pace the
+            downloads, create the session with a
+            :class:`RateLimiter <cantopy.rate_limiter.RateLimiter>`.
+        transcoder : optional
+            The :class:`AudioTranscoder <cantopy.audio_transcoder.AudioTranscoder>` that
+            transcodes the downloaded recordings to a fixed sample rate, channel count
+            and format, by default None (no transcoding). Each recording is handed to
+            the transcoder's process pool as soon as its download finishes, and the
+            path and duration of the transcoded file are added to the metadata in the
+            ``transcoded_file_path`` and ``transcoded_duration`` columns.
+        feature_extractor : optional
+            The :class:`FeatureExtractor <cantopy.feature_extractor.FeatureExtractor>`
+            that precomputes the log-mel spectrograms of the downloaded recordings, by
+            default None (no features). Each recording is handed to the extractor's
+            process pool as soon as its download finishes, and the path and number of
+            frames of its .npy feature file are added to the metadata in the
+            ``feature_file_path`` and ``feature_num_frames`` columns. Use
+            :meth:`extract_features` for recordings that were downloaded before.
+        shard_index : optional
+            The index of the shard of recordings this manager downloads, from 0 to
+            num_shards - 1, by default 0.
+        num_shards : optional
+            The number of shards the recordings are partitioned into, by default 1 (no
+            sharding). With multiple shards, every recording is assigned to a shard by
+            a stable hash of its recording id (see :meth:`get_recording_shard`), and
+            this manager only downloads the recordings of its own shard. This way,
+            num_shards managers on different processes or hosts can download the same
+            queries into a shared data folder without downloading a recording twice.
+            To avoid conflicting writes to the shared metadata files, each sharded
+            manager writes its metadata to its own fragment in the
+            ``metadata_fragments`` folder of the data folder. Once all shards are
+            downloaded, call :meth:`merge_metadata_fragments` on a single manager to
+            merge the fragments into the metadata store.
+
+        Raises
+        ------
+        ValueError
+            If an unknown metadata_write_mode is passed.
+        ValueError
+            If a metadata_store is passed together with a metadata_write_mode or
+            compaction_threshold.
+        ValueError
+            If the shard_index is not between 0 and num_shards - 1.
         """
+        if metadata_store is not None and (
+            metadata_write_mode != "rewrite" or compaction_threshold is not None
+        ):
+            raise ValueError(
+                "The metadata_write_mode and compaction_threshold only configure the "
+                "default metadata store, configure the passed metadata_store instead"
+            )
+
         self.data_base_path = data_base_path
         self.max_workers = max_workers
+        self.session = (
+            session if session is not None else HttpSession(pool_maxsize=max_workers)
+        )
+        self._owns_session = session is None
+        self.chunk_size = chunk_size
+        self.metadata_store = (
+            metadata_store
+            if metadata_store is not None
+            else CsvMetadataStore(
+                data_base_path,
+                write_mode=metadata_write_mode,
+                compaction_threshold=compaction_threshold,
+            )
+        )
+        self.download_index = (
+            DownloadIndex(data_base_path, index_path=download_index_path)
+            if use_download_index
+            else None
+        )
+        self.retry_policy = retry_policy if retry_policy is not None else RetryPolicy()
+        self.transcoder = transcoder
+        self.feature_extractor = feature_extractor
 
-    def download_all_recordings_in_queryresult(self, query_result: QueryResult):
+        if not 0 <= shard_index < num_shards:
+            raise ValueError(
+                f"The shard index should be between 0 and {num_shards - 1}: {shard_index}"
+            )
+        self.shard_index = shard_index
+        self.num_shards = num_shards
+
+        # Sharded managers write their metadata to their own fragment of the metadata
+        # store, in the same format
+        self._metadata_fragment_store = (
+            self.metadata_store.with_path(
+                join(
+                    data_base_path,
+                    self.metadata_fragments_folder_name,
+                    f"shard-{shard_index:05d}-of-{num_shards:05d}",
+                )
+            )
+            if num_shards > 1
+            else None
+        )
+
+        # Concurrent downloads of this manager hand their metadata to a single writer
+        self.metadata_writer = MetadataWriter(
+            self._metadata_fragment_store
+            if self._metadata_fragment_store is not None
+            else self.metadata_store
+        )
+
+    def download_all_recordings_in_queryresult(
+        self, query_result: QueryResult
+    ) -> dict[str, DownloadResult]:
         """Download all the recordings contained in the provided QueryResult.
 
         This function downloads all recordings contained in a QueryResult. Additionally,
-        the function also generates and updates a per-species metadata CSV file
-        containing additional recording information for each downloaded recording of
+        the function also generates and updates a per-species metadata file (a CSV
+        file by default, see the metadata_store argument) containing additional recording information for each downloaded recording of
         that species like recording_length, date, ... (See the
         :func:`Recording.to_dataframe_row <cantopy.xenocanto_components.Recording.to_dataframe_row>`
         method for the attributes that get logged in this metadata file).
 
         Note that this function also checks for duplicate recordings that have already
-        been downloaded and skips them.
+        been downloaded and skips them. Recordings whose download was interrupted in a
+        previous run are resumed from their partially downloaded ``.part`` file.
 
         Parameters
         ----------
         query_result
             The QueryResult instance containing the recordings we want to download.
+
+        Returns
+        -------
+        dict[str, DownloadResult]
+            The DownloadResult of each recording that was not downloaded before, keyed
+            by recording id.
+        """
+        return self._download_recordings(query_result.get_all_recordings())
+
+    def download_all_recordings_in_result_pages(
+        self, result_pages: Iterable[ResultPage]
+    ) -> dict[str, DownloadResult]:
+        """Download all the recordings in a stream of ResultPages.
+
+        The recordings are downloaded page by page, as soon as each page is available.
+        Combined with :meth:`FetchManager.iter_query
+        <cantopy.fetch_manager.FetchManager.iter_query>`, the downloading of the
+        recordings overlaps with fetching the next result pages, and only a limited
+        number of pages is held in memory at a time. The metadata files are updated
+        after every page, so the recordings of completed pages are kept if the stream
+        is interrupted. See :meth:`download_all_recordings_in_queryresult` for the
+        downloaded files.
+
+        Parameters
+        ----------
+        result_pages
+            The iterable of ResultPages containing the recordings we want to download.
+
+        Returns
+        -------
+        dict[str, DownloadResult]
+            The DownloadResult of each recording that was not downloaded before, keyed
+            by recording id.
+        """
+        download_results: dict[str, DownloadResult] = {}
+        for result_page in result_pages:
+            download_results.update(
+                self._download_recordings(list(result_page.recording_batch))
+            )
+
+        return download_results
+
+    def download_query(
+        self,
+        query: Query,
+        max_pages: int | None = None,
+        read_ahead: int = 1,
+        queue_size: int | None = None,
+        cache: ResponseCache | None = None,
+        recording_filter: Predicate | str | None = None,
+    ) -> dict[str, DownloadResult]:
+        """Fetch the result pages of a query and download their recordings in a pipeline.
+
+        Unlike sending the query first and then downloading the QueryResult, the page
+        fetching, dedup filtering, audio downloading and metadata writing stages run
+        concurrently, connected by bounded queues. This keeps both the XenoCanto API
+        and the audio file server busy for the whole run. To monitor the queue depths
+        of the stages for tuning, create and run a
+        :class:`DownloadPipeline <cantopy.download_pipeline.DownloadPipeline>` directly.
+
+        Parameters
+        ----------
+        query
+            The query whose recordings we want to download.
+        max_pages : optional
+            The maximum number of result pages to fetch, by default None (all pages).
+        read_ahead : optional
+            The number of result pages fetched ahead of the dedup stage, by default 1.
+        queue_size : optional
+            The maximum number of items on each queue between the stages, by default
+            twice max_workers.
+        cache : optional
+            The ResponseCache in which the fetched result pages are cached, by default
+            None (no caching).
+        recording_filter : optional
+            A Predicate or filter expression that the recordings must match to be
+            downloaded, by default None (download all recordings). See
+            :meth:`QueryResult.filter <cantopy.xenocanto_components.QueryResult.filter>`.
+
+        Returns
+        -------
+        dict[str, DownloadResult]
+            The DownloadResult of each matching recording that was not downloaded
+            before, keyed by recording id.
+        """
+        return DownloadPipeline(self, queue_size=queue_size).run(
+            query,
+            max_pages=max_pages,
+            read_ahead=read_ahead,
+            cache=cache,
+            recording_filter=recording_filter,
+        )
+
+    def sync(
+        self,
+        query: Query,
+        read_ahead: int = 1,
+        queue_size: int | None = None,
+        cache: ResponseCache | None = None,
+        recording_filter: Predicate | str | None = None,
+    ) -> dict[str, DownloadResult]:
+        """Download the recordings of a query that were uploaded since the last sync.
+
+        The first sync of a query downloads all its recordings like
+        :meth:`download_query`. After every sync, the high-water mark of the query, the
+        latest upload date and highest recording id that were fetched, is stored in the
+        ``sync_state.json`` file of the data folder. The next sync of the same query
+        only requests the recordings uploaded since that date, by adding it as the
+        ``uploaded_since`` attribute of the query, so only the new result pages are
+        fetched. Recordings uploaded on the day of the high-water mark are fetched again
+        and skipped as already downloaded. When a download fails, the high-water mark
+        is not moved past the upload date of the failed recording, so it is retried by
+        the next sync.
+
+        Parameters
+        ----------
+        query
+            The query whose recordings we want to keep in sync. The high-water mark is
+            kept per query, so the same query should be passed on every run.
+        read_ahead : optional
+            The number of result pages fetched ahead of the dedup stage, by default 1.
+        queue_size : optional
+            The maximum number of items on each queue between the stages, by default
+            twice max_workers.
+        cache : optional
+            The ResponseCache in which the fetched result pages are cached, by default
+            None (no caching).
+        recording_filter : optional
+            A Predicate or filter expression that the recordings must match to be
+            downloaded, by default None (download all recordings). The high-water mark
+            is kept separately for each filter.
+
+        Returns
+        -------
+        dict[str, DownloadResult]
+            The DownloadResult of each matching recording that was not downloaded
+            before, keyed by recording id.
+        """
+        sync_key = query.to_string()
+        if recording_filter is not None:
+            sync_key += f" | {as_predicate(recording_filter).description}"
+        if self.num_shards > 1:
+            sync_key += f" | shard {self.shard_index} of {self.num_shards}"
+
+        # Step 1: Only request the recordings uploaded since the last sync
+        query_sync_state = self._load_sync_state().get(sync_key)
+        if query_sync_state is not None:
+            query = query.copy_with(uploaded_since=query_sync_state["uploaded_since"])
+
+        pipeline = DownloadPipeline(self, queue_size=queue_size)
+        download_results = pipeline.run(
+            query,
+            read_ahead=read_ahead,
+            cache=cache,
+            recording_filter=recording_filter,
+        )
+
+        # Step 2: Move the high-water mark, but not past the recordings that failed
+        uploaded_since = max(
+            filter(
+                None,
+                [
+                    query_sync_state["uploaded_since"] if query_sync_state else None,
+                    pipeline.max_upload_date,
+                ],
+            ),
+            default=None,
+        )
+        if uploaded_since is not None and pipeline.first_failed_upload_date is not None:
+            uploaded_since = min(uploaded_since, pipeline.first_failed_upload_date)
+        if uploaded_since is None:
+            return download_results
+
+        max_recording_id = max(
+            filter(
+                None,
+                [
+                    query_sync_state["max_recording_id"] if query_sync_state else None,
+                    pipeline.max_recording_id,
+                ],
+            ),
+            default=None,
+        )
+
+        # Reload the state under the lock, so the marks of queries synced in the
+        # meantime by other threads or processes are kept
+        with FileLock(
+            join(self.data_base_path, self.sync_state_file_name + ".lock")
+        ):
+            sync_state = self._load_sync_state()
+            sync_state[sync_key] = {
+                "uploaded_since": uploaded_since,
+                "max_recording_id": max_recording_id,
+                "last_sync": time.strftime("%Y-%m-%dT%H:%M:%S%z"),
+            }
+            self._save_sync_state(sync_state)
+
+        return download_results
+
+    def _load_sync_state(self) -> dict[str, dict[str, Any]]:
+        """Load the high-water marks of the synced queries.
+
+        Returns
+        -------
+        dict[str, dict[str, Any]]
+            The "uploaded_since" date, "max_recording_id" and "last_sync" time of each
+            synced query, keyed by query string. An empty dict if no query was synced.
+        """
+        sync_state_path = join(self.data_base_path, self.sync_state_file_name)
+        if not exists(sync_state_path):
+            return {}
+
+        with open(sync_state_path, "r", encoding="utf-8") as sync_state_file:
+            return json.load(sync_state_file)
+
+    def _save_sync_state(self, sync_state: dict[str, dict[str, Any]]):
+        """Save the high-water marks of the synced queries.
+
+        Parameters
+        ----------
+        sync_state
+            The high-water mark of each synced query, keyed by query string.
+        """
+        sync_state_path = join(self.data_base_path, self.sync_state_file_name)
+        temporary_sync_state_path = sync_state_path + ".part"
+
+        # Write to a temporary file first, so an interrupted write never corrupts the
+        # state of the previous syncs
+        os.makedirs(self.data_base_path, exist_ok=True)
+        with open(temporary_sync_state_path, "w", encoding="utf-8") as sync_state_file:
+            json.dump(sync_state, sync_state_file, indent=2, sort_keys=True)
+        os.replace(temporary_sync_state_path, sync_state_path)
+
+    @staticmethod
+    def get_recording_shard(recording_id: str, num_shards: int) -> int:
+        """Get the shard a recording is assigned to.
+
+        The shard is derived from a hash of the recording id that is the same on every
+        process and host, unlike Python's built-in hash of strings.
+
+        Parameters
+        ----------
+        recording_id
+            The id of the recording.
+        num_shards
+            The number of shards the recordings are partitioned into.
+
+        Returns
+        -------
+        int
+            The index of the shard of the recording, from 0 to num_shards - 1.
+        """
+        recording_id_hash = hashlib.blake2b(
+            str(recording_id).encode(), digest_size=8
+        ).digest()
+
+        return int.from_bytes(recording_id_hash, "big") % num_shards
+
+    def is_in_shard(self, recording_id: str) -> bool:
+        """Check whether a recording belongs to the shard of this manager.
+
+        Parameters
+        ----------
+        recording_id
+            The id of the recording.
+
+        Returns
+        -------
+        bool
+            Whether this manager downloads the recording, always True without sharding.
         """
+        return (
+            self.num_shards == 1
+            or self.get_recording_shard(recording_id, self.num_shards)
+            == self.shard_index
+        )
 
-        # Get all the recordings from the query result
-        recordings = query_result.get_all_recordings()
+    def _download_recordings(
+        self, recordings: list[Recording]
+    ) -> dict[str, DownloadResult]:
+        """Download the provided recordings and update the metadata files of their animals.
+
+        Parameters
+        ----------
+        recordings
+            The list of recordings we want to download.
+
+        Returns
+        -------
+        dict[str, DownloadResult]
+            The DownloadResult of each recording that was not downloaded before, keyed
+            by recording id.
+        """
+        # Only download the recordings of this manager's shard
+        recordings = [
+            recording
+            for recording in recordings
+            if self.is_in_shard(recording.recording_id)
+        ]
 
         # First detect the recordings that are already downloaded
         detected_already_downloaded_recordings = (
@@ -71,20 +575,24 @@ class DownloadManager:
                 recordings,
             )
         )
-        download_pass_or_fail = self._download_all_recordings(
+        download_results = self._download_all_recordings(
             not_already_downloaded_recordings,
         )
 
         # Generate the metadata dataframe for the downloaded recordings
         downloaded_recordings_metadata = self._generate_downloaded_recordings_metadata(
             not_already_downloaded_recordings,
-            download_pass_or_fail,
+            download_results,
         )
 
         # Udate the metadata file of each one of the downloaded animals
         self._update_animal_recordings_metadata_files(downloaded_recordings_metadata)
 
-    def _download_all_recordings(self, recordings: list[Recording]) -> dict[str, str]:
+        return download_results
+
+    def _download_all_recordings(
+        self, recordings: list[Recording]
+    ) -> dict[str, DownloadResult]:
         """Download all recordings in the provided recordings list.
 
         Parameters
@@ -94,26 +602,30 @@ class DownloadManager:
 
         Returns
         -------
-        dict[str, str]
-            A dictionary containing the download status of each recording ("pass" or "fail").
+        dict[str, DownloadResult]
+            A dictionary containing the DownloadResult of each recording, keyed by
+            recording id, in the same order as the provided recordings.
         """
-        download_pass_or_fail: dict[str, str] = {}
-
+        # Executor.map yields the results in submission order, so every result is
+        # attached to its own recording regardless of which download finishes first
         with ThreadPoolExecutor(max_workers=self.max_workers) as executor:  # type: ignore
-            futures = [
-                executor.submit(self._download_single_recording, recording)
-                for recording in recordings
-            ]
-            results: str = [future.result() for future in as_completed(futures)]  # type: ignore
-
-        for recording, result in zip(recordings, results):
-            download_pass_or_fail[str(recording.recording_id)] = result
+            results = list(executor.map(self.download_recording, recordings))
 
-        return download_pass_or_fail
+        return {result.recording_id: result for result in results}
 
-    def _download_single_recording(self, recording: Recording) -> str:
+    def download_recording(self, recording: Recording) -> DownloadResult:
         """Download a single recording.
 
+        A download that is interrupted by a connection error or a timeout is resumed
+        from its partially downloaded file, after a jittered exponential backoff, up
+        to the maximum number of retries of the retry policy.
+
+        Unlike the other download methods, this method neither skips an already
+        downloaded recording nor writes the metadata of the recording. It is the
+        synchronous building block that those methods and the
+        :class:`DownloadPipeline <cantopy.download_pipeline.DownloadPipeline>` download
+        each recording with, also on an AsyncDownloadManager.
+
         Parameters
         ----------
         recording
@@ -121,9 +633,47 @@ class DownloadManager:
 
         Returns
         -------
-        str
-            The download status of the recording ("pass" or "fail").
+        DownloadResult
+            The result of the download, with status "pass" or "fail".
+        """
+        start_time = time.perf_counter()
+        num_bytes = 0
+
+        attempt = 0
+        while True:
+            result = self._download_single_recording_attempt(recording)
+            num_bytes += result.num_bytes
+            if result.status != "retry":
+                break
+
+            if attempt >= self.retry_policy.max_retries:
+                result.status = "fail"
+                break
+
+            time.sleep(self.retry_policy.get_delay(attempt))
+            attempt += 1
+
+        result.num_bytes = num_bytes
+        result.duration = time.perf_counter() - start_time
+
+        return result
+
+    def _download_single_recording_attempt(self, recording: Recording) -> DownloadResult:
+        """Make a single attempt at downloading a recording.
+
+        Parameters
+        ----------
+        recording
+            The recording we want to download.
+
+        Returns
+        -------
+        DownloadResult
+            The result of the attempt, with status "pass" or "fail", or "retry" if the
+            download was interrupted and can be resumed by a next attempt.
         """
+        recording_id = str(recording.recording_id)
+
         # Generate the path where the recording should be located
         recording_path = join(
             self.data_base_path,
@@ -142,18 +692,563 @@ class DownloadManager:
         except Exception:
             pass
 
+        # The recording is first streamed to a temporary file, so an interrupted
+        # download never shows up as an already downloaded recording. This partial
+        # file is kept on failure, so a next run can resume from its current size.
+        temporary_recording_path = f"{recording_path}.part"
+        offset = (
+            os.path.getsize(temporary_recording_path)
+            if exists(temporary_recording_path)
+            else 0
+        )
+
         # Download the recording
+        http_status = None
+        num_bytes = 0
+        is_streaming = False
         try:
-            response = requests.get(recording.audio_file_url)
+            with self.session.get(
+                recording.audio_file_url,
+                stream=True,
+                headers={"Range": f"bytes={offset}-"} if offset > 0 else {},
+            ) as response:
+                http_status = response.status_code
+                if response.status_code == 206:
+                    # The server honoured the range request, continue the partial file
+                    file_mode = "ab"
+                elif response.status_code == 200:
+                    # The server sent the full recording, start over from byte zero
+                    offset = 0
+                    file_mode = "wb"
+                elif response.status_code == 416 and offset > 0:
+                    # The partial file does not match the remote file, discard it
+                    # and fall back to a full download
+                    os.remove(temporary_recording_path)
+                    return self._download_single_recording_attempt(recording)
+                else:
+                    return DownloadResult(
+                        recording_id,
+                        "fail",
+                        http_status=http_status,
+                        error=f"Unexpected HTTP status {http_status}",
+                    )
+
+                expected_size = self._get_expected_download_size(response, offset)
+                checksum = self._start_download_checksum(
+                    temporary_recording_path, file_mode
+                )
 
-            if response.status_code != 200:
-                return "fail"
+                is_streaming = True
+                with open(temporary_recording_path, file_mode) as file:
+                    for chunk in response.iter_content(chunk_size=self.chunk_size):
+                        file.write(chunk)
+                        num_bytes += len(chunk)
+                        if checksum is not None:
+                            checksum.update(chunk)
 
-            open(recording_path, "wb").write(response.content)
+            # Verify that we received the complete recording
+            downloaded_size = os.path.getsize(temporary_recording_path)
+            if expected_size is not None and downloaded_size != expected_size:
+                # A partial file that outgrew the remote file can't be resumed
+                if downloaded_size > expected_size:
+                    os.remove(temporary_recording_path)
 
-            return "pass"
-        except Exception:
-            return "fail"
+                return DownloadResult(
+                    recording_id,
+                    "retry",
+                    num_bytes=num_bytes,
+                    http_status=http_status,
+                    error=f"Expected {expected_size} bytes, received {downloaded_size}",
+                )
+
+            # Atomically move the completed download to its final location
+            os.replace(temporary_recording_path, recording_path)
+        except Exception as error:
+            # Dropped connections and timeouts while streaming leave a resumable
+            # partial file, failed requests were already retried by the session
+            return DownloadResult(
+                recording_id,
+                (
+                    "retry"
+                    if is_streaming
+                    and isinstance(error, requests.exceptions.RequestException)
+                    else "fail"
+                ),
+                num_bytes=num_bytes,
+                http_status=http_status,
+                error=f"{type(error).__name__}: {error}",
+            )
+
+        # The recording is complete on disk from here on, so errors while indexing or
+        # post-processing it don't fail the download
+        return DownloadResult(
+            recording_id,
+            "pass",
+            num_bytes=num_bytes,
+            http_status=http_status,
+            error=self._process_downloaded_recording(
+                recording, recording_path, checksum
+            ),
+        )
+
+    def _process_downloaded_recording(
+        self,
+        recording: Recording,
+        recording_path: str,
+        checksum: "hashlib._Hash | None",
+    ) -> str | None:
+        """Index a completely downloaded recording and start its post-processing.
+
+        Every step is attempted, also when a previous one failed.
+
+        Parameters
+        ----------
+        recording
+            The downloaded recording.
+        recording_path
+            The path of the downloaded recording file.
+        checksum
+            The SHA-256 checksum of the downloaded recording file.
+
+        Returns
+        -------
+        str | None
+            A description of the steps that failed, None if all steps succeeded.
+        """
+        errors = []
+        for step, process in [
+            (
+                "indexing",
+                lambda: self._index_downloaded_recording(
+                    recording, recording_path, checksum
+                ),
+            ),
+            (
+                "transcoding",
+                lambda: self._transcode_downloaded_recording(recording, recording_path),
+            ),
+            (
+                "feature extraction",
+                lambda: self._extract_downloaded_recording_features(
+                    recording, recording_path
+                ),
+            ),
+        ]:
+            try:
+                process()
+            except Exception as error:
+                errors.append(f"{step} failed: {type(error).__name__}: {error}")
+
+        return "; ".join(errors) if len(errors) > 0 else None
+
+    def _start_download_checksum(
+        self, temporary_recording_path: str, file_mode: str
+    ) -> "hashlib._Hash | None":
+        """Start the checksum computation of a recording that is being downloaded.
+
+        Parameters
+        ----------
+        temporary_recording_path
+            The path of the temporary file the recording is downloaded to.
+        file_mode
+            The mode in which the temporary file is opened, "ab" when a partial
+            download is continued.
+
+        Returns
+        -------
+        hashlib._Hash | None
+            The SHA-256 checksum to update with the downloaded chunks, already covering
+            the previously downloaded part of the file. None if no download index is used.
+        """
+        if self.download_index is None:
+            return None
+
+        checksum = hashlib.sha256()
+
+        # A continued download also covers the bytes downloaded in a previous run
+        if file_mode == "ab":
+            with open(temporary_recording_path, "rb") as file:
+                for chunk in iter(lambda: file.read(self.chunk_size), b""):
+                    checksum.update(chunk)
+
+        return checksum
+
+    def _index_downloaded_recording(
+        self,
+        recording: Recording,
+        recording_path: str,
+        checksum: "hashlib._Hash | None",
+    ):
+        """Add a completely downloaded recording to the download index, if one is used.
+
+        Parameters
+        ----------
+        recording
+            The downloaded recording.
+        recording_path
+            The path of the downloaded recording file.
+        checksum
+            The SHA-256 checksum of the downloaded recording file.
+        """
+        if self.download_index is None:
+            return
+
+        self.download_index.record(
+            int(recording.recording_id),
+            self._generate_animal_folder_name(recording.english_name),
+            "pass",
+            file_size=os.path.getsize(recording_path),
+            sha256=checksum.hexdigest() if checksum is not None else None,
+        )
+
+    def _transcode_downloaded_recording(
+        self, recording: Recording, recording_path: str
+    ):
+        """Start transcoding a completely downloaded recording, if a transcoder is used.
+
+        Parameters
+        ----------
+        recording
+            The downloaded recording.
+        recording_path
+            The path of the downloaded recording file.
+        """
+        if self.transcoder is None:
+            return
+
+        self.transcoder.submit(str(recording.recording_id), recording_path)
+
+    def _extract_downloaded_recording_features(
+        self, recording: Recording, recording_path: str
+    ):
+        """Start computing the features of a completely downloaded recording, if a
+        feature extractor is used.
+
+        Parameters
+        ----------
+        recording
+            The downloaded recording.
+        recording_path
+            The path of the downloaded recording file.
+        """
+        if self.feature_extractor is None:
+            return
+
+        self.feature_extractor.submit(str(recording.recording_id), recording_path)
+
+    def rebuild_index(self, compute_checksums: bool = False):
+        """Rebuild the download index by rescanning the data folder.
+
+        Use this method when recordings were added to or removed from the data folder
+        without this manager, so the download index no longer matches its contents.
+
+        Parameters
+        ----------
+        compute_checksums : optional
+            Whether to compute the checksum of every recording in the data folder,
+            by default False.
+
+        Raises
+        ------
+        ValueError
+            If this manager does not use a download index.
+        """
+        if self.download_index is None:
+            raise ValueError(
+                "This DownloadManager does not use a download index, create it with use_download_index=True"
+            )
+
+        self.download_index.rebuild(compute_checksums=compute_checksums)
+
+    def _get_expected_download_size(
+        self, response: requests.Response, offset: int
+    ) -> int | None:
+        """Determine the full size of a recording from its download response headers.
+
+        Parameters
+        ----------
+        response
+            The (possibly partial) download response for the recording.
+        offset
+            The byte offset from which the response body starts.
+
+        Returns
+        -------
+        int | None
+            The expected size in bytes of the complete recording, or None if the
+            server did not report it.
+        """
+        # The reported sizes don't match the decoded body of compressed responses
+        if response.headers.get("Content-Encoding", "identity") != "identity":
+            return None
+
+        # A partial response reports the full size as "bytes <start>-<end>/<size>"
+        content_range = response.headers.get("Content-Range", "")
+        if "/" in content_range and not content_range.endswith("/*"):
+            return int(content_range.rsplit("/", 1)[1])
+
+        content_length = response.headers.get("Content-Length")
+        if content_length is None:
+            return None
+
+        return offset + int(content_length)
+
+    def load_animal_recordings_metadata(
+        self, animal_english_name: str, parsed: bool = False
+    ) -> pd.DataFrame:
+        """Load the recording metadata of an animal.
+
+        The returned metadata is always de-duplicated and sorted by recording id, also
+        when the metadata contains rows that were appended but not compacted yet.
+
+        Parameters
+        ----------
+        animal_english_name
+            The english name of the animal.
+        parsed : optional
+            Whether to add the ``parsed_<attribute>`` columns with the typed values of
+            the metadata, by default False. See
+            :func:`add_parsed_columns <cantopy.xenocanto_components.parsing.add_parsed_columns>`.
+
+        Returns
+        -------
+        pd.DataFrame
+            The recording metadata of the animal, an empty DataFrame if no metadata
+            exists for the animal.
+        """
+        animal_recordings_metadata = self.metadata_store.load(
+            self._generate_animal_folder_name(animal_english_name)
+        )
+
+        return (
+            add_parsed_columns(animal_recordings_metadata)
+            if parsed
+            else animal_recordings_metadata
+        )
+
+    def export_shards(
+        self,
+        output_path: str,
+        animal_english_names: list[str] | None = None,
+        shard_size: int = 1024 * 1024 * 1024,
+        content: str = "raw",
+        sample_rate: int = 22050,
+        ffmpeg_path: str = "ffmpeg",
+    ) -> list[str]:
+        """Pack the downloaded recordings into large shard files.
+
+        Reading a few large files is much faster than reading millions of small ones
+        from a file system or an object store. Every shard gets an offset index and the
+        metadata of its recordings, see :func:`export_shards
+        <cantopy.shard_export.export_shards>`. Use a :class:`ShardReader
+        <cantopy.shard_export.ShardReader>` to memory-map the shards and slice out
+        single recordings without copying them.
+
+        Parameters
+        ----------
+        output_path
+            The folder to write the shards to.
+        animal_english_names : optional
+            The english names of the animals whose recordings should be exported, by
+            default the recordings of all animals in the data folder are exported.
+        shard_size : optional
+            The target size in bytes of a shard file, by default 1 GiB.
+        content : optional
+            What to store for each recording, by default "raw". With "raw", the bytes
+            of the downloaded MP3 files are stored. With "pcm", the recordings are
+            decoded to mono float32 samples at sample_rate.
+        sample_rate : optional
+            The sample rate in Hz of the decoded samples in "pcm" mode, by default 22050.
+        ffmpeg_path : optional
+            The path of the ffmpeg executable used to decode the recordings in "pcm"
+            mode, by default "ffmpeg".
+
+        Returns
+        -------
+        list[str]
+            The paths of the written shard files.
+        """
+        return export_shards(
+            self.data_base_path,
+            self.metadata_store,
+            output_path,
+            animal_folder_names=(
+                [
+                    self._generate_animal_folder_name(animal_english_name)
+                    for animal_english_name in animal_english_names
+                ]
+                if animal_english_names is not None
+                else None
+            ),
+            shard_size=shard_size,
+            content=content,
+            sample_rate=sample_rate,
+            ffmpeg_path=ffmpeg_path,
+        )
+
+    def compact(self, animal_english_names: list[str] | None = None):
+        """De-duplicate and sort the stored recording metadata.
+
+        When the metadata is updated in "append" mode, new rows are only appended to
+        the existing metadata. This method rewrites the metadata with its rows
+        de-duplicated and sorted by recording id.
+
+        Parameters
+        ----------
+        animal_english_names : optional
+            The english names of the animals whose metadata should be compacted, by
+            default the metadata of all animals in the data folder is compacted.
+        """
+        self.metadata_store.compact(
+            [
+                self._generate_animal_folder_name(animal_english_name)
+                for animal_english_name in animal_english_names
+            ]
+            if animal_english_names is not None
+            else None
+        )
+
+    def merge_metadata_fragments(self):
+        """Merge the metadata fragments written by sharded managers into the metadata store.
+
+        Sharded managers (see the num_shards argument) each write the metadata of their
+        downloads to their own fragment. Once all shards are downloaded, this method
+        adds the rows of all fragments to the metadata store of this manager, and
+        removes the merged fragments.
+        """
+        metadata_fragments_path = join(
+            self.data_base_path, self.metadata_fragments_folder_name
+        )
+        if not exists(metadata_fragments_path):
+            return
+
+        fragment_stores = [
+            self.metadata_store.with_path(join(metadata_fragments_path, fragment_name))
+            for fragment_name in sorted(os.listdir(metadata_fragments_path))
+        ]
+
+        # Step 1: Merge the rows of each species over all fragments
+        animal_folder_names = sorted(
+            {
+                animal_folder_name
+                for fragment_store in fragment_stores
+                for animal_folder_name in fragment_store.list_animal_folder_names()
+            }
+        )
+        for animal_folder_name in animal_folder_names:
+            with self.metadata_store.lock(animal_folder_name):
+                animal_metadata = [self.metadata_store.load(animal_folder_name)] + [
+                    fragment_store.load(animal_folder_name)
+                    for fragment_store in fragment_stores
+                ]
+                self.metadata_store.replace(
+                    animal_folder_name,
+                    pd.concat(  # type: ignore
+                        [metadata for metadata in animal_metadata if len(metadata) > 0],
+                        ignore_index=True,
+                    ),
+                )
+
+        # Step 2: Remove the merged fragments
+        shutil.rmtree(metadata_fragments_path)
+
+    def extract_features(self, animal_english_names: list[str] | None = None):
+        """Precompute the features of recordings that are already downloaded.
+
+        Feature files that already exist for the current parameters of the feature
+        extractor are reused. The ``feature_file_path`` and ``feature_num_frames``
+        metadata columns are updated to point to the current feature files.
+
+        Parameters
+        ----------
+        animal_english_names : optional
+            The english names of the animals whose recordings should be processed, by
+            default the recordings of all animals in the data folder are processed.
+
+        Raises
+        ------
+        ValueError
+            If this DownloadManager does not use a feature extractor.
+        """
+        if self.feature_extractor is None:
+            raise ValueError(
+                "This DownloadManager does not use a feature extractor, create it with a feature_extractor"
+            )
+
+        animal_folder_names = (
+            [
+                self._generate_animal_folder_name(animal_english_name)
+                for animal_english_name in animal_english_names
+            ]
+            if animal_english_names is not None
+            else self.metadata_store.list_animal_folder_names()
+        )
+
+        for animal_folder_name in animal_folder_names:
+            animal_metadata = self.metadata_store.load(animal_folder_name)
+            if len(animal_metadata) == 0:
+                continue
+
+            # Step 1: Compute the features of all recordings of this animal in parallel
+            recording_ids = [
+                str(recording_id) for recording_id in animal_metadata["recording_id"]
+            ]
+            for recording_id in recording_ids:
+                self.feature_extractor.submit(
+                    recording_id,
+                    join(self.data_base_path, animal_folder_name, f"{recording_id}.mp3"),
+                )
+            extractions = self.feature_extractor.collect(recording_ids)
+
+            # Step 2: Point the metadata to the current feature files. The metadata is
+            # reloaded under the lock, so rows added by concurrent downloads are kept.
+            with self.metadata_store.lock(animal_folder_name):
+                animal_metadata = self.metadata_store.load(animal_folder_name)
+                for column, position in [
+                    ("feature_file_path", 0),
+                    ("feature_num_frames", 1),
+                ]:
+                    current_values = (
+                        animal_metadata[column]
+                        if column in animal_metadata.columns
+                        else [None] * len(animal_metadata)
+                    )
+                    animal_metadata[column] = [
+                        (
+                            extractions[str(recording_id)][position]
+                            if str(recording_id) in extractions
+                            else current_value
+                        )
+                        for recording_id, current_value in zip(
+                            animal_metadata["recording_id"], current_values
+                        )
+                    ]
+                self.metadata_store.replace(animal_folder_name, animal_metadata)
+
+    def close(self):
+        """Write the pending metadata and release the resources of this manager.
+
+        This waits for the metadata writer to write the queued metadata and stops its
+        thread, shuts down the process pools of the transcoder and feature extractor,
+        and closes the download index. The HttpSession is only closed if it was
+        created by this manager, a session that was passed in is left open for its
+        other users. Use the manager as a context manager to close it automatically.
+        """
+        self.metadata_writer.close()
+        if self.transcoder is not None:
+            self.transcoder.close()
+        if self.feature_extractor is not None:
+            self.feature_extractor.close()
+        if self.download_index is not None:
+            self.download_index.close()
+        if self._owns_session:
+            self.session.close()
+
+    def __enter__(self) -> "DownloadManager":
+        return self
+
+    def __exit__(self, *args: Any):
+        self.close()
 
     def _update_animal_recordings_metadata_files(
         self, downloaded_recordings_metadata: pd.DataFrame
@@ -165,6 +1260,27 @@ class DownloadManager:
         downloaded_recordings_metadata
             The metadata dataframe for the downloaded recordings.
         """
+        # Write the metadata of all animals through the single metadata writer, which
+        # batches it with the updates of concurrent downloads
+        self.metadata_writer.write(
+            self._split_metadata_per_animal(downloaded_recordings_metadata)
+        )
+
+    def _split_metadata_per_animal(
+        self, downloaded_recordings_metadata: pd.DataFrame
+    ) -> dict[str, pd.DataFrame]:
+        """Split the metadata of the downloaded recordings per animal.
+
+        Parameters
+        ----------
+        downloaded_recordings_metadata
+            The metadata dataframe for the downloaded recordings.
+
+        Returns
+        -------
+        dict[str, pd.DataFrame]
+            The metadata rows of each animal, keyed by animal folder name.
+        """
 
         # Get the list of animals
         animals = (
@@ -173,54 +1289,12 @@ class DownloadManager:
             else []
         )
 
-        # For each animal, update its metadata file
-        for animal in animals:
-            # Get the animal folder name
-            animal_folder_name = self._generate_animal_folder_name(animal)
-
-            # Get the animal metadata file path
-            animal_metadata_file_path = join(
-                self.data_base_path,
-                animal_folder_name,
-                f"{animal_folder_name}_recording_metadata.csv",
-            )
-
-            # If a previous metadata file exists, append the new metadata to it
-            if exists(animal_metadata_file_path):
-                # Get the animal metadata file
-                animal_metadata = pd.read_csv(animal_metadata_file_path, dtype="object")  # type: ignore
-
-                # Append the new metadata to the animal metadata file
-                animal_metadata = pd.concat(  # type: ignore
-                    [
-                        animal_metadata,
-                        downloaded_recordings_metadata[
-                            downloaded_recordings_metadata["english_name"] == animal
-                        ],  # type: ignore
-                    ],
-                    ignore_index=True,
-                )
-            else:
-                # If no previous metadata file exists, create a new dataframe
-                animal_metadata = downloaded_recordings_metadata[  # type: ignore
-                    downloaded_recordings_metadata["english_name"] == animal
-                ]
-
-            # Temporarily set the recording_id column to be of type int64 for sorting
-            animal_metadata.loc[:, "recording_id"] = animal_metadata["recording_id"].astype(  # type: ignore
-                np.int64
-            )
-
-            # Sort the animal metadata file by recording id
-            animal_metadata = animal_metadata.sort_values(by=["recording_id"])  # type: ignore
-
-            # Reset the recording_id column to be of type object
-            animal_metadata["recording_id"] = animal_metadata["recording_id"].astype(  # type: ignore
-                "object"
-            )
-
-            # Update the animal metadata file
-            animal_metadata.to_csv(animal_metadata_file_path, index=False)  # type: ignore
+        return {
+            self._generate_animal_folder_name(animal): downloaded_recordings_metadata[
+                downloaded_recordings_metadata["english_name"] == animal
+            ]  # type: ignore
+            for animal in animals
+        }
 
     def _detect_already_downloaded_recordings(
         self, recordings: list[Recording]
@@ -240,6 +1314,20 @@ class DownloadManager:
         """
         detected_already_downloaded_recordings: dict[str, str] = {}
 
+        # Look up all recordings at once in the download index
+        if self.download_index is not None:
+            statuses = self.download_index.lookup(
+                int(recording.recording_id) for recording in recordings
+            )
+            for recording in recordings:
+                detected_already_downloaded_recordings[str(recording.recording_id)] = (
+                    "already_downloaded"
+                    if statuses.get(int(recording.recording_id)) == "pass"
+                    else "new"
+                )
+
+            return detected_already_downloaded_recordings
+
         for recording in recordings:
             species_folder_name = self._generate_animal_folder_name(
                 recording.english_name
@@ -263,7 +1351,7 @@ class DownloadManager:
         return detected_already_downloaded_recordings
 
     def _generate_downloaded_recordings_metadata(
-        self, recordings: list[Recording], download_pass_or_fail: dict[str, str]
+        self, recordings: list[Recording], download_results: dict[str, DownloadResult]
     ) -> pd.DataFrame:
         """Generate the metadata dataframe for the downloaded recordings.
 
@@ -271,8 +1359,9 @@ class DownloadManager:
         ----------
         recordings
             The list of recordings we want to generate the metadata dataframe for.
-        download_pass_or_fail
-            A dictionary containing the downloaded status of each recording ("pass" or "fail").
+        download_results
+            A dictionary containing the DownloadResult of each recording, keyed by
+            recording id.
 
         Returns
         -------
@@ -280,14 +1369,43 @@ class DownloadManager:
             The metadata dataframe for the downloaded recordings.
         """
 
-        downloaded_recording_metadata = pd.DataFrame({})
+        # Only generate recording information for downloaded recordings
+        downloaded_recordings = [
+            recording
+            for recording in recordings
+            if download_results[str(recording.recording_id)].status == "pass"
+        ]
+        downloaded_recordings_metadata = Recording.to_dataframe(downloaded_recordings)
 
-        for recording in recordings:
-            # Only generate recording information for downloaded recordings
-            if download_pass_or_fail[str(recording.recording_id)] == "pass":
-                downloaded_recording_metadata = pd.concat([downloaded_recording_metadata, recording.to_dataframe_row()])  # type: ignore
+        downloaded_recording_ids = [
+            str(recording.recording_id) for recording in downloaded_recordings
+        ]
+
+        # Add the transcoded files, waiting for the transcodings that are still running
+        if self.transcoder is not None and len(downloaded_recordings) > 0:
+            transcodings = self.transcoder.collect(downloaded_recording_ids)
+            downloaded_recordings_metadata["transcoded_file_path"] = [
+                transcodings.get(recording_id, (None, None))[0]
+                for recording_id in downloaded_recording_ids
+            ]
+            downloaded_recordings_metadata["transcoded_duration"] = [
+                transcodings.get(recording_id, (None, None))[1]
+                for recording_id in downloaded_recording_ids
+            ]
+
+        # Add the feature files, waiting for the extractions that are still running
+        if self.feature_extractor is not None and len(downloaded_recordings) > 0:
+            extractions = self.feature_extractor.collect(downloaded_recording_ids)
+            downloaded_recordings_metadata["feature_file_path"] = [
+                extractions.get(recording_id, (None, None))[0]
+                for recording_id in downloaded_recording_ids
+            ]
+            downloaded_recordings_metadata["feature_num_frames"] = [
+                extractions.get(recording_id, (None, None))[1]
+                for recording_id in downloaded_recording_ids
+            ]
 
-        return downloaded_recording_metadata
+        return downloaded_recordings_metadata
 
     def _generate_animal_folder_name(self, animal_english_name: str) -> str:
         """Generate the download folder name for the animal recordings based on their english name.
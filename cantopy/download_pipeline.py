@@ -0,0 +1,437 @@
+from queue import Empty, Full, Queue
+from typing import TYPE_CHECKING, Any, Callable
+import re
+import threading
+import time
+from cantopy.download_result import DownloadResult
+from cantopy.fetch_manager import FetchManager
+from cantopy.http_session import HttpSession
+from cantopy.response_cache import ResponseCache
+from cantopy.xenocanto_components import Query, Recording, RecordingBatch
+from cantopy.xenocanto_components.recording_filter import Predicate, as_predicate
+
+if TYPE_CHECKING:
+    from cantopy.download_manager import DownloadManager
+
+
+# Marks the end of the items put on a pipeline queue
+_END_OF_STREAM = object()
+
+# The format of a valid XenoCanto upload date
+_UPLOAD_DATE_PATTERN = re.compile(r"^\d{4}-\d{2}-\d{2}$")
+
+
+class DownloadPipeline:
+    """A pipelined fetch-and-download run of a query for a DownloadManager.
+
+    The pipeline runs its stages concurrently, connected by bounded queues:
+
+    1. Page fetching: the result pages of the query are fetched with
+       :meth:`FetchManager.iter_query <cantopy.fetch_manager.FetchManager.iter_query>`
+       and put on the "pages" queue.
+    2. Dedup filtering: the recordings of each page that match the recording filter,
+       belong to the shard of the DownloadManager, are not downloaded yet, and were not
+       already seen in this run, are put on the "recordings" queue.
+    3. Audio downloading: max_workers threads of the DownloadManager download the
+       recordings and put the download results on the "results" queue.
+    4. Metadata writing: the metadata of the downloaded recordings is written to the
+       metadata store in batches, once a batch is full or its oldest recording has
+       waited for metadata_flush_interval seconds, and once more when the run ends.
+
+    The queue bounds keep a fast stage from running too far ahead of a slow one. Use
+    :attr:`queue_depths` while the pipeline runs, and :attr:`peak_queue_depths`
+    afterwards, to see which stage is the bottleneck: a full queue means the stages
+    after it can't keep up, an empty queue means the stages before it are too slow.
+
+    Attributes
+    ----------
+    download_manager
+        The DownloadManager whose data folder the recordings are downloaded into.
+    queue_size
+        The maximum number of items on each queue between the stages.
+    metadata_batch_size
+        The maximum number of recordings whose metadata is written at once.
+    metadata_flush_interval
+        The maximum time in seconds that the metadata of a downloaded recording waits
+        for its batch to fill up before it is written.
+    peak_queue_depths
+        The maximum number of items that were on each queue during the run.
+    max_upload_date
+        The latest upload date ("YYYY-MM-DD") of the fetched recordings, None if no
+        recording with a valid upload date was fetched.
+    max_recording_id
+        The highest id of the fetched recordings, None if no recording was fetched.
+    first_failed_upload_date
+        The earliest upload date of the recordings whose download failed, None if no
+        download failed.
+    """
+
+    def __init__(
+        self,
+        download_manager: "DownloadManager",
+        queue_size: int | None = None,
+        metadata_batch_size: int = 100,
+        metadata_flush_interval: float = 10.0,
+    ):
+        """Create a DownloadPipeline.
+
+        Parameters
+        ----------
+        download_manager
+            The DownloadManager whose data folder the recordings are downloaded into.
+        queue_size : optional
+            The maximum number of items on each queue between the stages, by default
+            twice the number of download workers of the DownloadManager.
+        metadata_batch_size : optional
+            The maximum number of recordings whose metadata is written at once, by
+            default 100.
+        metadata_flush_interval : optional
+            The maximum time in seconds that the metadata of a downloaded recording
+            waits for its batch to fill up before it is written, by default 10.0. Every
+            write rewrites the metadata files of the species in the batch, so flushing
+            too often makes writing the metadata of a large query quadratic in its
+            number of recordings.
+        """
+        self.download_manager = download_manager
+        self.queue_size = (
+            queue_size if queue_size is not None else 2 * download_manager.max_workers
+        )
+        self.metadata_batch_size = metadata_batch_size
+        self.metadata_flush_interval = metadata_flush_interval
+
+        self._queues: dict[str, Queue[Any]] = {
+            "pages": Queue(maxsize=self.queue_size),
+            "recordings": Queue(maxsize=self.queue_size),
+            "results": Queue(maxsize=self.queue_size),
+        }
+        self.peak_queue_depths = {name: 0 for name in self._queues}
+
+        self._stop_event = threading.Event()
+        self._errors: list[BaseException] = []
+        self._download_results: dict[str, DownloadResult] = {}
+
+        self.max_upload_date: str | None = None
+        self.max_recording_id: int | None = None
+        self.first_failed_upload_date: str | None = None
+
+    @property
+    def queue_depths(self) -> dict[str, int]:
+        """The current number of items on each queue between the stages.
+
+        Returns
+        -------
+        dict[str, int]
+            The depth of the "pages", "recordings" and "results" queues.
+        """
+        return {name: queue.qsize() for name, queue in self._queues.items()}
+
+    def run(
+        self,
+        query: Query,
+        max_pages: int | None = None,
+        read_ahead: int = 1,
+        session: HttpSession | None = None,
+        cache: ResponseCache | None = None,
+        recording_filter: Predicate | str | None = None,
+    ) -> dict[str, DownloadResult]:
+        """Fetch the result pages of a query and download their recordings.
+
+        Parameters
+        ----------
+        query
+            The query whose recordings we want to download.
+        max_pages : optional
+            The maximum number of result pages to fetch, by default None (all pages).
+        read_ahead : optional
+            The number of result pages fetched ahead of the dedup stage, by default 1.
+        session : optional
+            The HttpSession to fetch the result pages over, by default the session of
+            the DownloadManager.
+        cache : optional
+            The ResponseCache in which the fetched result pages are cached, by default
+            None (no caching).
+        recording_filter : optional
+            A Predicate or filter expression that the recordings must match to be
+            downloaded, by default None (download all recordings). It is evaluated on
+            each result page in the dedup filtering stage.
+
+        Returns
+        -------
+        dict[str, DownloadResult]
+            The DownloadResult of each matching recording that was not downloaded
+            before, keyed by recording id.
+
+        Raises
+        ------
+        Exception
+            The first error raised by one of the stages, after all stages are stopped.
+        """
+        session = session if session is not None else self.download_manager.session
+        num_download_workers = max(self.download_manager.max_workers, 1)
+
+        threads = [
+            threading.Thread(
+                target=self._run_stage,
+                args=(
+                    self._fetch_pages,
+                    query,
+                    max_pages,
+                    read_ahead,
+                    session,
+                    cache,
+                ),
+            ),
+            threading.Thread(
+                target=self._run_stage,
+                args=(
+                    self._filter_recordings,
+                    num_download_workers,
+                    (
+                        as_predicate(recording_filter)
+                        if recording_filter is not None
+                        else None
+                    ),
+                ),
+            ),
+            threading.Thread(
+                target=self._run_stage,
+                args=(self._write_metadata, num_download_workers),
+            ),
+        ]
+        threads.extend(
+            threading.Thread(target=self._run_stage, args=(self._download_recordings,))
+            for _ in range(num_download_workers)
+        )
+
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+
+        if self._errors:
+            raise self._errors[0]
+
+        return self._download_results
+
+    def _run_stage(self, stage: Callable[..., None], *args: Any):
+        """Run a pipeline stage, stopping the whole pipeline if it fails.
+
+        Parameters
+        ----------
+        stage
+            The stage to run.
+        *args
+            The arguments to pass to the stage.
+        """
+        try:
+            stage(*args)
+        except BaseException as error:
+            self._errors.append(error)
+            self._stop_event.set()
+
+    def _fetch_pages(
+        self,
+        query: Query,
+        max_pages: int | None,
+        read_ahead: int,
+        session: HttpSession,
+        cache: ResponseCache | None,
+    ):
+        """Stage 1: fetch the result pages of the query onto the "pages" queue."""
+        result_pages = FetchManager.iter_query(
+            query,
+            max_pages=max_pages,
+            read_ahead=read_ahead,
+            session=session,
+            cache=cache,
+        )
+        try:
+            for result_page in result_pages:
+                if not self._put("pages", result_page):
+                    return
+        finally:
+            result_pages.close()
+
+        self._put("pages", _END_OF_STREAM)
+
+    def _filter_recordings(
+        self, num_download_workers: int, recording_filter: Predicate | None
+    ):
+        """Stage 2: put the new recordings of each page onto the "recordings" queue."""
+        seen_recording_ids: set[str] = set()
+
+        while (result_page := self._get("pages")) is not _END_OF_STREAM:
+            if result_page is None:
+                return
+
+            self._update_high_water_marks(result_page.recording_batch)
+            if recording_filter is not None:
+                result_page = result_page.filter(recording_filter)
+
+            recordings = list(result_page.recording_batch)
+            detected_already_downloaded_recordings = (
+                self.download_manager._detect_already_downloaded_recordings(  # type: ignore
+                    recordings
+                )
+            )
+
+            for recording in recordings:
+                # Result pages can overlap when new recordings are uploaded during the run,
+                # and sharded managers only download the recordings of their own shard
+                if (
+                    recording.recording_id in seen_recording_ids
+                    or not self.download_manager.is_in_shard(recording.recording_id)
+                ):
+                    continue
+                seen_recording_ids.add(recording.recording_id)
+
+                if (
+                    detected_already_downloaded_recordings[recording.recording_id]
+                    == "new"
+                    and not self._put("recordings", recording)
+                ):
+                    return
+
+        # Signal the end of the stream to every download worker
+        for _ in range(num_download_workers):
+            self._put("recordings", _END_OF_STREAM)
+
+    def _update_high_water_marks(self, recording_batch: RecordingBatch):
+        """Update the latest upload date and highest id of the fetched recordings.
+
+        Parameters
+        ----------
+        recording_batch
+            The recordings of a fetched result page.
+        """
+        if not len(recording_batch):
+            return
+
+        upload_dates = [
+            upload_date
+            for upload_date in recording_batch.columns["upload_date"]
+            if _UPLOAD_DATE_PATTERN.match(upload_date)
+        ]
+        if upload_dates and (
+            self.max_upload_date is None or max(upload_dates) > self.max_upload_date
+        ):
+            self.max_upload_date = max(upload_dates)
+
+        max_recording_id = int(recording_batch.recording_ids.max())
+        if self.max_recording_id is None or max_recording_id > self.max_recording_id:
+            self.max_recording_id = max_recording_id
+
+    def _download_recordings(self):
+        """Stage 3: download the recordings and put their results on the "results" queue."""
+        while (recording := self._get("recordings")) is not _END_OF_STREAM:
+            if recording is None:
+                return
+
+            result = self.download_manager.download_recording(recording)
+            if not self._put("results", (recording, result)):
+                return
+
+        self._put("results", _END_OF_STREAM)
+
+    def _write_metadata(self, num_download_workers: int):
+        """Stage 4: write the metadata of the downloaded recordings in batches."""
+        batch: list[Recording] = []
+        batch_start_time = 0.0
+        num_finished_download_workers = 0
+
+        while num_finished_download_workers < num_download_workers:
+            item = self._get("results")
+            if item is None:
+                # Still write the metadata of the recordings that were downloaded
+                break
+
+            if item is _END_OF_STREAM:
+                num_finished_download_workers += 1
+            else:
+                recording, result = item
+                self._download_results[result.recording_id] = result
+                if result.status == "pass":
+                    if not batch:
+                        batch_start_time = time.monotonic()
+                    batch.append(recording)
+                elif _UPLOAD_DATE_PATTERN.match(recording.upload_date) and (
+                    self.first_failed_upload_date is None
+                    or recording.upload_date < self.first_failed_upload_date
+                ):
+                    self.first_failed_upload_date = recording.upload_date
+
+            # Write a batch when it is full, or when its oldest recording waited too long
+            if batch and (
+                len(batch) >= self.metadata_batch_size
+                or time.monotonic() - batch_start_time >= self.metadata_flush_interval
+            ):
+                self._write_metadata_batch(batch)
+                batch = []
+
+        if batch:
+            self._write_metadata_batch(batch)
+
+    def _write_metadata_batch(self, recordings: list[Recording]):
+        """Write the metadata of a batch of downloaded recordings.
+
+        Parameters
+        ----------
+        recordings
+            The downloaded recordings.
+        """
+        self.download_manager._update_animal_recordings_metadata_files(  # type: ignore
+            self.download_manager._generate_downloaded_recordings_metadata(  # type: ignore
+                recordings, self._download_results
+            )
+        )
+
+    def _put(self, queue_name: str, item: Any) -> bool:
+        """Put an item on a queue, waiting for free space unless the pipeline is stopped.
+
+        Parameters
+        ----------
+        queue_name
+            The name of the queue.
+        item
+            The item to put on the queue.
+
+        Returns
+        -------
+        bool
+            Whether the item was put on the queue, False if the pipeline was stopped.
+        """
+        queue = self._queues[queue_name]
+        while not self._stop_event.is_set():
+            try:
+                queue.put(item, timeout=0.1)
+            except Full:
+                continue
+
+            self.peak_queue_depths[queue_name] = max(
+                self.peak_queue_depths[queue_name], queue.qsize()
+            )
+            return True
+
+        return False
+
+    def _get(self, queue_name: str) -> Any:
+        """Get an item from a queue, waiting for one unless the pipeline is stopped.
+
+        Parameters
+        ----------
+        queue_name
+            The name of the queue.
+
+        Returns
+        -------
+        Any
+            The item, or None if the pipeline was stopped.
+        """
+        queue = self._queues[queue_name]
+        while not self._stop_event.is_set():
+            try:
+                return queue.get(timeout=0.1)
+            except Empty:
+                continue
+
+        return None
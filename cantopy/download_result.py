@@ -0,0 +1,63 @@
+class DownloadResult:
+    """The result of downloading a single recording.
+
+    Attributes
+    ----------
+    recording_id
+        The id of the downloaded recording.
+    status
+        The download status of the recording ("pass" or "fail").
+    num_bytes
+        The number of bytes received from the server, over all download attempts.
+    duration
+        The time in seconds spent on downloading the recording, including the
+        backoff between retries.
+    http_status
+        The HTTP status code of the last download response, None if no response
+        was received.
+    error
+        A description of the error that made the download fail. For a passed download,
+        a description of the errors while indexing or post-processing the downloaded
+        file, None if there were none.
+    """
+
+    def __init__(
+        self,
+        recording_id: str,
+        status: str,
+        num_bytes: int = 0,
+        duration: float = 0.0,
+        http_status: int | None = None,
+        error: str | None = None,
+    ):
+        """Create a DownloadResult.
+
+        Parameters
+        ----------
+        recording_id
+            The id of the downloaded recording.
+        status
+            The download status of the recording ("pass" or "fail").
+        num_bytes : optional
+            The number of bytes received from the server, by default 0.
+        duration : optional
+            The time in seconds spent on downloading the recording, by default 0.0.
+        http_status : optional
+            The HTTP status code of the last download response, by default None.
+        error : optional
+            A description of the error that made the download fail, or of the errors
+            after a passed download, by default None.
+        """
+        self.recording_id = recording_id
+        self.status = status
+        self.num_bytes = num_bytes
+        self.duration = duration
+        self.http_status = http_status
+        self.error = error
+
+    def __repr__(self) -> str:
+        return (
+            f"DownloadResult(recording_id={self.recording_id!r}, status={self.status!r}, "
+            f"num_bytes={self.num_bytes}, duration={self.duration:.3f}, "
+            f"http_status={self.http_status}, error={self.error!r})"
+        )
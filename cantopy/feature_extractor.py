@@ -0,0 +1,380 @@
+from os.path import basename, dirname, exists, join, splitext
+from typing import Any
+import hashlib
+import json
+import os
+import subprocess
+import wave
+import numpy as np
+from cantopy.process_pool_stage import ProcessPoolStage
+
+
+def load_audio(path: str, sample_rate: int, ffmpeg_path: str = "ffmpeg") -> np.ndarray:
+    """Load an audio file as mono samples at a given sample rate.
+
+    WAV files are read directly. Other formats, like the MP3 files served by
+    XenoCanto, are decoded with ffmpeg.
+
+    Parameters
+    ----------
+    path
+        The path of the audio file.
+    sample_rate
+        The sample rate in Hz of the returned samples.
+    ffmpeg_path : optional
+        The path of the ffmpeg executable used to decode non-WAV files, by default
+        "ffmpeg".
+
+    Returns
+    -------
+    np.ndarray
+        The float32 samples of the audio, scaled to [-1, 1].
+
+    Raises
+    ------
+    subprocess.CalledProcessError
+        If ffmpeg fails to decode the audio file.
+    """
+    with open(path, "rb") as file:
+        is_wave_file = file.read(4) == b"RIFF"
+
+    if not is_wave_file:
+        decoded_audio = subprocess.run(
+            [
+                ffmpeg_path,
+                "-nostdin",
+                "-v",
+                "error",
+                "-i",
+                path,
+                "-ac",
+                "1",
+                "-ar",
+                str(sample_rate),
+                "-f",
+                "s16le",
+                "-",
+            ],
+            check=True,
+            capture_output=True,
+        ).stdout
+        return np.frombuffer(decoded_audio, dtype="<i2").astype(np.float32) / 32768
+
+    with wave.open(path, "rb") as wave_file:
+        num_channels = wave_file.getnchannels()
+        sample_width = wave_file.getsampwidth()
+        file_sample_rate = wave_file.getframerate()
+        frames = wave_file.readframes(wave_file.getnframes())
+
+    # Step 1: Convert the PCM frames to floats and mix the channels down to mono
+    if sample_width == 1:
+        samples = (np.frombuffer(frames, dtype=np.uint8).astype(np.float32) - 128) / 128
+    else:
+        samples = np.frombuffer(frames, dtype=f"<i{sample_width}").astype(
+            np.float32
+        ) / float(2 ** (8 * sample_width - 1))
+    samples = samples.reshape(-1, num_channels).mean(axis=1)
+
+    # Step 2: Resample to the requested sample rate by linear interpolation
+    if file_sample_rate != sample_rate and len(samples) > 0:
+        num_resampled = int(round(len(samples) * sample_rate / file_sample_rate))
+        samples = np.interp(
+            np.arange(num_resampled) * (file_sample_rate / sample_rate),
+            np.arange(len(samples)),
+            samples,
+        ).astype(np.float32)
+
+    return samples
+
+
+def compute_log_mel_spectrogram(
+    samples: np.ndarray,
+    sample_rate: int,
+    n_fft: int,
+    hop_length: int,
+    n_mels: int,
+    f_min: float,
+    f_max: float,
+    log_offset: float,
+) -> np.ndarray:
+    """Compute the log-mel spectrogram of mono audio samples.
+
+    Parameters
+    ----------
+    samples
+        The mono audio samples.
+    sample_rate
+        The sample rate in Hz of the samples.
+    n_fft
+        The length in samples of each analysis window.
+    hop_length
+        The number of samples between the starts of consecutive windows.
+    n_mels
+        The number of mel bands.
+    f_min
+        The lowest frequency in Hz of the mel bands.
+    f_max
+        The highest frequency in Hz of the mel bands.
+    log_offset
+        The offset added to the mel energies before taking the logarithm.
+
+    Returns
+    -------
+    np.ndarray
+        The float32 log-mel spectrogram, with shape (n_mels, number of frames).
+    """
+    # Step 1: Pad the samples so the windows are centered on multiples of hop_length
+    padded_samples = np.pad(samples.astype(np.float32), n_fft // 2)
+    if len(padded_samples) < n_fft:
+        padded_samples = np.pad(padded_samples, (0, n_fft - len(padded_samples)))
+
+    # Step 2: Compute the power spectrum of each windowed frame
+    frames = np.lib.stride_tricks.sliding_window_view(padded_samples, n_fft)[
+        ::hop_length
+    ]
+    power_spectrum = (
+        np.abs(np.fft.rfft(frames * np.hanning(n_fft).astype(np.float32), axis=1))
+        ** 2
+    )
+
+    # Step 3: Project the power spectrum onto triangular filters evenly spaced on
+    # the mel scale
+    mel_points = np.linspace(_hz_to_mel(f_min), _hz_to_mel(f_max), n_mels + 2)
+    filter_edges = _mel_to_hz(mel_points)
+    fft_frequencies = np.fft.rfftfreq(n_fft, d=1 / sample_rate)
+    lower_slopes = (fft_frequencies[None, :] - filter_edges[:-2, None]) / (
+        filter_edges[1:-1, None] - filter_edges[:-2, None]
+    )
+    upper_slopes = (filter_edges[2:, None] - fft_frequencies[None, :]) / (
+        filter_edges[2:, None] - filter_edges[1:-1, None]
+    )
+    mel_filters = np.maximum(0, np.minimum(lower_slopes, upper_slopes))
+
+    return np.log(mel_filters @ power_spectrum.T + log_offset).astype(np.float32)
+
+
+def extract_features(
+    recording_path: str,
+    feature_path: str,
+    parameters: dict[str, Any],
+    ffmpeg_path: str = "ffmpeg",
+) -> int:
+    """Compute the log-mel spectrogram of a recording and save it as a .npy file.
+
+    If the feature file already exists, it is reused instead of computed again. The
+    spectrogram is first written to a temporary file, which is moved to the feature
+    path once it is complete.
+
+    Parameters
+    ----------
+    recording_path
+        The path of the recording.
+    feature_path
+        The path of the .npy feature file.
+    parameters
+        The keyword arguments of :func:`compute_log_mel_spectrogram`, apart from the
+        samples.
+    ffmpeg_path : optional
+        The path of the ffmpeg executable used to decode non-WAV files, by default
+        "ffmpeg".
+
+    Returns
+    -------
+    int
+        The number of frames of the spectrogram.
+    """
+    if exists(feature_path):
+        return np.load(feature_path, mmap_mode="r").shape[1]
+
+    log_mel_spectrogram = compute_log_mel_spectrogram(
+        load_audio(recording_path, parameters["sample_rate"], ffmpeg_path),
+        **parameters,
+    )
+
+    # np.save adds the .npy extension to paths that don't have it yet
+    temporary_feature_path = f"{feature_path}.part.npy"
+    np.save(temporary_feature_path, log_mel_spectrogram)
+    os.replace(temporary_feature_path, feature_path)
+
+    return log_mel_spectrogram.shape[1]
+
+
+def _hz_to_mel(frequency: Any) -> Any:
+    """Convert a frequency in Hz to the (HTK) mel scale."""
+    return 2595 * np.log10(1 + np.asarray(frequency) / 700)
+
+
+def _mel_to_hz(mel: Any) -> Any:
+    """Convert a frequency on the (HTK) mel scale to Hz."""
+    return 700 * (10 ** (np.asarray(mel) / 2595) - 1)
+
+
+class FeatureExtractor(ProcessPoolStage):
+    """A post-download stage that precomputes log-mel spectrograms of recordings.
+
+    The spectrograms are computed with NumPy in a process pool and saved as .npy files
+    next to the audio, as ``<recording id>.logmel-<parameter hash>.npy``. The hash
+    covers all spectrogram parameters, so changing a parameter writes new feature files
+    instead of reusing stale ones. The files can be memory-mapped with
+    ``np.load(path, mmap_mode="r")`` without decoding any audio.
+
+    A :class:`DownloadManager <cantopy.download_manager.DownloadManager>` created with a
+    feature extractor submits every recording to it as soon as its download finishes,
+    and records the feature file path and number of frames in the
+    ``feature_file_path`` and ``feature_num_frames`` metadata columns.
+
+    Attributes
+    ----------
+    sample_rate
+        The sample rate in Hz the audio is resampled to.
+    n_fft
+        The length in samples of each analysis window.
+    hop_length
+        The number of samples between the starts of consecutive windows.
+    n_mels
+        The number of mel bands.
+    f_min
+        The lowest frequency in Hz of the mel bands.
+    f_max
+        The highest frequency in Hz of the mel bands.
+    log_offset
+        The offset added to the mel energies before taking the logarithm.
+    max_workers
+        The maximum number of worker processes.
+    ffmpeg_path
+        The path of the ffmpeg executable used to decode MP3 recordings.
+    parameter_hash
+        The hash of the spectrogram parameters, used in the feature file names.
+    """
+
+    def __init__(
+        self,
+        sample_rate: int = 22050,
+        n_fft: int = 1024,
+        hop_length: int = 512,
+        n_mels: int = 64,
+        f_min: float = 0.0,
+        f_max: float | None = None,
+        log_offset: float = 1e-6,
+        max_workers: int | None = None,
+        ffmpeg_path: str = "ffmpeg",
+    ):
+        """Create a FeatureExtractor.
+
+        Parameters
+        ----------
+        sample_rate : optional
+            The sample rate in Hz the audio is resampled to, by default 22050.
+        n_fft : optional
+            The length in samples of each analysis window, by default 1024.
+        hop_length : optional
+            The number of samples between the starts of consecutive windows, by
+            default 512.
+        n_mels : optional
+            The number of mel bands, by default 64.
+        f_min : optional
+            The lowest frequency in Hz of the mel bands, by default 0.0.
+        f_max : optional
+            The highest frequency in Hz of the mel bands, by default half the sample
+            rate.
+        log_offset : optional
+            The offset added to the mel energies before taking the logarithm, by
+            default 1e-6.
+        max_workers : optional
+            The maximum number of worker processes, by default the number of CPUs.
+        ffmpeg_path : optional
+            The path of the ffmpeg executable used to decode MP3 recordings, by
+            default "ffmpeg". WAV files are read without ffmpeg.
+        """
+        super().__init__(max_workers)
+
+        self.sample_rate = sample_rate
+        self.n_fft = n_fft
+        self.hop_length = hop_length
+        self.n_mels = n_mels
+        self.f_min = f_min
+        self.f_max = f_max if f_max is not None else sample_rate / 2
+        self.log_offset = log_offset
+        self.ffmpeg_path = ffmpeg_path
+
+        self.parameter_hash = hashlib.sha256(
+            json.dumps(self.parameters, sort_keys=True).encode()
+        ).hexdigest()[:12]
+
+    @property
+    def parameters(self) -> dict[str, Any]:
+        """The parameters of the log-mel spectrograms.
+
+        Returns
+        -------
+        dict[str, Any]
+            The spectrogram parameters, keyed by name.
+        """
+        return {
+            "sample_rate": self.sample_rate,
+            "n_fft": self.n_fft,
+            "hop_length": self.hop_length,
+            "n_mels": self.n_mels,
+            "f_min": float(self.f_min),
+            "f_max": float(self.f_max),
+            "log_offset": self.log_offset,
+        }
+
+    def get_feature_path(self, recording_path: str) -> str:
+        """Get the path of the feature file of a recording.
+
+        Parameters
+        ----------
+        recording_path
+            The path of the downloaded recording.
+
+        Returns
+        -------
+        str
+            The path of the .npy feature file, next to the downloaded recording.
+        """
+        recording_name = splitext(basename(recording_path))[0]
+        return join(
+            dirname(recording_path),
+            f"{recording_name}.logmel-{self.parameter_hash}.npy",
+        )
+
+    def submit(self, recording_id: str, recording_path: str):
+        """Start computing the features of a downloaded recording in the process pool.
+
+        Parameters
+        ----------
+        recording_id
+            The id of the recording.
+        recording_path
+            The path of the downloaded recording.
+        """
+        feature_path = self.get_feature_path(recording_path)
+        self._submit(
+            recording_id,
+            feature_path,
+            extract_features,
+            recording_path,
+            feature_path,
+            self.parameters,
+            self.ffmpeg_path,
+        )
+
+    def collect(
+        self, recording_ids: list[str]
+    ) -> dict[str, tuple[str | None, int | None]]:
+        """Wait for the feature extraction of recordings that were submitted before.
+
+        Parameters
+        ----------
+        recording_ids
+            The ids of the recordings.
+
+        Returns
+        -------
+        dict[str, tuple[str | None, int | None]]
+            The path and number of frames of the feature file of each submitted
+            recording, or (None, None) if computing its features failed. Recordings
+            that were not submitted are left out.
+        """
+        return super().collect(recording_ids)
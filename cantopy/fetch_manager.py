@@ -1,5 +1,12 @@
-import requests
+from collections import deque
+from concurrent.futures import Future, ThreadPoolExecutor, as_completed
+from typing import Iterator
+import json
+import time
 import urllib.parse
+import requests
+from cantopy.http_session import HttpSession
+from cantopy.response_cache import ResponseCache
 from cantopy.xenocanto_components import Query, QueryResult, ResultPage
 
 
@@ -14,8 +21,18 @@ class FetchManager:
     # The base url to the XenoCanto API
     _base_url = "https://www.xeno-canto.org/api/2/recordings"
 
+    # The HttpSession that is used when no session is passed explicitly
+    _default_session = HttpSession()
+
     @classmethod
-    def send_query(cls, query: Query, max_pages: int = 1) -> QueryResult:
+    def send_query(
+        cls,
+        query: Query,
+        max_pages: int = 1,
+        max_workers: int = 1,
+        session: HttpSession | None = None,
+        cache: ResponseCache | None = None,
+    ) -> QueryResult:
         """Send a query to the Xeno Canto API.
 
         Parameters
@@ -29,6 +46,19 @@ class FetchManager:
             XenoCanto divides the result up into a number of pages, which we need to
             fetch seperately. If for example, we set that max_pages attribute to 5, this
             method will only fetch the first 5 result pages.
+        max_workers : optional
+            The maximum number of result pages to fetch concurrently, by default 1.
+            The first page is always fetched on its own to determine the number of
+            available pages, after which the remaining pages are requested in parallel
+            while keeping at most max_workers requests in flight.
+        session : optional
+            The HttpSession to send the requests over. By default, a session shared by
+            all FetchManager calls is used. Pass a session with a pool_maxsize of at
+            least max_workers to avoid waiting on free connections.
+        cache : optional
+            The ResponseCache in which the fetched result pages are cached, by default
+            None (no caching). Pages that are fresh in the cache are not requested
+            again, stale pages are revalidated with the server.
 
         Returns
         -------
@@ -38,20 +68,273 @@ class FetchManager:
 
         # We need to first send an initial query to determine the number of available result pages
         query_str = query.to_string()
-        query_metadata, result_page_1 = cls._fetch_result_page(query_str, page=1)
+        session = session if session is not None else cls._default_session
+        query_metadata, result_page_1 = cls._fetch_result_page(
+            query_str, page=1, session=session, cache=cache
+        )
 
         result_pages: list[ResultPage] = []
         result_pages.append(result_page_1)
 
         # Fetch the other requested result pages
-        for i in range(1, min(max_pages, int(query_metadata["available_num_pages"]))):
-            result_pages.append(cls._fetch_result_page(query_str, page=i + 1)[1])
+        remaining_pages = range(
+            2, min(max_pages, int(query_metadata["available_num_pages"])) + 1
+        )
+        result_pages.extend(
+            cls._fetch_result_pages(
+                query_str, remaining_pages, max_workers, session, cache
+            )
+        )
 
         return QueryResult(query_metadata, result_pages)
 
+    @classmethod
+    def send_queries(
+        cls,
+        queries: list[Query],
+        max_pages: int = 1,
+        max_workers: int = 4,
+        session: HttpSession | None = None,
+        cache: ResponseCache | None = None,
+    ) -> QueryResult:
+        """Send multiple queries to the Xeno Canto API and merge their results.
+
+        All queries are sent concurrently, sharing a single limit on the number of
+        requests in flight. The first page of every query is requested first, and the
+        remaining pages of a query are requested as soon as its first page tells how
+        many pages are available. The results are merged with :meth:`QueryResult.merge
+        <cantopy.xenocanto_components.QueryResult.merge>`, so recordings returned by
+        multiple queries only occur once and can be downloaded in a single pass with
+        :meth:`DownloadManager.download_all_recordings_in_queryresult
+        <cantopy.download_manager.DownloadManager.download_all_recordings_in_queryresult>`.
+
+        Parameters
+        ----------
+        queries
+            The queries to send to the Xeno Canto API.
+        max_pages : optional
+            The maximum number of pages of recordings to fetch per query, by default 1.
+        max_workers : optional
+            The maximum number of result pages to fetch concurrently, across all
+            queries, by default 4.
+        session : optional
+            The HttpSession to send the requests over, by default the shared session.
+            Pass a session with a pool_maxsize of at least max_workers to avoid waiting
+            on free connections.
+        cache : optional
+            The ResponseCache in which the fetched result pages are cached, by default
+            None (no caching).
+
+        Returns
+        -------
+        QueryResult
+            The merged QueryResult of all queries, de-duplicated by recording id. Its
+            ``query_provenance`` attribute maps each recording id to the positions in
+            queries of the queries that returned it.
+        """
+        query_strs = [query.to_string() for query in queries]
+        session = session if session is not None else cls._default_session
+
+        with ThreadPoolExecutor(max_workers=max(1, max_workers)) as executor:
+            # Step 1: Request the first page of every query
+            first_page_futures = {
+                executor.submit(
+                    cls._fetch_result_page,
+                    query_str,
+                    page=1,
+                    session=session,
+                    cache=cache,
+                ): position
+                for position, query_str in enumerate(query_strs)
+            }
+
+            # Step 2: Request the remaining pages of each query once its number of
+            # available pages is known
+            page_futures: list[list[Future[tuple[dict[str, int], ResultPage]]]] = [
+                [] for _ in queries
+            ]
+            for first_page_future in as_completed(first_page_futures):
+                position = first_page_futures[first_page_future]
+                query_metadata, _ = first_page_future.result()
+                page_futures[position] = [first_page_future] + [
+                    executor.submit(
+                        cls._fetch_result_page,
+                        query_strs[position],
+                        page=page,
+                        session=session,
+                        cache=cache,
+                    )
+                    for page in range(
+                        2,
+                        min(max_pages, int(query_metadata["available_num_pages"])) + 1,
+                    )
+                ]
+
+            # Step 3: Collect the result pages of every query, in page order
+            query_results: list[QueryResult] = []
+            for query_page_futures in page_futures:
+                query_pages = [future.result() for future in query_page_futures]
+                query_results.append(
+                    QueryResult(
+                        query_pages[0][0],
+                        [result_page for _, result_page in query_pages],
+                    )
+                )
+
+        return QueryResult.merge(query_results)
+
+    @classmethod
+    def iter_query(
+        cls,
+        query: Query,
+        max_pages: int | None = None,
+        read_ahead: int = 1,
+        session: HttpSession | None = None,
+        cache: ResponseCache | None = None,
+    ) -> Iterator[ResultPage]:
+        """Send a query to the Xeno Canto API and lazily iterate over its result pages.
+
+        Unlike :meth:`send_query`, this method does not wait for all pages to be
+        fetched. Each ResultPage is yielded as soon as it is available, while the next
+        read_ahead pages are already fetched in the background. This way, the
+        processing of a page (for example downloading its recordings with
+        :meth:`DownloadManager.download_all_recordings_in_result_pages
+        <cantopy.download_manager.DownloadManager.download_all_recordings_in_result_pages>`)
+        overlaps with fetching the next pages, and only a limited number of pages
+        is held in memory at a time.
+
+        Parameters
+        ----------
+        query
+            The query to send to the Xeno Canto API.
+        max_pages : optional
+            Specify a maximum number of pages of recordings to fetch, by default None
+            (fetch all available pages).
+        read_ahead : optional
+            The maximum number of pages that are fetched in the background before they
+            are requested from the iterator, by default 1. With a read_ahead of 0,
+            every page is only fetched when it is requested.
+        session : optional
+            The HttpSession to send the requests over, by default the shared session.
+        cache : optional
+            The ResponseCache in which the fetched result pages are cached, by default
+            None (no caching).
+
+        Yields
+        ------
+        ResultPage
+            The result pages of the query, in page order.
+        """
+        # We need to first fetch the first page to determine the number of available result pages
+        query_str = query.to_string()
+        session = session if session is not None else cls._default_session
+        query_metadata, result_page_1 = cls._fetch_result_page(
+            query_str, page=1, session=session, cache=cache
+        )
+
+        num_pages = int(query_metadata["available_num_pages"])
+        if max_pages is not None:
+            num_pages = min(max_pages, num_pages)
+        remaining_pages = iter(range(2, num_pages + 1))
+
+        # Without read-ahead, only fetch every page when it is requested
+        if read_ahead <= 0:
+            yield result_page_1
+            for page in remaining_pages:
+                yield cls._fetch_result_page(
+                    query_str, page=page, session=session, cache=cache
+                )[1]
+            return
+
+        executor = ThreadPoolExecutor(max_workers=read_ahead)
+        pending_pages: deque[Future[tuple[dict[str, int], ResultPage]]] = deque()
+
+        def fetch_next_page():
+            page = next(remaining_pages, None)
+            if page is not None:
+                pending_pages.append(
+                    executor.submit(
+                        cls._fetch_result_page,
+                        query_str,
+                        page=page,
+                        session=session,
+                        cache=cache,
+                    )
+                )
+
+        try:
+            # Start fetching the next pages before handing out the first one
+            for _ in range(read_ahead):
+                fetch_next_page()
+            yield result_page_1
+
+            # Keep read_ahead pages in flight while handing out the pages in order
+            while pending_pages:
+                _, result_page = pending_pages.popleft().result()
+                fetch_next_page()
+                yield result_page
+        finally:
+            # Don't fetch any more pages once the iterator is closed
+            executor.shutdown(wait=False, cancel_futures=True)
+
+    @classmethod
+    def _fetch_result_pages(
+        cls,
+        query_str: str,
+        pages: range,
+        max_workers: int,
+        session: HttpSession,
+        cache: ResponseCache | None = None,
+    ) -> list[ResultPage]:
+        """Fetch multiple pages from the XenoCanto API, possibly concurrently.
+
+        Parameters
+        ----------
+        query_str
+            The query to send to the Xeno Canto API, printed in string format.
+        pages
+            The number ids of the pages we want to fetch.
+        max_workers
+            The maximum number of pages to fetch concurrently.
+        session
+            The HttpSession to send the requests over.
+        cache : optional
+            The ResponseCache in which the fetched pages are cached, by default None.
+
+        Returns
+        -------
+        list[ResultPage]
+            The fetched ResultPages, in the same order as the requested pages.
+        """
+        # Avoid spinning up a thread pool for sequential fetching
+        if max_workers <= 1 or len(pages) <= 1:
+            return [
+                cls._fetch_result_page(
+                    query_str, page=page, session=session, cache=cache
+                )[1]
+                for page in pages
+            ]
+
+        # Executor.map yields the results in submission order, regardless of which
+        # request finishes first
+        with ThreadPoolExecutor(max_workers=max_workers) as executor:
+            return [
+                result_page
+                for _, result_page in executor.map(
+                    lambda page: cls._fetch_result_page(
+                        query_str, page=page, session=session, cache=cache
+                    ),
+                    pages,
+                )
+            ]
+
     @classmethod
     def _fetch_result_page(
-        cls, query_str: str, page: int
+        cls,
+        query_str: str,
+        page: int,
+        session: HttpSession | None = None,
+        cache: ResponseCache | None = None,
     ) -> tuple[dict[str, int], ResultPage]:
         """Fetch a specific page from the XenoCanto API.
 
@@ -61,6 +344,10 @@ class FetchManager:
             The query to send to the Xeno Canto API, printed in string format.
         page : optional
             The number id of the page we want to fetch.
+        session : optional
+            The HttpSession to send the request over, by default the shared session.
+        cache : optional
+            The ResponseCache in which the page is cached, by default None.
 
         Returns
         -------
@@ -68,9 +355,88 @@ class FetchManager:
             A tuple containing both a dictionary with query metadata (keys: "available_num_recordings",
             "available_num_species", "available_num_pages") and a ResultPage wrapper containing
             the requested page.
+
+        Raises
+        ------
+        requests.exceptions.HTTPError
+            If the XenoCanto API responds with an error status, after the retries of
+            the session.
         """
+        # Serve the page from the cache if it is still fresh
+        cached_response = cache.get(query_str, page) if cache is not None else None
+        if cached_response is not None and cached_response.is_fresh:
+            return cls._parse_query_response(json.loads(cached_response.body))
+
         # Encode the http payload
-        payload_str = urllib.parse.urlencode(
+        payload_str = cls._encode_payload(query_str, page)
+
+        # Send request, revalidating a stale cached page if there is one. Failed
+        # requests are already retried by the session, only a successful response
+        # whose body is not valid json (e.g. a truncated body) is fetched again.
+        session = session if session is not None else cls._default_session
+        attempt = 0
+        while True:
+            response = session.get(
+                cls._base_url,
+                params=payload_str,
+                timeout=30.0,
+                headers=(
+                    cached_response.get_conditional_headers()
+                    if cached_response is not None
+                    else {}
+                ),
+            )
+
+            # The server confirmed that the cached page is still up to date
+            if cached_response is not None and response.status_code == 304:
+                cache.revalidate(query_str, page)  # type: ignore
+                return cls._parse_query_response(json.loads(cached_response.body))
+
+            if response.status_code != 200:
+                raise requests.exceptions.HTTPError(
+                    f"The XenoCanto API responded with HTTP status {response.status_code}",
+                    response=response,  # type: ignore
+                )
+
+            # Open json return as dict
+            try:
+                query_response = response.json()
+                break
+            except ValueError:
+                if attempt >= session.retry_policy.max_retries:
+                    raise
+
+                time.sleep(session.retry_policy.get_delay(attempt))
+                attempt += 1
+
+        if cache is not None:
+            cache.put(
+                query_str,
+                page,
+                response.content,
+                etag=response.headers.get("ETag"),
+                last_modified=response.headers.get("Last-Modified"),
+            )
+
+        return cls._parse_query_response(query_response)
+
+    @classmethod
+    def _encode_payload(cls, query_str: str, page: int) -> str:
+        """Encode the http payload for fetching a specific page from the XenoCanto API.
+
+        Parameters
+        ----------
+        query_str
+            The query to send to the Xeno Canto API, printed in string format.
+        page
+            The number id of the page we want to fetch.
+
+        Returns
+        -------
+        str
+            The url-encoded payload string.
+        """
+        return urllib.parse.urlencode(
             {
                 "query": query_str,
                 "page": page,
@@ -78,18 +444,29 @@ class FetchManager:
             safe=":+",
         )
 
-        # Send request and open json return as dict
-        query_response = requests.get(
-            cls._base_url,
-            params=payload_str,
-            timeout=30.0,
-        ).json()
+    @classmethod
+    def _parse_query_response(
+        cls, query_response: dict[str, str | int | list[dict[str, str]]]
+    ) -> tuple[dict[str, int], ResultPage]:
+        """Parse the json response of the XenoCanto API for a single result page.
 
+        Parameters
+        ----------
+        query_response
+            The json response of the XenoCanto API, opened as a dict.
+
+        Returns
+        -------
+        tuple[dict[str, int], ResultPage]
+            A tuple containing both a dictionary with query metadata (keys: "available_num_recordings",
+            "available_num_species", "available_num_pages") and a ResultPage wrapper containing
+            the requested page.
+        """
         # Extract the metadata information of this query
         query_metadata = {
-            "available_num_recordings": int(query_response["numRecordings"]),
-            "available_num_species": int(query_response["numSpecies"]),
-            "available_num_pages": int(query_response["numPages"]),
+            "available_num_recordings": int(query_response["numRecordings"]),  # type: ignore
+            "available_num_species": int(query_response["numSpecies"]),  # type: ignore
+            "available_num_pages": int(query_response["numPages"]),  # type: ignore
         }
 
         return query_metadata, ResultPage(query_response)
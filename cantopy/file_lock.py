@@ -0,0 +1,79 @@
+from os.path import dirname
+from typing import IO, Any
+import os
+
+try:
+    import fcntl
+except ImportError:  # Windows
+    fcntl = None
+    import msvcrt
+
+
+class FileLock:
+    """An exclusive advisory lock on a file, shared between processes and threads.
+
+    The lock is taken with ``flock`` on POSIX systems and ``msvcrt.locking`` on
+    Windows. Every acquire opens the lock file anew, so two threads of the same process
+    exclude each other just like two processes do. The lock file itself is created when
+    needed and left in place, it holds no data.
+
+    Attributes
+    ----------
+    lock_file_path
+        The path of the lock file.
+    """
+
+    def __init__(self, lock_file_path: str):
+        """Create a FileLock.
+
+        Parameters
+        ----------
+        lock_file_path
+            The path of the lock file, its folder is created when it does not exist.
+        """
+        self.lock_file_path = lock_file_path
+        self._lock_file: IO[bytes] | None = None
+
+    def acquire(self):
+        """Wait until the lock is free and take it."""
+        os.makedirs(dirname(self.lock_file_path) or ".", exist_ok=True)
+        lock_file = open(self.lock_file_path, "a+b")
+
+        try:
+            if fcntl is not None:
+                fcntl.flock(lock_file.fileno(), fcntl.LOCK_EX)
+            else:
+                # LK_LOCK gives up after 10 attempts of one second, keep waiting
+                lock_file.seek(0)
+                while True:
+                    try:
+                        msvcrt.locking(lock_file.fileno(), msvcrt.LK_LOCK, 1)  # type: ignore
+                        break
+                    except OSError:
+                        continue
+        except BaseException:
+            lock_file.close()
+            raise
+
+        self._lock_file = lock_file
+
+    def release(self):
+        """Release the lock."""
+        if self._lock_file is None:
+            return
+
+        if fcntl is not None:
+            fcntl.flock(self._lock_file.fileno(), fcntl.LOCK_UN)
+        else:
+            self._lock_file.seek(0)
+            msvcrt.locking(self._lock_file.fileno(), msvcrt.LK_UNLCK, 1)  # type: ignore
+
+        self._lock_file.close()
+        self._lock_file = None
+
+    def __enter__(self) -> "FileLock":
+        self.acquire()
+        return self
+
+    def __exit__(self, *args: Any):
+        self.release()
@@ -0,0 +1,148 @@
+from typing import Any
+import time
+import requests
+from requests.adapters import HTTPAdapter
+from cantopy.rate_limiter import RateLimiter, RetryPolicy
+
+
+class HttpSession:
+    """A persistent HTTP session with connection pooling for talking to XenoCanto.
+
+    Reusing a single session keeps the TCP+TLS connections to the XenoCanto servers
+    alive between requests, instead of opening a new connection for every result page
+    or recording. An HttpSession can be shared by the FetchManager and DownloadManager
+    and is safe to use from multiple worker threads.
+
+    Attributes
+    ----------
+    pool_maxsize : int
+        The maximum number of connections kept open to a single host.
+    pool_connections : int
+        The number of distinct hosts for which a connection pool is kept.
+    timeout : float
+        The default timeout in seconds for the requests sent over this session.
+    rate_limiter : RateLimiter | None
+        The RateLimiter that paces the requests sent over this session, None if the
+        requests are not rate limited.
+    retry_policy : RetryPolicy
+        The RetryPolicy for requests that fail with a connection error, a timeout or a
+        retryable status code.
+    """
+
+    def __init__(
+        self,
+        pool_maxsize: int = 10,
+        pool_connections: int = 4,
+        timeout: float = 30.0,
+        rate_limiter: RateLimiter | None = None,
+        retry_policy: RetryPolicy | None = None,
+    ):
+        """Create a new HttpSession.
+
+        Parameters
+        ----------
+        pool_maxsize : optional
+            The maximum number of connections kept open to a single host, by default 10.
+            This acts as a per-host connection limit: worker threads that need a
+            connection while all of them are in use wait for one to be released. It
+            is best matched to the number of workers using this session.
+        pool_connections : optional
+            The number of distinct hosts for which a connection pool is kept, by default 4.
+        timeout : optional
+            The default timeout in seconds for the requests sent over this session,
+            by default 30.0.
+        rate_limiter : optional
+            The RateLimiter that paces the requests sent over this session, by default
+            None (no rate limiting). Share a single RateLimiter, or a single session,
+            between all managers that talk to the same server.
+        retry_policy : optional
+            The RetryPolicy for failed requests, by default a RetryPolicy with its
+            default settings. Pass ``RetryPolicy(max_retries=0)`` to disable retries.
+        """
+        self.pool_maxsize = pool_maxsize
+        self.pool_connections = pool_connections
+        self.timeout = timeout
+        self.rate_limiter = rate_limiter
+        self.retry_policy = retry_policy if retry_policy is not None else RetryPolicy()
+
+        # Mount a pooled adapter that blocks instead of opening extra connections
+        # once the per-host limit is reached
+        adapter = HTTPAdapter(
+            pool_connections=pool_connections,
+            pool_maxsize=pool_maxsize,
+            pool_block=True,
+        )
+        self._session = requests.Session()
+        self._session.mount("https://", adapter)
+        self._session.mount("http://", adapter)
+
+    def get(self, url: str, **kwargs: Any) -> requests.Response:
+        """Send a GET request over this session.
+
+        The request waits for the rate limiter of this session, if any. Requests that
+        fail with a connection error, a timeout or a retryable status code are
+        retried with jittered exponential backoff, honouring the Retry-After header
+        sent by the server. If all retries fail, the last error is raised or the last
+        response is returned.
+
+        Parameters
+        ----------
+        url
+            The url to send the request to.
+        **kwargs
+            Additional keyword arguments passed to :meth:`requests.Session.get`.
+            If no timeout is given, the session default timeout is used.
+
+        Returns
+        -------
+        requests.Response
+            The response returned by the server.
+        """
+        kwargs.setdefault("timeout", self.timeout)
+
+        attempt = 0
+        while True:
+            if self.rate_limiter is not None:
+                self.rate_limiter.acquire()
+
+            # Step 1: Send the request, retrying connection errors and timeouts
+            try:
+                response = self._session.get(url, **kwargs)
+            except (requests.exceptions.ConnectionError, requests.exceptions.Timeout):
+                if self.rate_limiter is not None:
+                    self.rate_limiter.on_throttle()
+                if attempt >= self.retry_policy.max_retries:
+                    raise
+
+                time.sleep(self.retry_policy.get_delay(attempt))
+                attempt += 1
+                continue
+
+            # Step 2: Return the response unless it has a retryable status code
+            if response.status_code not in self.retry_policy.retry_status_codes:
+                if self.rate_limiter is not None:
+                    self.rate_limiter.on_success()
+                return response
+
+            # Step 3: Back off, for at least as long as the server asked for
+            retry_after = RetryPolicy.parse_retry_after(
+                response.headers.get("Retry-After")
+            )
+            if self.rate_limiter is not None and response.status_code in (429, 503):
+                self.rate_limiter.on_throttle(retry_after)
+            if attempt >= self.retry_policy.max_retries:
+                return response
+
+            response.close()
+            time.sleep(self.retry_policy.get_delay(attempt, retry_after))
+            attempt += 1
+
+    def close(self):
+        """Close the session and all of its pooled connections."""
+        self._session.close()
+
+    def __enter__(self) -> "HttpSession":
+        return self
+
+    def __exit__(self, *args: Any):
+        self.close()
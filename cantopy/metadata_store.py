@@ -0,0 +1,770 @@
+import asyncio
+from concurrent.futures import Future
+from contextlib import contextmanager
+from glob import escape, glob
+from os.path import exists, join
+from queue import Queue
+from typing import Any, Iterator
+import copy
+import os
+import threading
+import uuid
+import numpy as np
+import pandas as pd
+from cantopy.file_lock import FileLock
+from cantopy.xenocanto_components.parsing import (
+    parse_coordinates,
+    parse_dates,
+    parse_recording_lengths,
+)
+
+
+class MetadataStore:
+    """Base class for storing the per-species recording metadata of a data folder.
+
+    The metadata of each species is stored inside the species folder of the data
+    folder. Subclasses implement the actual file format, while this class implements
+    the update strategy shared by all formats.
+
+    Every update of the metadata of a species holds an advisory lock on the lock file
+    of that species in the ``.metadata_locks`` folder of the data folder, so concurrent
+    updates from multiple threads or processes never overwrite each other's rows.
+    Updates of different species don't wait on each other.
+
+    Attributes
+    ----------
+    data_base_path
+        The base data folder containing the species folders.
+    write_mode
+        How new rows are added to the metadata ("rewrite" or "append").
+    compaction_threshold
+        The number of appended rows after which the metadata of a species is compacted
+        in "append" mode.
+    """
+
+    # The folder in the data folder with the lock files that serialize the metadata
+    # updates of each species
+    locks_folder_name = ".metadata_locks"
+
+    def __init__(
+        self,
+        data_base_path: str,
+        write_mode: str = "rewrite",
+        compaction_threshold: int | None = None,
+    ):
+        """Initialize a MetadataStore instance.
+
+        Parameters
+        ----------
+        data_base_path
+            The base data folder containing the species folders.
+        write_mode : optional
+            How new rows are added to the metadata, by default "rewrite". In "rewrite"
+            mode, each update reads the existing metadata of the species, merges the
+            new rows and rewrites it sorted by recording id. In "append" mode, the new
+            rows are only appended, and sorting and de-duplication are deferred to
+            :meth:`compact`. Use :meth:`load` to read the metadata in sorted form
+            regardless of the mode.
+        compaction_threshold : optional
+            In "append" mode, the number of rows this store appends to the metadata of a
+            species after which it compacts it, by default None (never compact automatically).
+
+        Raises
+        ------
+        ValueError
+            If an unknown write_mode is passed.
+        """
+        if write_mode not in ("rewrite", "append"):
+            raise ValueError(
+                f"Unknown metadata write mode, expected 'rewrite' or 'append': {write_mode}"
+            )
+
+        self.data_base_path = data_base_path
+        self.write_mode = write_mode
+        self.compaction_threshold = compaction_threshold
+
+        # The number of rows appended per animal folder since its last compaction
+        self._uncompacted_row_counts: dict[str, int] = {}
+
+        # The animal folders whose lock is held by the current thread
+        self._held_locks = threading.local()
+
+    def update(self, animal_folder_name: str, animal_recordings_metadata: pd.DataFrame):
+        """Add new rows to the metadata of a species.
+
+        Parameters
+        ----------
+        animal_folder_name
+            The name of the species folder.
+        animal_recordings_metadata
+            The new metadata rows for the recordings of this species.
+        """
+        animal_recordings_metadata = self._prepare(animal_recordings_metadata)
+        os.makedirs(join(self.data_base_path, animal_folder_name), exist_ok=True)
+
+        with self.lock(animal_folder_name):
+            if self.write_mode == "rewrite":
+                self._rewrite(animal_folder_name, animal_recordings_metadata)
+                return
+
+            self._append(animal_folder_name, animal_recordings_metadata)
+
+            # Compact the metadata once enough unsorted rows have accumulated
+            self._uncompacted_row_counts[animal_folder_name] = (
+                self._uncompacted_row_counts.get(animal_folder_name, 0)
+                + len(animal_recordings_metadata)
+            )
+            if (
+                self.compaction_threshold is not None
+                and self._uncompacted_row_counts[animal_folder_name]
+                >= self.compaction_threshold
+            ):
+                self.compact([animal_folder_name])
+
+    def load(self, animal_folder_name: str) -> pd.DataFrame:
+        """Load the metadata of a species.
+
+        The returned metadata is always de-duplicated and sorted by recording id, also
+        when rows were appended but not compacted yet.
+
+        Parameters
+        ----------
+        animal_folder_name
+            The name of the species folder.
+
+        Returns
+        -------
+        pd.DataFrame
+            The recording metadata of the species, an empty DataFrame if no metadata
+            exists for the species.
+        """
+        animal_metadata = self._read(animal_folder_name)
+
+        if animal_metadata is None:
+            return pd.DataFrame({})
+
+        return self._deduplicate_and_sort(animal_metadata).reset_index(drop=True)
+
+    def replace(self, animal_folder_name: str, animal_metadata: pd.DataFrame):
+        """Replace all the stored metadata of a species.
+
+        Parameters
+        ----------
+        animal_folder_name
+            The name of the species folder.
+        animal_metadata
+            The new metadata of the species, replacing all its stored rows.
+        """
+        os.makedirs(join(self.data_base_path, animal_folder_name), exist_ok=True)
+        with self.lock(animal_folder_name):
+            self._write(
+                animal_folder_name,
+                self._deduplicate_and_sort(self._prepare(animal_metadata)),
+            )
+            self._uncompacted_row_counts.pop(animal_folder_name, None)
+
+    def compact(self, animal_folder_names: list[str] | None = None):
+        """De-duplicate and sort the stored metadata.
+
+        Parameters
+        ----------
+        animal_folder_names : optional
+            The names of the species folders whose metadata should be compacted, by
+            default the metadata of all species in the data folder is compacted.
+        """
+        if animal_folder_names is None:
+            animal_folder_names = self.list_animal_folder_names()
+
+        for animal_folder_name in animal_folder_names:
+            with self.lock(animal_folder_name):
+                animal_metadata = self._read(animal_folder_name)
+
+                if animal_metadata is not None:
+                    self._write(
+                        animal_folder_name, self._deduplicate_and_sort(animal_metadata)
+                    )
+
+                self._uncompacted_row_counts.pop(animal_folder_name, None)
+
+    def with_path(self, data_base_path: str) -> "MetadataStore":
+        """Create a store with the same type and configuration for another data folder.
+
+        The DownloadManager uses this method to create the stores of the metadata
+        fragments of sharded downloads. The default implementation copies this store
+        and only changes its data folder. Subclasses that keep other state derived from
+        the data folder should override it.
+
+        Parameters
+        ----------
+        data_base_path
+            The base data folder of the new store.
+
+        Returns
+        -------
+        MetadataStore
+            The new store, which shares no state with this store.
+        """
+        metadata_store = copy.copy(self)
+        metadata_store.data_base_path = data_base_path
+        metadata_store._uncompacted_row_counts = {}
+        metadata_store._held_locks = threading.local()
+
+        return metadata_store
+
+    @contextmanager
+    def lock(self, animal_folder_name: str) -> Iterator[None]:
+        """Hold the exclusive lock on the metadata of a species.
+
+        The lock is shared with all threads and processes updating the metadata of
+        the same data folder. Hold it to read and update the metadata of a species
+        without other updates in between. The lock is reentrant within a thread, so
+        the metadata can still be updated through this store while holding it.
+
+        Parameters
+        ----------
+        animal_folder_name
+            The name of the species folder.
+
+        Yields
+        ------
+        None
+            While the lock is held.
+        """
+        if not hasattr(self._held_locks, "animal_folder_names"):
+            self._held_locks.animal_folder_names = set()
+        held_animal_folder_names: set[str] = self._held_locks.animal_folder_names
+
+        if animal_folder_name in held_animal_folder_names:
+            yield
+            return
+
+        with FileLock(
+            join(
+                self.data_base_path, self.locks_folder_name, f"{animal_folder_name}.lock"
+            )
+        ):
+            held_animal_folder_names.add(animal_folder_name)
+            try:
+                yield
+            finally:
+                held_animal_folder_names.discard(animal_folder_name)
+
+    def list_animal_folder_names(self) -> list[str]:
+        """List the species folders in the data folder that contain stored metadata.
+
+        Returns
+        -------
+        list[str]
+            The sorted names of the species folders with metadata.
+        """
+        if not exists(self.data_base_path):
+            return []
+
+        return sorted(
+            folder_name
+            for folder_name in os.listdir(self.data_base_path)
+            if self._has_metadata(folder_name)
+        )
+
+    def _rewrite(self, animal_folder_name: str, animal_recordings_metadata: pd.DataFrame):
+        """Merge new rows into the metadata of a species and rewrite it sorted.
+
+        Parameters
+        ----------
+        animal_folder_name
+            The name of the species folder.
+        animal_recordings_metadata
+            The new metadata rows for the recordings of this species.
+        """
+        # If previous metadata exists, append the new metadata to it
+        animal_metadata = self._read(animal_folder_name)
+        if animal_metadata is not None:
+            animal_metadata = pd.concat(  # type: ignore
+                [animal_metadata, animal_recordings_metadata],
+                ignore_index=True,
+            )
+        else:
+            animal_metadata = animal_recordings_metadata
+
+        # Sort the animal metadata by recording id
+        animal_metadata = animal_metadata.sort_values(  # type: ignore
+            by=["recording_id"], key=lambda ids: ids.astype(np.int64)  # type: ignore
+        )
+
+        self._write(animal_folder_name, animal_metadata)
+
+    def _deduplicate_and_sort(self, animal_metadata: pd.DataFrame) -> pd.DataFrame:
+        """De-duplicate the rows of a species' metadata and sort them by recording id.
+
+        Parameters
+        ----------
+        animal_metadata
+            The metadata of the species.
+
+        Returns
+        -------
+        pd.DataFrame
+            The de-duplicated and sorted metadata, for duplicate recording ids the last
+            added row is kept.
+        """
+        return animal_metadata.drop_duplicates(  # type: ignore
+            subset=["recording_id"], keep="last"
+        ).sort_values(
+            by=["recording_id"], key=lambda ids: ids.astype(np.int64)  # type: ignore
+        )
+
+    def _prepare(self, animal_recordings_metadata: pd.DataFrame) -> pd.DataFrame:
+        """Convert new metadata rows to the representation used by this store."""
+        return animal_recordings_metadata
+
+    def _has_metadata(self, animal_folder_name: str) -> bool:
+        """Check whether metadata is stored for a species."""
+        raise NotImplementedError
+
+    def _read(self, animal_folder_name: str) -> pd.DataFrame | None:
+        """Read all the stored metadata rows of a species, None if there are none."""
+        raise NotImplementedError
+
+    def _write(self, animal_folder_name: str, animal_metadata: pd.DataFrame):
+        """Replace the stored metadata of a species with the given rows."""
+        raise NotImplementedError
+
+    def _append(self, animal_folder_name: str, animal_recordings_metadata: pd.DataFrame):
+        """Append new rows to the stored metadata of a species."""
+        raise NotImplementedError
+
+
+class CsvMetadataStore(MetadataStore):
+    """Store the recording metadata in one CSV file per species.
+
+    The metadata of a species is stored in
+    ``<data_base_path>/<species>/<species>_recording_metadata.csv``, with all columns
+    read back as strings. This is the default metadata store of the DownloadManager.
+    """
+
+    def metadata_file_path(self, animal_folder_name: str) -> str:
+        """Generate the path to the metadata file of a species.
+
+        Parameters
+        ----------
+        animal_folder_name
+            The name of the species folder.
+
+        Returns
+        -------
+        str
+            The path to the metadata file of the species.
+        """
+        return join(
+            self.data_base_path,
+            animal_folder_name,
+            f"{animal_folder_name}_recording_metadata.csv",
+        )
+
+    def _has_metadata(self, animal_folder_name: str) -> bool:
+        return exists(self.metadata_file_path(animal_folder_name))
+
+    def _read(self, animal_folder_name: str) -> pd.DataFrame | None:
+        if not self._has_metadata(animal_folder_name):
+            return None
+
+        return pd.read_csv(self.metadata_file_path(animal_folder_name), dtype="object")  # type: ignore
+
+    def _write(self, animal_folder_name: str, animal_metadata: pd.DataFrame):
+        metadata_file_path = self.metadata_file_path(animal_folder_name)
+
+        # Write to a temporary file first, so readers never see a half-written file
+        temporary_metadata_file_path = f"{metadata_file_path}.tmp"
+        animal_metadata.to_csv(temporary_metadata_file_path, index=False)  # type: ignore
+        os.replace(temporary_metadata_file_path, metadata_file_path)
+
+    def _append(self, animal_folder_name: str, animal_recordings_metadata: pd.DataFrame):
+        metadata_file_path = self.metadata_file_path(animal_folder_name)
+
+        if not exists(metadata_file_path):
+            self._write(animal_folder_name, animal_recordings_metadata)
+            return
+
+        # Only read the header of the existing file to match its column order
+        existing_columns = list(pd.read_csv(metadata_file_path, nrows=0).columns)  # type: ignore
+
+        # New columns can't be appended to the existing rows, rewrite the file instead
+        if set(existing_columns) != set(animal_recordings_metadata.columns):
+            self._rewrite(animal_folder_name, animal_recordings_metadata)
+            return
+
+        animal_recordings_metadata[existing_columns].to_csv(  # type: ignore
+            metadata_file_path, mode="a", header=False, index=False
+        )
+
+
+class ParquetMetadataStore(MetadataStore):
+    """Store the recording metadata in typed Parquet files, partitioned by species.
+
+    The metadata of a species is stored in
+    ``<data_base_path>/<species>/<species>_recording_metadata*.parquet``. Contrary to
+    the CSV store, the columns are stored with their actual types: the recording id
+    and sample rate as integers, the coordinates as floats, the recording length as a
+    duration and the recording and upload dates as datetimes. Recording dates with an
+    unknown day or month (e.g. "2003-03-00") are stored as the first day of that
+    month or year. In "append" mode, every update is written as a separate Parquet
+    file, which are merged into a single file by :meth:`compact`.
+
+    The metadata of the whole data folder can be scanned lazily through
+    :meth:`dataset`. Using this class requires the optional pyarrow dependency
+    (``pip install cantopy[parquet]``).
+    """
+
+    def __init__(
+        self,
+        data_base_path: str,
+        write_mode: str = "rewrite",
+        compaction_threshold: int | None = None,
+    ):
+        """Initialize a ParquetMetadataStore instance.
+
+        Parameters
+        ----------
+        data_base_path
+            The base data folder containing the species folders.
+        write_mode : optional
+            How new rows are added to the metadata, by default "rewrite".
+        compaction_threshold : optional
+            In "append" mode, the number of rows this store appends to the metadata of a
+            species after which it compacts it, by default None.
+
+        Raises
+        ------
+        ImportError
+            If the optional pyarrow dependency is not installed.
+        """
+        try:
+            import pyarrow  # noqa: F401
+        except ImportError as error:
+            raise ImportError(
+                "The ParquetMetadataStore requires pyarrow, install it with: pip install cantopy[parquet]"
+            ) from error
+
+        super().__init__(data_base_path, write_mode, compaction_threshold)
+
+    def metadata_file_paths(self, animal_folder_name: str) -> list[str]:
+        """List the Parquet files holding the metadata of a species.
+
+        Parameters
+        ----------
+        animal_folder_name
+            The name of the species folder.
+
+        Returns
+        -------
+        list[str]
+            The sorted paths to the metadata files of the species.
+        """
+        return sorted(
+            glob(
+                join(
+                    escape(self.data_base_path),
+                    escape(animal_folder_name),
+                    f"{escape(animal_folder_name)}_recording_metadata*.parquet",
+                )
+            )
+        )
+
+    def dataset(self):
+        """Open the metadata of all species in the data folder as a pyarrow Dataset.
+
+        The dataset is scanned lazily, so filters and column selections passed to for
+        example ``dataset.to_table(filter=...)`` are pushed down to the Parquet files.
+        Next to the metadata columns, the dataset contains a "species" column holding
+        the species folder name of each row, which can also be used in filters to skip
+        whole species.
+
+        Returns
+        -------
+        pyarrow.dataset.Dataset
+            The dataset spanning the metadata of all species.
+        """
+        import pyarrow as pa
+        import pyarrow.dataset as ds
+
+        metadata_file_paths = [
+            metadata_file_path
+            for animal_folder_name in self.list_animal_folder_names()
+            for metadata_file_path in self.metadata_file_paths(animal_folder_name)
+        ]
+
+        return ds.dataset(
+            metadata_file_paths,
+            format="parquet",
+            partitioning=ds.DirectoryPartitioning(pa.schema([("species", pa.string())])),
+            partition_base_dir=self.data_base_path,
+        )
+
+    def _has_metadata(self, animal_folder_name: str) -> bool:
+        return len(self.metadata_file_paths(animal_folder_name)) > 0
+
+    def _read(self, animal_folder_name: str) -> pd.DataFrame | None:
+        metadata_file_paths = self.metadata_file_paths(animal_folder_name)
+
+        if len(metadata_file_paths) == 0:
+            return None
+
+        return pd.concat(  # type: ignore
+            [pd.read_parquet(path) for path in metadata_file_paths],
+            ignore_index=True,
+        )
+
+    def _write(self, animal_folder_name: str, animal_metadata: pd.DataFrame):
+        previous_metadata_file_paths = self.metadata_file_paths(animal_folder_name)
+        metadata_file_path = join(
+            self.data_base_path,
+            animal_folder_name,
+            f"{animal_folder_name}_recording_metadata.parquet",
+        )
+
+        # Write to a temporary file first, so readers never see a half-written file
+        temporary_metadata_file_path = f"{metadata_file_path}.tmp"
+        self._to_parquet(animal_metadata, temporary_metadata_file_path)
+        os.replace(temporary_metadata_file_path, metadata_file_path)
+
+        # Remove the appended files that are now merged into the main file
+        for path in previous_metadata_file_paths:
+            if path != metadata_file_path:
+                os.remove(path)
+
+    def _append(self, animal_folder_name: str, animal_recordings_metadata: pd.DataFrame):
+        self._to_parquet(
+            animal_recordings_metadata,
+            join(
+                self.data_base_path,
+                animal_folder_name,
+                f"{animal_folder_name}_recording_metadata-{uuid.uuid4().hex}.parquet",
+            ),
+        )
+
+    def _to_parquet(self, animal_metadata: pd.DataFrame, path: str):
+        """Write metadata rows to a Parquet file with typed columns.
+
+        Parameters
+        ----------
+        animal_metadata
+            The metadata rows to write.
+        path
+            The path of the Parquet file to write.
+        """
+        import pyarrow as pa
+        import pyarrow.parquet as pq
+
+        typed_animal_metadata = self._prepare(animal_metadata)
+
+        # Use a fixed schema, so files with only empty values in a column can still be
+        # read as one dataset with the other files
+        column_types = {
+            "recording_id": pa.int64(),
+            "sample_rate": pa.int64(),
+            "latitude": pa.float64(),
+            "longitude": pa.float64(),
+            "transcoded_duration": pa.float64(),
+            "feature_num_frames": pa.int64(),
+            "recording_length": pa.duration("ns"),
+            "recording_date": pa.timestamp("ns"),
+            "upload_date": pa.timestamp("ns"),
+        }
+        schema = pa.schema(
+            [
+                (column, column_types.get(column, pa.string()))
+                for column in typed_animal_metadata.columns
+            ]
+        )
+        pq.write_table(
+            pa.Table.from_pandas(
+                typed_animal_metadata, schema=schema, preserve_index=False
+            ),
+            path,
+        )
+
+    def _prepare(self, animal_metadata: pd.DataFrame) -> pd.DataFrame:
+        """Convert the string columns of metadata rows to their actual types.
+
+        Columns that already have a non-string type are left as they are.
+
+        Parameters
+        ----------
+        animal_metadata
+            The metadata rows to convert.
+
+        Returns
+        -------
+        pd.DataFrame
+            The metadata rows with typed columns.
+        """
+        typed_animal_metadata = animal_metadata.copy()
+
+        for column in typed_animal_metadata.columns:
+            values = typed_animal_metadata[column]
+            if values.dtype != object:
+                continue
+
+            if column in ("recording_id", "sample_rate", "feature_num_frames"):
+                typed_animal_metadata[column] = pd.to_numeric(values, errors="coerce").astype("Int64")  # type: ignore
+            elif column in ("latitude", "longitude"):
+                typed_animal_metadata[column] = parse_coordinates(values)
+            elif column == "transcoded_duration":
+                typed_animal_metadata[column] = pd.to_numeric(values, errors="coerce").astype("float64")  # type: ignore
+            elif column == "recording_length":
+                typed_animal_metadata[column] = pd.to_timedelta(parse_recording_lengths(values), unit="s")  # type: ignore
+            elif column in ("recording_date", "upload_date"):
+                typed_animal_metadata[column] = parse_dates(values)
+
+        return typed_animal_metadata
+
+
+class MetadataWriter:
+    """A single writer thread that applies the metadata updates of a MetadataStore.
+
+    Threads that download recordings at the same time, for example for multiple
+    queries sharing species, hand their metadata updates to the writer instead of
+    writing them themselves. The writer merges all updates that are waiting for the
+    same species into a single update of the store, so concurrent downloads neither
+    overwrite each other's rows nor each rewrite the metadata files separately. Updates
+    from other processes are kept consistent by the locks of the store.
+
+    Attributes
+    ----------
+    metadata_store
+        The MetadataStore the updates are written to.
+    """
+
+    def __init__(self, metadata_store: MetadataStore):
+        """Create a MetadataWriter. The writer thread is started on the first update.
+
+        Parameters
+        ----------
+        metadata_store
+            The MetadataStore to write the updates to.
+        """
+        self.metadata_store = metadata_store
+
+        self._queue: Queue[tuple[str, pd.DataFrame, Future[None]] | None] = Queue()
+        self._thread: threading.Thread | None = None
+        self._thread_lock = threading.Lock()
+
+    def submit(
+        self, animal_folder_name: str, animal_recordings_metadata: pd.DataFrame
+    ) -> "Future[None]":
+        """Queue new rows for the metadata of a species.
+
+        Parameters
+        ----------
+        animal_folder_name
+            The name of the species folder.
+        animal_recordings_metadata
+            The new metadata rows for the recordings of this species.
+
+        Returns
+        -------
+        Future[None]
+            A future that is done once the rows are written, holding the error if
+            writing them failed.
+        """
+        with self._thread_lock:
+            if self._thread is None:
+                self._thread = threading.Thread(target=self._run, daemon=True)
+                self._thread.start()
+
+        future: Future[None] = Future()
+        self._queue.put((animal_folder_name, animal_recordings_metadata, future))
+        return future
+
+    def write(self, animal_recordings_metadata: dict[str, pd.DataFrame]):
+        """Write new rows for the metadata of multiple species, and wait until they
+        are written.
+
+        Parameters
+        ----------
+        animal_recordings_metadata
+            The new metadata rows, keyed by species folder name.
+
+        Raises
+        ------
+        Exception
+            The error raised while writing the rows of one of the species.
+        """
+        futures = [
+            self.submit(animal_folder_name, metadata)
+            for animal_folder_name, metadata in animal_recordings_metadata.items()
+        ]
+        for future in futures:
+            future.result()
+
+    async def write_async(self, animal_recordings_metadata: dict[str, pd.DataFrame]):
+        """Write new rows for the metadata of multiple species, and wait until they
+        are written without blocking the running asyncio event loop.
+
+        Parameters
+        ----------
+        animal_recordings_metadata
+            The new metadata rows, keyed by species folder name.
+
+        Raises
+        ------
+        Exception
+            The error raised while writing the rows of one of the species.
+        """
+        futures = [
+            self.submit(animal_folder_name, metadata)
+            for animal_folder_name, metadata in animal_recordings_metadata.items()
+        ]
+        await asyncio.gather(*[asyncio.wrap_future(future) for future in futures])
+
+    def close(self):
+        """Write the queued updates and stop the writer thread."""
+        with self._thread_lock:
+            if self._thread is None:
+                return
+
+            self._queue.put(None)
+            self._thread.join()
+            self._thread = None
+
+    def _run(self):
+        """Apply the queued updates, one batch per species, until the writer is closed."""
+        while True:
+            # Step 1: Collect all updates that are waiting, grouped per species
+            pending_updates: dict[str, list[tuple[pd.DataFrame, Future[None]]]] = {}
+            item = self._queue.get()
+            is_closed = item is None
+            while item is not None:
+                animal_folder_name, metadata, future = item
+                pending_updates.setdefault(animal_folder_name, []).append(
+                    (metadata, future)
+                )
+                if self._queue.empty():
+                    break
+                item = self._queue.get()
+                is_closed = item is None
+
+            # Step 2: Write a single update per species
+            for animal_folder_name, updates in pending_updates.items():
+                try:
+                    self.metadata_store.update(
+                        animal_folder_name,
+                        pd.concat(  # type: ignore
+                            [metadata for metadata, _ in updates], ignore_index=True
+                        ),
+                    )
+                except BaseException as error:
+                    for _, future in updates:
+                        future.set_exception(error)
+                else:
+                    for _, future in updates:
+                        future.set_result(None)
+
+            if is_closed:
+                return
+
+    def __enter__(self) -> "MetadataWriter":
+        return self
+
+    def __exit__(self, *args: Any):
+        self.close()
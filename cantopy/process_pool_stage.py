@@ -0,0 +1,115 @@
+from concurrent.futures import Future, ProcessPoolExecutor
+from typing import Any, Callable, TypeVar
+import multiprocessing
+import threading
+
+
+_StageT = TypeVar("_StageT", bound="ProcessPoolStage")
+
+
+class ProcessPoolStage:
+    """The base class of the post-download stages that process recordings in a
+    process pool, like the :class:`AudioTranscoder <cantopy.audio_transcoder.AudioTranscoder>`
+    and the :class:`FeatureExtractor <cantopy.feature_extractor.FeatureExtractor>`.
+
+    Recordings are submitted from the download worker threads, each with the path of
+    the file the stage writes for it, and collected once their results are needed. The
+    process pool is only started on the first submitted recording. Its worker
+    processes are started with the "spawn" method: forking a process while other
+    threads hold locks can deadlock the forked workers.
+
+    Attributes
+    ----------
+    max_workers
+        The maximum number of worker processes.
+    """
+
+    def __init__(self, max_workers: int | None = None):
+        """Create a ProcessPoolStage.
+
+        Parameters
+        ----------
+        max_workers : optional
+            The maximum number of worker processes, by default the number of CPUs.
+        """
+        self.max_workers = max_workers
+
+        self._executor: ProcessPoolExecutor | None = None
+        self._pending_results: dict[str, tuple[str, Future[Any]]] = {}
+        self._lock = threading.Lock()
+
+    def _submit(
+        self,
+        recording_id: str,
+        output_path: str,
+        function: Callable[..., Any],
+        *args: Any,
+    ):
+        """Start processing a downloaded recording in the process pool.
+
+        Parameters
+        ----------
+        recording_id
+            The id of the recording.
+        output_path
+            The path of the file written for the recording.
+        function
+            The module-level function that processes the recording.
+        *args
+            The arguments to pass to the function.
+        """
+        with self._lock:
+            if self._executor is None:
+                self._executor = ProcessPoolExecutor(
+                    max_workers=self.max_workers,
+                    mp_context=multiprocessing.get_context("spawn"),
+                )
+
+            self._pending_results[recording_id] = (
+                output_path,
+                self._executor.submit(function, *args),
+            )
+
+    def collect(self, recording_ids: list[str]) -> dict[str, tuple[str | None, Any]]:
+        """Wait for the processing of recordings that were submitted before.
+
+        Parameters
+        ----------
+        recording_ids
+            The ids of the recordings.
+
+        Returns
+        -------
+        dict[str, tuple[str | None, Any]]
+            The path of the written file and the result of the processing function for
+            each submitted recording, or (None, None) if processing it failed.
+            Recordings that were not submitted are left out.
+        """
+        with self._lock:
+            pending_results = {
+                recording_id: self._pending_results.pop(recording_id)
+                for recording_id in recording_ids
+                if recording_id in self._pending_results
+            }
+
+        results: dict[str, tuple[str | None, Any]] = {}
+        for recording_id, (output_path, future) in pending_results.items():
+            try:
+                results[recording_id] = (output_path, future.result())
+            except Exception:
+                results[recording_id] = (None, None)
+
+        return results
+
+    def close(self):
+        """Wait for all running recordings and shut down the process pool."""
+        with self._lock:
+            if self._executor is not None:
+                self._executor.shutdown()
+                self._executor = None
+
+    def __enter__(self: _StageT) -> _StageT:
+        return self
+
+    def __exit__(self, *args: Any):
+        self.close()
@@ -0,0 +1,356 @@
+from concurrent.futures import ThreadPoolExecutor
+from datetime import date
+from cantopy.fetch_manager import FetchManager
+from cantopy.http_session import HttpSession
+from cantopy.response_cache import ResponseCache
+from cantopy.xenocanto_components import Query, QueryResult, ResultPage
+
+
+class QueryPlanner:
+    """Split queries with too many result pages into smaller, disjoint sub-queries.
+
+    Fetching the hundreds of pages of a broad query one after another is slow, and new
+    uploads shift the page boundaries while the pages are fetched, so recordings are
+    returned twice or skipped. The QueryPlanner uses the number of available pages
+    reported by the first result page to split such a query by recording date: first
+    by recorded year, and then the years that are still too large by recorded month.
+    The early and late years (or months) with few recordings are each covered by a
+    single sub-query, whose bounds are binary searched, and every year (or month) in
+    between gets its own sub-query. The sub-queries together cover exactly the
+    recordings of the original query, and can be fetched concurrently.
+
+    The split only depends on the page counts, so running the same query again results
+    in the same sub-queries, whose pages can be served from a ResponseCache.
+
+    Attributes
+    ----------
+    max_pages_per_query
+        The maximum number of result pages of a sub-query before it is split further.
+    first_year
+        The first year that can get its own sub-query. Recordings from before this
+        year, and recordings without a known year, are covered by a single sub-query.
+    last_year
+        The last year that can get its own sub-query. Recordings from after this year
+        are covered by a single sub-query.
+    max_workers
+        The maximum number of result pages to fetch concurrently.
+    session
+        The HttpSession to send the requests over, None for the shared session.
+    cache
+        The ResponseCache in which the fetched result pages are cached, None for no
+        caching.
+    """
+
+    def __init__(
+        self,
+        max_pages_per_query: int = 5,
+        first_year: int = 1970,
+        last_year: int | None = None,
+        max_workers: int = 4,
+        session: HttpSession | None = None,
+        cache: ResponseCache | None = None,
+    ):
+        """Create a QueryPlanner.
+
+        Parameters
+        ----------
+        max_pages_per_query : optional
+            The maximum number of result pages of a sub-query before it is split
+            further, by default 5.
+        first_year : optional
+            The first year that gets its own sub-query, by default 1970.
+        last_year : optional
+            The last year that gets its own sub-query, by default the current year.
+        max_workers : optional
+            The maximum number of result pages to fetch concurrently, by default 4.
+        session : optional
+            The HttpSession to send the requests over, by default the shared session.
+        cache : optional
+            The ResponseCache in which the fetched result pages are cached, by default
+            None (no caching).
+        """
+        self.max_pages_per_query = max_pages_per_query
+        self.first_year = first_year
+        self.last_year = last_year if last_year is not None else date.today().year
+        self.max_workers = max_workers
+        self.session = session
+        self.cache = cache
+
+    def plan(self, query: Query) -> list[Query]:
+        """Split a query into sub-queries with at most max_pages_per_query pages each.
+
+        The first result page of the query and of each candidate sub-query is fetched
+        to get its number of pages. Sub-queries without any recordings are left out.
+        A query that already has few enough pages is returned as it is. A sub-query
+        that is still too large after splitting it by month is kept as well.
+
+        Parameters
+        ----------
+        query
+            The query to split.
+
+        Returns
+        -------
+        list[Query]
+            The disjoint sub-queries covering all recordings of the query.
+        """
+        return [sub_query for sub_query, _, _ in self._plan(query)]
+
+    def send_query(self, query: Query) -> QueryResult:
+        """Fetch all recordings of a query by fetching its sub-queries concurrently.
+
+        Parameters
+        ----------
+        query
+            The query to send to the Xeno Canto API.
+
+        Returns
+        -------
+        QueryResult
+            The merged QueryResult of the sub-queries, de-duplicated by recording id
+            (see :meth:`QueryResult.merge
+            <cantopy.xenocanto_components.QueryResult.merge>`). Its ``query_provenance``
+            attribute refers to the positions of the sub-queries returned by
+            :meth:`plan`.
+        """
+        planned_queries = self._plan(query)
+
+        # Only the pages after the first page, which was fetched while planning, are
+        # left to fetch
+        remaining_pages = [
+            (sub_query.to_string(), page)
+            for sub_query, query_metadata, _ in planned_queries
+            for page in range(2, query_metadata["available_num_pages"] + 1)
+        ]
+        fetched_pages = iter(self._fetch_result_pages(remaining_pages))
+
+        query_results = [
+            QueryResult(
+                query_metadata,
+                [result_page_1]
+                + [
+                    next(fetched_pages)[1]
+                    for _ in range(2, query_metadata["available_num_pages"] + 1)
+                ],
+            )
+            for _, query_metadata, result_page_1 in planned_queries
+        ]
+
+        return QueryResult.merge(query_results)
+
+    def _plan(
+        self, query: Query
+    ) -> list[tuple[Query, dict[str, int], ResultPage]]:
+        """Split a query into sub-queries, keeping the first page of each sub-query.
+
+        Parameters
+        ----------
+        query
+            The query to split.
+
+        Returns
+        -------
+        list[tuple[Query, dict[str, int], ResultPage]]
+            The sub-queries, with the query metadata and the first result page of each.
+        """
+        # Step 1: Keep the query as it is if it has few enough pages
+        query_metadata, result_page_1 = self._fetch_result_pages(
+            [(query.to_string(), 1)]
+        )[0]
+        if (
+            query_metadata["available_num_pages"] <= self.max_pages_per_query
+            or query.recorded_year != "None"
+            or query.recorded_month != "None"
+        ):
+            return [(query, query_metadata, result_page_1)]
+
+        # Step 2: Split the query by recorded year
+        planned_queries = self._split(
+            query, "recorded_year", self.first_year, self.last_year
+        )
+
+        # Step 3: Split the single years that are still too large by recorded month
+        return [
+            planned_query
+            for year_query in planned_queries
+            for planned_query in (
+                self._split(year_query[0], "recorded_month", 1, 12)
+                if year_query[1]["available_num_pages"] > self.max_pages_per_query
+                and year_query[0].recorded_year.isdigit()
+                else [year_query]
+            )
+            if planned_query[1]["available_num_recordings"] > 0
+        ]
+
+    def _split(
+        self, query: Query, attribute: str, first_value: int, last_value: int
+    ) -> list[tuple[Query, dict[str, int], ResultPage]]:
+        """Split a query by the values of a recording date attribute.
+
+        The values before a lower bound are covered by a single sub-query, as are the
+        values after an upper bound, and each value in between gets its own sub-query.
+        Both bounds are binary searched, so the number of fetched first pages grows
+        with the number of values that need their own sub-query, and only
+        logarithmically with the number of values between first_value and last_value.
+
+        Parameters
+        ----------
+        query
+            The query to split.
+        attribute
+            The query attribute to split by, "recorded_year" or "recorded_month".
+        first_value
+            The first value that can get its own sub-query.
+        last_value
+            The last value that can get its own sub-query.
+
+        Returns
+        -------
+        list[tuple[Query, dict[str, int], ResultPage]]
+            The sub-queries in order of their values, with the query metadata and the
+            first result page of each.
+        """
+        planned_queries: dict[str, tuple[Query, dict[str, int], ResultPage]] = {}
+
+        # Step 1: Binary search the largest lower bound whose preceding values fit in
+        # one sub-query, and the smallest upper bound whose following values fit in one
+        # sub-query. The probes of both searches are fetched concurrently.
+        lower_bounds = (first_value, last_value + 1)
+        upper_bounds = (first_value - 1, last_value)
+        while True:
+            lower_bound = (lower_bounds[0] + lower_bounds[1] + 1) // 2
+            upper_bound = (upper_bounds[0] + upper_bounds[1]) // 2
+            self._fetch_split_queries(
+                query,
+                attribute,
+                [f'"<{lower_bound}"', f'">{upper_bound}"'],
+                planned_queries,
+            )
+            if (
+                lower_bounds[0] == lower_bounds[1]
+                and upper_bounds[0] == upper_bounds[1]
+            ):
+                break
+
+            if lower_bounds[0] < lower_bounds[1]:
+                lower_bounds = (
+                    (lower_bound, lower_bounds[1])
+                    if self._fits(planned_queries[f'"<{lower_bound}"'])
+                    else (lower_bounds[0], lower_bound - 1)
+                )
+            if upper_bounds[0] < upper_bounds[1]:
+                upper_bounds = (
+                    (upper_bounds[0], upper_bound)
+                    if self._fits(planned_queries[f'">{upper_bound}"'])
+                    else (upper_bound + 1, upper_bounds[1])
+                )
+
+        # Step 2: Give each value between the bounds its own sub-query
+        lower_bound = lower_bounds[0]
+        upper_bound = max(upper_bounds[0], lower_bound - 1)
+        values = (
+            [f'"<{lower_bound}"']
+            + [str(value) for value in range(lower_bound, upper_bound + 1)]
+            + [f'">{upper_bound}"']
+        )
+        self._fetch_split_queries(query, attribute, values, planned_queries)
+
+        return [planned_queries[value] for value in values]
+
+    def _fetch_split_queries(
+        self,
+        query: Query,
+        attribute: str,
+        values: list[str],
+        planned_queries: dict[str, tuple[Query, dict[str, int], ResultPage]],
+    ):
+        """Fetch the first page of the sub-queries of a query that were not fetched yet.
+
+        Parameters
+        ----------
+        query
+            The query to split.
+        attribute
+            The query attribute to split by.
+        values
+            The values of the attribute of the sub-queries.
+        planned_queries
+            The sub-queries fetched so far, with their query metadata and first result
+            page, keyed by value. The newly fetched sub-queries are added to it.
+        """
+        new_values = [
+            value for value in dict.fromkeys(values) if value not in planned_queries
+        ]
+        planned_queries.update(
+            zip(
+                new_values,
+                self._fetch_first_pages(
+                    [query.copy_with(**{attribute: value}) for value in new_values]
+                ),
+            )
+        )
+
+    def _fits(self, planned_query: tuple[Query, dict[str, int], ResultPage]) -> bool:
+        """Check whether a planned sub-query has at most max_pages_per_query pages.
+
+        Parameters
+        ----------
+        planned_query
+            The sub-query, with its query metadata and first result page.
+
+        Returns
+        -------
+        bool
+            Whether the sub-query has few enough pages.
+        """
+        return planned_query[1]["available_num_pages"] <= self.max_pages_per_query
+
+    def _fetch_first_pages(
+        self, queries: list[Query]
+    ) -> list[tuple[Query, dict[str, int], ResultPage]]:
+        """Fetch the first result page of each query.
+
+        Parameters
+        ----------
+        queries
+            The queries to fetch the first page of.
+
+        Returns
+        -------
+        list[tuple[Query, dict[str, int], ResultPage]]
+            The queries, with the query metadata and the first result page of each.
+        """
+        first_pages = self._fetch_result_pages(
+            [(query.to_string(), 1) for query in queries]
+        )
+
+        return [
+            (query, query_metadata, result_page_1)
+            for query, (query_metadata, result_page_1) in zip(queries, first_pages)
+        ]
+
+    def _fetch_result_pages(
+        self, pages: list[tuple[str, int]]
+    ) -> list[tuple[dict[str, int], ResultPage]]:
+        """Fetch result pages of possibly different queries concurrently.
+
+        Parameters
+        ----------
+        pages
+            The query string and page number of each page to fetch.
+
+        Returns
+        -------
+        list[tuple[dict[str, int], ResultPage]]
+            The query metadata and ResultPage of each page, in the order of the pages.
+        """
+        # Executor.map yields the results in submission order
+        with ThreadPoolExecutor(max_workers=max(1, self.max_workers)) as executor:
+            return list(
+                executor.map(
+                    lambda page: FetchManager._fetch_result_page(  # type: ignore
+                        page[0], page=page[1], session=self.session, cache=self.cache
+                    ),
+                    pages,
+                )
+            )
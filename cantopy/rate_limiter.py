@@ -0,0 +1,231 @@
+import asyncio
+from datetime import datetime, timezone
+from email.utils import parsedate_to_datetime
+import random
+import threading
+import time
+
+
+class RateLimiter:
+    """A thread-safe, adaptive token bucket rate limiter.
+
+    Every request first takes a token from the bucket, which is refilled at the
+    current rate. The rate adapts to the server with additive increase,
+    multiplicative decrease: each successful request raises it a little, up to
+    max_rate, while each time the server pushes back (429/503 responses, timeouts)
+    it is cut, down to min_rate. A single RateLimiter shared by all workers this way
+    settles at the highest request rate the server tolerates.
+
+    Attributes
+    ----------
+    rate
+        The current number of requests per second.
+    max_rate
+        The maximum number of requests per second.
+    min_rate
+        The minimum number of requests per second.
+    burst
+        The maximum number of requests that can be sent at once after an idle period.
+    increase
+        The number of requests per second the rate is raised by after a success.
+    decrease_factor
+        The factor the rate is multiplied by when the server pushes back.
+    """
+
+    def __init__(
+        self,
+        max_rate: float = 5.0,
+        min_rate: float = 0.1,
+        burst: int = 1,
+        increase: float | None = None,
+        decrease_factor: float = 0.5,
+    ):
+        """Create a RateLimiter.
+
+        Parameters
+        ----------
+        max_rate : optional
+            The maximum number of requests per second, by default 5.0. The limiter
+            starts at this rate.
+        min_rate : optional
+            The minimum number of requests per second, by default 0.1.
+        burst : optional
+            The maximum number of requests that can be sent at once after an idle
+            period, by default 1.
+        increase : optional
+            The number of requests per second the rate is raised by after a success,
+            by default a twentieth of max_rate.
+        decrease_factor : optional
+            The factor the rate is multiplied by when the server pushes back, by
+            default 0.5.
+        """
+        self.max_rate = max_rate
+        self.min_rate = min_rate
+        self.rate = max_rate
+        self.burst = burst
+        self.increase = increase if increase is not None else max_rate / 20
+        self.decrease_factor = decrease_factor
+
+        self._lock = threading.Lock()
+        self._tokens = float(burst)
+        self._last_refill = time.monotonic()
+        self._paused_until = 0.0
+
+    def acquire(self):
+        """Wait until a request can be sent, and take a token for it."""
+        wait = self._take_token()
+        if wait > 0:
+            time.sleep(wait)
+
+    async def acquire_async(self):
+        """Wait until a request can be sent, and take a token for it, without blocking
+        the running asyncio event loop."""
+        wait = self._take_token()
+        if wait > 0:
+            await asyncio.sleep(wait)
+
+    def _take_token(self) -> float:
+        """Take a token from the bucket.
+
+        Returns
+        -------
+        float
+            The time in seconds to wait before the request can be sent.
+        """
+        with self._lock:
+            now = time.monotonic()
+
+            # Step 1: Refill the bucket for the time that passed since the last refill
+            self._tokens = min(
+                self.burst, self._tokens + (now - self._last_refill) * self.rate
+            )
+            self._last_refill = now
+
+            # Step 2: Take a token, going into debt if none is available. The debt
+            # determines how long this request has to wait, so waiting threads are
+            # served in order.
+            self._tokens -= 1
+            return max(-self._tokens / self.rate, self._paused_until - now, 0.0)
+
+    def on_success(self):
+        """Raise the rate after the server handled a request successfully."""
+        with self._lock:
+            self.rate = min(self.max_rate, self.rate + self.increase)
+
+    def on_throttle(self, retry_after: float | None = None):
+        """Lower the rate after the server pushed back on a request.
+
+        Parameters
+        ----------
+        retry_after : optional
+            The number of seconds the server asked to wait before the next request,
+            by default None. If given, no new requests are sent during this period.
+        """
+        with self._lock:
+            self.rate = max(self.min_rate, self.rate * self.decrease_factor)
+            if retry_after is not None:
+                self._paused_until = max(
+                    self._paused_until, time.monotonic() + retry_after
+                )
+
+
+class RetryPolicy:
+    """The policy for retrying failed requests with jittered exponential backoff.
+
+    Attributes
+    ----------
+    max_retries
+        The maximum number of times a failed request is retried.
+    backoff_factor
+        The base delay in seconds of the exponential backoff.
+    max_backoff
+        The maximum delay in seconds between two attempts, unless the server asks
+        for a longer delay with a Retry-After header.
+    retry_status_codes
+        The HTTP status codes of the responses that are retried.
+    """
+
+    def __init__(
+        self,
+        max_retries: int = 5,
+        backoff_factor: float = 0.5,
+        max_backoff: float = 60.0,
+        retry_status_codes: tuple[int, ...] = (429, 500, 502, 503, 504),
+    ):
+        """Create a RetryPolicy.
+
+        Parameters
+        ----------
+        max_retries : optional
+            The maximum number of times a failed request is retried, by default 5.
+        backoff_factor : optional
+            The base delay in seconds of the exponential backoff, by default 0.5.
+        max_backoff : optional
+            The maximum delay in seconds between two attempts, by default 60.0.
+        retry_status_codes : optional
+            The HTTP status codes of the responses that are retried, by default the
+            429 (Too Many Requests) and 5xx server error codes.
+        """
+        self.max_retries = max_retries
+        self.backoff_factor = backoff_factor
+        self.max_backoff = max_backoff
+        self.retry_status_codes = retry_status_codes
+
+    def get_delay(self, attempt: int, retry_after: float | None = None) -> float:
+        """Get the delay before retrying a failed attempt.
+
+        The delay is drawn uniformly between zero and the exponential backoff, so
+        workers that failed at the same time don't all retry at the same time.
+
+        Parameters
+        ----------
+        attempt
+            The number of the failed attempt, starting from 0.
+        retry_after : optional
+            The number of seconds the server asked to wait, by default None. The
+            delay is never shorter than this.
+
+        Returns
+        -------
+        float
+            The delay in seconds.
+        """
+        backoff = min(self.max_backoff, self.backoff_factor * 2**attempt)
+        delay = random.uniform(0, backoff)
+
+        if retry_after is not None:
+            delay = max(delay, retry_after)
+
+        return delay
+
+    @staticmethod
+    def parse_retry_after(retry_after: str | None) -> float | None:
+        """Parse the value of a Retry-After header.
+
+        Parameters
+        ----------
+        retry_after
+            The value of the header, either a number of seconds or an HTTP date.
+
+        Returns
+        -------
+        float | None
+            The number of seconds to wait, None if the header is missing or invalid.
+        """
+        if retry_after is None:
+            return None
+
+        try:
+            return max(float(retry_after), 0.0)
+        except ValueError:
+            pass
+
+        try:
+            retry_date = parsedate_to_datetime(retry_after)
+        except (TypeError, ValueError):
+            return None
+
+        if retry_date.tzinfo is None:
+            retry_date = retry_date.replace(tzinfo=timezone.utc)
+
+        return max((retry_date - datetime.now(timezone.utc)).total_seconds(), 0.0)
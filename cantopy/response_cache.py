@@ -0,0 +1,284 @@
+from os.path import dirname
+import os
+import sqlite3
+import threading
+import time
+from typing import Any
+
+
+class CachedResponse:
+    """A XenoCanto API response stored in a ResponseCache.
+
+    Attributes
+    ----------
+    body
+        The raw body of the response.
+    etag
+        The ETag header of the response, None if the server did not send one.
+    last_modified
+        The Last-Modified header of the response, None if the server did not send one.
+    is_fresh
+        Whether the response is younger than the time-to-live of the cache, so it can
+        be used without revalidating it with the server.
+    """
+
+    def __init__(
+        self,
+        body: bytes,
+        etag: str | None,
+        last_modified: str | None,
+        is_fresh: bool,
+    ):
+        self.body = body
+        self.etag = etag
+        self.last_modified = last_modified
+        self.is_fresh = is_fresh
+
+    def get_conditional_headers(self) -> dict[str, str]:
+        """Get the headers to revalidate this response with the server.
+
+        Returns
+        -------
+        dict[str, str]
+            The If-None-Match and If-Modified-Since headers for the validators of this
+            response, an empty dict if the server did not send any validators.
+        """
+        headers: dict[str, str] = {}
+        if self.etag is not None:
+            headers["If-None-Match"] = self.etag
+        if self.last_modified is not None:
+            headers["If-Modified-Since"] = self.last_modified
+
+        return headers
+
+
+class ResponseCache:
+    """A persistent on-disk cache for XenoCanto API result pages.
+
+    Responses are stored in a SQLite database, keyed on the query string and the page
+    number. A cached response younger than the time-to-live is used without contacting
+    the server. An older response is revalidated with the server using its ETag and
+    Last-Modified validators, so an unchanged page is not downloaded again. When the
+    cache grows beyond its maximum size, the least recently used responses are evicted.
+    The cache is safe to use from multiple worker threads.
+
+    Attributes
+    ----------
+    cache_path
+        The path of the SQLite database file.
+    ttl
+        The time-to-live in seconds of a cached response.
+    max_size
+        The maximum total size in bytes of the cached response bodies.
+    hits
+        The number of pages served from the cache without contacting the server.
+    revalidated
+        The number of stale pages that the server confirmed to be unchanged.
+    misses
+        The number of pages that had to be downloaded from the server in full.
+    """
+
+    def __init__(
+        self,
+        cache_path: str,
+        ttl: float = 24 * 60 * 60,
+        max_size: int = 256 * 1024 * 1024,
+    ):
+        """Open a response cache, creating it if it does not exist yet.
+
+        Parameters
+        ----------
+        cache_path
+            The path of the SQLite database file.
+        ttl : optional
+            The time-to-live in seconds of a cached response, by default one day.
+        max_size : optional
+            The maximum total size in bytes of the cached response bodies, by default
+            256 MiB.
+        """
+        self.cache_path = cache_path
+        self.ttl = ttl
+        self.max_size = max_size
+        self.hits = 0
+        self.revalidated = 0
+        self.misses = 0
+
+        if dirname(cache_path):
+            os.makedirs(dirname(cache_path), exist_ok=True)
+
+        self._lock = threading.Lock()
+        self._connection = sqlite3.connect(cache_path, check_same_thread=False)
+        with self._lock, self._connection:
+            self._connection.execute(
+                "CREATE TABLE IF NOT EXISTS responses ("
+                "query_str TEXT NOT NULL, "
+                "page INTEGER NOT NULL, "
+                "body BLOB NOT NULL, "
+                "etag TEXT, "
+                "last_modified TEXT, "
+                "stored_at REAL NOT NULL, "
+                "last_accessed_at REAL NOT NULL, "
+                "PRIMARY KEY (query_str, page))"
+            )
+
+    def get(self, query_str: str, page: int) -> CachedResponse | None:
+        """Get the cached response for a result page.
+
+        A fresh response counts as a cache hit.
+
+        Parameters
+        ----------
+        query_str
+            The query sent to the Xeno Canto API, printed in string format.
+        page
+            The number id of the result page.
+
+        Returns
+        -------
+        CachedResponse | None
+            The cached response, None if the page is not in the cache.
+        """
+        now = time.time()
+
+        with self._lock, self._connection:
+            row = self._connection.execute(
+                "SELECT body, etag, last_modified, stored_at FROM responses "
+                "WHERE query_str = ? AND page = ?",
+                (query_str, page),
+            ).fetchone()
+            if row is None:
+                return None
+
+            self._connection.execute(
+                "UPDATE responses SET last_accessed_at = ? "
+                "WHERE query_str = ? AND page = ?",
+                (now, query_str, page),
+            )
+
+            body, etag, last_modified, stored_at = row
+            cached_response = CachedResponse(
+                body, etag, last_modified, now - stored_at < self.ttl
+            )
+            if cached_response.is_fresh:
+                self.hits += 1
+
+        return cached_response
+
+    def put(
+        self,
+        query_str: str,
+        page: int,
+        body: bytes,
+        etag: str | None = None,
+        last_modified: str | None = None,
+    ):
+        """Store a response that was downloaded from the server in full.
+
+        This counts as a cache miss. If the cache grows beyond its maximum size, the
+        least recently used responses are evicted.
+
+        Parameters
+        ----------
+        query_str
+            The query sent to the Xeno Canto API, printed in string format.
+        page
+            The number id of the result page.
+        body
+            The raw body of the response.
+        etag : optional
+            The ETag header of the response, by default None.
+        last_modified : optional
+            The Last-Modified header of the response, by default None.
+        """
+        now = time.time()
+
+        with self._lock, self._connection:
+            self.misses += 1
+            self._connection.execute(
+                "INSERT OR REPLACE INTO responses VALUES (?, ?, ?, ?, ?, ?, ?)",
+                (query_str, page, body, etag, last_modified, now, now),
+            )
+            self._evict()
+
+    def revalidate(self, query_str: str, page: int):
+        """Mark a cached response as confirmed unchanged by the server.
+
+        This restarts the time-to-live of the response.
+
+        Parameters
+        ----------
+        query_str
+            The query sent to the Xeno Canto API, printed in string format.
+        page
+            The number id of the result page.
+        """
+        with self._lock, self._connection:
+            self.revalidated += 1
+            self._connection.execute(
+                "UPDATE responses SET stored_at = ? WHERE query_str = ? AND page = ?",
+                (time.time(), query_str, page),
+            )
+
+    def get_stats(self) -> dict[str, int]:
+        """Get the usage counters and the current size of the cache.
+
+        Returns
+        -------
+        dict[str, int]
+            A dictionary with the "hits", "revalidated" and "misses" counters, the
+            number of cached "entries" and their total "size" in bytes.
+        """
+        with self._lock:
+            entries, size = self._connection.execute(
+                "SELECT COUNT(*), COALESCE(SUM(LENGTH(body)), 0) FROM responses"
+            ).fetchone()
+
+        return {
+            "hits": self.hits,
+            "revalidated": self.revalidated,
+            "misses": self.misses,
+            "entries": entries,
+            "size": size,
+        }
+
+    def clear(self):
+        """Remove all responses from the cache."""
+        with self._lock, self._connection:
+            self._connection.execute("DELETE FROM responses")
+
+    def close(self):
+        """Close the connection to the cache database."""
+        with self._lock:
+            self._connection.close()
+
+    def _evict(self):
+        """Evict least recently used responses until the cache fits its maximum size.
+
+        This method should be called while holding the lock.
+        """
+        size = self._connection.execute(
+            "SELECT COALESCE(SUM(LENGTH(body)), 0) FROM responses"
+        ).fetchone()[0]
+        if size <= self.max_size:
+            return
+
+        evicted_keys: list[tuple[str, int]] = []
+        for query_str, page, body_size in self._connection.execute(
+            "SELECT query_str, page, LENGTH(body) FROM responses "
+            "ORDER BY last_accessed_at ASC, rowid ASC"
+        ).fetchall():
+            if size <= self.max_size:
+                break
+
+            evicted_keys.append((query_str, page))
+            size -= body_size
+
+        self._connection.executemany(
+            "DELETE FROM responses WHERE query_str = ? AND page = ?", evicted_keys
+        )
+
+    def __enter__(self) -> "ResponseCache":
+        return self
+
+    def __exit__(self, *args: Any):
+        self.close()
@@ -0,0 +1,342 @@
+from os.path import exists, join
+from typing import Any
+import json
+import os
+import re
+import numpy as np
+import pandas as pd
+from cantopy.feature_extractor import load_audio
+from cantopy.metadata_store import MetadataStore
+
+
+# The record layout of the offset index of a shard
+SHARD_INDEX_DTYPE = np.dtype(
+    [("recording_id", "<i8"), ("offset", "<i8"), ("length", "<i8")]
+)
+
+# Recordings are aligned in the shard files, so decoded samples can be viewed in place
+SHARD_ALIGNMENT = 64
+
+# The names of the files that make up a shard
+_SHARD_FILE_PATTERN = re.compile(r"^shard-(\d{5})\.(bin|index\.npy|metadata\.csv)$")
+
+
+def export_shards(
+    data_base_path: str,
+    metadata_store: MetadataStore,
+    output_path: str,
+    animal_folder_names: list[str] | None = None,
+    shard_size: int = 1024 * 1024 * 1024,
+    content: str = "raw",
+    sample_rate: int = 22050,
+    ffmpeg_path: str = "ffmpeg",
+) -> list[str]:
+    """Pack the downloaded recordings of a data folder into large shard files.
+
+    Each shard consists of three files:
+
+    - ``shard-<number>.bin``: the recordings, concatenated.
+    - ``shard-<number>.index.npy``: the recording id, byte offset and byte length of
+      each recording in the shard, as a structured NumPy array sorted by recording id.
+    - ``shard-<number>.metadata.csv``: the metadata rows of the recordings in the shard.
+
+    A ``shards.json`` manifest describes the content of the shards. Use a
+    :class:`ShardReader` to read the recordings back. Shard files left in output_path
+    by an earlier export with more shards are removed.
+
+    Parameters
+    ----------
+    data_base_path
+        The base data folder containing the species folders.
+    metadata_store
+        The MetadataStore containing the metadata of the downloaded recordings.
+    output_path
+        The folder to write the shards to.
+    animal_folder_names : optional
+        The names of the species folders whose recordings should be exported, by
+        default all species with stored metadata.
+    shard_size : optional
+        The target size in bytes of a shard file, by default 1 GiB. A shard is closed
+        as soon as the next recording would make it larger, so only a shard holding a
+        single recording can exceed this size.
+    content : optional
+        What to store for each recording, by default "raw". With "raw", the bytes of
+        the downloaded MP3 file are stored. With "pcm", the recording is decoded to
+        mono float32 samples at sample_rate.
+    sample_rate : optional
+        The sample rate in Hz of the decoded samples in "pcm" mode, by default 22050.
+    ffmpeg_path : optional
+        The path of the ffmpeg executable used to decode MP3 recordings in "pcm" mode,
+        by default "ffmpeg".
+
+    Returns
+    -------
+    list[str]
+        The paths of the written shard files.
+
+    Raises
+    ------
+    ValueError
+        If an unknown content is passed.
+    """
+    if content not in ("raw", "pcm"):
+        raise ValueError(f"Unknown shard content, expected 'raw' or 'pcm': {content}")
+
+    os.makedirs(output_path, exist_ok=True)
+
+    if animal_folder_names is None:
+        animal_folder_names = metadata_store.list_animal_folder_names()
+
+    shard_paths: list[str] = []
+    shard_file = None
+    shard_index: list[tuple[int, int, int]] = []
+    shard_metadata: list[pd.DataFrame] = []
+    offset = 0
+
+    def close_shard():
+        """Write the offset index and metadata of the current shard and close it."""
+        assert shard_file is not None
+        shard_file.close()
+
+        shard_number = len(shard_paths) - 1
+        np.save(
+            join(output_path, f"shard-{shard_number:05d}.index.npy"),
+            np.sort(
+                np.array(shard_index, dtype=SHARD_INDEX_DTYPE), order="recording_id"
+            ),
+        )
+        pd.concat(shard_metadata, ignore_index=True).to_csv(  # type: ignore
+            join(output_path, f"shard-{shard_number:05d}.metadata.csv"), index=False
+        )
+
+    for animal_folder_name in animal_folder_names:
+        animal_metadata = metadata_store.load(animal_folder_name)
+        if not len(animal_metadata):
+            continue
+
+        # The positions of the metadata rows of this species in the current shard
+        shard_positions: list[int] = []
+
+        for row_number, recording_id in enumerate(
+            animal_metadata["recording_id"].astype(int).tolist()  # type: ignore
+        ):
+            recording_path = join(
+                data_base_path, animal_folder_name, f"{recording_id}.mp3"
+            )
+            if not exists(recording_path):
+                continue
+
+            # Step 1: Read the data of the recording
+            if content == "raw":
+                with open(recording_path, "rb") as file:
+                    data = file.read()
+            else:
+                data = load_audio(recording_path, sample_rate, ffmpeg_path).tobytes()
+
+            # Step 2: Start a new shard if the recording does not fit in the current one
+            padded_offset = -(-offset // SHARD_ALIGNMENT) * SHARD_ALIGNMENT
+            if shard_file is None or (
+                shard_index and padded_offset + len(data) > shard_size
+            ):
+                if shard_file is not None:
+                    if shard_positions:
+                        shard_metadata.append(animal_metadata.iloc[shard_positions])
+                        shard_positions = []
+                    close_shard()
+
+                shard_paths.append(
+                    join(output_path, f"shard-{len(shard_paths):05d}.bin")
+                )
+                shard_file = open(shard_paths[-1], "wb")
+                shard_index = []
+                shard_metadata = []
+                offset = padded_offset = 0
+
+            # Step 3: Append the recording to the shard
+            shard_file.write(bytes(padded_offset - offset))
+            shard_file.write(data)
+            shard_index.append((recording_id, padded_offset, len(data)))
+            shard_positions.append(row_number)
+            offset = padded_offset + len(data)
+
+        if shard_positions:
+            shard_metadata.append(animal_metadata.iloc[shard_positions])
+
+    if shard_file is not None:
+        close_shard()
+
+    with open(join(output_path, "shards.json"), "w") as file:
+        json.dump(
+            {
+                "content": content,
+                "sample_rate": sample_rate if content == "pcm" else None,
+                "shards": [os.path.basename(path) for path in shard_paths],
+            },
+            file,
+            indent=2,
+        )
+
+    # Remove the shards of an earlier export that are not part of this export
+    for file_name in os.listdir(output_path):
+        match = _SHARD_FILE_PATTERN.match(file_name)
+        if match is not None and int(match.group(1)) >= len(shard_paths):
+            os.remove(join(output_path, file_name))
+
+    return shard_paths
+
+
+class ShardReader:
+    """A reader for the recordings packed into shards by :func:`export_shards`.
+
+    The shard files and their offset indexes are memory-mapped. A recording is looked
+    up with a binary search on the sorted recording ids of the indexes, and sliced out
+    of its shard without copying it into memory.
+
+    Attributes
+    ----------
+    shards_path
+        The folder containing the shards.
+    content
+        What is stored for each recording, "raw" bytes or decoded "pcm" samples.
+    sample_rate
+        The sample rate in Hz of the decoded samples, None for raw recordings.
+    """
+
+    def __init__(self, shards_path: str):
+        """Open the shards in a folder.
+
+        Parameters
+        ----------
+        shards_path
+            The folder containing the shards, as written by :func:`export_shards`.
+        """
+        self.shards_path = shards_path
+
+        with open(join(shards_path, "shards.json")) as file:
+            manifest = json.load(file)
+        self.content: str = manifest["content"]
+        self.sample_rate: int | None = manifest["sample_rate"]
+        self._shard_names: list[str] = manifest["shards"]
+
+        self._shards: dict[int, np.memmap[Any, Any]] = {}
+        self._shard_indexes: list[np.ndarray] = [
+            np.load(
+                join(shards_path, shard_name.replace(".bin", ".index.npy")),
+                mmap_mode="r",
+            )
+            for shard_name in self._shard_names
+        ]
+
+    @property
+    def recording_ids(self) -> np.ndarray:
+        """The ids of all recordings in the shards.
+
+        Returns
+        -------
+        np.ndarray
+            The recording ids, in shard order and sorted within each shard.
+        """
+        if not self._shard_indexes:
+            return np.array([], dtype=np.int64)
+
+        return np.concatenate(
+            [shard_index["recording_id"] for shard_index in self._shard_indexes]
+        )
+
+    def __len__(self) -> int:
+        return sum(len(shard_index) for shard_index in self._shard_indexes)
+
+    def __contains__(self, recording_id: object) -> bool:
+        try:
+            return self._locate(int(recording_id)) is not None  # type: ignore
+        except (TypeError, ValueError):
+            return False
+
+    def _locate(self, recording_id: int) -> tuple[int, int, int] | None:
+        """Find a recording in the indexes of the shards.
+
+        Parameters
+        ----------
+        recording_id
+            The id of the recording.
+
+        Returns
+        -------
+        tuple[int, int, int] | None
+            The shard number, byte offset and byte length of the recording, or None if
+            the recording is not in the shards.
+        """
+        for shard_number, shard_index in enumerate(self._shard_indexes):
+            recording_ids = shard_index["recording_id"]
+            position = int(np.searchsorted(recording_ids, recording_id))
+            if (
+                position < len(recording_ids)
+                and recording_ids[position] == recording_id
+            ):
+                return (
+                    shard_number,
+                    int(shard_index["offset"][position]),
+                    int(shard_index["length"][position]),
+                )
+
+        return None
+
+    def get_recording(self, recording_id: int | str) -> np.ndarray:
+        """Get a recording from its memory-mapped shard.
+
+        Parameters
+        ----------
+        recording_id
+            The id of the recording.
+
+        Returns
+        -------
+        np.ndarray
+            A read-only view on the recording in its shard file, as uint8 bytes for raw
+            recordings or as float32 samples for decoded recordings.
+
+        Raises
+        ------
+        KeyError
+            If the recording is not in the shards.
+        """
+        location = self._locate(int(recording_id))
+        if location is None:
+            raise KeyError(recording_id)
+        shard_number, offset, length = location
+
+        if shard_number not in self._shards:
+            self._shards[shard_number] = np.memmap(
+                join(self.shards_path, self._shard_names[shard_number]),
+                dtype=np.uint8,
+                mode="r",
+            )
+
+        recording = self._shards[shard_number][offset : offset + length]
+        if self.content == "pcm":
+            return recording.view(np.float32)
+
+        return recording
+
+    def load_metadata(self) -> pd.DataFrame:
+        """Load the metadata of all recordings in the shards.
+
+        Returns
+        -------
+        pd.DataFrame
+            The metadata rows of the recordings, in shard order, with the number of the
+            shard of each recording in the ``shard`` column.
+        """
+        shard_metadata = []
+        for shard_number, shard_name in enumerate(self._shard_names):
+            metadata = pd.read_csv(  # type: ignore
+                join(self.shards_path, shard_name.replace(".bin", ".metadata.csv")),
+                dtype=str,
+            )
+            metadata["shard"] = shard_number
+            shard_metadata.append(metadata)
+
+        if not shard_metadata:
+            return pd.DataFrame({})
+
+        return pd.concat(shard_metadata, ignore_index=True)  # type: ignore
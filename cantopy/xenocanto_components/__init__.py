@@ -1,6 +1,16 @@
 from cantopy.xenocanto_components.query import Query
 from cantopy.xenocanto_components.query_result import QueryResult
 from cantopy.xenocanto_components.recording import Recording
+from cantopy.xenocanto_components.recording_batch import RecordingBatch
+from cantopy.xenocanto_components.recording_filter import F, Predicate
 from cantopy.xenocanto_components.result_page import ResultPage
 
-__all__ = ["Query", "QueryResult", "Recording", "ResultPage"]
+__all__ = [
+    "F",
+    "Predicate",
+    "Query",
+    "QueryResult",
+    "Recording",
+    "RecordingBatch",
+    "ResultPage",
+]
@@ -0,0 +1,242 @@
+from datetime import datetime
+from typing import Any
+import math
+import re
+import pandas as pd
+
+
+# The XenoCanto quality ratings, from worst to best, so "A" > "B" in the ordered
+# categorical returned by parse_quality_ratings
+QUALITY_RATINGS = ["E", "D", "C", "B", "A"]
+
+# The Recording attributes that have a parsed typed counterpart
+PARSED_COLUMNS = [
+    "recording_length",
+    "latitude",
+    "longitude",
+    "recording_date",
+    "upload_date",
+    "quality_rating",
+]
+
+
+def parse_recording_length(recording_length: str) -> float:
+    """Parse a XenoCanto recording length to a number of seconds.
+
+    Parameters
+    ----------
+    recording_length
+        The recording length, formatted as "m:ss" or "h:mm:ss".
+
+    Returns
+    -------
+    float
+        The length in seconds, NaN if the length could not be parsed.
+    """
+    try:
+        parts = [float(part) for part in recording_length.split(":")]
+    except ValueError:
+        return math.nan
+
+    if not 2 <= len(parts) <= 3:
+        return math.nan
+
+    seconds = 0.0
+    for part in parts:
+        seconds = 60 * seconds + part
+
+    return seconds
+
+
+def parse_coordinate(coordinate: str) -> float:
+    """Parse a XenoCanto latitude or longitude.
+
+    Parameters
+    ----------
+    coordinate
+        The coordinate in decimal degrees.
+
+    Returns
+    -------
+    float
+        The coordinate, NaN if it could not be parsed.
+    """
+    try:
+        return float(coordinate)
+    except ValueError:
+        return math.nan
+
+
+def parse_date(date: str) -> pd.Timestamp:
+    """Parse a XenoCanto recording or upload date.
+
+    Parameters
+    ----------
+    date
+        The date, formatted as "YYYY-MM-DD". Unknown days or months are written as "00",
+        and are parsed as the first day or month.
+
+    Returns
+    -------
+    pd.Timestamp
+        The date, NaT if it could not be parsed.
+    """
+    try:
+        return pd.Timestamp(
+            datetime.strptime(re.sub(r"-00\b", "-01", date), "%Y-%m-%d")
+        )
+    except ValueError:
+        return pd.NaT  # type: ignore
+
+
+def parse_quality_rating(quality_rating: str) -> str | None:
+    """Parse a XenoCanto quality rating.
+
+    Parameters
+    ----------
+    quality_rating
+        The quality rating, "A" (best) to "E" (worst).
+
+    Returns
+    -------
+    str | None
+        The quality rating, None if the recording has no valid rating.
+    """
+    return quality_rating if quality_rating in QUALITY_RATINGS else None
+
+
+def parse_recording_lengths(recording_lengths: Any) -> pd.Series:
+    """Parse XenoCanto recording lengths to numbers of seconds, vectorized.
+
+    Parameters
+    ----------
+    recording_lengths
+        The recording lengths, formatted as "m:ss" or "h:mm:ss". Already parsed
+        timedelta or numeric values are converted to seconds.
+
+    Returns
+    -------
+    pd.Series
+        The float64 lengths in seconds, NaN where a length could not be parsed.
+    """
+    values = pd.Series(recording_lengths)
+    if pd.api.types.is_timedelta64_dtype(values):
+        return values.dt.total_seconds()
+    if pd.api.types.is_numeric_dtype(values):
+        return values.astype("float64")
+
+    # Split the lengths in their parts like parse_recording_length, so both parsers
+    # agree on every value. Values without two or three parts, like a bare "10", are NaN.
+    values = values.astype("string")
+    num_parts = (values.str.count(":") + 1).fillna(0)
+    parts = values.str.split(":", expand=True)
+
+    seconds = pd.Series(0.0, index=values.index)
+    for position in parts.columns:
+        part = pd.to_numeric(parts[position].astype(object), errors="coerce")
+        seconds = seconds.where(num_parts <= position, 60 * seconds + part)
+
+    return seconds.where((num_parts >= 2) & (num_parts <= 3)).astype("float64")
+
+
+def parse_coordinates(coordinates: Any) -> pd.Series:
+    """Parse XenoCanto latitudes or longitudes, vectorized.
+
+    Parameters
+    ----------
+    coordinates
+        The coordinates in decimal degrees.
+
+    Returns
+    -------
+    pd.Series
+        The float64 coordinates, NaN where a coordinate could not be parsed.
+    """
+    return pd.to_numeric(pd.Series(coordinates), errors="coerce").astype("float64")  # type: ignore
+
+
+def parse_dates(dates: Any) -> pd.Series:
+    """Parse XenoCanto recording or upload dates, vectorized.
+
+    Parameters
+    ----------
+    dates
+        The dates, formatted as "YYYY-MM-DD". Unknown days or months are written as
+        "00", and are parsed as the first day or month. Already parsed datetime values
+        are returned as they are.
+
+    Returns
+    -------
+    pd.Series
+        The datetime64 dates, NaT where a date could not be parsed.
+    """
+    values = pd.Series(dates)
+    if pd.api.types.is_datetime64_any_dtype(values):
+        return values
+
+    # Unknown days or months are written as "00"
+    dates = values.astype("string").str.replace(r"-00\b", "-01", regex=True)
+    return pd.to_datetime(dates, format="%Y-%m-%d", errors="coerce")  # type: ignore
+
+
+def parse_quality_ratings(quality_ratings: Any) -> pd.Series:
+    """Parse XenoCanto quality ratings to an ordered categorical, vectorized.
+
+    The categories are ordered from worst to best, so ratings can be compared, for
+    example ``parse_quality_ratings(ratings) >= "B"`` selects the "A" and "B" ratings.
+
+    Parameters
+    ----------
+    quality_ratings
+        The quality ratings, "A" (best) to "E" (worst).
+
+    Returns
+    -------
+    pd.Series
+        The ordered categorical quality ratings, NaN where a recording has no valid
+        rating.
+    """
+    return pd.Series(quality_ratings).astype(
+        pd.CategoricalDtype(QUALITY_RATINGS, ordered=True)
+    )
+
+
+def add_parsed_columns(recordings_metadata: pd.DataFrame) -> pd.DataFrame:
+    """Add the parsed typed values of the metadata columns to a metadata DataFrame.
+
+    For each of the recording_length, latitude, longitude, recording_date, upload_date
+    and quality_rating columns, a ``parsed_<column>`` column is added with the same
+    values as the corresponding ``Recording.parsed_<column>`` property: lengths in
+    seconds as float64, coordinates as float64, dates as datetime64 and quality
+    ratings as an ordered categorical. The original columns are left as they are.
+
+    Parameters
+    ----------
+    recordings_metadata
+        The recording metadata, as created by :meth:`Recording.to_dataframe
+        <cantopy.xenocanto_components.Recording.to_dataframe>` or loaded from a
+        metadata store.
+
+    Returns
+    -------
+    pd.DataFrame
+        A copy of the metadata with the parsed columns added.
+    """
+    parse_functions = {
+        "recording_length": parse_recording_lengths,
+        "latitude": parse_coordinates,
+        "longitude": parse_coordinates,
+        "recording_date": parse_dates,
+        "upload_date": parse_dates,
+        "quality_rating": parse_quality_ratings,
+    }
+
+    parsed_recordings_metadata = recordings_metadata.copy()
+    for column in PARSED_COLUMNS:
+        if column in recordings_metadata.columns:
+            parsed_values = parse_functions[column](recordings_metadata[column])
+            parsed_values.index = recordings_metadata.index
+            parsed_recordings_metadata[f"parsed_{column}"] = parsed_values
+
+    return parsed_recordings_metadata
+
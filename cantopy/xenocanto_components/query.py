@@ -1,5 +1,6 @@
 # Additional information on the Xeno Canto API can be found at:
 # https://www.xeno-canto.org/explore/api
+import copy
 
 
 class Query:
@@ -200,6 +201,32 @@ class Query:
         self.recorded_month = recorded_month
         self.sample_rate = sample_rate
 
+    def copy_with(self, **attributes: str) -> "Query":
+        """Create a copy of this query with some of its attributes replaced.
+
+        Parameters
+        ----------
+        **attributes
+            The query attributes to replace, for example ``recorded_year="2010"``.
+
+        Returns
+        -------
+        Query
+            The copied query.
+
+        Raises
+        ------
+        AttributeError
+            If one of the attributes is not a query attribute.
+        """
+        query = copy.copy(self)
+        for attribute, value in attributes.items():
+            if not hasattr(self, attribute):
+                raise AttributeError(f"Unknown query attribute: {attribute}")
+            setattr(query, attribute, value)
+
+        return query
+
     def to_string(self) -> str:
         """Generate a string representation of the XenoCantoQuery object for passing to the Xeno Canto API.
 
@@ -1,5 +1,8 @@
 from cantopy.xenocanto_components.result_page import ResultPage
 from cantopy.xenocanto_components.recording import Recording
+from cantopy.xenocanto_components.recording_batch import RecordingBatch
+from cantopy.xenocanto_components.recording_filter import Predicate
+import numpy as np
 import pandas as pd
 
 
@@ -18,10 +21,19 @@ class QueryResult:
         The total number of pages available for this query.
     result_pages: list[ResultPage]
         List of all the returned pages for the query
+    query_provenance : dict[str, list[int]] | None
+        For a QueryResult merged from the results of multiple queries (see
+        :meth:`merge`), the positions of the queries that returned each recording,
+        keyed by recording id. None for the result of a single query.
 
     """
 
-    def __init__(self, query_metadata: dict[str, int], result_pages: list[ResultPage]):
+    def __init__(
+        self,
+        query_metadata: dict[str, int],
+        result_pages: list[ResultPage],
+        query_provenance: dict[str, list[int]] | None = None,
+    ):
         """Create a QueryResult container.
 
         Parameters
@@ -31,6 +43,9 @@ class QueryResult:
             the dict keys are: "available_num_recordings", "available_num_species", "available_num_pages".
         result_pages
             List of all the returned pages for the query.
+        query_provenance : optional
+            The positions of the queries that returned each recording, keyed by
+            recording id, by default None (the result of a single query).
 
         """
 
@@ -41,6 +56,126 @@ class QueryResult:
 
         # Set the result pages
         self.result_pages = result_pages
+        self.query_provenance = query_provenance
+
+    @staticmethod
+    def merge(query_results: list["QueryResult"]) -> "QueryResult":
+        """Merge the results of multiple queries, de-duplicated by recording id.
+
+        Queries for related species or regions often return the same recordings.
+        The merged QueryResult contains each recording only once, on the page where it
+        first occurs when going through the query results in order, so all recordings
+        can be downloaded in a single pass.
+
+        Parameters
+        ----------
+        query_results
+            The results of the queries to merge.
+
+        Returns
+        -------
+        QueryResult
+            The merged QueryResult. Its available numbers of recordings and species are
+            the numbers of unique recordings and species in the merged result, its
+            available number of pages the number of merged pages. The
+            ``query_provenance`` attribute maps each recording id to the positions in
+            query_results of the queries that returned it.
+        """
+        result_pages = [
+            result_page
+            for query_result in query_results
+            for result_page in query_result.result_pages
+        ]
+        recording_batches = [result_page.recording_batch for result_page in result_pages]
+        recording_ids = np.concatenate(
+            [np.empty(0, dtype=np.int64)]
+            + [recording_batch.recording_ids for recording_batch in recording_batches]
+        )
+
+        # Step 1: Only keep the first occurrence of every recording id
+        _, first_positions = np.unique(recording_ids, return_index=True)
+        keep = np.zeros(len(recording_ids), dtype=bool)
+        keep[first_positions] = True
+        page_ends = np.cumsum(
+            [len(recording_batch) for recording_batch in recording_batches]
+        )
+        merged_result_pages = [
+            ResultPage.from_recording_batch(
+                result_page.page_id, result_page.recording_batch[page_keep]
+            )
+            for result_page, page_keep in zip(
+                result_pages, np.split(keep, page_ends[:-1])
+            )
+        ]
+
+        # Step 2: Record which queries returned each recording
+        query_positions = np.concatenate(
+            [np.empty(0, dtype=np.int64)]
+            + [
+                np.full(len(result_page.recording_batch), position, dtype=np.int64)
+                for position, query_result in enumerate(query_results)
+                for result_page in query_result.result_pages
+            ]
+        )
+        query_provenance: dict[str, list[int]] = {}
+        for recording_id, position in np.unique(
+            np.stack([recording_ids, query_positions], axis=1), axis=0
+        ).tolist():
+            query_provenance.setdefault(str(recording_id), []).append(position)
+
+        merged_english_names = np.concatenate(
+            [np.empty(0, dtype=object)]
+            + [
+                result_page.recording_batch.columns["english_name"]
+                for result_page in merged_result_pages
+            ]
+        )
+
+        return QueryResult(
+            {
+                "available_num_recordings": len(first_positions),
+                "available_num_species": len(set(merged_english_names)),
+                "available_num_pages": len(merged_result_pages),
+            },
+            merged_result_pages,
+            query_provenance,
+        )
+
+    def filter(self, recording_filter: Predicate | str) -> "QueryResult":
+        """Select the recordings that match a filter, before downloading them.
+
+        The XenoCanto API can't express every condition, like a range of recording
+        lengths. This method evaluates such conditions client-side, vectorized over the
+        recordings of each page. Pass the filtered QueryResult to
+        :meth:`DownloadManager.download_all_recordings_in_queryresult
+        <cantopy.download_manager.DownloadManager.download_all_recordings_in_queryresult>`
+        to download only the matching recordings.
+
+        Parameters
+        ----------
+        recording_filter
+            A :class:`Predicate <cantopy.xenocanto_components.recording_filter.Predicate>`
+            built from :class:`F <cantopy.xenocanto_components.recording_filter.F>`
+            fields, like ``F("recording_length").between(5, 60) & (F("quality_rating")
+            >= "B")``, or a filter expression, like ``"5 <= recording_length <= 60 and
+            quality_rating in ['A', 'B']"`` (see :func:`parse_filter_expression
+            <cantopy.xenocanto_components.recording_filter.parse_filter_expression>`).
+
+        Returns
+        -------
+        QueryResult
+            A QueryResult with the matching recordings of each page. The available
+            numbers of recordings, species and pages still describe the query.
+        """
+        return QueryResult(
+            {
+                "available_num_recordings": self.available_num_recordings,
+                "available_num_species": self.available_num_species,
+                "available_num_pages": self.available_num_pages,
+            },
+            [result_page.filter(recording_filter) for result_page in self.result_pages],
+            self.query_provenance,
+        )
 
     def get_all_recordings(self) -> list[Recording]:
         """Return all the recordings contained in this QueryResult, across all ResultPages.
@@ -63,10 +198,16 @@ class QueryResult:
         # Return the list of recordings
         return all_recordings
     
-    def get_all_recordings_metadata(self) -> pd.DataFrame:
+    def get_all_recordings_metadata(self, parsed: bool = False) -> pd.DataFrame:
         """Return all the recordings metadata contained in this QueryResult, across all 
         ResultPages.
 
+        Parameters
+        ----------
+        parsed : optional
+            Whether to add the ``parsed_<attribute>`` columns with the typed values of
+            the metadata, by default False.
+
         Returns
         -------
         pd.DataFrame
@@ -75,11 +216,7 @@ class QueryResult:
 
         """
 
-        all_recordings = self.get_all_recordings()
-
-        all_recordings_metadata = pd.concat(
-            [recording.to_dataframe_row() for recording in all_recordings],
-            ignore_index=True
-        )
-
-        return pd.DataFrame(all_recordings_metadata)
+        # Build the DataFrame from the columnar batches, without creating Recordings
+        return RecordingBatch.concatenate(
+            [result_page.recording_batch for result_page in self.result_pages]
+        ).to_dataframe(parsed=parsed)
@@ -1,5 +1,12 @@
 import pandas as pd
 import numpy as np
+from cantopy.xenocanto_components.parsing import (
+    add_parsed_columns,
+    parse_coordinate,
+    parse_date,
+    parse_quality_rating,
+    parse_recording_length,
+)
 
 
 class Recording:
@@ -84,6 +91,81 @@ class Recording:
 
     """
 
+    # The attributes that are exported as columns in the metadata DataFrame, in order
+    dataframe_columns = [
+        "recording_id",
+        "generic_name",
+        "specific_name",
+        "subspecies_name",
+        "species_group",
+        "english_name",
+        "sound_type",
+        "sex",
+        "life_stage",
+        "background_species",
+        "animal_seen",
+        "recordist_name",
+        "recording_method",
+        "license_url",
+        "quality_rating",
+        "recording_length",
+        "recording_date",
+        "recording_time",
+        "upload_date",
+        "recording_url",
+        "audio_file_url",
+        "recordist_remarks",
+        "playback_used",
+        "automatic_recording",
+        "recording_device",
+        "microphone_used",
+        "sample_rate",
+        "country",
+        "locality_name",
+        "latitude",
+        "longitude",
+        "temperature",
+    ]
+
+    # Recordings are created by the hundreds of thousands, so they don't get a __dict__
+    __slots__ = tuple(dataframe_columns)
+
+    # The key and default value in the XenoCanto API response of each attribute
+    api_fields = {
+        "recording_id": ("id", "0"),
+        "generic_name": ("gen", ""),
+        "specific_name": ("sp", ""),
+        "subspecies_name": ("ssp", ""),
+        "species_group": ("group", ""),
+        "english_name": ("en", ""),
+        "sound_type": ("type", ""),
+        "sex": ("sex", ""),
+        "life_stage": ("stage", ""),
+        "background_species": ("also", ""),
+        "animal_seen": ("animal-seen", ""),
+        "recordist_name": ("rec", ""),
+        "recording_method": ("method", ""),
+        "license_url": ("lic", ""),
+        "quality_rating": ("q", ""),
+        "recording_length": ("length", ""),
+        "recording_date": ("date", ""),
+        "recording_time": ("time", ""),
+        "upload_date": ("uploaded", ""),
+        "recording_url": ("url", ""),
+        "audio_file_url": ("file", ""),
+        "recordist_remarks": ("rmk", ""),
+        "playback_used": ("playback-used", ""),
+        "automatic_recording": ("auto", ""),
+        "recording_device": ("dvc", ""),
+        "microphone_used": ("mic", ""),
+        "sample_rate": ("smp", "0"),
+        "country": ("cnt", ""),
+        "locality_name": ("loc", ""),
+        "latitude": ("lat", ""),
+        "longitude": ("lng", ""),
+        "temperature": ("temp", ""),
+    }
+
     def __init__(self, recording_data: dict[str, str]):
         """Create a Recording object with a given recording dict returned from the XenoCanto API
 
@@ -133,6 +215,68 @@ class Recording:
         self.longitude = str(recording_data.get("lng", ""))
         self.temperature = str(recording_data.get("temp", ""))
 
+    @classmethod
+    def from_attributes(cls, attributes: dict[str, str]) -> "Recording":
+        """Create a Recording object directly from its attribute values.
+
+        Parameters
+        ----------
+        attributes
+            The value of each attribute of the recording, keyed by attribute name.
+
+        Returns
+        -------
+        Recording
+            The created Recording object.
+        """
+        recording = cls.__new__(cls)
+        for attribute in cls.__slots__:
+            setattr(recording, attribute, attributes[attribute])
+
+        return recording
+
+    def __eq__(self, other: object) -> bool:
+        if not isinstance(other, Recording):
+            return NotImplemented
+
+        return all(
+            getattr(self, attribute) == getattr(other, attribute)
+            for attribute in self.__slots__
+        )
+
+    def __hash__(self) -> int:
+        return hash(self.recording_id)
+
+    @property
+    def parsed_recording_length(self) -> float:
+        """The length of the recording in seconds, NaN if unknown."""
+        return parse_recording_length(self.recording_length)
+
+    @property
+    def parsed_latitude(self) -> float:
+        """The latitude of the recording in decimal degrees, NaN if unknown."""
+        return parse_coordinate(self.latitude)
+
+    @property
+    def parsed_longitude(self) -> float:
+        """The longitude of the recording in decimal degrees, NaN if unknown."""
+        return parse_coordinate(self.longitude)
+
+    @property
+    def parsed_recording_date(self) -> pd.Timestamp:
+        """The date the recording was made, NaT if unknown."""
+        return parse_date(self.recording_date)
+
+    @property
+    def parsed_upload_date(self) -> pd.Timestamp:
+        """The date the recording was uploaded to xeno-canto, NaT if unknown."""
+        return parse_date(self.upload_date)
+
+    @property
+    def parsed_quality_rating(self) -> str | None:
+        """The quality rating of the recording ("A" to "E"), None if not rated."""
+        return parse_quality_rating(self.quality_rating)
+
     def to_dataframe_row(self) -> pd.DataFrame:
         """Convert the Recording object to a pandas DataFrame row.
 
@@ -142,47 +286,45 @@ class Recording:
             A pandas DataFrame row containing the recording information.
         """
 
-        data: dict[str, list[str]] = {
-            "recording_id": [self.recording_id],
-            "generic_name": [self.generic_name],
-            "specific_name": [self.specific_name],
-            "subspecies_name": [self.subspecies_name],
-            "species_group": [self.species_group],
-            "english_name": [self.english_name],
-            "sound_type": [self.sound_type],
-            "sex": [self.sex],
-            "life_stage": [self.life_stage],
-            "background_species": [self.background_species],
-            "animal_seen": [self.animal_seen],
-            "recordist_name": [self.recordist_name],
-            "recording_method": [self.recording_method],
-            "license_url": [self.license_url],
-            "quality_rating": [self.quality_rating],
-            "recording_length": [self.recording_length],
-            "recording_date": [self.recording_date],
-            "recording_time": [self.recording_time],
-            "upload_date": [self.upload_date],
-            "recording_url": [self.recording_url],
-            "audio_file_url": [self.audio_file_url],
-            "recordist_remarks": [self.recordist_remarks],
-            "playback_used": [self.playback_used],
-            "automatic_recording": [self.automatic_recording],
-            "recording_device": [self.recording_device],
-            "microphone_used": [self.microphone_used],
-            "sample_rate": [self.sample_rate],
-            "country": [self.country],
-            "locality_name": [self.locality_name],
-            "latitude": [self.latitude],
-            "longitude": [self.longitude],
-            "temperature": [self.temperature],
-        }
+        return Recording.to_dataframe([self])
+
+    @staticmethod
+    def to_dataframe(
+        recordings: list["Recording"], parsed: bool = False
+    ) -> pd.DataFrame:
+        """Convert a list of Recording objects to a pandas DataFrame in a single pass.
+
+        The DataFrame is built column by column from the recordings' attributes, which
+        scales linearly with the number of recordings. It has the same columns, column
+        data types and empty value handling as the rows created by
+        :meth:`to_dataframe_row <cantopy.xenocanto_components.Recording.to_dataframe_row>`.
+
+        Parameters
+        ----------
+        recordings
+            The recordings to convert.
+        parsed : optional
+            Whether to add the ``parsed_<attribute>`` columns with the typed values of
+            the ``parsed_<attribute>`` properties, by default False. See
+            :func:`add_parsed_columns <cantopy.xenocanto_components.parsing.add_parsed_columns>`.
 
-        row_data = pd.DataFrame(data)
+        Returns
+        -------
+        pd.DataFrame
+            A pandas DataFrame with one row per recording, in the order of the recordings.
+        """
 
-        # Set all column data types to object
-        row_data = row_data.astype("object")  # type: ignore
+        data = {
+            column: np.array(
+                [getattr(recording, column) for recording in recordings], dtype=object
+            )
+            for column in Recording.dataframe_columns
+        }
 
         # Replace empty strings with NaN
-        row_data = row_data.mask(row_data == "", np.nan) # type: ignore
+        for column_values in data.values():
+            column_values[column_values == ""] = np.nan
+
+        recordings_metadata = pd.DataFrame(data, dtype="object")
 
-        return row_data
+        return add_parsed_columns(recordings_metadata) if parsed else recordings_metadata
@@ -0,0 +1,238 @@
+from typing import Any, Iterator
+import sys
+import numpy as np
+import pandas as pd
+from cantopy.xenocanto_components.parsing import add_parsed_columns
+from cantopy.xenocanto_components.recording import Recording
+from cantopy.xenocanto_components.recording_filter import (
+    Predicate,
+    as_predicate,
+    build_filter_frame,
+)
+
+
+class RecordingBatch:
+    """Columnar store for a batch of recordings returned by the Xeno Canto API.
+
+    Instead of one Recording object per recording, a RecordingBatch keeps one NumPy
+    array per Recording attribute. The columns are object arrays of interned strings,
+    so the many repeated values like species names, countries and license urls are
+    stored only once, and every value is kept exactly as the Recording stores it.
+    The recording ids are also available as an int64 array in :attr:`recording_ids`,
+    for fast de-duplication. Recording objects are only created on demand, when
+    indexing or iterating over the batch.
+
+    Attributes
+    ----------
+    columns
+        The values of each Recording attribute, keyed by attribute name.
+    """
+
+    def __init__(self, columns: dict[str, np.ndarray]):
+        """Create a RecordingBatch from its columns.
+
+        Parameters
+        ----------
+        columns
+            The values of each Recording attribute, keyed by attribute name. All
+            columns must have the same length.
+        """
+        self.columns = columns
+        self._recording_ids: np.ndarray | None = None
+
+    @classmethod
+    def from_json(cls, recordings_data: list[dict[str, Any]]) -> "RecordingBatch":
+        """Create a RecordingBatch from the recordings of a XenoCanto API response.
+
+        Parameters
+        ----------
+        recordings_data
+            The list of recording dicts returned by the XenoCanto API.
+
+        Returns
+        -------
+        RecordingBatch
+            The batch with one row per recording, in the order of the response.
+        """
+        columns: dict[str, np.ndarray] = {}
+        for attribute, (api_key, default) in Recording.api_fields.items():
+            values = [
+                str(recording_data.get(api_key, default))
+                for recording_data in recordings_data
+            ]
+            columns[attribute] = cls._to_column(values)
+
+        return cls(columns)
+
+    @classmethod
+    def from_recordings(cls, recordings: list[Recording]) -> "RecordingBatch":
+        """Create a RecordingBatch from Recording objects.
+
+        Parameters
+        ----------
+        recordings
+            The recordings to store.
+
+        Returns
+        -------
+        RecordingBatch
+            The batch with one row per recording, in the order of the recordings.
+        """
+        return cls(
+            {
+                attribute: cls._to_column(
+                    [getattr(recording, attribute) for recording in recordings]
+                )
+                for attribute in Recording.dataframe_columns
+            }
+        )
+
+    @staticmethod
+    def concatenate(batches: list["RecordingBatch"]) -> "RecordingBatch":
+        """Concatenate RecordingBatches into a single batch.
+
+        Parameters
+        ----------
+        batches
+            The batches to concatenate.
+
+        Returns
+        -------
+        RecordingBatch
+            The batch with the rows of all batches, in order.
+        """
+        if not batches:
+            return RecordingBatch.from_recordings([])
+
+        return RecordingBatch(
+            {
+                attribute: np.concatenate([batch.columns[attribute] for batch in batches])
+                for attribute in Recording.dataframe_columns
+            }
+        )
+
+    @property
+    def recording_ids(self) -> np.ndarray:
+        """The ids of the recordings in this batch, as integers.
+
+        Returns
+        -------
+        np.ndarray
+            The int64 recording ids, in order. Ids that are not a number are -1.
+        """
+        if self._recording_ids is None:
+            self._recording_ids = np.array(
+                [
+                    int(recording_id) if recording_id.isdigit() else -1
+                    for recording_id in self.columns["recording_id"]
+                ],
+                dtype=np.int64,
+            )
+
+        return self._recording_ids
+
+    def __len__(self) -> int:
+        return len(self.columns["recording_id"])
+
+    def __getitem__(self, index: Any) -> Any:
+        """Get a single recording, or a batch with a subset of the recordings.
+
+        Parameters
+        ----------
+        index
+            An integer position to get a Recording object, or a slice, boolean mask or
+            array of positions to get a RecordingBatch.
+
+        Returns
+        -------
+        Recording | RecordingBatch
+            The Recording at the integer position, or the RecordingBatch with the
+            selected rows.
+        """
+        if isinstance(index, (int, np.integer)):
+            return Recording.from_attributes(
+                {attribute: column[index] for attribute, column in self.columns.items()}
+            )
+
+        recording_batch = RecordingBatch(
+            {attribute: column[index] for attribute, column in self.columns.items()}
+        )
+        if self._recording_ids is not None:
+            recording_batch._recording_ids = self._recording_ids[index]
+
+        return recording_batch
+
+    def __iter__(self) -> Iterator[Recording]:
+        for index in range(len(self)):
+            yield self[index]
+
+    def filter(self, recording_filter: Predicate | str) -> "RecordingBatch":
+        """Select the recordings that match a filter.
+
+        The filter is evaluated vectorized over the whole batch.
+
+        Parameters
+        ----------
+        recording_filter
+            A :class:`Predicate <cantopy.xenocanto_components.recording_filter.Predicate>`
+            built from :class:`F <cantopy.xenocanto_components.recording_filter.F>`
+            fields, or a filter expression like ``"recording_length < 30"``.
+
+        Returns
+        -------
+        RecordingBatch
+            The batch with the matching recordings, in order.
+        """
+        mask = as_predicate(recording_filter).evaluate(
+            build_filter_frame(self.to_dataframe(parsed=True))
+        )
+
+        return self[mask.to_numpy()]
+
+    def to_dataframe(self, parsed: bool = False) -> pd.DataFrame:
+        """Convert the batch to a pandas DataFrame.
+
+        The DataFrame is identical to the one created by :meth:`Recording.to_dataframe
+        <cantopy.xenocanto_components.Recording.to_dataframe>` for the same recordings.
+
+        Parameters
+        ----------
+        parsed : optional
+            Whether to add the ``parsed_<attribute>`` columns with the typed values,
+            parsed vectorized over the whole batch, by default False.
+
+        Returns
+        -------
+        pd.DataFrame
+            A pandas DataFrame with one row per recording, in order.
+        """
+        data = {
+            attribute: self.columns[attribute].copy()
+            for attribute in Recording.dataframe_columns
+        }
+
+        # Replace empty strings with NaN
+        for column_values in data.values():
+            column_values[column_values == ""] = np.nan
+
+        recordings_metadata = pd.DataFrame(data, dtype="object")
+
+        return add_parsed_columns(recordings_metadata) if parsed else recordings_metadata
+
+    @staticmethod
+    def _to_column(values: list[str]) -> np.ndarray:
+        """Convert the string values of an attribute to its column representation.
+
+        Parameters
+        ----------
+        values
+            The string values of the attribute.
+
+        Returns
+        -------
+        np.ndarray
+            An object array of the interned string values.
+        """
+        column = np.empty(len(values), dtype=object)
+        column[:] = [sys.intern(value) for value in values]
+        return column
@@ -0,0 +1,406 @@
+from typing import Any, Callable
+import ast
+import operator
+import pandas as pd
+from cantopy.xenocanto_components.parsing import PARSED_COLUMNS, QUALITY_RATINGS
+from cantopy.xenocanto_components.recording import Recording
+
+
+class Predicate:
+    """A condition on the fields of recordings, evaluated vectorized over a batch.
+
+    Predicates are created from :class:`F` fields, like ``F("sample_rate") >= 44100``,
+    or from a filter expression with :func:`parse_filter_expression`. They can be
+    combined with ``&`` (and), ``|`` (or) and ``~`` (not).
+    """
+
+    def __init__(
+        self, function: Callable[[pd.DataFrame], pd.Series], description: str
+    ):
+        """Create a Predicate.
+
+        Parameters
+        ----------
+        function
+            The function evaluating the condition on a filter frame (see
+            :func:`build_filter_frame`), returning a boolean Series.
+        description
+            A readable description of the condition.
+        """
+        self._function = function
+        self.description = description
+
+    def evaluate(self, filter_frame: pd.DataFrame) -> pd.Series:
+        """Evaluate the condition for every recording in a filter frame.
+
+        Parameters
+        ----------
+        filter_frame
+            The typed recording fields, as built by :func:`build_filter_frame`.
+
+        Returns
+        -------
+        pd.Series
+            Whether each recording matches the condition. Comparisons with unknown
+            values never match.
+        """
+        return self._function(filter_frame).fillna(False).astype(bool)  # type: ignore
+
+    def __and__(self, other: "Predicate") -> "Predicate":
+        return Predicate(
+            lambda frame: self.evaluate(frame) & other.evaluate(frame),
+            f"({self.description} and {other.description})",
+        )
+
+    def __or__(self, other: "Predicate") -> "Predicate":
+        return Predicate(
+            lambda frame: self.evaluate(frame) | other.evaluate(frame),
+            f"({self.description} or {other.description})",
+        )
+
+    def __invert__(self) -> "Predicate":
+        return Predicate(
+            lambda frame: ~self.evaluate(frame), f"not {self.description}"
+        )
+
+    def __repr__(self) -> str:
+        return f"Predicate({self.description})"
+
+
+class F:
+    """A reference to a Recording field, to build predicates on.
+
+    The typed fields are compared on their parsed values: ``recording_length`` in
+    seconds, ``latitude`` and ``longitude`` as floats, ``recording_date`` and
+    ``upload_date`` as dates, ``quality_rating`` as an ordered rating where "A" > "B",
+    and ``recording_id`` and ``sample_rate`` as integers. The other fields are compared
+    as strings.
+
+    Examples
+    --------
+    >>> predicate = (
+    ...     F("recording_length").between(5, 60)
+    ...     & (F("quality_rating") >= "B")
+    ...     & F("background_species").is_empty()
+    ...     & (F("sample_rate") >= 44100)
+    ... )
+    """
+
+    def __init__(self, field: str):
+        """Create a reference to a Recording field.
+
+        Parameters
+        ----------
+        field
+            The name of the Recording attribute.
+
+        Raises
+        ------
+        ValueError
+            If the field is not a Recording attribute.
+        """
+        if field not in Recording.dataframe_columns:
+            raise ValueError(f"Unknown recording field: {field}")
+
+        self.field = field
+
+    def _check_value(self, value: Any):
+        """Check that a value can be compared with the field.
+
+        Parameters
+        ----------
+        value
+            The value to compare the field with.
+
+        Raises
+        ------
+        ValueError
+            If the field is ``quality_rating`` and the value is not a quality rating.
+        """
+        if self.field == "quality_rating" and value not in QUALITY_RATINGS:
+            raise ValueError(
+                f"Unknown quality rating, expected one of {QUALITY_RATINGS}: {value!r}"
+            )
+
+    def _compare(self, compare: Callable[[Any, Any], Any], symbol: str, value: Any):
+        self._check_value(value)
+        return Predicate(
+            lambda frame: compare(frame[self.field], value),
+            f"{self.field} {symbol} {value!r}",
+        )
+
+    def __lt__(self, value: Any) -> Predicate:
+        return self._compare(operator.lt, "<", value)
+
+    def __le__(self, value: Any) -> Predicate:
+        return self._compare(operator.le, "<=", value)
+
+    def __gt__(self, value: Any) -> Predicate:
+        return self._compare(operator.gt, ">", value)
+
+    def __ge__(self, value: Any) -> Predicate:
+        return self._compare(operator.ge, ">=", value)
+
+    def __eq__(self, value: Any) -> Predicate:  # type: ignore
+        return self._compare(operator.eq, "==", value)
+
+    def __ne__(self, value: Any) -> Predicate:  # type: ignore
+        return self._compare(operator.ne, "!=", value)
+
+    __hash__ = None  # type: ignore
+
+    def between(self, low: Any, high: Any) -> Predicate:
+        """Match recordings whose value lies between two bounds, both included."""
+        self._check_value(low)
+        self._check_value(high)
+        return Predicate(
+            lambda frame: frame[self.field].between(low, high),
+            f"{self.field} between {low!r} and {high!r}",
+        )
+
+    def isin(self, values: Any) -> Predicate:
+        """Match recordings whose value is one of the given values."""
+        values = list(values)
+        for value in values:
+            self._check_value(value)
+        return Predicate(
+            lambda frame: frame[self.field].isin(values),
+            f"{self.field} in {values!r}",
+        )
+
+    def is_empty(self) -> Predicate:
+        """Match recordings without a value, like recordings without background species."""
+        return Predicate(
+            lambda frame: frame[self.field].isna()
+            | frame[self.field].astype(str).isin(["", "[]"]),
+            f"{self.field} is empty",
+        )
+
+    def contains(self, text: str) -> Predicate:
+        """Match recordings whose value contains a text, case insensitively."""
+        return Predicate(
+            lambda frame: frame[self.field]
+            .astype("string")
+            .str.contains(text, case=False, regex=False),
+            f"{self.field} contains {text!r}",
+        )
+
+
+def build_filter_frame(recordings_metadata: pd.DataFrame) -> pd.DataFrame:
+    """Build the frame of typed recording fields that predicates are evaluated on.
+
+    Parameters
+    ----------
+    recordings_metadata
+        The recording metadata, with the parsed columns added by
+        :func:`add_parsed_columns <cantopy.xenocanto_components.parsing.add_parsed_columns>`.
+
+    Returns
+    -------
+    pd.DataFrame
+        The recording fields, with the typed fields replaced by their parsed values.
+    """
+    filter_frame = recordings_metadata.drop(
+        columns=[f"parsed_{column}" for column in PARSED_COLUMNS]
+    )
+    for column in PARSED_COLUMNS:
+        filter_frame[column] = recordings_metadata[f"parsed_{column}"]
+    for column in ("recording_id", "sample_rate"):
+        filter_frame[column] = pd.to_numeric(  # type: ignore
+            recordings_metadata[column], errors="coerce"
+        )
+
+    return filter_frame
+
+
+# The comparison operators of the filter expression language, and their mirror image
+# for when the field is on the right-hand side
+_COMPARISONS = {
+    ast.Lt: (operator.lt, operator.gt),
+    ast.LtE: (operator.le, operator.ge),
+    ast.Gt: (operator.gt, operator.lt),
+    ast.GtE: (operator.ge, operator.le),
+    ast.Eq: (operator.eq, operator.eq),
+    ast.NotEq: (operator.ne, operator.ne),
+}
+
+
+def parse_filter_expression(expression: str) -> Predicate:
+    """Parse a filter expression into a Predicate.
+
+    A filter expression combines comparisons of Recording fields with constants using
+    ``and``, ``or``, ``not`` and parentheses. Comparisons can be chained, and fields can
+    be tested against a list of values with ``in`` and ``not in``. The functions
+    ``empty(field)`` and ``contains(field, "text")`` match fields without a value and
+    fields containing a text. Fields are compared on the same typed values as with
+    :class:`F`. For example::
+
+        5 <= recording_length <= 60 and quality_rating in ["A", "B"]
+        and empty(background_species) and sample_rate >= 44100
+
+    Parameters
+    ----------
+    expression
+        The filter expression.
+
+    Returns
+    -------
+    Predicate
+        The predicate of the expression.
+
+    Raises
+    ------
+    ValueError
+        If the expression is invalid, uses unsupported syntax or compares the
+        quality_rating with an unknown rating.
+    """
+    try:
+        tree = ast.parse(expression.strip(), mode="eval")
+    except SyntaxError as error:
+        raise ValueError(f"Invalid filter expression: {expression}") from error
+
+    return _compile_filter_node(tree.body)
+
+
+def _compile_filter_node(node: ast.expr) -> Predicate:
+    """Compile a node of a parsed filter expression into a Predicate.
+
+    Parameters
+    ----------
+    node
+        The expression node.
+
+    Returns
+    -------
+    Predicate
+        The predicate of the node.
+
+    Raises
+    ------
+    ValueError
+        If the node uses unsupported syntax.
+    """
+    if isinstance(node, ast.BoolOp):
+        predicates = [_compile_filter_node(value) for value in node.values]
+        predicate = predicates[0]
+        for other_predicate in predicates[1:]:
+            predicate = (
+                predicate & other_predicate
+                if isinstance(node.op, ast.And)
+                else predicate | other_predicate
+            )
+        return predicate
+
+    if isinstance(node, ast.UnaryOp) and isinstance(node.op, ast.Not):
+        return ~_compile_filter_node(node.operand)
+
+    if isinstance(node, ast.Compare):
+        predicate: Predicate | None = None
+        operands = [node.left, *node.comparators]
+        for left, comparison, right in zip(operands, node.ops, operands[1:]):
+            comparison_predicate = _compile_filter_comparison(left, comparison, right)
+            if comparison_predicate is None:
+                raise ValueError(
+                    f"Unsupported filter comparison: {ast.unparse(node)}"
+                )
+
+            predicate = (
+                comparison_predicate
+                if predicate is None
+                else predicate & comparison_predicate
+            )
+        return predicate  # type: ignore
+
+    if (
+        isinstance(node, ast.Call)
+        and isinstance(node.func, ast.Name)
+        and node.func.id in ("empty", "contains")
+        and not node.keywords
+        and node.args
+        and isinstance(node.args[0], ast.Name)
+    ):
+        field = F(node.args[0].id)
+        if node.func.id == "empty" and len(node.args) == 1:
+            return field.is_empty()
+        if node.func.id == "contains" and len(node.args) == 2:
+            return field.contains(_literal_value(node.args[1]))
+
+    raise ValueError(f"Unsupported filter expression: {ast.unparse(node)}")
+
+
+def _compile_filter_comparison(
+    left: ast.expr, comparison: ast.cmpop, right: ast.expr
+) -> Predicate | None:
+    """Compile a single comparison between a field and a constant into a Predicate.
+
+    Parameters
+    ----------
+    left
+        The left-hand side of the comparison.
+    comparison
+        The comparison operator.
+    right
+        The right-hand side of the comparison.
+
+    Returns
+    -------
+    Predicate | None
+        The predicate of the comparison, None if the comparison is not supported.
+    """
+    if isinstance(comparison, (ast.In, ast.NotIn)) and isinstance(left, ast.Name):
+        predicate = F(left.id).isin(_literal_value(right))
+        return ~predicate if isinstance(comparison, ast.NotIn) else predicate
+
+    if type(comparison) in _COMPARISONS:
+        compare, mirrored_compare = _COMPARISONS[type(comparison)]  # type: ignore
+        if isinstance(left, ast.Name) and not isinstance(right, ast.Name):
+            return compare(F(left.id), _literal_value(right))
+        if isinstance(right, ast.Name) and not isinstance(left, ast.Name):
+            return mirrored_compare(F(right.id), _literal_value(left))
+
+    return None
+
+
+def _literal_value(node: ast.expr) -> Any:
+    """Get the constant value of an expression node.
+
+    Parameters
+    ----------
+    node
+        The expression node.
+
+    Returns
+    -------
+    Any
+        The constant value of the node.
+
+    Raises
+    ------
+    ValueError
+        If the node is not a constant.
+    """
+    try:
+        return ast.literal_eval(node)
+    except ValueError as error:
+        raise ValueError(
+            f"Expected a constant in filter expression: {ast.unparse(node)}"
+        ) from error
+
+
+def as_predicate(recording_filter: "Predicate | str") -> Predicate:
+    """Get the Predicate of a recording filter.
+
+    Parameters
+    ----------
+    recording_filter
+        A Predicate, or a filter expression (see :func:`parse_filter_expression`).
+
+    Returns
+    -------
+    Predicate
+        The predicate of the filter.
+    """
+    if isinstance(recording_filter, str):
+        return parse_filter_expression(recording_filter)
+
+    return recording_filter
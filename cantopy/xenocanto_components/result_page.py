@@ -1,4 +1,6 @@
 from cantopy.xenocanto_components.recording import Recording
+from cantopy.xenocanto_components.recording_batch import RecordingBatch
+from cantopy.xenocanto_components.recording_filter import Predicate
 
 
 class ResultPage:
@@ -8,8 +10,12 @@ class ResultPage:
     ----------
     page_id : int
         The page number of the results page that is being displayed.
-    recordings : List[Recording]
-        An array of recording objects containing detailed information about each recording.
+    recording_batch : RecordingBatch
+        The columnar store of the recordings on this page.
+    recordings : tuple[Recording, ...]
+        The recording objects containing detailed information about each recording.
+        These objects are created from the recording_batch on every access, so they
+        are not kept in memory next to it.
 
     """
 
@@ -41,12 +47,69 @@ class ResultPage:
             )
 
         # Set the recordings
-        self.recordings: list[Recording] = []
-
         if not isinstance(single_page_query_response["recordings"], list):
             raise TypeError(
                 f"Error creating a new ResultPage instance from the XenoCanto API response: \
                 The recordings returned by the XenoCanto API could not be read as a list: {single_page_query_response['recordings']}"
             )
-        for query_response_recording in single_page_query_response["recordings"]:
-            self.recordings.append(Recording(query_response_recording))
+        self.recording_batch = RecordingBatch.from_json(
+            single_page_query_response["recordings"]
+        )
+
+    @classmethod
+    def from_recording_batch(
+        cls, page_id: int, recording_batch: RecordingBatch
+    ) -> "ResultPage":
+        """Create a ResultPage object from a batch of recordings.
+
+        Parameters
+        ----------
+        page_id
+            The page number of the results page.
+        recording_batch
+            The recordings on the page.
+
+        Returns
+        -------
+        ResultPage
+            The created ResultPage object.
+        """
+        result_page = cls.__new__(cls)
+        result_page.page_id = page_id
+        result_page.recording_batch = recording_batch
+
+        return result_page
+
+    def filter(self, recording_filter: Predicate | str) -> "ResultPage":
+        """Select the recordings on this page that match a filter.
+
+        Parameters
+        ----------
+        recording_filter
+            A Predicate, or a filter expression, see
+            :meth:`RecordingBatch.filter <cantopy.xenocanto_components.RecordingBatch.filter>`.
+
+        Returns
+        -------
+        ResultPage
+            A ResultPage with the same page id and the matching recordings.
+        """
+        return ResultPage.from_recording_batch(
+            self.page_id, self.recording_batch.filter(recording_filter)
+        )
+
+    @property
+    def recordings(self) -> tuple[Recording, ...]:
+        """The recordings on this page, created from the recording batch.
+
+        Every access creates new Recording objects, so iterate over the
+        :attr:`recording_batch` directly to avoid creating them more than once. To
+        change the recordings on a page, create a new page with
+        :meth:`from_recording_batch`.
+
+        Returns
+        -------
+        tuple[Recording, ...]
+            The recordings on this page, in order.
+        """
+        return tuple(self.recording_batch)
@@ -1,10 +1,15 @@
-from typing import Any, Dict, Generator, List
+from typing import Any, Dict, Generator, Iterator, List
 import pytest
+import requests
+import io
 import json
 import os
 from os.path import join
+import numpy as np
 import pandas as pd
 import shutil
+import sys
+import wave
 
 from cantopy.xenocanto_components import QueryResult, Recording, ResultPage
 from cantopy import DownloadManager
@@ -420,7 +425,9 @@ def partially_filled_download_data_base_path(
 
 
 @pytest.fixture
-def empty_data_folder_download_manager(empty_download_data_base_path: str):
+def empty_data_folder_download_manager(
+    empty_download_data_base_path: str,
+) -> Generator[DownloadManager, Any, Any]:
     """Build a DownloadManager instance with its download folder set to a new empty folder.
 
     Parameters
@@ -428,18 +435,21 @@ def empty_data_folder_download_manager(empty_download_data_base_path: str):
     empty_download_data_base_path
         The path to a newly created empty download folder.
 
-    Returns
-    -------
-    DownloadManager
-        The created DownloadManager instance.
+    Yields
+    ------
+    Generator[DownloadManager, Any, Any]
+        The created DownloadManager instance, which is closed afterwards.
     """
-    return DownloadManager(empty_download_data_base_path, max_workers=TEST_MAX_WORKERS)
+    with DownloadManager(
+        empty_download_data_base_path, max_workers=TEST_MAX_WORKERS
+    ) as download_manager:
+        yield download_manager
 
 
 @pytest.fixture
 def partially_filled_data_folder_download_manager(
     partially_filled_download_data_base_path: str,
-):
+) -> Generator[DownloadManager, Any, Any]:
     """Build a DownloadManager instance with its download folder set a partially-filled data folder.
 
     Parameters
@@ -447,28 +457,30 @@ def partially_filled_data_folder_download_manager(
     partially_filled_download_data_base_path
         The path to a newly created but partially-filled data folder.
 
-    Returns
-    -------
-    DownloadManager
-        The created DownloadManager instance.
+    Yields
+    ------
+    Generator[DownloadManager, Any, Any]
+        The created DownloadManager instance, which is closed afterwards.
     """
-    return DownloadManager(
+    with DownloadManager(
         partially_filled_download_data_base_path, max_workers=TEST_MAX_WORKERS
-    )
+    ) as download_manager:
+        yield download_manager
 
 
 @pytest.fixture
-def fake_data_folder_download_manager():
+def fake_data_folder_download_manager() -> Generator[DownloadManager, Any, Any]:
     """Build a DownloadManager instance with its download folder set to a fake/non-existant
     download folder. This DownloadManager instance can be used when we don't need to
     test any file storage functionality of this class.
 
-    Returns
-    -------
-    DownloadManager
-        The created DownloadManager instance.
+    Yields
+    ------
+    Generator[DownloadManager, Any, Any]
+        The created DownloadManager instance, which is closed afterwards.
     """
-    return DownloadManager("fake/path", max_workers=TEST_MAX_WORKERS)
+    with DownloadManager("fake/path", max_workers=TEST_MAX_WORKERS) as download_manager:
+        yield download_manager
 
 
 @pytest.fixture
@@ -694,3 +706,252 @@ def combined_to_add_test_recording_metadata(
         .sort_values(by=["recording_id"])
         .reset_index(drop=True)
     )
+
+
+######################################################################
+#### HTTP FIXTURES
+######################################################################
+
+
+class FakeHttpResponse:
+    """A minimal stand-in for a streamed requests.Response.
+
+    Attributes
+    ----------
+    status_code
+        The HTTP status code of the response.
+    content
+        The full body of the response.
+    headers
+        The HTTP headers of the response.
+    fail_after
+        If set, the number of body bytes after which the connection is dropped.
+    """
+
+    def __init__(
+        self,
+        status_code: int,
+        content: bytes = b"",
+        headers: Dict[str, str] | None = None,
+        fail_after: int | None = None,
+    ):
+        self.status_code = status_code
+        self.content = content
+        self.headers = headers if headers is not None else {}
+        self.fail_after = fail_after
+
+    def iter_content(self, chunk_size: int = 1) -> Iterator[bytes]:
+        for start in range(0, len(self.content), chunk_size):
+            if self.fail_after is not None and start >= self.fail_after:
+                raise requests.exceptions.ConnectionError("Connection dropped")
+            yield self.content[start : start + chunk_size]
+
+    def json(self) -> Any:
+        return json.loads(self.content)
+
+    def close(self):
+        pass
+
+    def __enter__(self) -> "FakeHttpResponse":
+        return self
+
+    def __exit__(self, *args: Any):
+        self.close()
+
+
+class FakeHttpSession:
+    """A fake HttpSession that serves a fixed set of files from memory.
+
+    Attributes
+    ----------
+    files
+        Mapping of urls to the content served for them, unknown urls return a 404.
+    fail_after
+        Mapping of urls to the number of bytes after which their download is dropped.
+    supports_range
+        Whether the session honours HTTP Range requests.
+    requested_urls
+        The urls of all requests sent through this session, in order.
+    requested_ranges
+        The Range headers of all requests sent through this session, in order.
+    """
+
+    def __init__(
+        self,
+        files: Dict[str, bytes],
+        fail_after: Dict[str, int] | None = None,
+        supports_range: bool = True,
+    ):
+        self.files = files
+        self.fail_after = fail_after if fail_after is not None else {}
+        self.supports_range = supports_range
+        self.requested_urls: List[str] = []
+        self.requested_ranges: List[str | None] = []
+
+    def get(self, url: str, **kwargs: Any) -> FakeHttpResponse:
+        range_header = (kwargs.get("headers") or {}).get("Range")
+        self.requested_urls.append(url)
+        self.requested_ranges.append(range_header)
+
+        if url not in self.files:
+            return FakeHttpResponse(404)
+
+        content = self.files[url]
+        fail_after = self.fail_after.pop(url, None)
+
+        # Serve the requested byte range as a partial response
+        if range_header is not None and self.supports_range:
+            start = int(range_header.removeprefix("bytes=").removesuffix("-"))
+            if start >= len(content):
+                return FakeHttpResponse(416)
+
+            return FakeHttpResponse(
+                206,
+                content[start:],
+                headers={
+                    "Content-Length": str(len(content) - start),
+                    "Content-Range": f"bytes {start}-{len(content) - 1}/{len(content)}",
+                },
+                fail_after=fail_after,
+            )
+
+        return FakeHttpResponse(
+            200,
+            content,
+            headers={"Content-Length": str(len(content))},
+            fail_after=fail_after,
+        )
+
+
+@pytest.fixture
+def fake_audio_http_session(
+    example_two_page_queryresult: QueryResult,
+) -> FakeHttpSession:
+    """Build a FakeHttpSession that serves fake audio content for every recording
+    in the example page 1 and 2 XenoCanto API query responses.
+
+    Parameters
+    ----------
+    example_two_page_queryresult
+        The two-page QueryResult object based on the example XenoCanto API responses.
+
+    Returns
+    -------
+    FakeHttpSession
+        The fake session serving the audio files of the example recordings.
+    """
+    return FakeHttpSession(
+        {
+            recording.audio_file_url: f"audio-{recording.recording_id}".encode() * 1000
+            for recording in example_two_page_queryresult.get_all_recordings()
+        }
+    )
+
+
+@pytest.fixture
+def fake_session_download_manager(
+    empty_download_data_base_path: str, fake_audio_http_session: FakeHttpSession
+) -> Generator[DownloadManager, Any, Any]:
+    """Build a DownloadManager instance set to an empty data folder that downloads its
+    recordings through the fake audio session.
+
+    Parameters
+    ----------
+    empty_download_data_base_path
+        The path to a newly created empty download folder.
+    fake_audio_http_session
+        The fake session serving the audio files of the example recordings.
+
+    Yields
+    ------
+    Generator[DownloadManager, Any, Any]
+        The created DownloadManager instance, which is closed afterwards.
+    """
+    with DownloadManager(
+        empty_download_data_base_path,
+        max_workers=TEST_MAX_WORKERS,
+        session=fake_audio_http_session,  # type: ignore
+        chunk_size=1024,
+    ) as download_manager:
+        yield download_manager
+
+
+# A stand-in for the ffmpeg executable, which writes a silent WAV file of
+# FAKE_FFMPEG_DURATION seconds with the requested sample rate and channel count
+FAKE_FFMPEG_DURATION = 0.5
+FAKE_FFMPEG_SCRIPT = f"""#!{sys.executable}
+import os
+import sys
+import wave
+
+arguments = sys.argv[1:]
+input_path = arguments[arguments.index("-i") + 1]
+if not os.path.exists(input_path):
+    sys.exit(1)
+
+with wave.open(arguments[-1], "wb") as output_file:
+    output_file.setnchannels(int(arguments[arguments.index("-ac") + 1]))
+    output_file.setsampwidth(2)
+    output_file.setframerate(int(arguments[arguments.index("-ar") + 1]))
+    output_file.writeframes(
+        bytes(
+            2
+            * output_file.getnchannels()
+            * int({FAKE_FFMPEG_DURATION} * output_file.getframerate())
+        )
+    )
+"""
+
+
+@pytest.fixture
+def fake_ffmpeg_path(tmp_path: Any) -> str:
+    """Write an executable script that stands in for ffmpeg when it is not installed.
+
+    Parameters
+    ----------
+    tmp_path
+        The temporary directory of the test.
+
+    Returns
+    -------
+    str
+        The path of the fake ffmpeg executable.
+    """
+    ffmpeg_path = join(str(tmp_path), "ffmpeg")
+    with open(ffmpeg_path, "w") as file:
+        file.write(FAKE_FFMPEG_SCRIPT)
+    os.chmod(ffmpeg_path, 0o755)
+
+    return ffmpeg_path
+
+
+def generate_wave_file_content(
+    frequency: float, duration: float, sample_rate: int = 22050
+) -> bytes:
+    """Generate the content of a 16-bit mono WAV file with a sine tone.
+
+    Parameters
+    ----------
+    frequency
+        The frequency in Hz of the tone.
+    duration
+        The duration in seconds of the tone.
+    sample_rate : optional
+        The sample rate in Hz of the file, by default 22050.
+
+    Returns
+    -------
+    bytes
+        The content of the WAV file.
+    """
+    time = np.arange(int(duration * sample_rate)) / sample_rate
+    samples = (0.5 * np.sin(2 * np.pi * frequency * time) * 32767).astype("<i2")
+
+    content = io.BytesIO()
+    with wave.open(content, "wb") as wave_file:
+        wave_file.setnchannels(1)
+        wave_file.setsampwidth(2)
+        wave_file.setframerate(sample_rate)
+        wave_file.writeframes(samples.tobytes())
+
+    return content.getvalue()
@@ -0,0 +1,365 @@
+import asyncio
+import os
+from os.path import join
+from typing import Any, Dict
+import pytest
+from cantopy import (
+    AsyncDownloadManager,
+    DownloadManager,
+    DownloadResult,
+    FetchManager,
+    HttpSession,
+    RateLimiter,
+    RetryPolicy,
+)
+from cantopy.xenocanto_components import (
+    Query,
+    QueryResult,
+    RecordingBatch,
+    ResultPage,
+)
+from tests.conftest import FakeHttpSession
+
+aiohttp = pytest.importorskip("aiohttp")
+from aiohttp import web  # noqa: E402
+from aiohttp.test_utils import TestServer  # noqa: E402
+
+
+def _point_recordings_to_server(
+    query_result: QueryResult, server: TestServer
+) -> QueryResult:
+    """Point the audio file urls of the recordings in a QueryResult to a local server.
+
+    Parameters
+    ----------
+    query_result
+        The QueryResult whose recordings should be downloaded from the server.
+    server
+        The local fake file server, serving the recordings at ``/<id>/download``.
+
+    Returns
+    -------
+    QueryResult
+        A copy of the QueryResult with the audio file urls pointing to the server.
+    """
+    result_pages: list[ResultPage] = []
+    for result_page in query_result.result_pages:
+        recordings = list(result_page.recordings)
+        for recording in recordings:
+            recording.audio_file_url = str(
+                server.make_url(f"/{recording.recording_id}/download")
+            )
+        result_pages.append(
+            ResultPage.from_recording_batch(
+                result_page.page_id, RecordingBatch.from_recordings(recordings)
+            )
+        )
+
+    return QueryResult(
+        {
+            "available_num_recordings": query_result.available_num_recordings,
+            "available_num_species": query_result.available_num_species,
+            "available_num_pages": query_result.available_num_pages,
+        },
+        result_pages,
+    )
+
+
+def test_async_downloadmanager_download_all_recordings_in_queryresult(
+    empty_download_data_base_path: str,
+    example_two_page_queryresult: QueryResult,
+):
+    """Test downloading a QueryResult with the AsyncDownloadManager from a local fake
+    file server.
+
+    Parameters
+    ----------
+    empty_download_data_base_path
+        The path to a newly created empty download folder.
+    example_two_page_queryresult
+        The two-page QueryResult object based on the example XenoCanto API responses.
+    """
+
+    async def fake_file_server(request: web.Request) -> web.Response:
+        return web.Response(body=f"audio-{request.match_info['id']}".encode() * 1000)
+
+    async def run():
+        app = web.Application()
+        app.router.add_get("/{id}/download", fake_file_server)
+
+        async with TestServer(app) as server:
+            # Point the example recordings to the local fake file server
+            query_result = _point_recordings_to_server(
+                example_two_page_queryresult, server
+            )
+
+            return await AsyncDownloadManager(
+                empty_download_data_base_path, max_workers=4
+            ).adownload_all_recordings_in_queryresult(query_result)
+
+    download_results = asyncio.run(run())
+
+    assert {
+        recording_id: (download_result.status, download_result.num_bytes)
+        for recording_id, download_result in download_results.items()
+    } == {
+        recording.recording_id: ("pass", len(f"audio-{recording.recording_id}") * 1000)
+        for recording in example_two_page_queryresult.get_all_recordings()
+    }
+
+    bird_folder = join(empty_download_data_base_path, "little_nightjar")
+    assert sorted(os.listdir(bird_folder)) == [
+        "196385.mp3",
+        "220365.mp3",
+        "220366.mp3",
+        "little_nightjar_recording_metadata.csv",
+    ]
+    with open(join(bird_folder, "220365.mp3"), "rb") as file:
+        assert file.read() == b"audio-220365" * 1000
+
+    bird_folder = join(empty_download_data_base_path, "spot_winged_wood_quail")
+    assert len(os.listdir(bird_folder)) == 4
+
+
+def test_async_downloadmanager_download_cancellation(
+    empty_download_data_base_path: str,
+    example_single_page_queryresult: QueryResult,
+):
+    """Test that cancelling an async download stops it and only leaves partial files
+    behind that are not detected as downloaded.
+
+    Parameters
+    ----------
+    empty_download_data_base_path
+        The path to a newly created empty download folder.
+    example_single_page_queryresult
+        The single-page QueryResult object based on the example XenoCanto API responses.
+    """
+
+    async def stalling_file_server(request: web.Request) -> web.StreamResponse:
+        response = web.StreamResponse()
+        await response.prepare(request)
+        await response.write(b"partial")
+        await asyncio.sleep(60)
+        return response
+
+    async def run():
+        app = web.Application()
+        app.router.add_get("/{id}/download", stalling_file_server)
+
+        async with TestServer(app) as server:
+            # Point the example recordings to the local fake file server
+            query_result = _point_recordings_to_server(
+                example_single_page_queryresult, server
+            )
+
+            with pytest.raises(asyncio.TimeoutError):
+                await asyncio.wait_for(
+                    AsyncDownloadManager(
+                        empty_download_data_base_path, max_workers=4, chunk_size=1
+                    ).adownload_all_recordings_in_queryresult(query_result),
+                    timeout=0.5,
+                )
+
+    asyncio.run(run())
+
+    bird_folder = join(empty_download_data_base_path, "spot_winged_wood_quail")
+    assert all(file_name.endswith(".part") for file_name in os.listdir(bird_folder))
+
+
+def test_async_downloadmanager_inherited_entry_points(
+    empty_download_data_base_path: str,
+    example_two_page_queryresult: QueryResult,
+    fake_audio_http_session: FakeHttpSession,
+):
+    """Test that the synchronous entry points inherited from the DownloadManager keep
+    working on the AsyncDownloadManager.
+
+    Parameters
+    ----------
+    empty_download_data_base_path
+        The path to a newly created empty download folder.
+    example_two_page_queryresult
+        The two-page QueryResult object based on the example XenoCanto API responses.
+    fake_audio_http_session
+        The fake session serving the audio files of the example recordings.
+    """
+    download_manager = AsyncDownloadManager(
+        empty_download_data_base_path,
+        max_workers=4,
+        session=fake_audio_http_session,  # type: ignore
+    )
+    download_results = download_manager.download_all_recordings_in_result_pages(
+        example_two_page_queryresult.result_pages
+    )
+
+    assert {
+        recording_id: download_result.status
+        for recording_id, download_result in download_results.items()
+    } == {
+        recording.recording_id: "pass"
+        for recording in example_two_page_queryresult.get_all_recordings()
+    }
+    assert len(download_manager.load_animal_recordings_metadata("Little Nightjar")) == 3
+
+    # The synchronous building block of the DownloadPipeline returns a plain result
+    download_result = download_manager.download_recording(
+        example_two_page_queryresult.get_all_recordings()[0]
+    )
+    assert isinstance(download_result, DownloadResult)
+    assert download_result.status == "pass"
+
+
+def test_async_downloadmanager_inherited_query_entry_points(
+    empty_download_data_base_path: str,
+    example_xenocanto_query_response_page_1: Dict[str, Any],
+    example_xenocanto_query_response_page_2: Dict[str, Any],
+    example_two_page_queryresult: QueryResult,
+    fake_audio_http_session: FakeHttpSession,
+    monkeypatch: pytest.MonkeyPatch,
+):
+    """Test that the AsyncDownloadManager can stand in for a DownloadManager in the
+    pipelined download_query and sync entry points.
+
+    Parameters
+    ----------
+    empty_download_data_base_path
+        The path to a newly created empty download folder.
+    example_xenocanto_query_response_page_1
+        The dictionary representation of example page 1 XenoCanto API query response.
+    example_xenocanto_query_response_page_2
+        The dictionary representation of example page 2 XenoCanto API query response.
+    example_two_page_queryresult
+        The two-page QueryResult object based on the example XenoCanto API responses.
+    fake_audio_http_session
+        The fake session serving the audio files of the example recordings.
+    monkeypatch
+        Monkeypatch fixture to replace the actual API call with a fake one.
+    """
+    responses = {
+        1: example_xenocanto_query_response_page_1,
+        2: example_xenocanto_query_response_page_2,
+    }
+
+    def fake_fetch_result_page(query_str: str, page: int, session=None, cache=None):
+        return FetchManager._parse_query_response(  # type: ignore
+            {**responses[page], "numPages": 2}
+        )
+
+    monkeypatch.setattr(FetchManager, "_fetch_result_page", fake_fetch_result_page)
+
+    download_manager: DownloadManager = AsyncDownloadManager(
+        empty_download_data_base_path,
+        max_workers=4,
+        session=fake_audio_http_session,  # type: ignore
+    )
+    download_results = download_manager.download_query(
+        Query(species_name="common blackbird")
+    )
+
+    assert sorted(download_results) == sorted(
+        recording.recording_id
+        for recording in example_two_page_queryresult.get_all_recordings()
+    )
+
+    # Syncing the downloaded query again only stores its high-water mark
+    assert download_manager.sync(Query(species_name="common blackbird")) == {}
+    assert os.path.exists(
+        join(empty_download_data_base_path, download_manager.sync_state_file_name)
+    )
+
+
+def test_async_downloadmanager_retries(
+    empty_download_data_base_path: str,
+    example_single_page_queryresult: QueryResult,
+):
+    """Test that the AsyncDownloadManager retries throttled requests and resumes
+    dropped downloads with the same policies as the DownloadManager.
+
+    Parameters
+    ----------
+    empty_download_data_base_path
+        The path to a newly created empty download folder.
+    example_single_page_queryresult
+        The single-page QueryResult object based on the example XenoCanto API responses.
+    """
+    requests_per_recording: dict[str, list[str | None]] = {}
+
+    async def flaky_file_server(request: web.Request) -> web.StreamResponse:
+        recording_id = request.match_info["id"]
+        content = f"audio-{recording_id}".encode() * 1000
+        requests_per_recording.setdefault(recording_id, []).append(
+            request.headers.get("Range")
+        )
+
+        # The first request is throttled
+        if len(requests_per_recording[recording_id]) == 1:
+            return web.Response(status=503, headers={"Retry-After": "0"})
+
+        # The second request drops the connection halfway through the recording
+        if len(requests_per_recording[recording_id]) == 2:
+            response = web.StreamResponse(
+                headers={"Content-Length": str(len(content))}
+            )
+            await response.prepare(request)
+            await response.write(content[: len(content) // 2])
+            request.transport.close()  # type: ignore
+            return response
+
+        # Later requests continue the partial download
+        start = int(request.headers["Range"].removeprefix("bytes=").removesuffix("-"))
+        return web.Response(
+            status=206,
+            body=content[start:],
+            headers={
+                "Content-Range": f"bytes {start}-{len(content) - 1}/{len(content)}"
+            },
+        )
+
+    rate_limiter = RateLimiter(max_rate=1000.0, burst=100)
+    download_manager = AsyncDownloadManager(
+        empty_download_data_base_path,
+        max_workers=4,
+        session=HttpSession(
+            rate_limiter=rate_limiter,
+            retry_policy=RetryPolicy(backoff_factor=0.01),
+        ),
+        retry_policy=RetryPolicy(backoff_factor=0.01),
+    )
+
+    async def run():
+        app = web.Application()
+        app.router.add_get("/{id}/download", flaky_file_server)
+
+        async with TestServer(app) as server:
+            # Point the example recordings to the local fake file server
+            query_result = _point_recordings_to_server(
+                example_single_page_queryresult, server
+            )
+
+            return await download_manager.adownload_all_recordings_in_queryresult(
+                query_result
+            )
+
+    download_results = asyncio.run(run())
+
+    assert {
+        recording_id: download_result.status
+        for recording_id, download_result in download_results.items()
+    } == {
+        recording.recording_id: "pass"
+        for recording in example_single_page_queryresult.get_all_recordings()
+    }
+    for recording_id, ranges in requests_per_recording.items():
+        content_size = len(f"audio-{recording_id}") * 1000
+        assert ranges == [None, None, f"bytes={content_size // 2}-"]
+        recording_path = join(
+            empty_download_data_base_path,
+            "spot_winged_wood_quail",
+            f"{recording_id}.mp3",
+        )
+        with open(recording_path, "rb") as file:
+            assert file.read() == f"audio-{recording_id}".encode() * 1000
+
+    # The throttled requests lowered the rate of the shared rate limiter
+    assert rate_limiter.rate < rate_limiter.max_rate
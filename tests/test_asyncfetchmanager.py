@@ -0,0 +1,124 @@
+import asyncio
+import json
+import pytest
+from cantopy import AsyncFetchManager, FetchManager, RateLimiter, RetryPolicy
+from cantopy.xenocanto_components import Query
+
+aiohttp = pytest.importorskip("aiohttp")
+from aiohttp import web  # noqa: E402
+from aiohttp.test_utils import TestServer  # noqa: E402
+
+
+def test_async_query_multipage(
+    example_xenocanto_query_response_page_1: dict,
+    monkeypatch: pytest.MonkeyPatch,
+):
+    """Test a concurrent multi-page async fetch against a local fake XenoCanto API.
+
+    Parameters
+    ----------
+    example_xenocanto_query_response_page_1
+        The dictionary representation of example page 1 XenoCanto API query response.
+    monkeypatch
+        Monkeypatch fixture to point the FetchManager to the local fake API.
+    """
+    requested_queries: list[str] = []
+
+    async def fake_api(request: web.Request) -> web.Response:
+        # Let the earlier pages finish last to scramble the completion order
+        page = int(request.query["page"])
+        requested_queries.append(request.query["query"])
+        await asyncio.sleep(0.01 * (10 - page))
+        return web.Response(
+            text=json.dumps({**example_xenocanto_query_response_page_1, "page": page})
+        )
+
+    async def run() -> list[int]:
+        app = web.Application()
+        app.router.add_get("/api/2/recordings", fake_api)
+
+        async with TestServer(app) as server:
+            monkeypatch.setattr(
+                FetchManager,
+                "_base_url",
+                str(server.make_url("/api/2/recordings")),
+            )
+            query_result = await AsyncFetchManager.send_query(
+                Query(species_name="common blackbird", quality="A"),
+                max_pages=5,
+                max_workers=3,
+            )
+
+        return [result_page.page_id for result_page in query_result.result_pages]
+
+    assert asyncio.run(run()) == [1, 2, 3, 4, 5]
+    assert set(requested_queries) == {"common blackbird q:A"}
+
+
+def test_async_query_retries_and_errors(
+    example_xenocanto_query_response_page_1: dict,
+    monkeypatch: pytest.MonkeyPatch,
+):
+    """Test that the AsyncFetchManager retries throttled and truncated page responses
+    through its rate limiter, and raises on error responses.
+
+    Parameters
+    ----------
+    example_xenocanto_query_response_page_1
+        The dictionary representation of example page 1 XenoCanto API query response.
+    monkeypatch
+        Monkeypatch fixture to point the FetchManager to the local fake API.
+    """
+    requests_per_query: dict[str, int] = {}
+
+    async def flaky_api(request: web.Request) -> web.Response:
+        query = request.query["query"]
+        requests_per_query[query] = requests_per_query.get(query, 0) + 1
+
+        # Always fail the requests for the broken query
+        if query == "broken":
+            return web.Response(status=500)
+
+        # Throttle the first request, then send a truncated body
+        if requests_per_query[query] == 1:
+            return web.Response(status=429, headers={"Retry-After": "0"})
+        if requests_per_query[query] == 2:
+            return web.Response(text='{"numRecordings": "3", "recor')
+
+        return web.Response(text=json.dumps(example_xenocanto_query_response_page_1))
+
+    rate_limiter = RateLimiter(max_rate=1000.0)
+    throttles: list[float | None] = []
+    monkeypatch.setattr(
+        rate_limiter,
+        "on_throttle",
+        lambda retry_after=None: throttles.append(retry_after),
+    )
+
+    async def run(query: Query):
+        app = web.Application()
+        app.router.add_get("/api/2/recordings", flaky_api)
+
+        async with TestServer(app) as server:
+            monkeypatch.setattr(
+                FetchManager,
+                "_base_url",
+                str(server.make_url("/api/2/recordings")),
+            )
+            return await AsyncFetchManager.send_query(
+                query,
+                rate_limiter=rate_limiter,
+                retry_policy=RetryPolicy(max_retries=2, backoff_factor=0.01),
+            )
+
+    query_result = asyncio.run(run(Query(species_name="common blackbird")))
+
+    assert len(query_result.result_pages[0].recording_batch) == 3
+    assert requests_per_query["common blackbird"] == 3
+    assert throttles == [0.0]
+
+    # Error statuses are raised once the retries are used up
+    with pytest.raises(aiohttp.ClientResponseError) as error:
+        asyncio.run(run(Query(species_name="broken")))
+    assert error.value.status == 500
+    assert requests_per_query["broken"] == 3
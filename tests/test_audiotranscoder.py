@@ -0,0 +1,159 @@
+from cantopy import AudioTranscoder, DownloadManager
+from cantopy.audio_transcoder import get_audio_duration
+from cantopy.xenocanto_components import QueryResult
+from tests.conftest import FAKE_FFMPEG_DURATION, TEST_MAX_WORKERS, FakeHttpSession
+from os.path import exists, join
+import shutil
+import struct
+import wave
+import pytest
+
+
+def test_audiotranscoder_transcode_recordings(
+    fake_ffmpeg_path: str, empty_download_data_base_path: str
+):
+    """Test transcoding recordings in the process pool and collecting the results.
+
+    Parameters
+    ----------
+    fake_ffmpeg_path
+        The path of an executable script standing in for ffmpeg.
+    empty_download_data_base_path
+        The path to a newly created empty download folder.
+    """
+    recording_path = join(empty_download_data_base_path, "581411.mp3")
+    with open(recording_path, "wb") as file:
+        file.write(b"fake mp3 audio")
+
+    with AudioTranscoder(
+        sample_rate=8000, num_channels=2, max_workers=2, ffmpeg_path=fake_ffmpeg_path
+    ) as transcoder:
+        transcoder.submit("581411", recording_path)
+        transcoder.submit("581412", join(empty_download_data_base_path, "581412.mp3"))
+
+        transcodings = transcoder.collect(["581411", "581412", "581413"])
+
+    # The recording that does not exist fails, the one never submitted is left out
+    output_path = join(empty_download_data_base_path, "581411.wav")
+    assert transcodings == {
+        "581411": (output_path, FAKE_FFMPEG_DURATION),
+        "581412": (None, None),
+    }
+    assert not exists(f"{output_path}.part")
+    with wave.open(output_path, "rb") as wave_file:
+        assert wave_file.getframerate() == 8000
+        assert wave_file.getnchannels() == 2
+
+
+def test_audiotranscoder_invalid_arguments(fake_ffmpeg_path: str):
+    """Test that an AudioTranscoder can't be created with an unsupported format or
+    without ffmpeg.
+
+    Parameters
+    ----------
+    fake_ffmpeg_path
+        The path of an executable script standing in for ffmpeg.
+    """
+    with pytest.raises(ValueError):
+        AudioTranscoder(output_format="mp3", ffmpeg_path=fake_ffmpeg_path)
+
+    with pytest.raises(FileNotFoundError):
+        AudioTranscoder(ffmpeg_path=f"{fake_ffmpeg_path}-missing")
+
+
+def test_audiotranscoder_get_flac_duration(tmp_path: str):
+    """Test reading the duration of a FLAC file from its STREAMINFO block.
+
+    Parameters
+    ----------
+    tmp_path
+        The temporary directory of the test.
+    """
+    # 44.1 kHz, 2 channels, 16 bits per sample, 88200 samples
+    packed = (44100 << 44) | (1 << 41) | (15 << 36) | 88200
+    flac_path = join(str(tmp_path), "581411.flac")
+    with open(flac_path, "wb") as file:
+        file.write(
+            b"fLaC"
+            + bytes([0x80, 0, 0, 34])
+            + bytes(10)
+            + struct.pack(">Q", packed)
+            + bytes(16)
+        )
+
+    assert get_audio_duration(flac_path) == 2.0
+
+
+def test_downloadmanager_transcode_downloaded_recordings(
+    fake_ffmpeg_path: str,
+    empty_download_data_base_path: str,
+    fake_audio_http_session: FakeHttpSession,
+    example_two_page_queryresult: QueryResult,
+):
+    """Test that the DownloadManager transcodes its downloads and records them in the
+    metadata.
+
+    Parameters
+    ----------
+    fake_ffmpeg_path
+        The path of an executable script standing in for ffmpeg.
+    empty_download_data_base_path
+        The path to a newly created empty download folder.
+    fake_audio_http_session
+        The fake session serving the audio files of the example recordings.
+    example_two_page_queryresult
+        The two-page QueryResult object based on the example XenoCanto API responses.
+    """
+    # Closing the DownloadManager also shuts down the process pool of its transcoder
+    with DownloadManager(
+        empty_download_data_base_path,
+        max_workers=TEST_MAX_WORKERS,
+        session=fake_audio_http_session,  # type: ignore
+        transcoder=AudioTranscoder(ffmpeg_path=fake_ffmpeg_path),
+    ) as download_manager:
+        download_manager.download_all_recordings_in_queryresult(
+            example_two_page_queryresult
+        )
+
+    for animal_english_name in ["Spot-winged Wood Quail", "Little Nightjar"]:
+        animal_recordings_metadata = download_manager.load_animal_recordings_metadata(
+            animal_english_name
+        )
+        assert (
+            animal_recordings_metadata["transcoded_duration"].astype(float)
+            == FAKE_FFMPEG_DURATION
+        ).all()
+        for recording_id, transcoded_file_path in zip(
+            animal_recordings_metadata["recording_id"],
+            animal_recordings_metadata["transcoded_file_path"],
+        ):
+            assert transcoded_file_path == join(
+                empty_download_data_base_path,
+                download_manager._generate_animal_folder_name(animal_english_name),  # type: ignore
+                f"{recording_id}.wav",
+            )
+            assert exists(transcoded_file_path)
+
+
+@pytest.mark.skipif(shutil.which("ffmpeg") is None, reason="ffmpeg is not installed")
+def test_audiotranscoder_transcode_with_ffmpeg(tmp_path: str):
+    """Test transcoding a real audio file with ffmpeg.
+
+    Parameters
+    ----------
+    tmp_path
+        The temporary directory of the test.
+    """
+    # Write one second of stereo 44.1 kHz silence as input
+    input_path = join(str(tmp_path), "581411.wav")
+    with wave.open(input_path, "wb") as wave_file:
+        wave_file.setnchannels(2)
+        wave_file.setsampwidth(2)
+        wave_file.setframerate(44100)
+        wave_file.writeframes(bytes(4 * 44100))
+
+    with AudioTranscoder(sample_rate=16000, output_format="flac") as transcoder:
+        transcoder.submit("581411", input_path)
+        transcodings = transcoder.collect(["581411"])
+
+    assert transcodings == {"581411": (join(str(tmp_path), "581411.flac"), 1.0)}
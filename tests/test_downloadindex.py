@@ -0,0 +1,174 @@
+from concurrent.futures import ProcessPoolExecutor
+from cantopy import DownloadIndex
+import multiprocessing
+import os
+from os.path import join
+import sqlite3
+import threading
+
+
+def _record_downloads(
+    data_base_path: str, index_path: str, first_recording_id: int
+) -> dict[int, str]:
+    """Record downloads one by one through a separate index connection, in a worker
+    process.
+
+    Parameters
+    ----------
+    data_base_path
+        The shared data folder.
+    index_path
+        The folder of the shared index database.
+    first_recording_id
+        The id of the first recording to record.
+
+    Returns
+    -------
+    dict[int, str]
+        The statuses of all recordings in the index after recording the downloads.
+    """
+    with DownloadIndex(data_base_path, index_path=index_path) as download_index:
+        for recording_id in range(first_recording_id, first_recording_id + 50):
+            download_index.record(recording_id, "little_nightjar", "pass")
+
+        return download_index.lookup(range(first_recording_id, first_recording_id + 50))
+
+
+def test_downloadindex_build_from_existing_data_folder(
+    partially_filled_download_data_base_path: str,
+):
+    """Test that a new DownloadIndex indexes the recordings already in the data folder.
+
+    Parameters
+    ----------
+    partially_filled_download_data_base_path
+        The path to a newly created but partially-filled data folder.
+    """
+    # Leave an interrupted download behind next to the complete recordings
+    with open(
+        join(
+            partially_filled_download_data_base_path,
+            "little_nightjar",
+            "220366.mp3.part",
+        ),
+        "wb",
+    ) as file:
+        file.write(b"partial")
+
+    with DownloadIndex(partially_filled_download_data_base_path) as download_index:
+        assert os.path.exists(download_index.index_file_path)
+        assert download_index.lookup([581412, 581411, 220366, 220365, 196385]) == {
+            581411: "pass",
+            220366: "partial",
+            220365: "pass",
+            196385: "pass",
+        }
+        assert download_index.get(220366) == {
+            "recording_id": 220366,
+            "animal_folder_name": "little_nightjar",
+            "file_size": 7,
+            "sha256": None,
+            "status": "partial",
+        }
+
+
+def test_downloadindex_record_and_rebuild(empty_download_data_base_path: str):
+    """Test recording downloads in the DownloadIndex and rebuilding it from disk.
+
+    Parameters
+    ----------
+    empty_download_data_base_path
+        The path to a newly created empty download folder.
+    """
+    download_index = DownloadIndex(empty_download_data_base_path)
+    assert download_index.lookup([1, 2, 3]) == {}
+
+    # Lookups with more ids than fit in a single query are split in batches
+    for recording_id in range(2000):
+        download_index.record(recording_id, "little_nightjar", "pass")
+    assert len(download_index.lookup(range(1000, 3000))) == 1000
+
+    # The index survives closing and reopening it
+    download_index.close()
+    download_index = DownloadIndex(empty_download_data_base_path)
+    assert download_index.lookup([1999]) == {1999: "pass"}
+
+    # Rebuilding the index drops the recordings that are not on disk
+    os.mkdir(join(empty_download_data_base_path, "little_nightjar"))
+    with open(
+        join(empty_download_data_base_path, "little_nightjar", "5.mp3"), "wb"
+    ) as file:
+        file.write(b"audio-5")
+    download_index.rebuild(compute_checksums=True)
+
+    assert download_index.lookup(range(2000)) == {5: "pass"}
+    assert download_index.get(5)["sha256"] == DownloadIndex.compute_checksum(  # type: ignore
+        join(empty_download_data_base_path, "little_nightjar", "5.mp3")
+    )
+    download_index.close()
+
+
+def test_downloadindex_concurrent_connections(empty_download_data_base_path: str):
+    """Test that the DownloadIndex is opened in WAL mode and waits for the writes of
+    other connections instead of failing.
+
+    Parameters
+    ----------
+    empty_download_data_base_path
+        The path to a newly created empty download folder.
+    """
+    download_index = DownloadIndex(empty_download_data_base_path)
+    assert (
+        download_index._connection.execute("PRAGMA journal_mode").fetchone()[0]  # type: ignore
+        == "wal"
+    )
+
+    # Hold a write transaction on another connection while recording a download
+    other_connection = sqlite3.connect(
+        download_index.index_file_path, check_same_thread=False
+    )
+    other_connection.execute("BEGIN IMMEDIATE")
+    timer = threading.Timer(0.2, other_connection.commit)
+    timer.start()
+    download_index.record(1, "little_nightjar", "pass")
+    timer.join()
+    other_connection.close()
+
+    assert download_index.lookup([1]) == {1: "pass"}
+    download_index.close()
+
+
+def test_downloadindex_multiple_processes(
+    empty_download_data_base_path: str, tmp_path: str
+):
+    """Test that processes sharing an index stored outside the data folder don't lose
+    each other's writes.
+
+    Parameters
+    ----------
+    empty_download_data_base_path
+        The path to a newly created empty download folder.
+    tmp_path
+        A temporary folder standing in for a local disk.
+    """
+    index_path = join(str(tmp_path), "local_index")
+    with ProcessPoolExecutor(
+        max_workers=2, mp_context=multiprocessing.get_context("spawn")
+    ) as executor:
+        worker_statuses = list(
+            executor.map(
+                _record_downloads,
+                [empty_download_data_base_path] * 2,
+                [index_path] * 2,
+                [0, 1000],
+            )
+        )
+
+    assert [len(statuses) for statuses in worker_statuses] == [50, 50]
+    assert not os.path.exists(
+        join(empty_download_data_base_path, DownloadIndex.index_file_name)
+    )
+    with DownloadIndex(
+        empty_download_data_base_path, index_path=index_path
+    ) as download_index:
+        assert len(download_index.lookup(list(range(50)) + list(range(1000, 1050)))) == 100
@@ -1,9 +1,21 @@
-from cantopy import DownloadManager
-from cantopy.xenocanto_components import QueryResult, Recording
+from cantopy import (
+    CsvMetadataStore,
+    DownloadIndex,
+    DownloadManager,
+    DownloadResult,
+    HttpSession,
+    RetryPolicy,
+)
+from cantopy.xenocanto_components import QueryResult, Recording, ResultPage
+from tests.conftest import TEST_MAX_WORKERS, FakeHttpSession
+from concurrent.futures import ProcessPoolExecutor
+import copy
+import multiprocessing
 import os
 from os.path import join
 import pytest
 import pandas as pd
+import sqlite3
 
 
 @pytest.mark.parametrize(
@@ -58,26 +70,26 @@ def test_downloadmanager_download_recordings(
     if example_queryresult_fixture_name == "example_single_page_queryresult":
         if add_fake_recording:
             assert len(download_pass_or_fail) == 4
-            assert download_pass_or_fail["0"] == "fail"
+            assert download_pass_or_fail["0"].status == "fail"
         elif not add_fake_recording:
             assert len(download_pass_or_fail) == 3
 
-        assert download_pass_or_fail["581412"] == "pass"
-        assert download_pass_or_fail["581411"] == "pass"
-        assert download_pass_or_fail["427716"] == "pass"
+        assert download_pass_or_fail["581412"].status == "pass"
+        assert download_pass_or_fail["581411"].status == "pass"
+        assert download_pass_or_fail["427716"].status == "pass"
     elif example_queryresult_fixture_name == "example_two_page_queryresult":
         if add_fake_recording:
             assert len(download_pass_or_fail) == 7
-            assert download_pass_or_fail["0"] == "fail"
+            assert download_pass_or_fail["0"].status == "fail"
         elif not add_fake_recording:
             assert len(download_pass_or_fail) == 6
 
-        assert download_pass_or_fail["581412"] == "pass"
-        assert download_pass_or_fail["581411"] == "pass"
-        assert download_pass_or_fail["427716"] == "pass"
-        assert download_pass_or_fail["220366"] == "pass"
-        assert download_pass_or_fail["220365"] == "pass"
-        assert download_pass_or_fail["196385"] == "pass"
+        assert download_pass_or_fail["581412"].status == "pass"
+        assert download_pass_or_fail["581411"].status == "pass"
+        assert download_pass_or_fail["427716"].status == "pass"
+        assert download_pass_or_fail["220366"].status == "pass"
+        assert download_pass_or_fail["220365"].status == "pass"
+        assert download_pass_or_fail["196385"].status == "pass"
 
     # Check if the files have been downloaded correctly
     if example_queryresult_fixture_name == "example_single_page_queryresult":
@@ -232,7 +244,10 @@ def test_downloadmanager_generate_downloaeded_recording_metadata(
     )
     downloaded_recording_metadata = fake_data_folder_download_manager._generate_downloaded_recordings_metadata(  # type: ignore
         example_queryresult.get_all_recordings(),
-        test_pass_fail_dict,
+        {
+            recording_id: DownloadResult(recording_id, status)
+            for recording_id, status in test_pass_fail_dict.items()
+        },
     )
 
     # Get the recording ids that have passed, these are the ones we should have generated
@@ -600,3 +615,706 @@ def test_downloadmanager_generate_animal_folder_name(
         )
         == "black_winged_bird"
     )
+
+
+def test_downloadmanager_download_single_recording_streams_to_disk(
+    fake_session_download_manager: DownloadManager,
+    fake_audio_http_session: FakeHttpSession,
+    example_recording_1_from_example_xenocanto_query_response_page_1: Recording,
+):
+    """Test that a recording is streamed to its final location without leaving a
+    temporary file behind.
+
+    Parameters
+    ----------
+    fake_session_download_manager
+        DownloadManager instance downloading from a fake session into an empty folder.
+    fake_audio_http_session
+        The fake session serving the audio files of the example recordings.
+    example_recording_1_from_example_xenocanto_query_response_page_1
+        A Recording object based on the first recording in the example page 1 XenoCanto
+        API query response.
+    """
+    recording = example_recording_1_from_example_xenocanto_query_response_page_1
+
+    status = fake_session_download_manager.download_recording(recording)
+
+    bird_folder = join(
+        fake_session_download_manager.data_base_path, "spot_winged_wood_quail"
+    )
+    assert status.status == "pass"
+    assert os.listdir(bird_folder) == ["581412.mp3"]
+    with open(join(bird_folder, "581412.mp3"), "rb") as file:
+        assert file.read() == fake_audio_http_session.files[recording.audio_file_url]
+
+
+def test_downloadmanager_download_single_recording_interrupted(
+    fake_session_download_manager: DownloadManager,
+    fake_audio_http_session: FakeHttpSession,
+    example_recording_1_from_example_xenocanto_query_response_page_1: Recording,
+):
+    """Test that an interrupted download is reported as failed and only leaves a
+    partial file behind, which is not detected as an already downloaded recording.
+
+    Parameters
+    ----------
+    fake_session_download_manager
+        DownloadManager instance downloading from a fake session into an empty folder.
+    fake_audio_http_session
+        The fake session serving the audio files of the example recordings.
+    example_recording_1_from_example_xenocanto_query_response_page_1
+        A Recording object based on the first recording in the example page 1 XenoCanto
+        API query response.
+    """
+    recording = example_recording_1_from_example_xenocanto_query_response_page_1
+    fake_audio_http_session.fail_after[recording.audio_file_url] = 4096
+    fake_session_download_manager.retry_policy = RetryPolicy(max_retries=0)
+
+    status = fake_session_download_manager.download_recording(recording)
+
+    assert status.status == "fail"
+    assert os.listdir(
+        join(fake_session_download_manager.data_base_path, "spot_winged_wood_quail")
+    ) == ["581412.mp3.part"]
+    assert (
+        fake_session_download_manager._detect_already_downloaded_recordings(  # type: ignore
+            [recording]
+        )["581412"]
+        == "new"
+    )
+
+
+@pytest.mark.parametrize("supports_range", [True, False])
+def test_downloadmanager_download_single_recording_resume(
+    fake_session_download_manager: DownloadManager,
+    fake_audio_http_session: FakeHttpSession,
+    example_recording_1_from_example_xenocanto_query_response_page_1: Recording,
+    supports_range: bool,
+):
+    """Test that an interrupted download is resumed from its partial file with a Range
+    request, or fully downloaded again when the server ignores the range.
+
+    Parameters
+    ----------
+    fake_session_download_manager
+        DownloadManager instance downloading from a fake session into an empty folder.
+    fake_audio_http_session
+        The fake session serving the audio files of the example recordings.
+    example_recording_1_from_example_xenocanto_query_response_page_1
+        A Recording object based on the first recording in the example page 1 XenoCanto
+        API query response.
+    supports_range
+        Whether the fake server honours the Range requests.
+    """
+    recording = example_recording_1_from_example_xenocanto_query_response_page_1
+    fake_audio_http_session.supports_range = supports_range
+    fake_audio_http_session.fail_after[recording.audio_file_url] = 4096
+    fake_session_download_manager.retry_policy = RetryPolicy(max_retries=0)
+
+    # The first attempt gets interrupted after 4096 bytes
+    assert (
+        fake_session_download_manager.download_recording(recording).status
+        == "fail"
+    )
+
+    # The second attempt continues where the first one stopped
+    assert (
+        fake_session_download_manager.download_recording(recording).status
+        == "pass"
+    )
+    assert fake_audio_http_session.requested_ranges == [None, "bytes=4096-"]
+
+    bird_folder = join(
+        fake_session_download_manager.data_base_path, "spot_winged_wood_quail"
+    )
+    assert os.listdir(bird_folder) == ["581412.mp3"]
+    with open(join(bird_folder, "581412.mp3"), "rb") as file:
+        assert file.read() == fake_audio_http_session.files[recording.audio_file_url]
+
+
+def test_downloadmanager_download_single_recording_resume_invalid_range(
+    fake_session_download_manager: DownloadManager,
+    fake_audio_http_session: FakeHttpSession,
+    example_recording_1_from_example_xenocanto_query_response_page_1: Recording,
+):
+    """Test that a partial file that can't be resumed is discarded in favour of a full
+    download.
+
+    Parameters
+    ----------
+    fake_session_download_manager
+        DownloadManager instance downloading from a fake session into an empty folder.
+    fake_audio_http_session
+        The fake session serving the audio files of the example recordings.
+    example_recording_1_from_example_xenocanto_query_response_page_1
+        A Recording object based on the first recording in the example page 1 XenoCanto
+        API query response.
+    """
+    recording = example_recording_1_from_example_xenocanto_query_response_page_1
+    bird_folder = join(
+        fake_session_download_manager.data_base_path, "spot_winged_wood_quail"
+    )
+
+    # Simulate a partial file that is larger than the remote recording
+    os.mkdir(bird_folder)
+    with open(join(bird_folder, "581412.mp3.part"), "wb") as file:
+        file.write(b"x" * 100000)
+
+    assert (
+        fake_session_download_manager.download_recording(recording).status
+        == "pass"
+    )
+    assert fake_audio_http_session.requested_ranges == ["bytes=100000-", None]
+    with open(join(bird_folder, "581412.mp3"), "rb") as file:
+        assert file.read() == fake_audio_http_session.files[recording.audio_file_url]
+
+
+@pytest.mark.parametrize("compaction_threshold", [None, 2])
+def test_downloadmanager_append_animal_recordings_metadata_files(
+    partially_filled_download_data_base_path: str,
+    compaction_threshold: int | None,
+    spot_winged_wood_quail_to_add_test_recording_metadata: pd.DataFrame,
+    spot_winged_wood_quail_full_test_recording_metadata: pd.DataFrame,
+):
+    """Test the incremental "append" metadata write mode of the DownloadManager class.
+
+    Parameters
+    ----------
+    partially_filled_download_data_base_path
+        The path to a newly created but partially-filled data folder.
+    compaction_threshold
+        The number of appended rows after which the metadata file gets compacted.
+    spot_winged_wood_quail_to_add_test_recording_metadata
+        The test recording metadata for the spot-winged wood quail that we want to add.
+    spot_winged_wood_quail_full_test_recording_metadata
+        Full test recording metadata for the spot-winged wood quail that should be
+        the result of adding the new metadata.
+    """
+    download_manager = DownloadManager(
+        partially_filled_download_data_base_path,
+        metadata_write_mode="append",
+        compaction_threshold=compaction_threshold,
+    )
+    metadata_file_path = join(
+        partially_filled_download_data_base_path,
+        "spot_winged_wood_quail",
+        "spot_winged_wood_quail_recording_metadata.csv",
+    )
+    with open(metadata_file_path, "r", encoding="utf-8") as file:
+        original_content = file.read()
+
+    # Add the same rows twice, the duplicates should not show up for readers
+    download_manager._update_animal_recordings_metadata_files(  # type: ignore
+        spot_winged_wood_quail_to_add_test_recording_metadata
+    )
+    download_manager._update_animal_recordings_metadata_files(  # type: ignore
+        spot_winged_wood_quail_to_add_test_recording_metadata
+    )
+
+    if compaction_threshold is None:
+        # The existing rows are left untouched, the new ones are only appended
+        with open(metadata_file_path, "r", encoding="utf-8") as file:
+            assert file.read().startswith(original_content)
+        assert len(pd.read_csv(metadata_file_path)) == len(  # type: ignore
+            spot_winged_wood_quail_full_test_recording_metadata
+        ) + len(spot_winged_wood_quail_to_add_test_recording_metadata)
+
+    pd.testing.assert_frame_equal(
+        spot_winged_wood_quail_full_test_recording_metadata,
+        download_manager.load_animal_recordings_metadata("Spot-winged Wood Quail"),
+    )
+
+    # After compaction, the file itself is sorted and de-duplicated
+    download_manager.compact()
+    pd.testing.assert_frame_equal(
+        spot_winged_wood_quail_full_test_recording_metadata,
+        pd.read_csv(metadata_file_path, dtype="object"),  # type: ignore
+    )
+
+
+def test_downloadmanager_invalid_metadata_write_mode():
+    """Test that an unknown metadata write mode is rejected."""
+    with pytest.raises(ValueError):
+        DownloadManager("fake/path", metadata_write_mode="overwrite")
+
+
+def test_downloadmanager_metadata_store_with_write_options():
+    """Test that the write options of the default metadata store can't be combined
+    with a passed metadata store, which would silently ignore them.
+    """
+    metadata_store = CsvMetadataStore("fake/path", write_mode="append")
+    with pytest.raises(ValueError):
+        DownloadManager(
+            "fake/path", metadata_write_mode="append", metadata_store=metadata_store
+        )
+    with pytest.raises(ValueError):
+        DownloadManager(
+            "fake/path", compaction_threshold=100, metadata_store=metadata_store
+        )
+
+    with DownloadManager("fake/path", metadata_store=metadata_store) as download_manager:
+        assert download_manager.metadata_store is metadata_store
+
+
+def test_downloadmanager_download_index(
+    empty_download_data_base_path: str,
+    fake_audio_http_session: FakeHttpSession,
+    example_two_page_queryresult: QueryResult,
+):
+    """Test detecting already downloaded recordings through the download index.
+
+    Parameters
+    ----------
+    empty_download_data_base_path
+        The path to a newly created empty download folder.
+    fake_audio_http_session
+        The fake session serving the audio files of the example recordings.
+    example_two_page_queryresult
+        The two-page QueryResult object based on the example XenoCanto API responses.
+    """
+    download_manager = DownloadManager(
+        empty_download_data_base_path,
+        max_workers=TEST_MAX_WORKERS,
+        session=fake_audio_http_session,  # type: ignore
+        chunk_size=1024,
+        use_download_index=True,
+        retry_policy=RetryPolicy(max_retries=0),
+    )
+    recording = example_two_page_queryresult.get_all_recordings()[0]
+    recording_path = join(
+        empty_download_data_base_path, "spot_winged_wood_quail", "581412.mp3"
+    )
+
+    # Resume an interrupted download, the checksum should cover the whole file
+    fake_audio_http_session.fail_after[recording.audio_file_url] = 4096
+    assert download_manager.download_recording(recording).status == "fail"
+    assert download_manager.download_recording(recording).status == "pass"
+
+    download_index = download_manager.download_index
+    assert download_index is not None
+    assert download_index.get(581412) == {
+        "recording_id": 581412,
+        "animal_folder_name": "spot_winged_wood_quail",
+        "file_size": os.path.getsize(recording_path),
+        "sha256": DownloadIndex.compute_checksum(recording_path),
+        "status": "pass",
+    }
+
+    # Downloaded recordings are detected from the index, without probing the files
+    os.remove(recording_path)
+    detected_already_downloaded_recordings = download_manager._detect_already_downloaded_recordings(  # type: ignore
+        example_two_page_queryresult.get_all_recordings()
+    )
+    assert detected_already_downloaded_recordings["581412"] == "already_downloaded"
+    assert detected_already_downloaded_recordings["581411"] == "new"
+
+    # Rebuilding the index picks up the removed recording
+    download_manager.rebuild_index()
+    detected_already_downloaded_recordings = download_manager._detect_already_downloaded_recordings(  # type: ignore
+        example_two_page_queryresult.get_all_recordings()
+    )
+    assert detected_already_downloaded_recordings["581412"] == "new"
+    download_manager.close()
+
+
+def test_downloadmanager_download_index_error(
+    empty_download_data_base_path: str,
+    fake_audio_http_session: FakeHttpSession,
+    example_two_page_queryresult: QueryResult,
+    monkeypatch: pytest.MonkeyPatch,
+):
+    """Test that a failure to index a completely downloaded recording does not fail
+    its download.
+
+    Parameters
+    ----------
+    empty_download_data_base_path
+        The path to a newly created empty download folder.
+    fake_audio_http_session
+        The fake session serving the audio files of the example recordings.
+    example_two_page_queryresult
+        The two-page QueryResult object based on the example XenoCanto API responses.
+    monkeypatch
+        Monkeypatch fixture to make the download index fail.
+    """
+    download_manager = DownloadManager(
+        empty_download_data_base_path,
+        session=fake_audio_http_session,  # type: ignore
+        use_download_index=True,
+    )
+
+    def locked_record(*args, **kwargs):
+        raise sqlite3.OperationalError("database is locked")
+
+    monkeypatch.setattr(download_manager.download_index, "record", locked_record)
+    recording = example_two_page_queryresult.get_all_recordings()[0]
+    download_result = download_manager.download_recording(recording)
+
+    assert download_result.status == "pass"
+    assert download_result.error == (
+        "indexing failed: OperationalError: database is locked"
+    )
+    assert os.path.exists(
+        join(empty_download_data_base_path, "spot_winged_wood_quail", "581412.mp3")
+    )
+    download_manager.close()
+
+
+def test_downloadmanager_close(
+    empty_download_data_base_path: str,
+    fake_audio_http_session: FakeHttpSession,
+    example_two_page_queryresult: QueryResult,
+    monkeypatch: pytest.MonkeyPatch,
+):
+    """Test that closing a DownloadManager stops its metadata writer, closes its
+    download index and only closes the session it created itself.
+
+    Parameters
+    ----------
+    empty_download_data_base_path
+        The path to a newly created empty download folder.
+    fake_audio_http_session
+        The fake session serving the audio files of the example recordings.
+    example_two_page_queryresult
+        The two-page QueryResult object based on the example XenoCanto API responses.
+    monkeypatch
+        Monkeypatch fixture to record the closed sessions.
+    """
+    closed_sessions = []
+    monkeypatch.setattr(
+        HttpSession, "close", lambda session: closed_sessions.append(session)
+    )
+
+    with DownloadManager(
+        empty_download_data_base_path,
+        max_workers=TEST_MAX_WORKERS,
+        session=fake_audio_http_session,  # type: ignore
+        use_download_index=True,
+    ) as download_manager:
+        download_manager.download_all_recordings_in_queryresult(
+            example_two_page_queryresult
+        )
+        assert download_manager.metadata_writer._thread is not None  # type: ignore
+
+    assert download_manager.metadata_writer._thread is None  # type: ignore
+    with pytest.raises(sqlite3.ProgrammingError):
+        download_manager.download_index.get(581412)  # type: ignore
+    assert closed_sessions == []
+
+    with DownloadManager(empty_download_data_base_path) as download_manager:
+        pass
+    assert closed_sessions == [download_manager.session]
+
+
+def test_downloadmanager_rebuild_index_without_download_index():
+    """Test that rebuilding the index of a DownloadManager without index fails."""
+    with pytest.raises(ValueError):
+        DownloadManager("fake/path").rebuild_index()
+
+
+def test_downloadmanager_download_all_recordings_in_result_pages(
+    fake_session_download_manager: DownloadManager,
+    example_result_page_page_1: ResultPage,
+    example_result_page_page_2: ResultPage,
+):
+    """Test downloading the recordings of a stream of ResultPages, page by page.
+
+    Parameters
+    ----------
+    fake_session_download_manager
+        DownloadManager instance downloading through a fake session into an empty folder.
+    example_result_page_page_1
+        The ResultPage of the example page 1 XenoCanto API response.
+    example_result_page_page_2
+        The ResultPage of the example page 2 XenoCanto API response.
+    """
+
+    def result_pages():
+        yield example_result_page_page_1
+
+        # The recordings of the first page are downloaded before the next page arrives
+        assert sorted(
+            fake_session_download_manager.load_animal_recordings_metadata(
+                "Spot-winged Wood Quail"
+            )["recording_id"]
+        ) == sorted(
+            recording.recording_id
+            for recording in example_result_page_page_1.recordings
+        )
+
+        yield example_result_page_page_2
+
+    fake_session_download_manager.download_all_recordings_in_result_pages(
+        result_pages()
+    )
+
+    for result_page in [example_result_page_page_1, example_result_page_page_2]:
+        for recording in result_page.recordings:
+            assert os.path.exists(
+                join(
+                    fake_session_download_manager.data_base_path,
+                    fake_session_download_manager._generate_animal_folder_name(  # type: ignore
+                        recording.english_name
+                    ),
+                    f"{recording.recording_id}.mp3",
+                )
+            )
+
+
+def test_downloadmanager_download_single_recording_retry(
+    fake_session_download_manager: DownloadManager,
+    fake_audio_http_session: FakeHttpSession,
+    example_recording_1_from_example_xenocanto_query_response_page_1: Recording,
+):
+    """Test that an interrupted download is retried and resumed within a single call.
+
+    Parameters
+    ----------
+    fake_session_download_manager
+        DownloadManager instance downloading from a fake session into an empty folder.
+    fake_audio_http_session
+        The fake session serving the audio files of the example recordings.
+    example_recording_1_from_example_xenocanto_query_response_page_1
+        A Recording object based on the first recording in the example page 1 XenoCanto
+        API query response.
+    """
+    recording = example_recording_1_from_example_xenocanto_query_response_page_1
+    fake_audio_http_session.fail_after[recording.audio_file_url] = 4096
+    fake_session_download_manager.retry_policy = RetryPolicy(backoff_factor=0.0)
+
+    assert (
+        fake_session_download_manager.download_recording(recording).status
+        == "pass"
+    )
+    assert fake_audio_http_session.requested_ranges == [None, "bytes=4096-"]
+
+
+def test_downloadmanager_download_all_recordings_high_concurrency(
+    empty_download_data_base_path: str,
+    example_fake_xenocanto_recording: Recording,
+    example_two_page_queryresult: QueryResult,
+):
+    """Test that concurrently downloaded results are attached to the right recordings.
+
+    The downloads finish in a different order than they were submitted, with failing
+    downloads mixed in between passing ones.
+
+    Parameters
+    ----------
+    empty_download_data_base_path
+        The path to a newly created empty download folder.
+    example_fake_xenocanto_recording
+        Example fake recording that is not served, to mix failing downloads in.
+    example_two_page_queryresult
+        The two-page QueryResult object based on the example XenoCanto API responses.
+    """
+    recordings = []
+    files: dict[str, bytes] = {}
+    for index in range(200):
+        template = (
+            example_two_page_queryresult.get_all_recordings()[index % 6]
+            if index % 5
+            else example_fake_xenocanto_recording
+        )
+        recording = copy.copy(template)
+        recording.recording_id = str(100000 + index)
+        recording.audio_file_url = f"https://xeno-canto.org/{recording.recording_id}"
+        recordings.append(recording)
+
+        # Only serve the recordings based on a real one, with varying sizes
+        if index % 5:
+            files[recording.audio_file_url] = b"x" * (index * 997 % 20000 + 1)
+
+    download_manager = DownloadManager(
+        empty_download_data_base_path,
+        max_workers=32,
+        session=FakeHttpSession(files),  # type: ignore
+        chunk_size=512,
+    )
+
+    download_results = download_manager._download_all_recordings(recordings)  # type: ignore
+
+    assert list(download_results) == [recording.recording_id for recording in recordings]
+    for recording in recordings:
+        download_result = download_results[recording.recording_id]
+        assert download_result.recording_id == recording.recording_id
+
+        if recording.audio_file_url in files:
+            assert download_result.status == "pass"
+            assert download_result.http_status == 200
+            assert download_result.num_bytes == len(files[recording.audio_file_url])
+            assert download_result.error is None
+        else:
+            assert download_result.status == "fail"
+            assert download_result.http_status == 404
+            assert download_result.num_bytes == 0
+            assert download_result.error is not None
+
+    # Only the metadata of the passed downloads is generated
+    metadata = download_manager._generate_downloaded_recordings_metadata(  # type: ignore
+        recordings, download_results
+    )
+    assert sorted(metadata["recording_id"]) == sorted(
+        recording.recording_id
+        for recording in recordings
+        if recording.audio_file_url in files
+    )
+
+
+def _download_shard(
+    data_base_path: str,
+    files: dict[str, bytes],
+    query_result: QueryResult,
+    shard_index: int,
+    num_shards: int,
+) -> list[str]:
+    """Download a shard of the recordings of a QueryResult, in a worker process.
+
+    Parameters
+    ----------
+    data_base_path
+        The shared data folder to download the recordings into.
+    files
+        The audio files served by the fake session, keyed by url.
+    query_result
+        The QueryResult whose recordings are downloaded.
+    shard_index
+        The index of the shard to download.
+    num_shards
+        The number of shards.
+
+    Returns
+    -------
+    list[str]
+        The sorted ids of the downloaded recordings.
+    """
+    download_manager = DownloadManager(
+        data_base_path,
+        max_workers=2,
+        session=FakeHttpSession(files),  # type: ignore
+        chunk_size=1024,
+        shard_index=shard_index,
+        num_shards=num_shards,
+    )
+    return sorted(download_manager.download_all_recordings_in_queryresult(query_result))
+
+
+def test_downloadmanager_sharded_download(
+    empty_download_data_base_path: str,
+    fake_audio_http_session: FakeHttpSession,
+    example_two_page_queryresult: QueryResult,
+):
+    """Test downloading the recordings of a QueryResult with several sharded worker
+    processes into a shared data folder.
+
+    Parameters
+    ----------
+    empty_download_data_base_path
+        The path to a newly created empty download folder.
+    fake_audio_http_session
+        The fake session serving the audio files of the example recordings.
+    example_two_page_queryresult
+        The two-page QueryResult object based on the example XenoCanto API responses.
+    """
+    num_shards = 3
+    with ProcessPoolExecutor(
+        max_workers=num_shards, mp_context=multiprocessing.get_context("spawn")
+    ) as executor:
+        shard_recording_ids = list(
+            executor.map(
+                _download_shard,
+                [empty_download_data_base_path] * num_shards,
+                [fake_audio_http_session.files] * num_shards,
+                [example_two_page_queryresult] * num_shards,
+                range(num_shards),
+                [num_shards] * num_shards,
+            )
+        )
+
+    # Every recording is downloaded by exactly one shard, the one its id hashes to
+    recording_ids = [
+        recording.recording_id
+        for recording in example_two_page_queryresult.get_all_recordings()
+    ]
+    assert sorted(sum(shard_recording_ids, [])) == sorted(recording_ids)
+    for shard_index, recording_ids_of_shard in enumerate(shard_recording_ids):
+        assert recording_ids_of_shard == sorted(
+            recording_id
+            for recording_id in recording_ids
+            if DownloadManager.get_recording_shard(recording_id, num_shards)
+            == shard_index
+        )
+
+    # The metadata is only written to the shard fragments, until they are merged
+    download_manager = DownloadManager(empty_download_data_base_path)
+    assert len(download_manager.load_animal_recordings_metadata("Little Nightjar")) == 0
+    assert os.path.isdir(join(empty_download_data_base_path, "metadata_fragments"))
+
+    download_manager.merge_metadata_fragments()
+    assert not os.path.exists(join(empty_download_data_base_path, "metadata_fragments"))
+    for english_name in ["Spot-winged Wood Quail", "Little Nightjar"]:
+        assert list(
+            download_manager.load_animal_recordings_metadata(english_name)["recording_id"]
+        ) == sorted(
+            (
+                recording.recording_id
+                for recording in example_two_page_queryresult.get_all_recordings()
+                if recording.english_name == english_name
+            ),
+            key=int,
+        )
+
+    with pytest.raises(ValueError):
+        DownloadManager(empty_download_data_base_path, shard_index=3, num_shards=3)
+
+
+def test_downloadmanager_sharded_download_custom_metadata_store(
+    empty_download_data_base_path: str,
+    fake_audio_http_session: FakeHttpSession,
+    example_two_page_queryresult: QueryResult,
+):
+    """Test sharded downloads with a MetadataStore subclass that has its own
+    constructor arguments.
+
+    Parameters
+    ----------
+    empty_download_data_base_path
+        The path to a newly created empty download folder.
+    fake_audio_http_session
+        The fake session serving the audio files of the example recordings.
+    example_two_page_queryresult
+        The two-page QueryResult object based on the example XenoCanto API responses.
+    """
+
+    class LabeledMetadataStore(CsvMetadataStore):
+        def __init__(self, data_base_path: str, label: str):
+            super().__init__(data_base_path, write_mode="append")
+            self.label = label
+
+    metadata_store = LabeledMetadataStore(empty_download_data_base_path, "birds")
+    for shard_index in range(2):
+        download_manager = DownloadManager(
+            empty_download_data_base_path,
+            session=fake_audio_http_session,  # type: ignore
+            metadata_store=metadata_store,
+            shard_index=shard_index,
+            num_shards=2,
+        )
+        fragment_store = download_manager.metadata_writer.metadata_store
+        assert isinstance(fragment_store, LabeledMetadataStore)
+        assert fragment_store.label == "birds"
+        assert fragment_store.write_mode == "append"
+        assert fragment_store.data_base_path != empty_download_data_base_path
+
+        download_manager.download_all_recordings_in_queryresult(
+            example_two_page_queryresult
+        )
+
+    download_manager.merge_metadata_fragments()
+    assert sorted(
+        list(metadata_store.load("little_nightjar")["recording_id"])
+        + list(metadata_store.load("spot_winged_wood_quail")["recording_id"])
+    ) == sorted(
+        recording.recording_id
+        for recording in example_two_page_queryresult.get_all_recordings()
+    )
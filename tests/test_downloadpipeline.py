@@ -0,0 +1,304 @@
+import json
+import os
+import re
+from os.path import join
+from typing import Any, Dict
+import pytest
+from cantopy import DownloadManager, DownloadPipeline, FetchManager
+from cantopy.xenocanto_components import Query, QueryResult, ResultPage
+
+
+@pytest.fixture
+def fake_two_page_api(
+    example_xenocanto_query_response_page_1: Dict[str, Any],
+    example_xenocanto_query_response_page_2: Dict[str, Any],
+    monkeypatch: pytest.MonkeyPatch,
+):
+    """Replace the XenoCanto API calls of the FetchManager with the example responses.
+
+    Parameters
+    ----------
+    example_xenocanto_query_response_page_1
+        The dictionary representation of example page 1 XenoCanto API query response.
+    example_xenocanto_query_response_page_2
+        The dictionary representation of example page 2 XenoCanto API query response.
+    monkeypatch
+        Monkeypatch fixture to replace the actual API call with a fake one.
+    """
+    responses = {
+        1: example_xenocanto_query_response_page_1,
+        2: example_xenocanto_query_response_page_2,
+    }
+
+    def fake_fetch_result_page(query_str: str, page: int, session=None, cache=None):
+        return FetchManager._parse_query_response(  # type: ignore
+            {**responses[page], "numPages": 2}
+        )
+
+    monkeypatch.setattr(FetchManager, "_fetch_result_page", fake_fetch_result_page)
+
+
+@pytest.mark.parametrize("queue_size", [1, None])
+def test_downloadmanager_download_query(
+    fake_two_page_api: None,
+    fake_session_download_manager: DownloadManager,
+    example_two_page_queryresult: QueryResult,
+    queue_size: int | None,
+):
+    """Test downloading all recordings of a query through the download pipeline.
+
+    Parameters
+    ----------
+    fake_two_page_api
+        Fixture replacing the XenoCanto API with the example responses.
+    fake_session_download_manager
+        DownloadManager instance downloading through a fake session into an empty folder.
+    example_two_page_queryresult
+        The two-page QueryResult object based on the example XenoCanto API responses.
+    queue_size
+        The maximum number of items on each queue between the stages.
+    """
+    # Pretend one recording was already downloaded
+    os.mkdir(join(fake_session_download_manager.data_base_path, "little_nightjar"))
+    open(
+        join(
+            fake_session_download_manager.data_base_path,
+            "little_nightjar",
+            "196385.mp3",
+        ),
+        "x",
+    )
+
+    pipeline = DownloadPipeline(fake_session_download_manager, queue_size=queue_size)
+    download_results = pipeline.run(Query(species_name="common blackbird"))
+
+    recordings = example_two_page_queryresult.get_all_recordings()
+    assert {
+        recording_id: download_result.status
+        for recording_id, download_result in download_results.items()
+    } == {
+        recording.recording_id: "pass"
+        for recording in recordings
+        if recording.recording_id != "196385"
+    }
+
+    # The bounded queues never hold more than queue_size items
+    assert all(
+        0 < peak_queue_depth <= pipeline.queue_size
+        for peak_queue_depth in pipeline.peak_queue_depths.values()
+    )
+    assert pipeline.queue_depths == {"pages": 0, "recordings": 0, "results": 0}
+
+    # All downloaded recordings are written to the metadata files
+    for english_name in ["Spot-winged Wood Quail", "Little Nightjar"]:
+        assert sorted(
+            fake_session_download_manager.load_animal_recordings_metadata(
+                english_name
+            )["recording_id"]
+        ) == sorted(
+            recording.recording_id
+            for recording in recordings
+            if recording.english_name == english_name
+            and recording.recording_id != "196385"
+        )
+
+    # Running the query again does not download anything
+    assert fake_session_download_manager.download_query(
+        Query(species_name="common blackbird")
+    ) == {}
+
+
+def test_downloadpipeline_batches_metadata_writes(
+    fake_two_page_api: None,
+    fake_session_download_manager: DownloadManager,
+    monkeypatch: pytest.MonkeyPatch,
+):
+    """Test that the download pipeline writes the metadata of each species once per
+    batch instead of once per downloaded recording.
+
+    Parameters
+    ----------
+    fake_two_page_api
+        Fixture replacing the XenoCanto API with the example responses.
+    fake_session_download_manager
+        DownloadManager instance downloading through a fake session into an empty folder.
+    monkeypatch
+        Monkeypatch fixture to count the writes to the metadata store.
+    """
+    metadata_store = fake_session_download_manager.metadata_store
+    store_updates: list[tuple[str, int]] = []
+    store_update = metadata_store.update
+
+    def counting_update(animal_folder_name: str, animal_recordings_metadata):
+        store_updates.append((animal_folder_name, len(animal_recordings_metadata)))
+        store_update(animal_folder_name, animal_recordings_metadata)
+
+    monkeypatch.setattr(metadata_store, "update", counting_update)
+
+    # The downloads never fill a batch, so the metadata is written once at the end
+    download_results = DownloadPipeline(fake_session_download_manager).run(
+        Query(species_name="common blackbird")
+    )
+
+    assert sorted(animal_folder_name for animal_folder_name, _ in store_updates) == [
+        "little_nightjar",
+        "spot_winged_wood_quail",
+    ]
+    assert sum(num_rows for _, num_rows in store_updates) == len(download_results)
+
+
+def test_downloadpipeline_stage_error(
+    fake_session_download_manager: DownloadManager,
+    monkeypatch: pytest.MonkeyPatch,
+):
+    """Test that an error in one stage stops the pipeline and is raised by run.
+
+    Parameters
+    ----------
+    fake_session_download_manager
+        DownloadManager instance downloading through a fake session into an empty folder.
+    monkeypatch
+        Monkeypatch fixture to replace the actual API call with a failing one.
+    """
+
+    def failing_fetch_result_page(
+        query_str: str, page: int, session=None, cache=None
+    ) -> tuple[dict[str, int], ResultPage]:
+        raise ConnectionError("API unreachable")
+
+    monkeypatch.setattr(FetchManager, "_fetch_result_page", failing_fetch_result_page)
+
+    with pytest.raises(ConnectionError):
+        fake_session_download_manager.download_query(Query(species_name="blackbird"))
+
+
+def test_downloadmanager_download_query_with_filter(
+    fake_two_page_api: None,
+    fake_session_download_manager: DownloadManager,
+):
+    """Test that the download pipeline only downloads the recordings matching a filter.
+
+    Parameters
+    ----------
+    fake_two_page_api
+        Fixture replacing the XenoCanto API with the example responses.
+    fake_session_download_manager
+        DownloadManager instance downloading through a fake session into an empty folder.
+    """
+    download_results = fake_session_download_manager.download_query(
+        Query(species_name="common blackbird"),
+        recording_filter="recording_length < 30 and quality_rating >= 'C'",
+    )
+
+    assert sorted(download_results) == ["196385", "220366", "427716"]
+    assert sorted(
+        fake_session_download_manager.load_animal_recordings_metadata(
+            "Little Nightjar"
+        )["recording_id"]
+    ) == ["196385", "220366"]
+
+    # Invalid filters are rejected before anything is fetched
+    with pytest.raises(ValueError):
+        fake_session_download_manager.download_query(
+            Query(species_name="common blackbird"), recording_filter="length <"
+        )
+
+
+def test_downloadmanager_sync(
+    fake_session_download_manager: DownloadManager,
+    example_xenocanto_query_response_page_1: Dict[str, Any],
+    example_xenocanto_query_response_page_2: Dict[str, Any],
+    monkeypatch: pytest.MonkeyPatch,
+):
+    """Test that a sync only requests the recordings uploaded since the last sync.
+
+    Parameters
+    ----------
+    fake_session_download_manager
+        DownloadManager instance downloading through a fake session into an empty folder.
+    example_xenocanto_query_response_page_1
+        The dictionary representation of example page 1 XenoCanto API query response.
+    example_xenocanto_query_response_page_2
+        The dictionary representation of example page 2 XenoCanto API query response.
+    monkeypatch
+        Monkeypatch fixture to replace the actual API call with a fake one.
+    """
+    recordings = (
+        example_xenocanto_query_response_page_1["recordings"]
+        + example_xenocanto_query_response_page_2["recordings"]
+    )
+    requested_query_strs: list[str] = []
+
+    def fake_fetch_result_page(query_str: str, page: int, session=None, cache=None):
+        requested_query_strs.append(query_str)
+        since = re.search(r"since:(\S+)", query_str)
+        matching_recordings = [
+            recording
+            for recording in recordings
+            if since is None or recording["uploaded"] >= since.group(1)
+        ]
+        return FetchManager._parse_query_response(  # type: ignore
+            {
+                "numRecordings": len(matching_recordings),
+                "numSpecies": 2,
+                "numPages": 1,
+                "page": page,
+                "recordings": matching_recordings,
+            }
+        )
+
+    monkeypatch.setattr(FetchManager, "_fetch_result_page", fake_fetch_result_page)
+
+    def upload_recording(recording_id: str, upload_date: str):
+        file_url = f"https://xeno-canto.org/{recording_id}/download"
+        recordings.append(
+            {**recordings[0], "id": recording_id, "uploaded": upload_date, "file": file_url}
+        )
+        return file_url
+
+    def load_sync_state() -> Dict[str, Any]:
+        with open(
+            join(fake_session_download_manager.data_base_path, "sync_state.json")
+        ) as sync_state_file:
+            return json.load(sync_state_file)["spot-winged wood quail"]
+
+    query = Query(species_name="spot-winged wood quail")
+
+    # The first sync downloads all recordings and stores the high-water mark
+    assert len(fake_session_download_manager.sync(query)) == 6
+    assert requested_query_strs == ["spot-winged wood quail"]
+    assert load_sync_state()["uploaded_since"] == "2020-08-09"
+    assert load_sync_state()["max_recording_id"] == 581412
+
+    # The next sync only requests the recordings uploaded since the high-water mark
+    fake_session_download_manager.session.files[  # type: ignore
+        upload_recording("600000", "2021-01-05")
+    ] = b"audio-600000"
+    assert list(fake_session_download_manager.sync(query)) == ["600000"]
+    assert requested_query_strs[-1] == "spot-winged wood quail since:2020-08-09"
+    assert load_sync_state()["uploaded_since"] == "2021-01-05"
+
+    # A failed download keeps the high-water mark before its upload date
+    failing_file_url = upload_recording("600001", "2021-02-01")
+    upload_recording("600002", "2021-03-01")
+    fake_session_download_manager.session.files[  # type: ignore
+        recordings[-1]["file"]
+    ] = b"audio-600002"
+    download_results = fake_session_download_manager.sync(query)
+    assert {
+        recording_id: download_result.status
+        for recording_id, download_result in download_results.items()
+    } == {"600001": "fail", "600002": "pass"}
+    assert load_sync_state()["uploaded_since"] == "2021-02-01"
+    assert load_sync_state()["max_recording_id"] == 600002
+
+    # The failed recording is retried by the next sync
+    fake_session_download_manager.session.files[failing_file_url] = b"audio-600001"  # type: ignore
+    assert list(fake_session_download_manager.sync(query)) == ["600001"]
+    assert requested_query_strs[-1] == "spot-winged wood quail since:2021-02-01"
+    assert load_sync_state()["uploaded_since"] == "2021-03-01"
+    assert sorted(
+        fake_session_download_manager.load_animal_recordings_metadata(
+            "Spot-winged Wood Quail"
+        )["recording_id"]
+    ) == ["427716", "581411", "581412", "600000", "600001", "600002"]
@@ -0,0 +1,154 @@
+from cantopy import DownloadManager, FeatureExtractor
+from cantopy.feature_extractor import compute_log_mel_spectrogram, load_audio
+from cantopy.xenocanto_components import QueryResult
+from tests.conftest import (
+    TEST_MAX_WORKERS,
+    FakeHttpSession,
+    generate_wave_file_content,
+)
+from os.path import join
+import os
+import numpy as np
+import pytest
+
+
+def test_featureextractor_compute_log_mel_spectrogram():
+    """Test that the energy of a sine tone ends up in the mel band of its frequency."""
+    sample_rate = 16000
+    samples = np.sin(2 * np.pi * 1000 * np.arange(sample_rate) / sample_rate)
+
+    log_mel_spectrogram = compute_log_mel_spectrogram(
+        samples,
+        sample_rate=sample_rate,
+        n_fft=512,
+        hop_length=160,
+        n_mels=40,
+        f_min=0.0,
+        f_max=8000.0,
+        log_offset=1e-6,
+    )
+
+    assert log_mel_spectrogram.shape == (40, 1 + sample_rate // 160)
+    assert log_mel_spectrogram.dtype == np.float32
+
+    # The 1 kHz tone falls in the mel band around 1 kHz in every (non-edge) frame
+    band_center_frequencies = 700 * (
+        10 ** (np.linspace(0, 2595 * np.log10(1 + 8000 / 700), 42)[1:-1] / 2595) - 1
+    )
+    expected_band = int(np.argmin(np.abs(band_center_frequencies - 1000)))
+    assert (np.argmax(log_mel_spectrogram[:, 5:-5], axis=0) == expected_band).all()
+
+
+def test_featureextractor_load_wave_audio(tmp_path: str):
+    """Test loading a WAV file, resampled to a different sample rate.
+
+    Parameters
+    ----------
+    tmp_path
+        The temporary directory of the test.
+    """
+    wave_path = join(str(tmp_path), "581411.wav")
+    with open(wave_path, "wb") as file:
+        file.write(generate_wave_file_content(440, 1.0, sample_rate=22050))
+
+    samples = load_audio(wave_path, 16000)
+
+    assert samples.dtype == np.float32
+    assert len(samples) == 16000
+    assert 0.45 < np.abs(samples).max() <= 0.5
+
+
+def test_featureextractor_extract_features(tmp_path: str):
+    """Test extracting features into .npy files keyed by the parameter hash.
+
+    Parameters
+    ----------
+    tmp_path
+        The temporary directory of the test.
+    """
+    recording_path = join(str(tmp_path), "581411.mp3")
+    with open(recording_path, "wb") as file:
+        file.write(generate_wave_file_content(440, 1.0))
+
+    with FeatureExtractor(n_mels=32, max_workers=2) as feature_extractor:
+        feature_extractor.submit("581411", recording_path)
+        feature_extractor.submit("581412", join(str(tmp_path), "581412.mp3"))
+        extractions = feature_extractor.collect(["581411", "581412"])
+
+        feature_path = feature_extractor.get_feature_path(recording_path)
+        assert feature_path == join(
+            str(tmp_path), f"581411.logmel-{feature_extractor.parameter_hash}.npy"
+        )
+        assert extractions == {"581411": (feature_path, 44), "581412": (None, None)}
+        assert np.load(feature_path, mmap_mode="r").shape == (32, 44)
+
+        # An existing feature file is reused instead of computed again
+        modification_time = os.path.getmtime(feature_path)
+        feature_extractor.submit("581411", recording_path)
+        assert feature_extractor.collect(["581411"]) == {"581411": (feature_path, 44)}
+        assert os.path.getmtime(feature_path) == modification_time
+
+    # Changing a parameter changes the feature file
+    assert FeatureExtractor(n_mels=32).get_feature_path(recording_path) == feature_path
+    assert FeatureExtractor(n_mels=64).get_feature_path(recording_path) != feature_path
+
+
+def test_downloadmanager_extract_features(
+    empty_download_data_base_path: str,
+    example_two_page_queryresult: QueryResult,
+):
+    """Test that the DownloadManager precomputes the features of its downloads, and
+    recomputes them for existing downloads with new parameters.
+
+    Parameters
+    ----------
+    empty_download_data_base_path
+        The path to a newly created empty download folder.
+    example_two_page_queryresult
+        The two-page QueryResult object based on the example XenoCanto API responses.
+    """
+    session = FakeHttpSession(
+        {
+            recording.audio_file_url: generate_wave_file_content(440, 0.5)
+            for recording in example_two_page_queryresult.get_all_recordings()
+        }
+    )
+
+    for n_mels in [32, 16]:
+        # Closing the DownloadManager also shuts down the process pool of its extractor
+        feature_extractor = FeatureExtractor(n_mels=n_mels)
+        with DownloadManager(
+            empty_download_data_base_path,
+            max_workers=TEST_MAX_WORKERS,
+            session=session,  # type: ignore
+            feature_extractor=feature_extractor,
+        ) as download_manager:
+            download_manager.download_all_recordings_in_queryresult(
+                example_two_page_queryresult
+            )
+
+            # The second run finds all recordings downloaded, so backfill their features
+            if n_mels == 16:
+                download_manager.extract_features()
+
+        for animal_english_name in ["Spot-winged Wood Quail", "Little Nightjar"]:
+            animal_recordings_metadata = (
+                download_manager.load_animal_recordings_metadata(animal_english_name)
+            )
+            assert len(animal_recordings_metadata) == 3
+            for feature_file_path, feature_num_frames in zip(
+                animal_recordings_metadata["feature_file_path"],
+                animal_recordings_metadata["feature_num_frames"],
+            ):
+                assert feature_extractor.parameter_hash in feature_file_path
+                assert np.load(feature_file_path, mmap_mode="r").shape == (
+                    n_mels,
+                    int(feature_num_frames),
+                )
+
+
+def test_downloadmanager_extract_features_without_feature_extractor():
+    """Test that extracting features requires a DownloadManager with a feature extractor."""
+    with pytest.raises(ValueError):
+        DownloadManager("fake/path").extract_features()
+
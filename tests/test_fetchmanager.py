@@ -1,6 +1,12 @@
+import json
+import threading
+import time
+from typing import Any
 import pytest
-from cantopy import FetchManager
-from cantopy.xenocanto_components import Query
+import requests
+from cantopy import FetchManager, RetryPolicy
+from cantopy.xenocanto_components import Query, ResultPage
+from tests.conftest import FakeHttpResponse
 
 
 @pytest.fixture
@@ -65,3 +71,212 @@ def test_query_multipage(fetch_manager: FetchManager, query: Query):
     assert len(query_result.result_pages) == 3
     assert query_result.result_pages[0].recordings[0].english_name == "Common Blackbird"
     assert query_result.result_pages[0].recordings[0].quality_rating == "A"
+
+
+def test_query_multipage_concurrent_page_order(
+    query: Query,
+    example_xenocanto_query_response_page_1: dict,
+    monkeypatch: pytest.MonkeyPatch,
+):
+    """Test that a concurrent multi-page fetch returns the ResultPages in page order.
+
+    Parameters
+    ----------
+    query
+        The Query object to send to the XenoCanto API.
+    example_xenocanto_query_response_page_1
+        The dictionary representation of example page 1 XenoCanto API query response.
+    monkeypatch
+        Monkeypatch fixture to replace the actual API call with a fake one.
+    """
+
+    def fake_fetch_result_page(query_str: str, page: int, session=None, cache=None):
+        # Let the earlier pages finish last to scramble the completion order
+        time.sleep(0.01 * (10 - page))
+        return (
+            {
+                "available_num_recordings": 67810,
+                "available_num_species": 1675,
+                "available_num_pages": 136,
+            },
+            ResultPage({**example_xenocanto_query_response_page_1, "page": page}),
+        )
+
+    monkeypatch.setattr(FetchManager, "_fetch_result_page", fake_fetch_result_page)
+
+    query_result = FetchManager.send_query(query, max_pages=8, max_workers=4)
+
+    assert len(query_result.result_pages) == 8
+    assert [result_page.page_id for result_page in query_result.result_pages] == list(
+        range(1, 9)
+    )
+
+
+@pytest.mark.parametrize("read_ahead", [0, 1, 3])
+def test_iter_query(
+    query: Query,
+    example_xenocanto_query_response_page_1: dict,
+    monkeypatch: pytest.MonkeyPatch,
+    read_ahead: int,
+):
+    """Test lazily iterating over the result pages of a query with read-ahead.
+
+    Parameters
+    ----------
+    query
+        The Query object to send to the XenoCanto API.
+    example_xenocanto_query_response_page_1
+        The dictionary representation of example page 1 XenoCanto API query response.
+    monkeypatch
+        Monkeypatch fixture to replace the actual API call with a fake one.
+    read_ahead
+        The number of pages to fetch in the background.
+    """
+    fetched_pages: list[int] = []
+
+    def fake_fetch_result_page(query_str: str, page: int, session=None, cache=None):
+        fetched_pages.append(page)
+        return (
+            {
+                "available_num_recordings": 67810,
+                "available_num_species": 1675,
+                "available_num_pages": 136,
+            },
+            ResultPage({**example_xenocanto_query_response_page_1, "page": page}),
+        )
+
+    monkeypatch.setattr(FetchManager, "_fetch_result_page", fake_fetch_result_page)
+
+    result_pages = FetchManager.iter_query(query, max_pages=10, read_ahead=read_ahead)
+
+    # Pages are only fetched on demand, at most read_ahead pages in advance
+    assert next(result_pages).page_id == 1
+    assert next(result_pages).page_id == 2
+    time.sleep(0.05)
+    assert sorted(fetched_pages) == list(range(1, 3 + read_ahead))
+
+    # The remaining pages are yielded in page order
+    assert [result_page.page_id for result_page in result_pages] == list(range(3, 11))
+
+
+def test_fetch_result_page_retries_invalid_json(
+    example_xenocanto_query_response_page_1: dict,
+):
+    """Test that a result page whose response is not valid json is fetched again.
+
+    Parameters
+    ----------
+    example_xenocanto_query_response_page_1
+        The dictionary representation of example page 1 XenoCanto API query response.
+    """
+    responses = [
+        FakeHttpResponse(200, b'{"numRecordings": "67'),
+        FakeHttpResponse(200, json.dumps(example_xenocanto_query_response_page_1)),
+    ]
+
+    class FakeSession:
+        retry_policy = RetryPolicy(backoff_factor=0.0)
+
+        def get(self, url: str, **kwargs: Any) -> FakeHttpResponse:
+            return responses.pop(0)
+
+    query_metadata, result_page = FetchManager._fetch_result_page(  # type: ignore
+        "gen:test", 1, session=FakeSession()  # type: ignore
+    )
+
+    assert responses == []
+    assert result_page.page_id == 1
+    assert query_metadata["available_num_pages"] > 0
+
+
+def test_fetch_result_page_error_status():
+    """Test that an error response of the XenoCanto API is raised without fetching
+    the result page again."""
+    responses = [FakeHttpResponse(503, b"Service Unavailable")]
+
+    class FakeSession:
+        retry_policy = RetryPolicy(backoff_factor=0.0)
+
+        def get(self, url: str, **kwargs: Any) -> FakeHttpResponse:
+            return responses.pop(0)
+
+    with pytest.raises(requests.exceptions.HTTPError):
+        FetchManager._fetch_result_page(  # type: ignore
+            "gen:test", 1, session=FakeSession()  # type: ignore
+        )
+    assert responses == []
+
+
+def test_send_queries(
+    example_xenocanto_query_response_page_1: dict,
+    example_xenocanto_query_response_page_2: dict,
+    monkeypatch: pytest.MonkeyPatch,
+):
+    """Test sending multiple overlapping queries under a global concurrency limit.
+
+    Parameters
+    ----------
+    example_xenocanto_query_response_page_1
+        The dictionary representation of example page 1 XenoCanto API query response.
+    example_xenocanto_query_response_page_2
+        The dictionary representation of example page 2 XenoCanto API query response.
+    monkeypatch
+        Monkeypatch fixture to replace the actual API call with a fake one.
+    """
+    # Each query returns the example pages, in a different order
+    query_pages = {
+        Query(species_name="quail").to_string(): [
+            example_xenocanto_query_response_page_1
+        ],
+        Query(species_name="quail nightjar").to_string(): [
+            example_xenocanto_query_response_page_2,
+            example_xenocanto_query_response_page_1,
+        ],
+        Query(species_name="nightjar").to_string(): [
+            example_xenocanto_query_response_page_2,
+            example_xenocanto_query_response_page_2,
+        ],
+    }
+    lock = threading.Lock()
+    num_requests_in_flight = 0
+    max_requests_in_flight = 0
+
+    def fake_fetch_result_page(query_str: str, page: int, session=None, cache=None):
+        nonlocal num_requests_in_flight, max_requests_in_flight
+        with lock:
+            num_requests_in_flight += 1
+            max_requests_in_flight = max(max_requests_in_flight, num_requests_in_flight)
+        time.sleep(0.02)
+        with lock:
+            num_requests_in_flight -= 1
+
+        pages = query_pages[query_str]
+        return FetchManager._parse_query_response(  # type: ignore
+            {**pages[page - 1], "page": page, "numPages": len(pages)}
+        )
+
+    monkeypatch.setattr(FetchManager, "_fetch_result_page", fake_fetch_result_page)
+
+    queries = [
+        Query(species_name="quail"),
+        Query(species_name="quail nightjar"),
+        Query(species_name="nightjar"),
+    ]
+    query_result = FetchManager.send_queries(queries, max_pages=2, max_workers=2)
+
+    # All pages of every query are fetched, never more than max_workers at once
+    assert max_requests_in_flight == 2
+    assert [
+        (result_page.page_id, len(result_page.recording_batch))
+        for result_page in query_result.result_pages
+    ] == [(1, 3), (1, 3), (2, 0), (1, 0), (2, 0)]
+
+    # Every recording occurs once, and the provenance lists the queries returning it
+    recording_ids = [
+        recording.recording_id for recording in query_result.get_all_recordings()
+    ]
+    assert len(set(recording_ids)) == len(recording_ids) == 6
+    assert query_result.query_provenance == {
+        **{recording_id: [0, 1] for recording_id in recording_ids[:3]},
+        **{recording_id: [1, 2] for recording_id in recording_ids[3:]},
+    }
@@ -0,0 +1,76 @@
+import time
+from typing import Any
+import pytest
+import requests
+from cantopy import DownloadManager, HttpSession, RateLimiter, RetryPolicy
+from tests.conftest import FakeHttpResponse
+
+
+def test_httpsession_connection_pool_configuration():
+    """Test that the HttpSession mounts a blocking connection pool with the requested
+    per-host connection limit.
+    """
+    session = HttpSession(pool_maxsize=16, pool_connections=2)
+
+    adapter = session._session.get_adapter("https://xeno-canto.org")  # type: ignore
+    assert adapter._pool_maxsize == 16  # type: ignore
+    assert adapter._pool_connections == 2  # type: ignore
+    assert adapter._pool_block  # type: ignore
+
+
+def test_downloadmanager_default_session_matches_max_workers():
+    """Test that a DownloadManager without explicit session gets a session with a
+    connection pool sized to its number of workers, and that an explicitly passed
+    session is shared as-is.
+    """
+    download_manager = DownloadManager("fake/path", max_workers=12)
+    assert download_manager.session.pool_maxsize == 12
+
+    shared_session = HttpSession(pool_maxsize=4)
+    download_manager = DownloadManager(
+        "fake/path", max_workers=4, session=shared_session
+    )
+    assert download_manager.session is shared_session
+
+
+def test_httpsession_retry(monkeypatch: pytest.MonkeyPatch):
+    """Test that the HttpSession retries retryable responses and connection errors,
+    honouring the Retry-After header and slowing down its rate limiter.
+
+    Parameters
+    ----------
+    monkeypatch
+        Monkeypatch fixture to replace the actual requests and sleeps with fake ones.
+    """
+    session = HttpSession(retry_policy=RetryPolicy(backoff_factor=0.0))
+
+    responses: list[FakeHttpResponse | Exception] = [
+        FakeHttpResponse(429, headers={"Retry-After": "7"}),
+        requests.exceptions.ConnectionError("Connection refused"),
+        FakeHttpResponse(503),
+        FakeHttpResponse(200, b"ok"),
+    ]
+
+    def fake_get(url: str, **kwargs: Any) -> FakeHttpResponse:
+        response = responses.pop(0)
+        if isinstance(response, Exception):
+            raise response
+        return response
+
+    sleeps: list[float] = []
+    monkeypatch.setattr(session._session, "get", fake_get)  # type: ignore
+    monkeypatch.setattr(time, "sleep", sleeps.append)
+
+    response = session.get("https://xeno-canto.org")
+
+    assert response.status_code == 200
+    assert sleeps == [7.0, 0.0, 0.0]
+
+    # Once all retries are used up, the last response is returned, and the rate
+    # limiter has slowed down
+    session.rate_limiter = RateLimiter(max_rate=100.0)
+    session.retry_policy = RetryPolicy(max_retries=1, backoff_factor=0.0)
+    responses.extend([FakeHttpResponse(503), FakeHttpResponse(503)])
+    assert session.get("https://xeno-canto.org").status_code == 503
+    assert responses == []
+    assert session.rate_limiter.rate == 25.0
@@ -0,0 +1,139 @@
+import os
+import pytest
+import pandas as pd
+from cantopy import DownloadManager, ParquetMetadataStore
+
+pytest.importorskip("pyarrow")
+import pyarrow.dataset as ds  # noqa: E402
+
+
+@pytest.mark.parametrize("write_mode", ["rewrite", "append"])
+def test_parquet_metadata_store_typed_columns(
+    empty_download_data_base_path: str,
+    write_mode: str,
+    combined_partial_test_recording_metadata: pd.DataFrame,
+    combined_to_add_test_recording_metadata: pd.DataFrame,
+    spot_winged_wood_quail_full_test_recording_metadata: pd.DataFrame,
+):
+    """Test storing the recording metadata of a DownloadManager in typed Parquet files.
+
+    Parameters
+    ----------
+    empty_download_data_base_path
+        The path to a newly created empty download folder.
+    write_mode
+        How new rows are added to the metadata.
+    combined_partial_test_recording_metadata
+        The partial test recording metadata for both species, added first.
+    combined_to_add_test_recording_metadata
+        The test recording metadata for both species, added second.
+    spot_winged_wood_quail_full_test_recording_metadata
+        The combined partial and to add test recording metadata of the spot-winged wood
+        quail.
+    """
+    download_manager = DownloadManager(
+        empty_download_data_base_path,
+        metadata_store=ParquetMetadataStore(
+            empty_download_data_base_path, write_mode=write_mode
+        ),
+    )
+    os.mkdir(os.path.join(empty_download_data_base_path, "spot_winged_wood_quail"))
+    os.mkdir(os.path.join(empty_download_data_base_path, "little_nightjar"))
+
+    download_manager._update_animal_recordings_metadata_files(  # type: ignore
+        combined_partial_test_recording_metadata
+    )
+    download_manager._update_animal_recordings_metadata_files(  # type: ignore
+        combined_to_add_test_recording_metadata
+    )
+
+    # In append mode, every update is written to a separate file until compacted
+    parquet_files = [
+        file_name
+        for file_name in os.listdir(
+            os.path.join(empty_download_data_base_path, "spot_winged_wood_quail")
+        )
+        if file_name.endswith(".parquet")
+    ]
+    assert len(parquet_files) == (2 if write_mode == "append" else 1)
+
+    animal_metadata = download_manager.load_animal_recordings_metadata(
+        "Spot-winged Wood Quail"
+    )
+
+    # The columns are stored with their actual types
+    assert animal_metadata["recording_id"].tolist() == [
+        int(recording_id)
+        for recording_id in spot_winged_wood_quail_full_test_recording_metadata[
+            "recording_id"
+        ]
+    ]
+    assert animal_metadata["latitude"].dtype == "float64"
+    assert animal_metadata["latitude"][0] == pytest.approx(
+        float(spot_winged_wood_quail_full_test_recording_metadata["latitude"][0])
+    )
+    assert pd.api.types.is_timedelta64_dtype(animal_metadata["recording_length"])
+    assert pd.api.types.is_datetime64_any_dtype(animal_metadata["recording_date"])
+    assert pd.api.types.is_datetime64_any_dtype(animal_metadata["upload_date"])
+
+    # After compaction, a single sorted file remains
+    download_manager.compact()
+    assert [
+        file_name
+        for file_name in os.listdir(
+            os.path.join(empty_download_data_base_path, "spot_winged_wood_quail")
+        )
+        if file_name.endswith(".parquet")
+    ] == ["spot_winged_wood_quail_recording_metadata.parquet"]
+    pd.testing.assert_frame_equal(
+        animal_metadata,
+        download_manager.load_animal_recordings_metadata("Spot-winged Wood Quail"),
+    )
+
+
+def test_parquet_metadata_store_dataset(
+    empty_download_data_base_path: str,
+    combined_full_test_recording_metadata: pd.DataFrame,
+    little_nightjar_full_test_recording_metadata: pd.DataFrame,
+):
+    """Test scanning the metadata of all species as one lazily filtered dataset.
+
+    Parameters
+    ----------
+    empty_download_data_base_path
+        The path to a newly created empty download folder.
+    combined_full_test_recording_metadata
+        The full test recording metadata for both species.
+    little_nightjar_full_test_recording_metadata
+        The full test recording metadata for the little nightjar.
+    """
+    metadata_store = ParquetMetadataStore(empty_download_data_base_path)
+    for animal_folder_name, english_name in [
+        ("spot_winged_wood_quail", "Spot-winged Wood Quail"),
+        ("little_nightjar", "Little Nightjar"),
+    ]:
+        os.mkdir(os.path.join(empty_download_data_base_path, animal_folder_name))
+        metadata_store.update(
+            animal_folder_name,
+            combined_full_test_recording_metadata[
+                combined_full_test_recording_metadata["english_name"] == english_name
+            ],
+        )
+
+    dataset = metadata_store.dataset()
+    assert dataset.count_rows() == len(combined_full_test_recording_metadata)
+
+    # Filter on both the species partition and a typed column
+    table = dataset.to_table(
+        columns=["recording_id", "latitude"],
+        filter=(ds.field("species") == "little_nightjar")
+        & (ds.field("latitude") < 0.0),
+    )
+    assert sorted(table.column("recording_id").to_pylist()) == sorted(
+        int(recording_id)
+        for recording_id, latitude in zip(
+            little_nightjar_full_test_recording_metadata["recording_id"],
+            little_nightjar_full_test_recording_metadata["latitude"],
+        )
+        if float(latitude) < 0.0
+    )
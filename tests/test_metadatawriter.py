@@ -0,0 +1,216 @@
+from concurrent.futures import ProcessPoolExecutor, ThreadPoolExecutor
+import asyncio
+import multiprocessing
+import threading
+import pandas as pd
+import pytest
+from cantopy import CsvMetadataStore, MetadataStore, MetadataWriter
+
+
+def _generate_recordings_metadata(first_recording_id: int, num_recordings: int):
+    """Generate metadata rows for a range of recording ids.
+
+    Parameters
+    ----------
+    first_recording_id
+        The id of the first recording.
+    num_recordings
+        The number of recordings.
+
+    Returns
+    -------
+    pd.DataFrame
+        The metadata rows, with string columns like the DownloadManager writes them.
+    """
+    return pd.DataFrame(
+        {
+            "recording_id": [
+                str(recording_id)
+                for recording_id in range(
+                    first_recording_id, first_recording_id + num_recordings
+                )
+            ],
+            "english_name": "Little Nightjar",
+        },
+        dtype="object",
+    )
+
+
+def _update_metadata(data_base_path: str, write_mode: str, first_recording_id: int):
+    """Add metadata rows one by one through a separate store, in a worker process.
+
+    Parameters
+    ----------
+    data_base_path
+        The shared data folder.
+    write_mode
+        How new rows are added to the metadata.
+    first_recording_id
+        The id of the first recording to add.
+    """
+    metadata_store = CsvMetadataStore(
+        data_base_path, write_mode=write_mode, compaction_threshold=3
+    )
+    for recording_id in range(first_recording_id, first_recording_id + 10):
+        metadata_store.update(
+            "little_nightjar", _generate_recordings_metadata(recording_id, 1)
+        )
+
+
+@pytest.mark.parametrize("write_mode", ["rewrite", "append"])
+def test_metadata_store_concurrent_updates(
+    empty_download_data_base_path: str, write_mode: str
+):
+    """Test that concurrent updates of the same species from separate stores in
+    multiple threads and processes don't lose any rows.
+
+    Parameters
+    ----------
+    empty_download_data_base_path
+        The path to a newly created empty download folder.
+    write_mode
+        How new rows are added to the metadata.
+    """
+    first_recording_ids = [1000 * worker for worker in range(1, 7)]
+
+    with ThreadPoolExecutor(max_workers=4) as executor:
+        list(
+            executor.map(
+                lambda first_recording_id: _update_metadata(
+                    empty_download_data_base_path, write_mode, first_recording_id
+                ),
+                first_recording_ids[:4],
+            )
+        )
+    with ProcessPoolExecutor(
+        max_workers=2, mp_context=multiprocessing.get_context("spawn")
+    ) as executor:
+        list(
+            executor.map(
+                _update_metadata,
+                [empty_download_data_base_path] * 2,
+                [write_mode] * 2,
+                first_recording_ids[4:],
+            )
+        )
+
+    assert list(
+        CsvMetadataStore(empty_download_data_base_path).load("little_nightjar")[
+            "recording_id"
+        ]
+    ) == [
+        str(recording_id)
+        for first_recording_id in first_recording_ids
+        for recording_id in range(first_recording_id, first_recording_id + 10)
+    ]
+
+
+def test_metadata_writer_batches_updates(empty_download_data_base_path: str):
+    """Test that the MetadataWriter merges the updates waiting for the same species
+    into a single update of the store.
+
+    Parameters
+    ----------
+    empty_download_data_base_path
+        The path to a newly created empty download folder.
+    """
+    first_update_started = threading.Event()
+    first_update_released = threading.Event()
+    updates: list[tuple[str, int]] = []
+
+    class SlowMetadataStore(CsvMetadataStore):
+        def update(self, animal_folder_name: str, animal_recordings_metadata):
+            updates.append((animal_folder_name, len(animal_recordings_metadata)))
+            if len(updates) == 1:
+                first_update_started.set()
+                first_update_released.wait()
+            super().update(animal_folder_name, animal_recordings_metadata)
+
+    metadata_store = SlowMetadataStore(empty_download_data_base_path)
+    with MetadataWriter(metadata_store) as metadata_writer:
+        # Keep the writer busy with a first update, while the others queue up
+        first_future = metadata_writer.submit(
+            "little_nightjar", _generate_recordings_metadata(0, 1)
+        )
+        first_update_started.wait()
+        futures = [
+            metadata_writer.submit(
+                animal_folder_name, _generate_recordings_metadata(10 * update + 1, 2)
+            )
+            for update in range(10)
+            for animal_folder_name in ["little_nightjar", "spot_winged_wood_quail"]
+        ]
+        first_update_released.set()
+
+        for future in [first_future] + futures:
+            future.result(timeout=10)
+
+    # The queued updates are written as a single update per species
+    assert updates == [
+        ("little_nightjar", 1),
+        ("little_nightjar", 20),
+        ("spot_winged_wood_quail", 20),
+    ]
+    assert len(metadata_store.load("little_nightjar")) == 21
+    assert len(metadata_store.load("spot_winged_wood_quail")) == 20
+
+
+def test_metadata_writer_errors(empty_download_data_base_path: str):
+    """Test that an error while writing an update is raised to its submitter.
+
+    Parameters
+    ----------
+    empty_download_data_base_path
+        The path to a newly created empty download folder.
+    """
+
+    class FailingMetadataStore(MetadataStore):
+        def update(self, animal_folder_name: str, animal_recordings_metadata):
+            raise OSError("Disk full")
+
+    metadata_writer = MetadataWriter(
+        FailingMetadataStore(empty_download_data_base_path)
+    )
+    with pytest.raises(OSError):
+        metadata_writer.write(
+            {"little_nightjar": _generate_recordings_metadata(0, 1)}
+        )
+    metadata_writer.close()
+
+
+def test_metadata_writer_write_async(empty_download_data_base_path: str):
+    """Test that the MetadataWriter writes updates awaited from an asyncio event
+    loop, and raises their errors to the awaiting coroutine.
+
+    Parameters
+    ----------
+    empty_download_data_base_path
+        The path to a newly created empty download folder.
+    """
+    metadata_store = CsvMetadataStore(empty_download_data_base_path)
+    with MetadataWriter(metadata_store) as metadata_writer:
+        asyncio.run(
+            metadata_writer.write_async(
+                {
+                    "little_nightjar": _generate_recordings_metadata(0, 2),
+                    "spot_winged_wood_quail": _generate_recordings_metadata(2, 3),
+                }
+            )
+        )
+
+    assert len(metadata_store.load("little_nightjar")) == 2
+    assert len(metadata_store.load("spot_winged_wood_quail")) == 3
+
+    class FailingMetadataStore(MetadataStore):
+        def update(self, animal_folder_name: str, animal_recordings_metadata):
+            raise OSError("Disk full")
+
+    with MetadataWriter(
+        FailingMetadataStore(empty_download_data_base_path)
+    ) as metadata_writer:
+        with pytest.raises(OSError):
+            asyncio.run(
+                metadata_writer.write_async(
+                    {"little_nightjar": _generate_recordings_metadata(0, 1)}
+                )
+            )
@@ -0,0 +1,63 @@
+import os
+from os.path import join
+from cantopy.process_pool_stage import ProcessPoolStage
+from tests.conftest import TEST_MAX_WORKERS
+
+
+def _write_process_id(output_path: str, fail: bool) -> int:
+    """Write the id of the worker process to a file, in a worker process.
+
+    Parameters
+    ----------
+    output_path
+        The path of the file to write.
+    fail
+        Whether to fail instead of writing the file.
+
+    Returns
+    -------
+    int
+        The id of the worker process.
+    """
+    if fail:
+        raise RuntimeError("Processing failed")
+
+    with open(output_path, "w") as file:
+        file.write(str(os.getpid()))
+
+    return os.getpid()
+
+
+def test_process_pool_stage(empty_download_data_base_path: str):
+    """Test that a ProcessPoolStage runs recordings in spawned worker processes and
+    collects their results.
+
+    Parameters
+    ----------
+    empty_download_data_base_path
+        The path to a newly created empty download folder.
+    """
+    with ProcessPoolStage(max_workers=TEST_MAX_WORKERS) as stage:
+        for recording_id in ["1", "2", "3"]:
+            output_path = join(empty_download_data_base_path, f"{recording_id}.txt")
+            stage._submit(  # type: ignore
+                recording_id,
+                output_path,
+                _write_process_id,
+                output_path,
+                recording_id == "3",
+            )
+
+        # Forking from the download worker threads could deadlock the workers
+        assert stage._executor._mp_context.get_start_method() == "spawn"  # type: ignore
+
+        results = stage.collect(["1", "2", "3", "4"])
+
+    assert results["1"][0] == join(empty_download_data_base_path, "1.txt")
+    assert results["1"][1] != os.getpid()
+    assert results["3"] == (None, None)
+    assert "4" not in results
+
+    # Collected recordings are no longer pending
+    assert stage.collect(["1"]) == {}
+    assert stage._executor is None  # type: ignore
@@ -0,0 +1,151 @@
+from collections import Counter
+from typing import Any, Dict
+import math
+import re
+import pytest
+from cantopy import FetchManager, QueryPlanner
+from cantopy.xenocanto_components import Query
+
+
+# The number of recordings on a result page of the fake API
+FAKE_PAGE_SIZE = 3
+
+
+@pytest.fixture
+def fake_dated_api(
+    example_xenocanto_query_response_page_1: Dict[str, Any],
+    monkeypatch: pytest.MonkeyPatch,
+) -> Counter:
+    """Replace the XenoCanto API with a fake one that supports year and month filters.
+
+    Parameters
+    ----------
+    example_xenocanto_query_response_page_1
+        The dictionary representation of example page 1 XenoCanto API query response.
+    monkeypatch
+        Monkeypatch fixture to replace the actual API call with a fake one.
+
+    Returns
+    -------
+    Counter
+        The number of times each (query string, page) was fetched.
+    """
+    recording_dates = (
+        ["1960-05-01", "0000-00-00", "1995-03-02", "2001-12-31", "2003-07-00"]
+        + [f"2000-{month:02d}-15" for month in range(1, 13) for _ in range(2)]
+        + ["2000-00-00"] * 4
+    )
+    template = example_xenocanto_query_response_page_1["recordings"][0]
+    recordings = [
+        {**template, "id": str(100000 + index), "date": recording_date}
+        for index, recording_date in enumerate(recording_dates)
+    ]
+    fetched_pages: Counter = Counter()
+
+    def matches(value: int, condition: str | None) -> bool:
+        if condition is None:
+            return True
+        condition = condition.strip('"')
+        if condition.startswith("<"):
+            return value < int(condition[1:])
+        if condition.startswith(">"):
+            return value > int(condition[1:])
+        return value == int(condition)
+
+    def fake_fetch_result_page(query_str: str, page: int, session=None, cache=None):
+        fetched_pages[(query_str, page)] += 1
+        year = re.search(r"year:(\S+)", query_str)
+        month = re.search(r"month:(\S+)", query_str)
+        matching_recordings = [
+            recording
+            for recording in recordings
+            if matches(int(recording["date"][:4]), year and year.group(1))
+            and matches(int(recording["date"][5:7]), month and month.group(1))
+        ]
+
+        return FetchManager._parse_query_response(  # type: ignore
+            {
+                "numRecordings": len(matching_recordings),
+                "numSpecies": 1,
+                "numPages": max(1, math.ceil(len(matching_recordings) / FAKE_PAGE_SIZE)),
+                "page": page,
+                "recordings": matching_recordings[
+                    (page - 1) * FAKE_PAGE_SIZE : page * FAKE_PAGE_SIZE
+                ],
+            }
+        )
+
+    monkeypatch.setattr(FetchManager, "_fetch_result_page", fake_fetch_result_page)
+
+    return fetched_pages
+
+
+def test_queryplanner_plan(fake_dated_api: Counter):
+    """Test splitting a large query into disjoint sub-queries by recording date.
+
+    Parameters
+    ----------
+    fake_dated_api
+        Fixture replacing the XenoCanto API with a fake API of dated recordings.
+    """
+    planner = QueryPlanner(max_pages_per_query=2, first_year=1990, last_year=2005)
+    sub_queries = planner.plan(Query(species_name="spot-winged wood quail"))
+
+    # The sparse years and months around the large ones are covered by single
+    # sub-queries
+    assert [sub_query.to_string() for sub_query in sub_queries] == [
+        'spot-winged wood quail year:"<2000"',
+        'spot-winged wood quail year:2000 month:"<2"',
+    ] + [f"spot-winged wood quail year:2000 month:{month}" for month in range(2, 10)] + [
+        'spot-winged wood quail year:2000 month:">9"',
+        'spot-winged wood quail year:">2000"',
+    ]
+
+    # The bounds of the years that need their own sub-query are binary searched, so a
+    # wide range of years only takes a few more probes instead of one per year
+    fake_dated_api.clear()
+    assert [
+        sub_query.to_string()
+        for sub_query in QueryPlanner(
+            max_pages_per_query=2, first_year=1900, last_year=2100
+        ).plan(Query(species_name="spot-winged wood quail"))
+    ] == [sub_query.to_string() for sub_query in sub_queries]
+    assert sum(fake_dated_api.values()) < 40
+
+    # The plan is stable, and queries with few pages are not split
+    assert [sub_query.to_string() for sub_query in planner.plan(Query("quail"))] == [
+        sub_query.to_string().replace("spot-winged wood quail", "quail")
+        for sub_query in sub_queries
+    ]
+    assert [
+        sub_query.to_string()
+        for sub_query in QueryPlanner(max_pages_per_query=20).plan(Query("quail"))
+    ] == ["quail"]
+    assert [
+        sub_query.to_string()
+        for sub_query in planner.plan(Query("quail", recorded_year="2000"))
+    ] == ["quail year:2000"]
+
+
+def test_queryplanner_send_query(fake_dated_api: Counter):
+    """Test fetching all recordings of a large query through its sub-queries.
+
+    Parameters
+    ----------
+    fake_dated_api
+        Fixture replacing the XenoCanto API with a fake API of dated recordings.
+    """
+    planner = QueryPlanner(
+        max_pages_per_query=2, first_year=1990, last_year=2005, max_workers=3
+    )
+    query_result = planner.send_query(Query(species_name="spot-winged wood quail"))
+
+    # Every recording is returned exactly once
+    recording_ids = [
+        recording.recording_id for recording in query_result.get_all_recordings()
+    ]
+    assert sorted(recording_ids) == [str(100000 + index) for index in range(33)]
+    assert query_result.available_num_recordings == 33
+
+    # Every page is fetched once, the first pages are not fetched again after planning
+    assert max(fake_dated_api.values()) == 1
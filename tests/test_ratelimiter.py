@@ -0,0 +1,61 @@
+import time
+from datetime import datetime, timedelta, timezone
+from email.utils import format_datetime
+import pytest
+from cantopy import RateLimiter, RetryPolicy
+
+
+def test_ratelimiter_token_bucket():
+    """Test that the RateLimiter paces the requests to its rate after the burst."""
+    rate_limiter = RateLimiter(max_rate=50.0, burst=5)
+
+    start = time.monotonic()
+    for _ in range(15):
+        rate_limiter.acquire()
+
+    # The first 5 requests go at once, the next 10 are paced at 50 requests/sec
+    assert time.monotonic() - start == pytest.approx(0.2, abs=0.1)
+
+
+def test_ratelimiter_adaptive_rate():
+    """Test the additive increase, multiplicative decrease of the RateLimiter rate."""
+    rate_limiter = RateLimiter(max_rate=10.0, min_rate=1.0, increase=0.5)
+
+    rate_limiter.on_throttle()
+    assert rate_limiter.rate == 5.0
+    for _ in range(3):
+        rate_limiter.on_throttle()
+    assert rate_limiter.rate == 1.0
+
+    rate_limiter.on_success()
+    assert rate_limiter.rate == 1.5
+    for _ in range(100):
+        rate_limiter.on_success()
+    assert rate_limiter.rate == 10.0
+
+    # The server asked to pause all requests for a while
+    rate_limiter.on_throttle(retry_after=0.2)
+    start = time.monotonic()
+    rate_limiter.acquire()
+    assert time.monotonic() - start >= 0.15
+
+
+def test_retrypolicy_delay():
+    """Test the jittered exponential backoff of the RetryPolicy."""
+    retry_policy = RetryPolicy(backoff_factor=1.0, max_backoff=8.0)
+
+    for attempt in range(6):
+        assert 0 <= retry_policy.get_delay(attempt) <= min(8.0, 2**attempt)
+
+    # A Retry-After header sets the minimum delay
+    assert retry_policy.get_delay(0, retry_after=30.0) == 30.0
+
+
+def test_retrypolicy_parse_retry_after():
+    """Test parsing the seconds and HTTP date forms of the Retry-After header."""
+    assert RetryPolicy.parse_retry_after(None) is None
+    assert RetryPolicy.parse_retry_after("120") == 120.0
+    assert RetryPolicy.parse_retry_after("invalid") is None
+    assert RetryPolicy.parse_retry_after(
+        format_datetime(datetime.now(timezone.utc) + timedelta(seconds=60), usegmt=True)
+    ) == pytest.approx(60, abs=2)
@@ -0,0 +1,124 @@
+import json
+import time
+from os.path import join
+from typing import Any, Dict, List
+from cantopy import FetchManager, ResponseCache
+from cantopy.xenocanto_components import Query
+from tests.conftest import FakeHttpResponse
+
+
+class FakeApiSession:
+    """A fake HttpSession that serves XenoCanto API pages with an ETag validator.
+
+    Attributes
+    ----------
+    pages
+        Mapping of page numbers to the json response served for them.
+    etag
+        The ETag of the served pages.
+    requested_headers
+        The headers of all requests sent through this session, in order.
+    """
+
+    def __init__(self, pages: Dict[int, Dict[str, Any]], etag: str = '"v1"'):
+        self.pages = pages
+        self.etag = etag
+        self.requested_headers: List[Dict[str, str]] = []
+
+    def get(self, url: str, **kwargs: Any) -> FakeHttpResponse:
+        headers = kwargs.get("headers") or {}
+        self.requested_headers.append(headers)
+
+        if headers.get("If-None-Match") == self.etag:
+            return FakeHttpResponse(304)
+
+        page = int(kwargs["params"].rsplit("page=", 1)[1])
+        return FakeHttpResponse(
+            200, json.dumps(self.pages[page]).encode(), headers={"ETag": self.etag}
+        )
+
+
+def test_responsecache_fetch_manager(
+    empty_download_data_base_path: str,
+    example_xenocanto_query_response_page_1: Dict[str, Any],
+    example_xenocanto_query_response_page_2: Dict[str, Any],
+):
+    """Test serving, revalidating and refreshing result pages through a ResponseCache.
+
+    Parameters
+    ----------
+    empty_download_data_base_path
+        The path to a newly created empty folder to store the cache in.
+    example_xenocanto_query_response_page_1
+        The dictionary representation of example page 1 XenoCanto API query response.
+    example_xenocanto_query_response_page_2
+        The dictionary representation of example page 2 XenoCanto API query response.
+    """
+    session = FakeApiSession(
+        {
+            1: example_xenocanto_query_response_page_1,
+            2: example_xenocanto_query_response_page_2,
+        }
+    )
+    cache = ResponseCache(join(empty_download_data_base_path, "cache.sqlite"), ttl=60)
+    query = Query(species_name="common blackbird")
+
+    # The first run downloads both pages
+    query_result = FetchManager.send_query(
+        query, max_pages=2, session=session, cache=cache  # type: ignore
+    )
+    assert len(session.requested_headers) == 2
+    assert cache.get_stats()["misses"] == 2
+
+    # The second run is served from the cache without contacting the server
+    cached_query_result = FetchManager.send_query(
+        query, max_pages=2, session=session, cache=cache  # type: ignore
+    )
+    assert len(session.requested_headers) == 2
+    assert cache.hits == 2
+    assert [
+        recording.recording_id for recording in cached_query_result.get_all_recordings()
+    ] == [recording.recording_id for recording in query_result.get_all_recordings()]
+
+    # Once expired, unchanged pages are revalidated with their ETag
+    cache.ttl = 0
+    FetchManager.send_query(
+        query, max_pages=2, session=session, cache=cache  # type: ignore
+    )
+    assert session.requested_headers[2:] == [{"If-None-Match": '"v1"'}] * 2
+    assert cache.revalidated == 2
+
+    # Changed pages are downloaded again
+    session.etag = '"v2"'
+    FetchManager.send_query(
+        query, max_pages=2, session=session, cache=cache  # type: ignore
+    )
+    assert cache.get_stats()["misses"] == 4
+    assert cache.get_stats()["entries"] == 2
+    cache.close()
+
+
+def test_responsecache_lru_eviction(empty_download_data_base_path: str):
+    """Test that the least recently used responses are evicted from a full cache.
+
+    Parameters
+    ----------
+    empty_download_data_base_path
+        The path to a newly created empty folder to store the cache in.
+    """
+    with ResponseCache(
+        join(empty_download_data_base_path, "cache.sqlite"), max_size=300
+    ) as cache:
+        cache.put("query", 1, b"1" * 100)
+        cache.put("query", 2, b"2" * 100)
+        cache.put("query", 3, b"3" * 100)
+
+        # Use page 1, so page 2 becomes the least recently used page
+        time.sleep(0.01)
+        assert cache.get("query", 1) is not None
+
+        cache.put("query", 4, b"4" * 100)
+
+        assert cache.get("query", 2) is None
+        assert all(cache.get("query", page) is not None for page in [1, 3, 4])
+        assert cache.get_stats()["size"] == 300
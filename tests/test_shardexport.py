@@ -0,0 +1,183 @@
+from cantopy import DownloadManager, ShardReader
+from cantopy.feature_extractor import load_audio
+from cantopy.shard_export import SHARD_ALIGNMENT
+from cantopy.xenocanto_components import QueryResult
+from tests.conftest import (
+    TEST_MAX_WORKERS,
+    FakeHttpSession,
+    generate_wave_file_content,
+)
+from os.path import exists, join
+import os
+import numpy as np
+import pytest
+
+
+def test_downloadmanager_export_raw_shards(
+    fake_session_download_manager: DownloadManager,
+    example_two_page_queryresult: QueryResult,
+    tmp_path: str,
+):
+    """Test packing the downloaded recordings into shards and reading them back.
+
+    Parameters
+    ----------
+    fake_session_download_manager
+        DownloadManager instance downloading through a fake session into an empty folder.
+    example_two_page_queryresult
+        The two-page QueryResult object based on the example XenoCanto API responses.
+    tmp_path
+        The temporary directory of the test.
+    """
+    fake_session_download_manager.download_all_recordings_in_queryresult(
+        example_two_page_queryresult
+    )
+    recordings = example_two_page_queryresult.get_all_recordings()
+
+    # The fake recordings are about 11 kB each, so at most two fit in a shard
+    shards_path = join(str(tmp_path), "shards")
+    shard_paths = fake_session_download_manager.export_shards(
+        shards_path, shard_size=25000
+    )
+
+    assert len(shard_paths) == 3
+    for shard_path in shard_paths:
+        assert exists(shard_path.replace(".bin", ".index.npy"))
+        assert exists(shard_path.replace(".bin", ".metadata.csv"))
+
+    shard_reader = ShardReader(shards_path)
+    assert len(shard_reader) == len(recordings)
+    assert sorted(shard_reader.recording_ids) == sorted(
+        int(recording.recording_id) for recording in recordings
+    )
+
+    for recording in recordings:
+        recording_path = join(
+            fake_session_download_manager.data_base_path,
+            fake_session_download_manager._generate_animal_folder_name(  # type: ignore
+                recording.english_name
+            ),
+            f"{recording.recording_id}.mp3",
+        )
+        with open(recording_path, "rb") as file:
+            recording_content = file.read()
+
+        # The recording is a view on the memory-mapped shard, not a copy
+        shard_recording = shard_reader.get_recording(recording.recording_id)
+        assert isinstance(shard_recording.base, np.memmap)
+        assert shard_recording.tobytes() == recording_content
+        assert recording.recording_id in shard_reader
+
+    # The shard metadata contains the metadata rows of all exported recordings
+    shard_metadata = shard_reader.load_metadata()
+    assert sorted(shard_metadata["recording_id"]) == sorted(
+        recording.recording_id for recording in recordings
+    )
+    assert sorted(shard_metadata["shard"].unique()) == [0, 1, 2]
+    for recording_id, shard_number in zip(
+        shard_metadata["recording_id"], shard_metadata["shard"]
+    ):
+        assert shard_reader._locate(int(recording_id))[0] == shard_number  # type: ignore
+
+    # The recordings are looked up in the sorted, memory-mapped shard indexes
+    for shard_index in shard_reader._shard_indexes:  # type: ignore
+        assert isinstance(shard_index, np.memmap)
+        assert list(shard_index["recording_id"]) == sorted(shard_index["recording_id"])
+    assert 1 not in shard_reader
+    with pytest.raises(KeyError):
+        shard_reader.get_recording(1)
+
+    # A smaller export into the same folder removes the shards it doesn't replace
+    shard_paths = fake_session_download_manager.export_shards(shards_path)
+    assert len(shard_paths) == 1
+    assert sorted(os.listdir(shards_path)) == [
+        "shard-00000.bin",
+        "shard-00000.index.npy",
+        "shard-00000.metadata.csv",
+        "shards.json",
+    ]
+    assert len(ShardReader(shards_path)) == len(recordings)
+
+
+def test_downloadmanager_export_pcm_shards(
+    empty_download_data_base_path: str,
+    example_two_page_queryresult: QueryResult,
+    tmp_path: str,
+):
+    """Test packing the downloaded recordings into shards as decoded samples.
+
+    Parameters
+    ----------
+    empty_download_data_base_path
+        The path to a newly created empty download folder.
+    example_two_page_queryresult
+        The two-page QueryResult object based on the example XenoCanto API responses.
+    tmp_path
+        The temporary directory of the test.
+    """
+    recordings = example_two_page_queryresult.get_all_recordings()
+    download_manager = DownloadManager(
+        empty_download_data_base_path,
+        max_workers=TEST_MAX_WORKERS,
+        session=FakeHttpSession(  # type: ignore
+            {
+                recording.audio_file_url: generate_wave_file_content(
+                    440 + index * 100, 0.1 + index * 0.01
+                )
+                for index, recording in enumerate(recordings)
+            }
+        ),
+    )
+    download_manager.download_all_recordings_in_queryresult(
+        example_two_page_queryresult
+    )
+
+    shards_path = join(str(tmp_path), "shards")
+    download_manager.export_shards(
+        shards_path, ["Little Nightjar"], content="pcm", sample_rate=16000
+    )
+
+    shard_reader = ShardReader(shards_path)
+    assert shard_reader.content == "pcm"
+    assert shard_reader.sample_rate == 16000
+    assert len(shard_reader) == 3
+
+    for recording in recordings:
+        if recording.english_name != "Little Nightjar":
+            assert recording.recording_id not in shard_reader
+            continue
+
+        samples = shard_reader.get_recording(recording.recording_id)
+        assert samples.dtype == np.float32
+        assert np.array_equal(
+            samples,
+            load_audio(
+                join(
+                    download_manager.data_base_path,
+                    "little_nightjar",
+                    f"{recording.recording_id}.mp3",
+                ),
+                16000,
+            ),
+        )
+
+    # The recordings are aligned in the shard file
+    index = np.load(join(shards_path, "shard-00000.index.npy"))
+    assert (index["offset"] % SHARD_ALIGNMENT == 0).all()
+    assert os.path.getsize(join(shards_path, "shard-00000.bin")) == (
+        index["offset"][-1] + index["length"][-1]
+    )
+
+
+def test_downloadmanager_export_shards_invalid_content(tmp_path: str):
+    """Test that shards can only contain raw or decoded recordings.
+
+    Parameters
+    ----------
+    tmp_path
+        The temporary directory of the test.
+    """
+    with pytest.raises(ValueError):
+        DownloadManager(str(tmp_path)).export_shards(
+            join(str(tmp_path), "shards"), content="mel"
+        )
@@ -0,0 +1,129 @@
+from cantopy.xenocanto_components import QueryResult, Recording
+from cantopy.xenocanto_components.parsing import (
+    add_parsed_columns,
+    parse_dates,
+    parse_quality_ratings,
+    parse_recording_length,
+    parse_recording_lengths,
+)
+import math
+import numpy as np
+import pandas as pd
+
+
+def test_recording_parsed_values(
+    example_recording_1_from_example_xenocanto_query_response_page_1: Recording,
+):
+    """Test the parsed typed values of a Recording.
+
+    Parameters
+    ----------
+    example_recording_1_from_example_xenocanto_query_response_page_1
+        A Recording object based on the first recording in the example page 1 XenoCanto
+        API query response.
+    """
+    recording = example_recording_1_from_example_xenocanto_query_response_page_1
+
+    assert recording.parsed_recording_length == 194.0
+    assert recording.parsed_latitude == -15.3915
+    assert recording.parsed_longitude == -39.5643
+    assert recording.parsed_recording_date == pd.Timestamp("2020-08-02")
+    assert recording.parsed_upload_date == pd.Timestamp("2020-08-09")
+    assert recording.parsed_quality_rating == "A"
+
+
+def test_recording_parsed_missing_values():
+    """Test that missing or invalid values are parsed to NaN, NaT or None."""
+    recording = Recording({"id": "1", "q": "no score", "date": "2020-00-00"})
+
+    assert math.isnan(recording.parsed_recording_length)
+    assert math.isnan(recording.parsed_latitude)
+    assert pd.isna(recording.parsed_upload_date)
+    assert recording.parsed_recording_date == pd.Timestamp("2020-01-01")
+    assert recording.parsed_quality_rating is None
+
+
+def test_parse_vectorized():
+    """Test the vectorized parse functions."""
+    assert parse_recording_lengths(["3:14", "1:02:03", "", np.nan]).equals(
+        pd.Series([194.0, 3723.0, np.nan, np.nan])
+    )
+    assert parse_recording_lengths(
+        pd.Series(pd.to_timedelta(["0:03:14"]))
+    ).tolist() == [194.0]
+
+    assert parse_dates(["2020-08-02", "2020-08-00", "unknown"]).equals(
+        pd.Series(pd.to_datetime(["2020-08-02", "2020-08-01", None]))
+    )
+
+    quality_ratings = parse_quality_ratings(["A", "C", "no score", "B", "E"])
+    assert quality_ratings.cat.ordered
+    assert (quality_ratings >= "B").tolist() == [True, False, False, True, False]
+
+
+def test_parse_recording_lengths_matches_scalar():
+    """Test that the vectorized and scalar recording length parsers agree."""
+    recording_lengths = [
+        "3:14",
+        "1:02:03",
+        "75:00",
+        "0:5.5",
+        " 1:30",
+        "-1:30",
+        "10",
+        "1:2:3:4",
+        "1:",
+        "::",
+        "",
+        "abc",
+    ]
+
+    np.testing.assert_array_equal(
+        parse_recording_lengths(recording_lengths).to_numpy(),
+        [
+            parse_recording_length(recording_length)
+            for recording_length in recording_lengths
+        ],
+    )
+
+
+def test_parsed_metadata_matches_recordings(example_two_page_queryresult: QueryResult):
+    """Test that the vectorized parsed metadata columns match the Recording properties.
+
+    Parameters
+    ----------
+    example_two_page_queryresult
+        The two-page QueryResult object based on the example XenoCanto API responses.
+    """
+    recordings_metadata = example_two_page_queryresult.get_all_recordings_metadata(
+        parsed=True
+    )
+    recordings = example_two_page_queryresult.get_all_recordings()
+
+    assert recordings_metadata["parsed_recording_length"].dtype == np.float64
+    assert recordings_metadata["parsed_latitude"].dtype == np.float64
+    assert pd.api.types.is_datetime64_any_dtype(
+        recordings_metadata["parsed_recording_date"]
+    )
+    assert recordings_metadata["parsed_quality_rating"].dtype == "category"
+
+    for column in [
+        "recording_length",
+        "latitude",
+        "longitude",
+        "recording_date",
+        "upload_date",
+        "quality_rating",
+    ]:
+        expected_values = [
+            getattr(recording, f"parsed_{column}") for recording in recordings
+        ]
+        for value, expected_value in zip(
+            recordings_metadata[f"parsed_{column}"], expected_values
+        ):
+            assert (pd.isna(value) and pd.isna(expected_value)) or value == expected_value
+
+    # Parsing is not limited to freshly created metadata
+    pd.testing.assert_frame_equal(
+        add_parsed_columns(Recording.to_dataframe(recordings)), recordings_metadata
+    )
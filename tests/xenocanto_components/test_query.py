@@ -32,3 +32,25 @@ def test_to_string(query_for_tostring_test: Query):
         query_for_tostring_test.to_string()
         == 'common blackbird cnt:Netherlands type:"alarm call" stage:"=adult" q:">C"'
     )
+
+
+def test_copy_with(query_for_tostring_test: Query):
+    """Test copying a Query with some of its attributes replaced.
+
+    Parameters
+    ----------
+    query_for_tostring_test
+        The Query object to copy.
+    """
+    copied_query = query_for_tostring_test.copy_with(
+        recorded_year="2010", recorded_month="5"
+    )
+
+    assert copied_query.to_string() == (
+        'common blackbird cnt:Netherlands type:"alarm call" stage:"=adult" q:">C" '
+        "year:2010 month:5"
+    )
+    assert query_for_tostring_test.recorded_year == "None"
+
+    with pytest.raises(AttributeError):
+        query_for_tostring_test.copy_with(unknown_attribute="1")
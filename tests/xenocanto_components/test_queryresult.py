@@ -96,15 +96,15 @@ def test_query_result_get_all_recordings(
 
     # The specific recordings should also be in the correct order
     if example_queryresult_fixture_name == "example_single_page_queryresult":
-        assert recordings_list == example_result_page_page_1.recordings
+        assert recordings_list == list(example_result_page_page_1.recordings)
     elif example_queryresult_fixture_name == "example_two_page_queryresult":
         assert (
             recordings_list[: len(example_result_page_page_1.recordings)]
-            == example_result_page_page_1.recordings
+            == list(example_result_page_page_1.recordings)
         )
         assert (
             recordings_list[len(example_result_page_page_1.recordings) :]
-            == example_result_page_page_2.recordings
+            == list(example_result_page_page_2.recordings)
         )
 
 
@@ -167,3 +167,50 @@ def test_query_result_get_all_recordings_metadata(
         )
     elif example_queryresult_fixture_name == "example_two_page_queryresult":
         pd.testing.assert_frame_equal(recordings_metadata, combined_full_test_recording_metadata)
+
+
+def test_query_result_merge(
+    example_single_page_queryresult: QueryResult,
+    example_two_page_queryresult: QueryResult,
+):
+    """Test merging the results of multiple queries, de-duplicated by recording id.
+
+    Parameters
+    ----------
+    example_single_page_queryresult
+        The single-page QueryResult object based on the example XenoCanto API response.
+    example_two_page_queryresult
+        The two-page QueryResult object based on the example XenoCanto API responses.
+    """
+    merged_query_result = QueryResult.merge(
+        [
+            example_single_page_queryresult,
+            example_two_page_queryresult,
+            example_single_page_queryresult,
+        ]
+    )
+
+    # Each recording only occurs once, on the page where it first occurs
+    recording_ids = [
+        recording.recording_id for recording in merged_query_result.get_all_recordings()
+    ]
+    assert recording_ids == [
+        recording.recording_id
+        for recording in example_two_page_queryresult.get_all_recordings()
+    ]
+    assert [
+        len(result_page.recording_batch)
+        for result_page in merged_query_result.result_pages
+    ] == [3, 0, 3, 0]
+    assert merged_query_result.available_num_recordings == 6
+    assert merged_query_result.available_num_species == 2
+    assert merged_query_result.available_num_pages == 4
+
+    # The provenance lists the queries that returned each recording
+    assert merged_query_result.query_provenance == {
+        **{recording_id: [0, 1, 2] for recording_id in recording_ids[:3]},
+        **{recording_id: [1] for recording_id in recording_ids[3:]},
+    }
+    assert example_two_page_queryresult.query_provenance is None
+
+    assert len(QueryResult.merge([]).get_all_recordings()) == 0
@@ -1,4 +1,4 @@
-from cantopy.xenocanto_components import Recording
+from cantopy.xenocanto_components import Recording, ResultPage
 import pandas as pd
 
 
@@ -199,3 +199,35 @@ def test_to_dataframe_row(
     assert pd.isna(example_recording_df_row["recording_device"][0])  # type: ignore
     assert pd.isna(example_recording_df_row["microphone_used"][0])  # type: ignore
     assert example_recording_df_row["sample_rate"][0] == "48000"
+
+
+def test_to_dataframe(
+    example_result_page_page_1: ResultPage,
+    spot_winged_wood_quail_full_test_recording_metadata: pd.DataFrame,
+):
+    """Test the bulk conversion of multiple Recording objects to a pandas DataFrame.
+
+    Parameters
+    ----------
+    example_result_page_page_1
+        The ResultPage object created from the example page 1 XenoCanto API query response.
+    spot_winged_wood_quail_full_test_recording_metadata
+        Metadata dataframe for the recordings in the example page 1 XenoCanto API query
+        response.
+    """
+    recordings_metadata = Recording.to_dataframe(example_result_page_page_1.recordings)
+
+    # The rows should follow the order of the recordings
+    assert list(recordings_metadata["recording_id"]) == [
+        recording.recording_id for recording in example_result_page_page_1.recordings
+    ]
+
+    pd.testing.assert_frame_equal(
+        recordings_metadata.sort_values("recording_id").reset_index(drop=True),  # type: ignore
+        spot_winged_wood_quail_full_test_recording_metadata,
+    )
+
+    # An empty list of recordings still results in the full set of columns
+    empty_recordings_metadata = Recording.to_dataframe([])
+    assert len(empty_recordings_metadata) == 0
+    assert list(empty_recordings_metadata.columns) == Recording.dataframe_columns
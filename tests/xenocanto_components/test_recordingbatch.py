@@ -0,0 +1,126 @@
+from typing import Dict, List
+from cantopy.xenocanto_components import Recording, RecordingBatch, QueryResult
+import numpy as np
+import pandas as pd
+import pytest
+
+
+def test_recordingbatch_from_json(
+    example_xenocanto_query_response_page_1: Dict[str, str | int | List[Dict[str, str]]],
+):
+    """Test that the recordings of a RecordingBatch match the Recording objects of the
+    same XenoCanto API response.
+
+    Parameters
+    ----------
+    example_xenocanto_query_response_page_1
+        The dictionary representation of example page 1 XenoCanto API query response.
+    """
+    recordings_data = example_xenocanto_query_response_page_1["recordings"]
+    recording_batch = RecordingBatch.from_json(recordings_data)  # type: ignore
+
+    assert len(recording_batch) == 3
+    assert recording_batch.recording_ids.dtype == np.int64
+    assert list(recording_batch.recording_ids) == [581412, 581411, 427716]
+
+    for recording_data, batch_recording in zip(recordings_data, recording_batch):  # type: ignore
+        recording = Recording(recording_data)  # type: ignore
+        for attribute in Recording.dataframe_columns:
+            assert getattr(batch_recording, attribute) == getattr(recording, attribute)
+
+
+def test_recordingbatch_to_dataframe(example_two_page_queryresult: QueryResult):
+    """Test that a RecordingBatch builds the same DataFrame as its Recording objects.
+
+    Parameters
+    ----------
+    example_two_page_queryresult
+        The two-page QueryResult object based on the example XenoCanto API responses.
+    """
+    recordings = example_two_page_queryresult.get_all_recordings()
+    recording_batch = RecordingBatch.from_recordings(recordings)
+
+    pd.testing.assert_frame_equal(
+        recording_batch.to_dataframe(), Recording.to_dataframe(recordings)
+    )
+    pd.testing.assert_frame_equal(
+        example_two_page_queryresult.get_all_recordings_metadata(),
+        Recording.to_dataframe(recordings),
+    )
+
+
+def test_recordingbatch_select_and_concatenate(
+    example_two_page_queryresult: QueryResult,
+):
+    """Test selecting and concatenating the rows of RecordingBatches.
+
+    Parameters
+    ----------
+    example_two_page_queryresult
+        The two-page QueryResult object based on the example XenoCanto API responses.
+    """
+    recording_batch = RecordingBatch.concatenate(
+        [
+            result_page.recording_batch
+            for result_page in example_two_page_queryresult.result_pages
+        ]
+    )
+    assert len(recording_batch) == 6
+
+    selected_batch = recording_batch[recording_batch.recording_ids > 400000]
+    assert isinstance(selected_batch, RecordingBatch)
+    assert [recording.recording_id for recording in selected_batch] == [
+        str(recording_id)
+        for recording_id in recording_batch.recording_ids
+        if recording_id > 400000
+    ]
+    assert len(recording_batch[1:3]) == 2
+    assert len(RecordingBatch.concatenate([])) == 0
+
+
+def test_recordingbatch_missing_values():
+    """Test that values that are empty or missing from the API response round-trip
+    through a RecordingBatch exactly like through a Recording."""
+    recordings_data = [
+        {"id": "581412", "smp": ""},
+        {"id": "", "smp": "unknown"},
+        {},
+    ]
+    recording_batch = RecordingBatch.from_json(recordings_data)
+
+    for recording_data, batch_recording in zip(recordings_data, recording_batch):
+        recording = Recording(recording_data)
+        for attribute in Recording.dataframe_columns:
+            assert getattr(batch_recording, attribute) == getattr(recording, attribute)
+    assert [recording.sample_rate for recording in recording_batch] == [
+        "",
+        "unknown",
+        "0",
+    ]
+    assert list(recording_batch.recording_ids) == [581412, -1, 0]
+
+    # Empty values are stored as NaN in the metadata, not as a made up value
+    pd.testing.assert_frame_equal(
+        recording_batch.to_dataframe(),
+        Recording.to_dataframe([Recording(data) for data in recordings_data]),
+    )
+    assert pd.isna(recording_batch.to_dataframe()["sample_rate"][0])
+    assert pd.isna(recording_batch.to_dataframe()["latitude"]).all()
+
+
+def test_recording_slots(
+    example_recording_1_from_example_xenocanto_query_response_page_1: Recording,
+):
+    """Test that Recording objects don't carry a per-instance __dict__.
+
+    Parameters
+    ----------
+    example_recording_1_from_example_xenocanto_query_response_page_1
+        A Recording object based on the first recording in the example page 1 XenoCanto
+        API query response.
+    """
+    assert not hasattr(
+        example_recording_1_from_example_xenocanto_query_response_page_1, "__dict__"
+    )
+    with pytest.raises(AttributeError):
+        example_recording_1_from_example_xenocanto_query_response_page_1.unknown_attribute = ""  # type: ignore
@@ -0,0 +1,192 @@
+from cantopy import DownloadManager
+from cantopy.xenocanto_components import F, QueryResult, RecordingBatch
+from cantopy.xenocanto_components.recording_filter import parse_filter_expression
+import pytest
+
+
+def _filtered_recording_ids(query_result: QueryResult, recording_filter) -> list[str]:  # type: ignore
+    """Get the ids of the recordings in a QueryResult that match a filter."""
+    return [
+        recording.recording_id
+        for recording in query_result.filter(recording_filter).get_all_recordings()
+    ]
+
+
+def test_recordingfilter_predicates(example_two_page_queryresult: QueryResult):
+    """Test filtering recordings with predicates built from F fields.
+
+    Parameters
+    ----------
+    example_two_page_queryresult
+        The two-page QueryResult object based on the example XenoCanto API responses.
+    """
+    query_result = example_two_page_queryresult
+
+    assert _filtered_recording_ids(
+        query_result, F("recording_length").between(5, 60)
+    ) == ["581411", "427716", "220366", "220365", "196385"]
+    assert _filtered_recording_ids(query_result, F("quality_rating") >= "B") == [
+        "581412",
+        "581411",
+        "427716",
+    ]
+    assert _filtered_recording_ids(query_result, F("sample_rate") < 48000) == [
+        "220366",
+        "220365",
+        "196385",
+    ]
+    assert _filtered_recording_ids(
+        query_result, F("recording_date") >= "2016-01-01"
+    ) == ["581412", "581411", "427716"]
+    assert _filtered_recording_ids(
+        query_result, F("english_name").contains("nightjar")
+    ) == ["220366", "220365", "196385"]
+
+    # Combined predicates
+    predicate = (
+        F("recording_length").between(5, 60)
+        & (F("quality_rating") >= "B")
+        & F("background_species").is_empty()
+        & (F("sample_rate") >= 44100)
+    )
+    assert _filtered_recording_ids(query_result, predicate) == ["581411", "427716"]
+    assert _filtered_recording_ids(
+        query_result, (F("latitude") < -15) | (F("recording_id") == 196385)
+    ) == ["581412", "581411", "196385"]
+    assert _filtered_recording_ids(query_result, ~predicate) == [
+        "581412",
+        "220366",
+        "220365",
+        "196385",
+    ]
+
+    with pytest.raises(ValueError):
+        F("unknown_field")
+    with pytest.raises(ValueError, match="'Z'"):
+        F("quality_rating") >= "Z"
+
+
+def test_recordingfilter_expressions(example_two_page_queryresult: QueryResult):
+    """Test that filter expressions select the same recordings as their predicates.
+
+    Parameters
+    ----------
+    example_two_page_queryresult
+        The two-page QueryResult object based on the example XenoCanto API responses.
+    """
+    query_result = example_two_page_queryresult
+
+    for expression, predicate in [
+        (
+            "5 <= recording_length <= 60 and quality_rating >= 'B'",
+            F("recording_length").between(5, 60) & (F("quality_rating") >= "B"),
+        ),
+        ("44100 < sample_rate", F("sample_rate") > 44100),
+        ("country in ['Brazil'] and not empty(background_species)", ~F(
+            "background_species"
+        ).is_empty()),
+        ("recording_id not in [220366, 220365]", ~F("recording_id").isin(
+            [220366, 220365]
+        )),
+        (
+            "contains(english_name, 'quail') or latitude > -5",
+            F("english_name").contains("quail") | (F("latitude") > -5),
+        ),
+    ]:
+        assert _filtered_recording_ids(query_result, expression) == (
+            _filtered_recording_ids(query_result, predicate)
+        )
+
+    assert _filtered_recording_ids(query_result, "recording_length > 3600") == []
+
+
+@pytest.mark.parametrize(
+    "expression",
+    [
+        "recording_length >",
+        "__import__('os').system('true')",
+        "recording_length.real > 5",
+        "recording_length > latitude",
+        "recording_length > 5 + 5",
+        "unknown_field == 1",
+        "empty(background_species, 1)",
+        "sample_rate",
+        "quality_rating >= 'Z'",
+        "quality_rating in ['A', 'b']",
+    ],
+)
+def test_recordingfilter_invalid_expressions(expression: str):
+    """Test that invalid or unsupported filter expressions are rejected.
+
+    Parameters
+    ----------
+    expression
+        The invalid filter expression.
+    """
+    with pytest.raises(ValueError):
+        parse_filter_expression(expression)
+
+
+def test_queryresult_filter(example_two_page_queryresult: QueryResult):
+    """Test that filtering a QueryResult keeps its pages and query information.
+
+    Parameters
+    ----------
+    example_two_page_queryresult
+        The two-page QueryResult object based on the example XenoCanto API responses.
+    """
+    filtered_query_result = example_two_page_queryresult.filter("quality_rating == 'C'")
+
+    assert (
+        filtered_query_result.available_num_recordings
+        == example_two_page_queryresult.available_num_recordings
+    )
+    assert (
+        filtered_query_result.available_num_pages
+        == example_two_page_queryresult.available_num_pages
+    )
+    assert [result_page.page_id for result_page in filtered_query_result.result_pages] == [
+        result_page.page_id
+        for result_page in example_two_page_queryresult.result_pages
+    ]
+    assert [
+        len(result_page.recording_batch)
+        for result_page in filtered_query_result.result_pages
+    ] == [0, 3]
+
+    # The original QueryResult is left as it is
+    assert len(example_two_page_queryresult.get_all_recordings()) == 6
+    assert len(
+        RecordingBatch.concatenate(
+            [
+                result_page.recording_batch
+                for result_page in example_two_page_queryresult.result_pages
+            ]
+        ).filter(F("quality_rating") == "C")
+    ) == 3
+
+
+def test_downloadmanager_download_filtered_queryresult(
+    fake_session_download_manager: DownloadManager,
+    example_two_page_queryresult: QueryResult,
+):
+    """Test that only the recordings matching a filter are downloaded.
+
+    Parameters
+    ----------
+    fake_session_download_manager
+        DownloadManager instance downloading through a fake session into an empty folder.
+    example_two_page_queryresult
+        The two-page QueryResult object based on the example XenoCanto API responses.
+    """
+    download_results = fake_session_download_manager.download_all_recordings_in_queryresult(
+        example_two_page_queryresult.filter(
+            (F("recording_length") < 30) & (F("sample_rate") >= 44100)
+        )
+    )
+
+    assert sorted(download_results) == ["196385", "220366", "427716"]
+    assert all(
+        download_result.status == "pass"
+        for download_result in download_results.values()
+    )
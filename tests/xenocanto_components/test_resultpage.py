@@ -1,4 +1,5 @@
-from cantopy.xenocanto_components import ResultPage
+import pytest
+from cantopy.xenocanto_components import RecordingBatch, ResultPage
 
 
 def test_resultpage_init(example_result_page_page_1: ResultPage):
@@ -17,3 +18,37 @@ def test_resultpage_init(example_result_page_page_1: ResultPage):
     # but more detailed recording evaluation is in the Recording test section
     assert len(example_result_page_page_1.recordings) == 3
     assert example_result_page_page_1.recordings[0].recording_id == "581412"
+
+
+def test_resultpage_recordings_follow_recording_batch(
+    example_result_page_page_1: ResultPage,
+):
+    """Test that the recordings of a ResultPage are always created from its recording
+    batch, so they can't get out of sync with it.
+
+    Parameters
+    ----------
+    example_result_page_page_1
+        The ResultPage object created from the example page 1 XenoCanto API query response
+    """
+    recordings = example_result_page_page_1.recordings
+
+    # Every access creates new, equal recordings from the batch
+    assert isinstance(recordings, tuple)
+    assert recordings == example_result_page_page_1.recordings
+    assert recordings[0] is not example_result_page_page_1.recordings[0]
+    assert [recording.recording_id for recording in recordings] == list(
+        example_result_page_page_1.recording_batch.columns["recording_id"]
+    )
+
+    # The recordings can't be changed apart from the batch
+    with pytest.raises(AttributeError):
+        recordings.append(recordings[0])  # type: ignore
+    with pytest.raises(AttributeError):
+        example_result_page_page_1.recordings = list(recordings)  # type: ignore
+
+    # A page with other recordings is created from a new batch
+    result_page = ResultPage.from_recording_batch(
+        1, RecordingBatch.from_recordings(list(recordings) + [recordings[0]])
+    )
+    assert len(result_page.recordings) == len(result_page.recording_batch) == 4